@@ -239,6 +239,7 @@ def set_org_feature(
     from sqlmodel import select
     from src.db.organizations import Organization
     from src.db.organization_config import OrganizationConfig
+    from src.security.features_utils.usage import invalidate_org_features_cache
 
     nexo_config = get_nexo_config()
     engine = create_engine(
@@ -269,8 +270,121 @@ def set_org_feature(
         session.add(cfg)
         session.commit()
 
+        # Running API workers pick the change up on their next read
+        invalidate_org_features_cache(org.id)  # type: ignore
+
         print(f"OK: org '{org_slug}' feature '{feature}' enabled={bool(enabled)}")
 
 
+@cli.command("rebuild-course-progress")
+def rebuild_course_progress_command(
+    course_uuid: Annotated[str, typer.Option(help="Only rebuild this course")] = "",
+):
+    """
+    Rebuild the course progress of every learner from their trail steps.
+
+    Example:
+      uv run cli.py rebuild-course-progress --course-uuid course_xxx
+    """
+    from sqlmodel import select
+    from src.db.courses.courses import Course
+    from src.services.trail.progress import rebuild_course_progress
+
+    nexo_config = get_nexo_config()
+    engine = create_engine(
+        nexo_config.database_config.sql_connection_string, echo=False, pool_pre_ping=True  # type: ignore
+    )
+
+    with Session(engine) as session:
+        course_id = None
+        if course_uuid:
+            course = session.exec(select(Course).where(Course.course_uuid == course_uuid)).first()
+            if not course:
+                print(f"ERROR: Course not found with uuid '{course_uuid}'")
+                raise typer.Exit(code=1)
+            course_id = course.id
+
+        count = rebuild_course_progress(session, course_id)
+        print(f"OK: Rebuilt the progress of {count} learner(s)")
+
+
+@cli.command("rollup-affiliate-stats")
+def rollup_affiliate_stats_command():
+    """
+    Rebuild the daily affiliate click counters from the clicks of the complete
+    days not rolled up yet. Run once to backfill the counters, then daily
+    (cron) to repair days whose clicks were flushed partially.
+
+    Example:
+      uv run cli.py rollup-affiliate-stats
+    """
+    from src.services.affiliates.affiliates import rollup_affiliate_click_stats
+
+    nexo_config = get_nexo_config()
+    engine = create_engine(
+        nexo_config.database_config.sql_connection_string, echo=False, pool_pre_ping=True  # type: ignore
+    )
+
+    with Session(engine) as session:
+        days = rollup_affiliate_click_stats(session)
+        print(f"OK: Rolled up {days} day(s) of affiliate clicks")
+
+
+@cli.command("migrate-invited-users")
+def migrate_invited_users_command():
+    """
+    Move the pending org invitations from their former one key per
+    invitation layout to the per-org invitation keys. Run once after
+    upgrading; invitations not moved do not show in the invited users list.
+
+    Example:
+      uv run cli.py migrate-invited-users
+    """
+    from src.core.redis_client import get_redis_client
+    from src.services.orgs.invited_users import migrate_legacy_invited_users
+
+    r = get_redis_client()
+    if r is None:
+        print("ERROR: Redis connection string not found")
+        raise typer.Exit(code=1)
+
+    moved = migrate_legacy_invited_users(r)
+    print(f"OK: Moved {moved} invitation(s)")
+
+
+@cli.command("replay-stripe-webhooks")
+def replay_stripe_webhooks_command(
+    event_id: Annotated[str, typer.Option(help="Only replay this Stripe event (evt_...)")] = "",
+):
+    """
+    Process Stripe webhook events again: every event that exhausted its
+    retries, or a single event, even one already processed. The events are
+    processed right away, along with any other event due in the inbox.
+
+    Example:
+      uv run cli.py replay-stripe-webhooks
+      uv run cli.py replay-stripe-webhooks --event-id evt_123
+    """
+    import asyncio
+    from src.services.payments.webhooks.inbox import requeue_stripe_events
+    from src.services.payments.webhooks.payments_webhooks import process_stripe_events
+
+    nexo_config = get_nexo_config()
+    engine = create_engine(
+        nexo_config.database_config.sql_connection_string, echo=False, pool_pre_ping=True  # type: ignore
+    )
+
+    with Session(engine) as session:
+        count = requeue_stripe_events(session, event_id or None)
+        if event_id and not count:
+            print(f"ERROR: Stripe event {event_id} not found")
+            raise typer.Exit(code=1)
+
+        processed = 0
+        while batch := asyncio.run(process_stripe_events(session)):
+            processed += batch
+        print(f"OK: Requeued {count} event(s), processed {processed} event(s)")
+
+
 if __name__ == "__main__":
     cli()
@@ -62,10 +62,13 @@ class HostingConfig(BaseModel):
 class MailingConfig(BaseModel):
     resend_api_key: str
     system_email_address: str
+    # Keep emails in memory instead of sending them (local development)
+    stub_transport: bool = False
 
 
 class DatabaseConfig(BaseModel):
     sql_connection_string: Optional[str]
+    async_engine: bool = False
 
 
 class RedisConfig(BaseModel):
@@ -173,6 +176,7 @@ def get_nexo_config() -> NexoConfig:
         "LEARNHOUSE_SQL_CONNECTION_STRING",
         "DATABASE_URL",
     )
+    env_sql_async_engine = _first_env("NEXO_SQL_ASYNC_ENGINE", "LEARNHOUSE_SQL_ASYNC_ENGINE")
 
     
 
@@ -244,6 +248,12 @@ def get_nexo_config() -> NexoConfig:
         "database_config", {}
     ).get("sql_connection_string")
 
+    # Serve the read-heavy routers from the asyncpg engine
+    if env_sql_async_engine:
+        sql_async_engine = env_sql_async_engine.lower() in ("true", "1", "yes")
+    else:
+        sql_async_engine = yaml_config.get("database_config", {}).get("async_engine", False)
+
     # AI Config
     env_openai_api_key = _first_env("NEXO_OPENAI_API_KEY")
     env_is_ai_enabled_str = _first_env("NEXO_IS_AI_ENABLED")
@@ -277,6 +287,11 @@ def get_nexo_config() -> NexoConfig:
     system_email_address = env_system_email_address or yaml_config.get(
         "mailing_config", {}
     ).get("system_email_address")
+    env_email_stub_transport = os.environ.get("NEXO_EMAIL_STUB_TRANSPORT", "None")
+    email_stub_transport = (
+        env_email_stub_transport.lower() == "true" if env_email_stub_transport != "None"
+        else yaml_config.get("mailing_config", {}).get("stub_transport", False)
+    )
 
     # Payments config
     env_stripe_secret_key = _first_env(
@@ -340,6 +355,7 @@ def get_nexo_config() -> NexoConfig:
     )
     database_config = DatabaseConfig(
         sql_connection_string=sql_connection_string,
+        async_engine=sql_async_engine,
     )
 
     # AI Config
@@ -363,7 +379,9 @@ def get_nexo_config() -> NexoConfig:
         ai_config=ai_config,
         redis_config=RedisConfig(redis_connection_string=redis_connection_string),
         mailing_config=MailingConfig(
-            resend_api_key=resend_api_key, system_email_address=system_email_address
+            resend_api_key=resend_api_key,
+            system_email_address=system_email_address,
+            stub_transport=bool(email_stub_transport),
         ),
         payments_config=InternalPaymentsConfig(
             stripe=InternalStripeConfig(
@@ -1,4 +1,5 @@
 from typing import Optional, Any, Dict, List
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import SQLModel, Field, Column, Integer, ForeignKey, JSON
 from datetime import datetime
 
@@ -19,12 +20,14 @@ class AuditLogBase(SQLModel):
     status_code: int
     payload: Optional[Dict[str, Any]] = Field(
         default=None, 
-        sa_column=Column(JSON)
+        sa_column=Column(JSON().with_variant(JSONB(), "postgresql"))
     )
     ip_address: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class AuditLog(AuditLogBase, table=True):
+    # On Postgres the table is partitioned by month of created_at, and its
+    # primary key is (id, created_at), see ee/services/audit_retention.py
     id: Optional[int] = Field(default=None, primary_key=True)
 
 class AuditLogRead(AuditLogBase):
@@ -34,6 +37,10 @@ class AuditLogRead(AuditLogBase):
 
 class AuditLogPaginated(SQLModel):
     items: List[AuditLogRead]
+    # -1 when not counted (count=none)
     total: int
+    total_is_estimate: bool = False
     limit: int
     offset: int
+    # Opaque cursor of the next page, None on the last page
+    next_cursor: Optional[str] = None
@@ -4,7 +4,19 @@ from fastapi import FastAPI, APIRouter, Depends
 from sqlmodel import Session
 from src.core.events.database import engine
 from ee.middleware.audit import EEAuditLogMiddleware
-from ee.services.audit import flush_audit_logs_to_db, get_redis_client
+from ee.services.audit import (
+    AUDIT_FORWARD_INTERVAL,
+    AUDIT_FLUSH_BUSY_INTERVAL,
+    AUDIT_FLUSH_INTERVAL,
+    AUDIT_RECOVER_INTERVAL,
+    flush_audit_logs_to_db,
+    get_audit_log_queue,
+)
+from ee.services.audit_retention import (
+    AUDIT_LOG_MAINTENANCE_INTERVAL,
+    run_audit_log_maintenance,
+)
+from src.services.payments.webhooks.payments_webhooks import stripe_webhook_worker
 from ee.routers import cloud_internal
 from ee.routers import payments
 from ee.routers import info
@@ -53,20 +65,63 @@ def register_routers(v1_router: APIRouter):
 def on_startup(app: FastAPI):
     """Run Enterprise Edition startup tasks."""
     
-    # Start Audit Log Flusher
-    if not get_redis_client():
-        logger.info("EE Audit log flusher disabled (Redis not configured/available).")
-        return
+    # Start Audit Log Flusher (Redis queue, or in-process queue without Redis)
+    queue = get_audit_log_queue()
+
+    def flush() -> tuple[int, int]:
+        with Session(engine) as session:
+            flushed = flush_audit_logs_to_db(session)
+        return flushed, queue.depth()["queue_depth"]
 
     async def audit_log_flusher():
+        interval = AUDIT_FLUSH_INTERVAL
         while True:
-            await asyncio.sleep(60)  # Flush every minute
+            await asyncio.sleep(interval)
             try:
-                with Session(engine) as session:
-                    flush_audit_logs_to_db(session)
+                # Database work stays off the event loop
+                flushed, backlog = await asyncio.to_thread(flush)
+                interval = AUDIT_FLUSH_BUSY_INTERVAL if flushed and backlog else AUDIT_FLUSH_INTERVAL
             except Exception as e:
                 logger.error(f"EE Audit log flusher error: {e}")
+                interval = AUDIT_FLUSH_INTERVAL
 
-    asyncio.create_task(audit_log_flusher())
-    logger.info("EE Startup tasks initiated")
+    async def audit_log_forwarder():
+        # Requests only buffer their logs, push them to Redis in bulk
+        while True:
+            await asyncio.sleep(AUDIT_FORWARD_INTERVAL)
+            try:
+                if queue.outbox:
+                    await asyncio.to_thread(queue.forward)
+            except Exception as e:
+                logger.error(f"EE Audit log forwarder error: {e}")
 
+    async def audit_log_recovery():
+        # Entries left in processing by stopped workers, on startup then periodically
+        while True:
+            try:
+                await asyncio.to_thread(queue.recover)
+            except Exception as e:
+                logger.error(f"EE Audit log recovery error: {e}")
+            await asyncio.sleep(AUDIT_RECOVER_INTERVAL)
+
+    def maintain():
+        with Session(engine) as session:
+            run_audit_log_maintenance(session)
+
+    async def audit_log_maintenance():
+        # Partitions ahead and retention, on startup then periodically
+        while True:
+            try:
+                await asyncio.to_thread(maintain)
+            except Exception as e:
+                logger.error(f"EE Audit log maintenance error: {e}")
+            await asyncio.sleep(AUDIT_LOG_MAINTENANCE_INTERVAL)
+
+    asyncio.create_task(audit_log_flusher())
+    asyncio.create_task(audit_log_maintenance())
+    # Stripe webhooks are only stored by the endpoint, and processed here
+    asyncio.create_task(stripe_webhook_worker(engine))
+    if queue.backend == "redis":
+        asyncio.create_task(audit_log_forwarder())
+        asyncio.create_task(audit_log_recovery())
+    logger.info(f"EE Startup tasks initiated (audit log queue: {queue.backend})")
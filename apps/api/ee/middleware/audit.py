@@ -1,165 +1,202 @@
 import asyncio
 import json
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from ee.services.audit import queue_audit_log, resolve_org_id, get_redis_client
-from src.db.users import PublicUser
-from src.core.events.database import engine
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from sqlmodel import Session
-from typing import Optional, Dict, Any
+from ee.services.audit import queue_audit_log, resolve_org_id
+from src.core.events.database import engine
+from src.db.users import PublicUser
 
 logger = logging.getLogger(__name__)
 
-class EEAuditLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Only audit "actions" (mutations: POST, PUT, DELETE, PATCH)
-        # We skip GET (reads) and OPTIONS to avoid noise
-        if request.method not in ["POST", "PUT", "DELETE", "PATCH"]:
-            return await call_next(request)
+AUDITED_METHODS = {"POST", "PUT", "DELETE", "PATCH"}
+SKIPPED_PATH_PREFIXES = ("/api/v1/health", "/docs", "/redoc", "/content")
+# Bodies are only captured for these content types, and up to this size.
+# Anything else (multipart uploads...) streams through untouched.
+CAPTURED_CONTENT_TYPES = ("application/json", "application/x-www-form-urlencoded")
+AUDIT_MAX_BODY_BYTES = 64 * 1024
+SENSITIVE_KEYS = {"password", "token", "access_token", "secret", "new_password", "old_password"}
 
-        # Skip health checks, documentation, and static files
-        path = request.url.path
-        if (
-            path.startswith("/api/v1/health") or 
-            path.startswith("/docs") or 
-            path.startswith("/redoc") or
-            path.startswith("/content")
-        ):
-            return await call_next(request)
+# Path segment -> identifier used to find the org of the request
+PATH_ORG_REFERENCES = {
+    "orgs": "org_id",
+    "courses": "course_id",
+    "chapters": "chapter_id",
+    "activities": "activity_id",
+    "collections": "collection_id",
+    "usergroups": "usergroup_id",
+    "roles": "role_id",
+    "assignments": "assignment_id",
+    "certifications": "certification_id",
+}
 
-        # Capture request data for payload and org_id extraction
-        payload = {}
-        org_id = None
-        
-        try:
-            content_type = request.headers.get("content-type", "")
-            
-            if "application/json" in content_type:
-                body = await request.body()
-                if body:
-                    try:
-                        payload = json.loads(body)
-                        # Reset request body so subsequent handlers can read it
-                        async def receive():
-                            return {"type": "http.request", "body": body, "more_body": False}
-                        request._receive = receive
-                    except json.JSONDecodeError:
-                        pass
-            elif "multipart/form-data" in content_type or "application/x-www-form-urlencoded" in content_type:
-                # Read and parse the form data
-                body = await request.body()
-                if body:
-                    # Parse form data manually to avoid consuming the stream
-                    from urllib.parse import parse_qs
-                    if "application/x-www-form-urlencoded" in content_type:
-                        body_str = body.decode('utf-8')
-                        parsed = parse_qs(body_str)
-                        # Convert lists to single values for logging
-                        payload = {k: v[0] if len(v) == 1 else v for k, v in parsed.items()}
-                    else:
-                        # For multipart, just note that it was multipart data
-                        payload = {"_type": "multipart/form-data"}
-                    
-                    # Reset request body so subsequent handlers can read it
-                    async def receive():
-                        return {"type": "http.request", "body": body, "more_body": False}
-                    request._receive = receive
-            
-            # Scrub sensitive data from payload
-            if isinstance(payload, dict):
-                sensitive_keys = ["password", "token", "access_token", "secret", "new_password", "old_password"]
-                payload = {k: v for k, v in payload.items() if k not in sensitive_keys}
-                
-        except Exception as e:
-            logger.error(f"Audit middleware failed to capture request data: {e}")
-
-        # Determine resource and resource_id from path
-        # Paths are usually /api/v1/{resource}/{id}/{subresource}/{subid}
-        path_parts = [p for p in path.split("/") if p]
+
+def parse_resource(path: str) -> tuple[str, Optional[str], Dict[str, str]]:
+    """
+    Resource and resource_id acted on, and the identifiers found in the path.
+    Paths are usually /api/v1/{resource}/{id}/{subresource}/{subid}
+    """
+    path_parts = [p for p in path.split("/") if p]
+    try:
+        v1_index = path_parts.index("v1")
+        clean_parts = path_parts[v1_index + 1:]
+    except ValueError:
+        clean_parts = path_parts
+
+    resource = clean_parts[0] if len(clean_parts) > 0 else "root"
+    resource_id = clean_parts[1] if len(clean_parts) > 1 else None
+    references = {}
+
+    # The last pair or single resource name we encounter is the one we log
+    for i in range(0, len(clean_parts), 2):
+        resource = clean_parts[i]
+        resource_id = clean_parts[i + 1] if len(clean_parts) > i + 1 else None
+        if resource in PATH_ORG_REFERENCES and resource_id:
+            references[PATH_ORG_REFERENCES[resource]] = resource_id
+
+    return resource, resource_id, references
+
+
+def parse_payload(content_type: str, body: bytes) -> Dict[str, Any]:
+    payload: Any = {}
+    if "application/json" in content_type:
         try:
-            v1_index = path_parts.index("v1")
-            clean_parts = path_parts[v1_index + 1:]
+            payload = json.loads(body)
         except ValueError:
-            clean_parts = path_parts
-
-        # Default resource determination
-        resource = clean_parts[0] if len(clean_parts) > 0 else "root"
-        resource_id = clean_parts[1] if len(clean_parts) > 1 else None
-
-        # Prepare data for org_id resolution
-        path_query_data = {
-            "org_id": request.query_params.get("org_id") or request.query_params.get("orgId"),
-            "org_slug": request.query_params.get("org_slug") or request.query_params.get("orgslug"),
-            "course_id": request.query_params.get("course_id") or request.query_params.get("courseId"),
-            "chapter_id": request.query_params.get("chapter_id") or request.query_params.get("chapterId"),
-            "assignment_id": request.query_params.get("assignment_id") or request.query_params.get("assignmentId"),
-            "certification_id": request.query_params.get("certification_id") or request.query_params.get("certificationId"),
+            pass
+    else:
+        parsed = parse_qs(body.decode("utf-8", errors="replace"))
+        # Convert lists to single values for logging
+        payload = {k: v[0] if len(v) == 1 else v for k, v in parsed.items()}
+
+    if not isinstance(payload, dict):
+        return {}
+    # Scrub sensitive data from payload
+    return {k: v for k, v in payload.items() if k not in SENSITIVE_KEYS}
+
+
+def _resolve_org_id_now(references: List[Dict[str, Any]]) -> Optional[int]:
+    with Session(engine) as session:
+        for data in references:
+            org_id = resolve_org_id(session, data)
+            if org_id is not None:
+                return org_id
+    return None
+
+
+class EEAuditLogMiddleware:
+    """
+    Pure ASGI audit middleware for mutations (POST, PUT, DELETE, PATCH).
+
+    The request body is never buffered ahead of the app: small JSON and form
+    bodies are copied as the app reads them, other bodies are not captured.
+    The org of the log is resolved by the flusher (before the request for
+    DELETEs only), and queueing doesn't do any I/O.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in AUDITED_METHODS
+            or scope["path"].startswith(SKIPPED_PATH_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        headers = Headers(scope=scope)
+        content_type = headers.get("content-type", "")
+        content_length = headers.get("content-length")
+
+        capture = any(ct in content_type for ct in CAPTURED_CONTENT_TYPES) and (
+            content_length is None
+            or (content_length.isdigit() and int(content_length) <= AUDIT_MAX_BODY_BYTES)
+        )
+        body = bytearray()
+        body_complete = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal capture, body_complete
+            message = await receive()
+            if capture and message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+                if len(body) > AUDIT_MAX_BODY_BYTES:
+                    capture = False
+                    body.clear()
+                elif not message.get("more_body", False):
+                    body_complete = True
+            return message
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        resource, resource_id, references = parse_resource(path)
+        query_params = QueryParams(scope.get("query_string", b""))
+        org_references = {
+            "org_id": query_params.get("org_id") or query_params.get("orgId"),
+            "course_id": query_params.get("course_id") or query_params.get("courseId"),
+            "chapter_id": query_params.get("chapter_id") or query_params.get("chapterId"),
+            "assignment_id": query_params.get("assignment_id") or query_params.get("assignmentId"),
+            "certification_id": query_params.get("certification_id") or query_params.get("certificationId"),
         }
+        org_references.update(references)
+        org_references = {k: v for k, v in org_references.items() if v}
 
-        # Traverse path to find the actual resource being acted on and collect IDs for org resolution
-        for i in range(0, len(clean_parts), 2):
-            res_name = clean_parts[i]
-            res_id = clean_parts[i+1] if len(clean_parts) > i+1 else None
-            
-            # The last pair or single resource name we encounter is the one we log
-            resource = res_name
-            resource_id = res_id
-
-            # Collect IDs for org resolution
-            if res_name == "orgs" and res_id:
-                path_query_data["org_id"] = res_id
-            elif res_name == "courses" and res_id:
-                path_query_data["course_id"] = res_id
-            elif res_name == "chapters" and res_id:
-                path_query_data["chapter_id"] = res_id
-            elif res_name == "activities" and res_id:
-                path_query_data["activity_id"] = res_id
-            elif res_name == "collections" and res_id:
-                path_query_data["collection_id"] = res_id
-            elif res_name == "usergroups" and res_id:
-                path_query_data["usergroup_id"] = res_id
-            elif res_name == "roles" and res_id:
-                path_query_data["role_id"] = res_id
-            elif res_name == "assignments" and res_id:
-                path_query_data["assignment_id"] = res_id
-            elif res_name == "certifications" and res_id:
-                path_query_data["certification_id"] = res_id
-
-        # Try to resolve org_id BEFORE the action (essential for DELETE)
+        # The resource is gone once deleted, so DELETEs are the only requests
+        # whose org is looked up before the app runs (off the event loop).
         org_id = None
-        with Session(engine) as session:
-            # 1. Try from captured payload
-            if isinstance(payload, dict):
-                org_id = resolve_org_id(session, payload)
-            
-            # 2. Try from path/query data collected
-            if org_id is None:
-                org_id = resolve_org_id(session, path_query_data)
-
-        # Proceed with the request
-        response: Response = await call_next(request)
-
-        # Extract user if available (set by auth dependencies during call_next)
-        user_id = None
-        if hasattr(request.state, "user") and isinstance(request.state.user, PublicUser):
-            user_id = request.state.user.id
-
-        action = f"{request.method} {path}"
-
-        # Queue the log asynchronously (if Redis is available) for any org.
-        if org_id and get_redis_client():
-            asyncio.create_task(queue_audit_log(
-                user_id=user_id,
-                org_id=org_id,
-                action=action,
-                resource=resource,
-                method=request.method,
-                path=path,
-                status_code=response.status_code,
-                payload=payload if payload else None,
-                resource_id=resource_id,
-                ip_address=request.client.host if request.client else None
-            ))
-
-        return response
+        if method == "DELETE" and org_references:
+            try:
+                org_id = await asyncio.to_thread(_resolve_org_id_now, [org_references])
+            except Exception as e:
+                logger.error(f"Audit middleware failed to resolve the org: {e}")
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            try:
+                payload: Dict[str, Any] = {}
+                if body_complete and body:
+                    payload = parse_payload(content_type, bytes(body))
+                elif "multipart/form-data" in content_type:
+                    payload = {"_type": "multipart/form-data"}
+
+                # Extract user if available (set by auth dependencies)
+                user = scope.get("state", {}).get("user")
+                user_id = user.id if isinstance(user, PublicUser) else None
+                client = scope.get("client")
+
+                await queue_audit_log(
+                    user_id=user_id,
+                    org_id=org_id,
+                    action=f"{method} {path}",
+                    resource=resource,
+                    method=method,
+                    path=path,
+                    status_code=status_code,
+                    payload=payload if payload else None,
+                    resource_id=resource_id,
+                    ip_address=client[0] if client else None,
+                    org_references=[
+                        {
+                            k: v
+                            for k, v in payload.items()
+                            if k.endswith(("_id", "Id", "_uuid")) and isinstance(v, (str, int))
+                        },
+                        org_references,
+                    ],
+                )
+            except Exception as e:
+                logger.error(f"Audit middleware failed to queue the log: {e}")
@@ -1,9 +1,13 @@
-from typing import Optional
+import base64
+import json
+from typing import Iterator, List, Literal, Optional, Tuple
 from fastapi import APIRouter, Depends, Query, Request, HTTPException, status
 from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
 from sqlmodel import Session, select, desc, func
-from src.core.events.database import get_db_session
+from src.core.events.database import engine, get_db_session
 from ee.db.audit_logs import AuditLog, AuditLogRead, AuditLogPaginated
+from ee.services.audit_retention import get_audit_log_retention_days, retention_start
 from src.db.users import User, PublicUser
 from src.db.organizations import Organization
 from src.db.organization_config import OrganizationConfig
@@ -15,12 +19,19 @@ import io
 
 router = APIRouter()
 
+# Rows per chunk of the CSV export (and per fetch of the server side cursor)
+EXPORT_CHUNK_SIZE = 1000
+# Below this estimate, the exact count is cheap enough
+ESTIMATED_COUNT_EXACT_BELOW = 10_000
+
+CSV_HEADER = ["ID", "Timestamp", "User ID", "Username", "Action", "Resource", "Resource ID", "Method", "Path", "Status Code", "IP Address"]
+
 async def verify_org_admin(
     org_id: int,
     request: Request,
     current_user: PublicUser,
     session: Session
-):
+) -> OrganizationConfig:
     # Get organization to get uuid
     org = session.get(Organization, org_id)
     if not org:
@@ -34,14 +45,10 @@ async def verify_org_admin(
     
     # RBAC check for admin status (using 'update' as a proxy for admin actions)
     await rbac_check(request, org.org_uuid, current_user, "update", session)
+    return org_config
 
-@router.get("/export")
-async def export_audit_logs(
-    *,
-    request: Request,
+def audit_log_filters(
     org_id: int,
-    current_user: PublicUser = Depends(get_current_user),
-    session: Session = Depends(get_db_session),
     user_id: Optional[str] = None,
     action: Optional[str] = None,
     resource: Optional[str] = None,
@@ -51,69 +58,162 @@ async def export_audit_logs(
     name: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-):
+    retention_days: Optional[int] = None,
+) -> Tuple[list, bool]:
     """
-    Export audit logs as CSV.
+    Where clauses of the audit log queries, and whether they need the User
+    join. Every query is scoped to the org, served by the (org_id, created_at)
+    indexes, and to the months kept by its retention so that Postgres only
+    scans those partitions.
     """
-    await verify_org_admin(org_id, request, current_user, session)
-
-    statement = (
-        select(AuditLog, User.username)
-        .outerjoin(User, AuditLog.user_id == User.id)
-        .where(AuditLog.org_id == org_id)
-    )
-    
-    # Apply same filters as get_audit_logs
+    filters = [AuditLog.org_id == org_id]
+    if retention_days:
+        filters.append(AuditLog.created_at >= retention_start(retention_days))
+    needs_user = False
     if user_id:
-        from sqlalchemy import cast, String
-        statement = statement.where(cast(AuditLog.user_id, String).ilike(f"%{user_id}%"))
+        if not user_id.strip().isdigit():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="user_id must be a number",
+            )
+        filters.append(AuditLog.user_id == int(user_id))
     if username:
-        statement = statement.where(User.username.ilike(f"%{username}%"))
+        filters.append(User.username.ilike(f"%{username}%"))  # type: ignore
+        needs_user = True
     if name:
-        statement = statement.where((User.first_name + " " + User.last_name).ilike(f"%{name}%"))
+        filters.append((User.first_name + " " + User.last_name).ilike(f"%{name}%"))
+        needs_user = True
     if action:
-        statement = statement.where(AuditLog.action.ilike(f"%{action}%"))
+        filters.append(AuditLog.action.ilike(f"%{action}%"))  # type: ignore
     if resource:
-        statement = statement.where(AuditLog.resource.ilike(f"%{resource}%"))
+        filters.append(AuditLog.resource.ilike(f"%{resource}%"))  # type: ignore
     if status_code:
-        statement = statement.where(AuditLog.status_code == status_code)
+        filters.append(AuditLog.status_code == status_code)
     if ip_address:
-        statement = statement.where(AuditLog.ip_address.ilike(f"%{ip_address}%"))
+        filters.append(AuditLog.ip_address.ilike(f"%{ip_address}%"))  # type: ignore
     if start_date:
-        statement = statement.where(AuditLog.created_at >= start_date)
+        filters.append(AuditLog.created_at >= start_date)
     if end_date:
-        statement = statement.where(AuditLog.created_at <= end_date)
-        
-    statement = statement.order_by(desc(AuditLog.created_at))
-    results = session.exec(statement).all()
+        filters.append(AuditLog.created_at <= end_date)
+    return filters, needs_user
+
+
+def encode_cursor(log: AuditLog) -> str:
+    value = json.dumps([log.created_at.isoformat(), log.id])
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(log_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
 
-    # Create CSV in memory
+
+def count_audit_logs(
+    session: Session, filters: list, needs_user: bool, mode: str
+) -> Tuple[Optional[int], bool]:
+    """
+    Total of the filtered audit logs, and whether it's an estimate.
+
+    The estimate is the row count the Postgres planner expects, exact counts
+    are only run when that estimate is small. Other databases always count.
+    """
+    if mode == "none":
+        return None, False
+
+    statement = select(AuditLog.id)
+    if needs_user:
+        statement = statement.outerjoin(User, AuditLog.user_id == User.id)  # type: ignore
+    statement = statement.where(*filters)
+
+    bind = session.get_bind()
+    if mode == "estimated" and bind.dialect.name == "postgresql":
+        compiled = statement.compile(dialect=bind.dialect)
+        plan = session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params
+        ).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= ESTIMATED_COUNT_EXACT_BELOW:
+            return estimate, True
+
+    count_statement = select(func.count()).select_from(statement.subquery())
+    return session.exec(count_statement).one(), False
+
+
+def export_rows(statement) -> Iterator[str]:
+    """
+    CSV chunks of the export. Rows are fetched with a server side cursor on
+    its own session, so memory stays constant whatever the number of logs.
+    """
     output = io.StringIO()
     writer = csv.writer(output)
-    
-    # Header
-    writer.writerow(["ID", "Timestamp", "User ID", "Username", "Action", "Resource", "Resource ID", "Method", "Path", "Status Code", "IP Address"])
-    
-    # Rows
-    for log, user_name in results:
-        writer.writerow([
-            log.id,
-            log.created_at.isoformat(),
-            log.user_id or "System",
-            user_name or "System",
-            log.action,
-            log.resource,
-            log.resource_id or "",
-            log.method,
-            log.path,
-            log.status_code,
-            log.ip_address or ""
-        ])
-    
-    output.seek(0)
-    
+    writer.writerow(CSV_HEADER)
+
+    with Session(engine) as session:
+        results = session.exec(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for index, (log, user_name) in enumerate(results, start=1):
+            writer.writerow([
+                log.id,
+                log.created_at.isoformat(),
+                log.user_id or "System",
+                user_name or "System",
+                log.action,
+                log.resource,
+                log.resource_id or "",
+                log.method,
+                log.path,
+                log.status_code,
+                log.ip_address or ""
+            ])
+            if index % EXPORT_CHUNK_SIZE == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+
+    yield output.getvalue()
+
+
+@router.get("/export")
+async def export_audit_logs(
+    *,
+    request: Request,
+    org_id: int,
+    current_user: PublicUser = Depends(get_current_user),
+    session: Session = Depends(get_db_session),
+    user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    resource: Optional[str] = None,
+    status_code: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    username: Optional[str] = None,
+    name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """
+    Export audit logs as CSV, streamed in chunks.
+    """
+    org_config = await verify_org_admin(org_id, request, current_user, session)
+
+    filters, _ = audit_log_filters(
+        org_id, user_id, action, resource, status_code, ip_address, username, name, start_date, end_date,
+        retention_days=get_audit_log_retention_days(org_config.config),
+    )
+    statement = (
+        select(AuditLog, User.username)
+        .outerjoin(User, AuditLog.user_id == User.id)  # type: ignore
+        .where(*filters)
+        .order_by(desc(AuditLog.created_at), desc(AuditLog.id))
+    )
+
     return StreamingResponse(
-        iter([output.getvalue()]),
+        export_rows(statement),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=audit_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
     )
@@ -125,8 +225,10 @@ async def get_audit_logs(
     org_id: int,
     current_user: PublicUser = Depends(get_current_user),
     session: Session = Depends(get_db_session),
+    cursor: Optional[str] = None,
     offset: int = 0,
     limit: int = Query(default=100, lte=100),
+    count: Literal["exact", "estimated", "none"] = "estimated",
     user_id: Optional[str] = None,
     action: Optional[str] = None,
     resource: Optional[str] = None,
@@ -138,52 +240,41 @@ async def get_audit_logs(
     end_date: Optional[datetime] = None,
 ):
     """
-    Get audit logs with filtering and pagination.
+    Get audit logs with filtering and pagination, newest first.
+
+    Pages are walked with the next_cursor of the previous page, offset is
+    kept for existing clients. The total is an estimate on large orgs unless
+    count=exact is requested.
     """
-    await verify_org_admin(org_id, request, current_user, session)
+    org_config = await verify_org_admin(org_id, request, current_user, session)
+
+    filters, needs_user = audit_log_filters(
+        org_id, user_id, action, resource, status_code, ip_address, username, name, start_date, end_date,
+        retention_days=get_audit_log_retention_days(org_config.config),
+    )
+    total, total_is_estimate = count_audit_logs(session, filters, needs_user, count)
 
-    # Build count query
-    count_statement = select(func.count()).select_from(AuditLog).outerjoin(User, AuditLog.user_id == User.id).where(AuditLog.org_id == org_id)
-    
-    # Build data query
     statement = (
         select(AuditLog, User.username, User.avatar_image)
-        .outerjoin(User, AuditLog.user_id == User.id)
-        .where(AuditLog.org_id == org_id)
+        .outerjoin(User, AuditLog.user_id == User.id)  # type: ignore
+        .where(*filters)
+        .order_by(desc(AuditLog.created_at), desc(AuditLog.id))
+        .limit(limit + 1)
     )
-    
-    # Apply filters
-    filters = []
-    if user_id:
-        from sqlalchemy import cast, String
-        filters.append(cast(AuditLog.user_id, String).ilike(f"%{user_id}%"))
-    if username:
-        filters.append(User.username.ilike(f"%{username}%"))
-    if name:
-        filters.append((User.first_name + " " + User.last_name).ilike(f"%{name}%"))
-    if action:
-        filters.append(AuditLog.action.ilike(f"%{action}%"))
-    if resource:
-        filters.append(AuditLog.resource.ilike(f"%{resource}%"))
-    if status_code:
-        filters.append(AuditLog.status_code == status_code)
-    if ip_address:
-        filters.append(AuditLog.ip_address.ilike(f"%{ip_address}%"))
-    if start_date:
-        filters.append(AuditLog.created_at >= start_date)
-    if end_date:
-        filters.append(AuditLog.created_at <= end_date)
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(AuditLog.created_at, AuditLog.id) < tuple_(cursor_created_at, cursor_id),
+            # Row comparisons don't prune partitions, this bound does
+            AuditLog.created_at <= cursor_created_at,
+        )
+    elif offset:
+        statement = statement.offset(offset)
+
+    results: List = list(session.exec(statement).all())
+    has_more = len(results) > limit
+    results = results[:limit]
 
-    for f in filters:
-        count_statement = count_statement.where(f)
-        statement = statement.where(f)
-        
-    total = session.exec(count_statement).one()
-    
-    statement = statement.order_by(desc(AuditLog.created_at)).offset(offset).limit(limit)
-    
-    results = session.exec(statement).all()
-    
     # Process results to match AuditLogRead
     audit_logs_read = []
     for log, username, avatar_image in results:
@@ -191,11 +282,12 @@ async def get_audit_logs(
         log_dict["username"] = username
         log_dict["avatar_url"] = avatar_image
         audit_logs_read.append(AuditLogRead(**log_dict))
-        
+
     return {
         "items": audit_logs_read,
-        "total": total,
+        "total": total if total is not None else -1,
+        "total_is_estimate": total_is_estimate,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "next_cursor": encode_cursor(results[-1][0]) if has_more else None,
     }
-
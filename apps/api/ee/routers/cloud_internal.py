@@ -3,6 +3,7 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session
 from src.core.events.database import get_db_session
+from ee.services.audit import get_audit_pipeline_stats
 from src.db.organization_config import OrganizationConfigBase
 from src.services.explore.explore import get_course_for_explore, get_courses_for_an_org_explore, get_org_for_explore, get_orgs_for_explore, search_orgs_for_explore
 from src.services.orgs.orgs import update_org_with_config_no_auth
@@ -72,3 +73,8 @@ async def update_org_Config(
         request, config_object, org_id, db_session
     )
     return res
+
+@router.get("/audit_logs/pipeline")
+async def api_get_audit_pipeline_stats():
+    """Audit log queue depth, lag and flush statistics of this worker"""
+    return get_audit_pipeline_stats()
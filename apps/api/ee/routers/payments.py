@@ -24,7 +24,7 @@ from src.services.payments.payments_stripe import (
     update_stripe_account_id,
     verify_stripe_checkout_session,
 )
-from src.services.payments.payments_access import check_course_paid_access
+from src.services.payments.payments_access import check_course_paid_access, get_courses_paid_access
 from src.services.payments.payments_customers import get_customers
 from src.services.payments.payments_stripe import generate_stripe_connect_link
 from src.services.payments.webhooks.payments_webhooks import handle_stripe_webhook
@@ -238,10 +238,34 @@ async def api_check_course_paid_access(
             course_id=course_id,
             org_id=org_id,
             user=current_user,
-            db_session=db_session
+            db_session=db_session,
+            request=request,
         )
     }
 
+@router.get("/{org_id}/courses/access")
+async def api_check_courses_paid_access(
+    request: Request,
+    org_id: int,
+    course_ids: str,
+    current_user: PublicUser = Depends(get_current_user),
+    db_session: Session = Depends(get_db_session),
+):
+    """
+    Check if current user has paid access to several courses, course_ids
+    being comma separated
+    """
+    try:
+        ids = [int(course_id) for course_id in course_ids.split(",") if course_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid course ids")
+    if len(ids) > 500:
+        raise HTTPException(status_code=400, detail="Too many course ids")
+
+    return {
+        "access": await get_courses_paid_access(request, ids, current_user, db_session)
+    }
+
 @router.get("/{org_id}/customers")
 async def api_get_customers(
     request: Request,
@@ -1,16 +1,47 @@
 import json
 import logging
+import os
+import socket
+import threading
+import time
 import redis
+from collections import deque
 from datetime import datetime
-from typing import Any, Optional, Dict
+from typing import Any, List, Optional, Dict
+from sqlalchemy import insert
 from sqlmodel import Session, select
 from config.config import get_nexo_config
+from src.core.redis_client import get_redis_client as get_shared_redis_client
 from ee.db.audit_logs import AuditLog
 from src.db.organization_config import OrganizationConfig, OrganizationConfigBase
 
 logger = logging.getLogger(__name__)
 NEXO_CONFIG = get_nexo_config()
 REDIS_AUDIT_LOG_KEY = "learnhouse:audit_logs"
+# Entries being flushed, one list per consumer. They go back to the queue if
+# the consumer dies before they are saved.
+REDIS_AUDIT_PROCESSING_KEY = "learnhouse:audit_logs:processing"
+# Consumers by time of their last heartbeat, refreshed on every flush
+REDIS_AUDIT_CONSUMERS_KEY = "learnhouse:audit_logs:consumers"
+# Seconds without a heartbeat after which a consumer is considered stopped
+AUDIT_CONSUMER_TTL = 300
+# Seconds between recoveries of the entries of stopped consumers
+AUDIT_RECOVER_INTERVAL = 60
+
+# Batch size adapts between these bounds: doubled while batches come back
+# full, halved once the queue is drained.
+AUDIT_BATCH_MIN = 100
+AUDIT_BATCH_MAX = 5000
+# Upper bound of batches per flush, so that one flush can't run forever
+AUDIT_FLUSH_MAX_BATCHES = 20
+# Seconds between flushes, shorter while there is a backlog
+AUDIT_FLUSH_INTERVAL = 10
+AUDIT_FLUSH_BUSY_INTERVAL = 1
+# In-process queue used without Redis, and buffer of the entries waiting to
+# be pushed to Redis. The oldest entries are dropped when full.
+AUDIT_LOCAL_QUEUE_MAX = 100_000
+# Seconds between pushes of the buffered entries to Redis
+AUDIT_FORWARD_INTERVAL = 1
 
 # Cache Redis connectivity so we don't spam logs and waste time reconnecting.
 _redis_client_cached: Optional[redis.Redis] = None
@@ -36,6 +67,9 @@ def get_redis_client():
     """
     Return a usable Redis client for audit logs, or None if not configured/available.
 
+    This is the shared pooled client from src.core.redis_client; only the
+    availability check is specific to audit logs.
+
     We verify connectivity once with PING to catch invalid auth (common in dev) and
     avoid logging the same error on every request / flush cycle.
     """
@@ -44,15 +78,14 @@ def get_redis_client():
     if _redis_client_checked:
         return _redis_client_cached
 
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
-    if not redis_conn_string:
+    client = get_shared_redis_client()
+    if client is None:
         _redis_client_checked = True
         _redis_client_cached = None
         return None
 
     try:
-        client = redis.Redis.from_url(redis_conn_string)
-        # Force an actual connection/auth check now (from_url is lazy).
+        # Force an actual connection/auth check now (the pool connects lazily).
         client.ping()
         _redis_client_cached = client
         _redis_client_checked = True
@@ -232,6 +265,223 @@ def resolve_org_id(session: Session, data: Dict[str, Any]) -> Optional[int]:
 
     return None
 
+
+
+####################################################
+# Queue
+####################################################
+
+# Move up to ARGV[1] of the oldest entries to the processing list, atomically
+_DEQUEUE_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], -tonumber(ARGV[1]), -1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], 0, -#items - 1)
+    redis.call('RPUSH', KEYS[2], unpack(items))
+end
+return items
+"""
+
+# Put the entries of a processing list back at the oldest end of the queue
+_REQUEUE_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+for i = 1, #items, 1000 do
+    redis.call('RPUSH', KEYS[2], unpack(items, i, math.min(i + 999, #items)))
+end
+redis.call('DEL', KEYS[1])
+return #items
+"""
+
+
+class RedisAuditLogQueue:
+    """
+    Audit log queue shared by every worker. Entries are buffered in process
+    and pushed on the left in bulk by forward(), so that queueing never waits
+    on Redis. They are dequeued in batches from the right (oldest first) into
+    a processing list owned by this consumer, and only removed once saved.
+
+    The buffer is volatile: the entries not forwarded yet, up to
+    AUDIT_FORWARD_INTERVAL worth of them, are lost if the process dies.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self.outbox: deque = deque(maxlen=AUDIT_LOCAL_QUEUE_MAX)
+        self.dropped = 0
+        self._dropped_logged = 0
+        # Held briefly by push(), and for the whole forward() so that the
+        # flusher and the forwarder don't push the buffer concurrently
+        self._outbox_lock = threading.Lock()
+        self._forward_lock = threading.Lock()
+        self.consumer_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.processing_key = f"{REDIS_AUDIT_PROCESSING_KEY}:{self.consumer_id}"
+        self._dequeue = client.register_script(_DEQUEUE_SCRIPT)
+        self._requeue = client.register_script(_REQUEUE_SCRIPT)
+
+    def push(self, entry: str) -> None:
+        with self._outbox_lock:
+            if len(self.outbox) == self.outbox.maxlen:
+                self.dropped += 1
+            self.outbox.append(entry)
+
+    def forward(self) -> int:
+        """Push the buffered entries to Redis, returns how many were pushed"""
+        with self._forward_lock:
+            with self._outbox_lock:
+                entries = list(self.outbox)
+                self.outbox.clear()
+            pushed = 0
+            try:
+                while pushed < len(entries):
+                    self.client.lpush(REDIS_AUDIT_LOG_KEY, *entries[pushed : pushed + 1000])
+                    pushed += 1000
+            except Exception:
+                self._keep(entries[pushed:])
+                raise
+            finally:
+                self._log_dropped()
+            return len(entries)
+
+    def _keep(self, entries: List[str]) -> None:
+        """
+        Put entries that couldn't be pushed back in the buffer for the next
+        attempt. They are older than the ones buffered since, so they are the
+        ones dropped if it doesn't have room for all.
+        """
+        with self._outbox_lock:
+            room = self.outbox.maxlen - len(self.outbox)  # type: ignore
+            kept = entries[max(0, len(entries) - room) :]
+            self.dropped += len(entries) - len(kept)
+            self.outbox.extendleft(reversed(kept))
+
+    def _log_dropped(self) -> None:
+        dropped = self.dropped - self._dropped_logged
+        if dropped:
+            logger.warning(f"Dropped {dropped} audit logs: the buffer for Redis is full.")
+            self._dropped_logged += dropped
+
+    def in_flight(self) -> List[str]:
+        """Entries left over by a failed flush of this consumer"""
+        return [_decode(entry) for entry in self.client.lrange(self.processing_key, 0, -1)]
+
+    def dequeue(self, count: int) -> List[str]:
+        entries = self._dequeue(keys=[REDIS_AUDIT_LOG_KEY, self.processing_key], args=[count])
+        # Oldest last in the list
+        return [_decode(entry) for entry in reversed(entries)]
+
+    def ack(self) -> None:
+        self.client.delete(self.processing_key)
+
+    def heartbeat(self) -> None:
+        self.client.zadd(REDIS_AUDIT_CONSUMERS_KEY, {self.consumer_id: time.time()})
+
+    def recover(self) -> int:
+        """
+        Requeue the entries of consumers that stopped without saving them,
+        found by their expired heartbeat.
+        """
+        recovered = 0
+        expired = self.client.zrangebyscore(
+            REDIS_AUDIT_CONSUMERS_KEY, "-inf", time.time() - AUDIT_CONSUMER_TTL
+        )
+        for consumer_id in map(_decode, expired):
+            if consumer_id == self.consumer_id:
+                continue
+            recovered += self._requeue(
+                keys=[f"{REDIS_AUDIT_PROCESSING_KEY}:{consumer_id}", REDIS_AUDIT_LOG_KEY]
+            )
+            self.client.zrem(REDIS_AUDIT_CONSUMERS_KEY, consumer_id)
+        if recovered:
+            logger.warning(f"Requeued {recovered} audit logs of stopped consumers.")
+        return recovered
+
+    def depth(self) -> Dict[str, int]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.llen(REDIS_AUDIT_LOG_KEY)
+        pipe.llen(self.processing_key)
+        queue_depth, processing_depth = pipe.execute()
+        return {
+            "queue_depth": queue_depth + len(self.outbox),
+            "processing_depth": processing_depth,
+        }
+
+    def oldest(self) -> Optional[str]:
+        entry = self.client.lindex(REDIS_AUDIT_LOG_KEY, -1)
+        if entry:
+            return _decode(entry)
+        return self.outbox[0] if self.outbox else None
+
+
+class LocalAuditLogQueue:
+    """
+    In-process fallback when Redis is not available. Entries only survive as
+    long as the process, each worker flushes its own queue.
+    """
+
+    backend = "memory"
+
+    def __init__(self, maxlen: int = AUDIT_LOCAL_QUEUE_MAX):
+        self.entries: deque = deque(maxlen=maxlen)
+        self.processing: List[str] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def push(self, entry: str) -> None:
+        with self._lock:
+            if len(self.entries) == self.entries.maxlen:
+                self.dropped += 1
+            self.entries.append(entry)
+
+    def in_flight(self) -> List[str]:
+        return list(self.processing)
+
+    def dequeue(self, count: int) -> List[str]:
+        with self._lock:
+            while self.entries and len(self.processing) < count:
+                self.processing.append(self.entries.popleft())
+            return list(self.processing)
+
+    def forward(self) -> int:
+        return 0
+
+    def ack(self) -> None:
+        self.processing = []
+
+    def heartbeat(self) -> None:
+        pass
+
+    def recover(self) -> int:
+        return 0
+
+    def depth(self) -> Dict[str, int]:
+        return {"queue_depth": len(self.entries), "processing_depth": len(self.processing)}
+
+    def oldest(self) -> Optional[str]:
+        return self.entries[0] if self.entries else None
+
+
+_audit_log_queue = None
+_audit_log_queue_lock = threading.Lock()
+
+
+def get_audit_log_queue():
+    """Redis backed queue when Redis is usable, in-process queue otherwise"""
+    global _audit_log_queue
+
+    if _audit_log_queue is None:
+        with _audit_log_queue_lock:
+            if _audit_log_queue is None:
+                client = get_redis_client()
+                _audit_log_queue = RedisAuditLogQueue(client) if client else LocalAuditLogQueue()
+                logger.info(f"EE audit log queue: {_audit_log_queue.backend}")
+    return _audit_log_queue
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
 async def queue_audit_log(
     user_id: Optional[int],
     action: str,
@@ -243,11 +493,12 @@ async def queue_audit_log(
     resource_id: Optional[str] = None,
     ip_address: Optional[str] = None,
     org_id: Optional[int] = None,
+    org_references: Optional[List[Dict[str, Any]]] = None,
 ):
-    r = get_redis_client()
-    if not r:
-        return
-
+    """
+    Queue an audit log, without any I/O. Without an org_id, the org is
+    resolved from org_references (see resolve_org_id) when flushing.
+    """
     log_data = {
         "user_id": user_id,
         "org_id": org_id,
@@ -260,37 +511,155 @@ async def queue_audit_log(
         "payload": payload,
         "ip_address": ip_address,
         "created_at": datetime.utcnow().isoformat(),
+        "org_references": org_references or [],
     }
     try:
-        r.lpush(REDIS_AUDIT_LOG_KEY, json.dumps(log_data))
+        get_audit_log_queue().push(json.dumps(log_data))
     except Exception as e:
         logger.error(f"Failed to queue audit log: {e}")
 
-def flush_audit_logs_to_db(db_session: Session):
-    r = get_redis_client()
-    if not r:
-        return
-
-    logs = []
-    # Batch process up to 100 logs at a time
-    for _ in range(100):
-        log_json = r.rpop(REDIS_AUDIT_LOG_KEY)
-        if not log_json:
-            break
-        
-        try:
-            data = json.loads(log_json)
-            # Convert ISO string back to datetime object
-            data["created_at"] = datetime.fromisoformat(data["created_at"])
-            logs.append(AuditLog(**data))
-        except Exception as e:
-            logger.error(f"Failed to parse audit log from redis: {e}")
 
-    if logs:
+####################################################
+# Flush
+####################################################
+
+_AUDIT_LOG_COLUMNS = [column.name for column in AuditLog.__table__.columns if column.name != "id"]  # type: ignore
+
+_pipeline_stats: Dict[str, Any] = {
+    "batch_size": AUDIT_BATCH_MIN,
+    "last_flush_at": None,
+    "last_flush_count": 0,
+    "last_flush_seconds": 0.0,
+    "flushed_total": 0,
+    "failed_total": 0,
+}
+
+
+def _parse_audit_log(entry: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(entry)
+        row = {column: data.get(column) for column in _AUDIT_LOG_COLUMNS}
+        # Convert ISO string back to datetime object
+        row["created_at"] = datetime.fromisoformat(data["created_at"])
+        row["org_references"] = data.get("org_references") or []
+        return row
+    except Exception as e:
+        logger.error(f"Failed to parse audit log from queue: {e}")
+        return None
+
+
+def _resolve_org_ids(db_session: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Set the org_id of the logs queued without one. Logs whose org can't be
+    found are dropped. Each identifier is only looked up once per batch.
+    """
+    resolved: Dict[str, Optional[int]] = {}
+    kept = []
+    for row in rows:
+        references = row.pop("org_references")
+        for data in references if row["org_id"] is None else []:
+            key = json.dumps(data, sort_keys=True)
+            if key not in resolved:
+                resolved[key] = resolve_org_id(db_session, data)
+            if resolved[key] is not None:
+                row["org_id"] = resolved[key]
+                break
+        if row["org_id"] is not None:
+            kept.append(row)
+    return kept
+
+
+def _save_audit_logs(db_session: Session, rows: List[Dict[str, Any]]) -> None:
+    # executemany, sent as multi-row INSERT statements
+    db_session.connection().execute(insert(AuditLog.__table__), rows)  # type: ignore
+    db_session.commit()
+
+
+def _save_audit_logs_one_by_one(db_session: Session, rows: List[Dict[str, Any]]) -> int:
+    """Last resort for a batch that failed twice, drop the logs that can't be saved"""
+    saved = 0
+    for row in rows:
         try:
-            db_session.add_all(logs)
-            db_session.commit()
-            logger.info(f"Successfully flushed {len(logs)} audit logs to database.")
+            _save_audit_logs(db_session, [row])
+            saved += 1
         except Exception as e:
-            logger.error(f"Failed to save audit logs to database: {e}")
             db_session.rollback()
+            logger.error(f"Dropping audit log that can't be saved: {e}")
+    return saved
+
+
+def flush_audit_logs_to_db(db_session: Session) -> int:
+    """
+    Save queued audit logs with one multi-row INSERT per batch. Returns the
+    number of saved logs.
+
+    Entries stay in the processing list until their batch is committed. A
+    batch that fails is retried on the next flush, then saved log by log.
+    """
+    queue = get_audit_log_queue()
+    started = time.monotonic()
+    flushed = 0
+    batch_size = _pipeline_stats["batch_size"]
+
+    try:
+        queue.forward()
+        queue.heartbeat()
+        entries = queue.in_flight()
+        retrying = bool(entries)
+        for _ in range(AUDIT_FLUSH_MAX_BATCHES):
+            entries = entries or queue.dequeue(batch_size)
+            if not entries:
+                break
+
+            rows = [row for row in map(_parse_audit_log, entries) if row]
+            rows = _resolve_org_ids(db_session, rows)
+            if rows:
+                try:
+                    _save_audit_logs(db_session, rows)
+                    flushed += len(rows)
+                except Exception:
+                    db_session.rollback()
+                    if not retrying:
+                        raise
+                    flushed += _save_audit_logs_one_by_one(db_session, rows)
+            queue.ack()
+
+            # A leftover batch says nothing about the queue
+            if not retrying:
+                if len(entries) < batch_size:
+                    batch_size = max(AUDIT_BATCH_MIN, batch_size // 2)
+                    break
+                batch_size = min(AUDIT_BATCH_MAX, batch_size * 2)
+            entries, retrying = [], False
+    except Exception as e:
+        logger.error(f"Failed to save audit logs to database: {e}")
+        db_session.rollback()
+        _pipeline_stats["failed_total"] += 1
+
+    _pipeline_stats.update(
+        batch_size=batch_size,
+        last_flush_at=datetime.utcnow().isoformat(),
+        last_flush_count=flushed,
+        last_flush_seconds=round(time.monotonic() - started, 3),
+        flushed_total=_pipeline_stats["flushed_total"] + flushed,
+    )
+    if flushed:
+        logger.info(f"Successfully flushed {flushed} audit logs to database.")
+    return flushed
+
+
+def get_audit_pipeline_stats() -> Dict[str, Any]:
+    """Queue depth, lag of the oldest queued log and flush statistics"""
+    queue = get_audit_log_queue()
+    stats: Dict[str, Any] = {"backend": queue.backend, **queue.depth(), **_pipeline_stats}
+
+    stats["lag_seconds"] = 0.0
+    oldest = queue.oldest()
+    if oldest:
+        try:
+            created_at = datetime.fromisoformat(json.loads(oldest)["created_at"])
+            stats["lag_seconds"] = round((datetime.utcnow() - created_at).total_seconds(), 3)
+        except Exception:
+            pass
+    stats["dropped_total"] = queue.dropped
+    return stats
@@ -0,0 +1,242 @@
+import gzip
+import io
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, delete, or_, text, true
+from sqlmodel import Session, func, select
+from ee.db.audit_logs import AuditLog
+from src.db.organization_config import AuditLogsOrgConfig, OrganizationConfig
+from src.db.organizations import Organization
+from src.services.utils.upload_content import write_content
+
+logger = logging.getLogger(__name__)
+
+# On Postgres, audit logs are range partitioned by month of created_at:
+# auditlog_p2026_01 holds January 2026, and auditlog_default catches logs of
+# months without a partition. Partitions are created ahead by the maintenance
+# job, which also applies the retention of each org.
+AUDIT_LOG_DEFAULT_PARTITION = "auditlog_default"
+AUDIT_LOG_PARTITIONS_AHEAD = 3
+AUDIT_LOG_DEFAULT_RETENTION_DAYS = AuditLogsOrgConfig().retention_days
+# Seconds between runs of the maintenance job
+AUDIT_LOG_MAINTENANCE_INTERVAL = 6 * 60 * 60
+
+# Expired logs are archived to {content}/orgs/{org_uuid}/audit_logs/2026_01.jsonl.gz
+AUDIT_LOG_ARCHIVE_DIRECTORY = "audit_logs"
+# Stands for the org of logs whose org was deleted
+AUDIT_LOG_ARCHIVE_NO_ORG = "_deleted"
+AUDIT_LOG_ARCHIVE_CHUNK_SIZE = 1000
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"auditlog_p{month:%Y_%m}"
+
+
+def get_audit_log_retention_days(config: Optional[Dict[str, Any]]) -> int:
+    """Retention of the audit logs of an org, from its OrganizationConfig.config"""
+    audit_logs = ((config or {}).get("features") or {}).get("audit_logs") or {}
+    return int(audit_logs.get("retention_days") or AUDIT_LOG_DEFAULT_RETENTION_DAYS)
+
+
+def retention_start(retention_days: int, now: Optional[datetime] = None) -> datetime:
+    """
+    First month kept with this retention. Logs expire a whole month at a
+    time, so that the month partitions can be dropped.
+    """
+    return month_start((now or datetime.utcnow()) - timedelta(days=retention_days))
+
+
+def is_audit_log_partitioned(session: Session) -> bool:
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    statement = text(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'auditlog'"
+    )
+    return session.execute(statement).first() is not None
+
+
+def list_audit_log_partitions(session: Session) -> Dict[datetime, str]:
+    """Month partitions of the audit log table, by first day of the month"""
+    statement = text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'auditlog'"
+    )
+    partitions = {}
+    for name in session.execute(statement).scalars():
+        try:
+            partitions[datetime.strptime(name, "auditlog_p%Y_%m")] = name
+        except ValueError:
+            # Default partition
+            continue
+    return partitions
+
+
+def create_audit_log_partitions(session: Session, now: Optional[datetime] = None) -> List[str]:
+    """
+    Create the partitions of the current month and of the months ahead.
+    Does nothing when the table isn't partitioned (SQLite, or Postgres before
+    the partitioning migration).
+    """
+    if not is_audit_log_partitioned(session):
+        return []
+
+    existing = list_audit_log_partitions(session)
+    created = []
+    month = month_start(now or datetime.utcnow())
+    for _ in range(AUDIT_LOG_PARTITIONS_AHEAD + 1):
+        if month not in existing:
+            # Fails if the default partition already holds logs of this month
+            session.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF auditlog "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+                )
+            )
+            created.append(partition_name(month))
+        month = next_month(month)
+    session.commit()
+    return created
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def archive_audit_logs(session: Session, org_id: Optional[int], month: datetime) -> int:
+    """
+    Write the logs of an org for a month to a gzipped JSONL file on the
+    content store, and return their number. Archiving again overwrites the
+    file, so a failed retention run can safely be retried.
+    """
+    statement = (
+        select(AuditLog)
+        .where(
+            AuditLog.org_id == org_id if org_id is not None else AuditLog.org_id.is_(None),  # type: ignore
+            AuditLog.created_at >= month,
+            AuditLog.created_at < next_month(month),
+        )
+        .order_by(AuditLog.created_at, AuditLog.id)  # type: ignore
+        .execution_options(yield_per=AUDIT_LOG_ARCHIVE_CHUNK_SIZE)
+    )
+
+    buffer = io.BytesIO()
+    count = 0
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as archive:
+        for log in session.exec(statement):
+            archive.write(json.dumps(log.model_dump(), default=_json_default).encode() + b"\n")
+            count += 1
+
+    if count:
+        org_uuid = None
+        if org_id is not None:
+            org_uuid = session.exec(
+                select(Organization.org_uuid).where(Organization.id == org_id)
+            ).first()
+        write_content(
+            directory=AUDIT_LOG_ARCHIVE_DIRECTORY,
+            type_of_dir="orgs",
+            uuid=org_uuid or AUDIT_LOG_ARCHIVE_NO_ORG,
+            file_binary=buffer.getvalue(),
+            file_and_format=f"{month:%Y_%m}.jsonl.gz",
+        )
+    return count
+
+
+def _months_with_logs(
+    session: Session, partitions: Optional[Dict[datetime, str]], before: datetime
+) -> List[datetime]:
+    """Months before `before` that may hold logs, oldest first"""
+    months = set()
+    if partitions is None:
+        oldest = session.exec(
+            select(func.min(AuditLog.created_at)).where(AuditLog.created_at < before)
+        ).one()
+    else:
+        months.update(month for month in partitions if month < before)
+        oldest = session.execute(
+            text(f"SELECT min(created_at) FROM {AUDIT_LOG_DEFAULT_PARTITION} WHERE created_at < :before"),
+            {"before": before},
+        ).scalar()
+
+    if oldest is not None:
+        month = month_start(oldest)
+        while month < before:
+            months.add(month)
+            month = next_month(month)
+    return sorted(months)
+
+
+def apply_audit_log_retention(session: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Archive then delete the audit logs older than the retention of their org.
+
+    A month partition is dropped once it has expired for every org. Before
+    that, only the logs of the orgs with a shorter retention are deleted.
+    Logs without an org, or of orgs without a config, use the default
+    retention.
+    """
+    now = now or datetime.utcnow()
+    retentions = {
+        org_id: get_audit_log_retention_days(config)
+        for org_id, config in session.exec(
+            select(OrganizationConfig.org_id, OrganizationConfig.config)
+        ).all()
+    }
+    default_start = retention_start(AUDIT_LOG_DEFAULT_RETENTION_DAYS, now)
+    # Logs of some org may have expired in any month before the latest start
+    latest_start = max(
+        [default_start, *(retention_start(days, now) for days in retentions.values())]
+    )
+    partitions = list_audit_log_partitions(session) if is_audit_log_partitioned(session) else None
+
+    stats = {"archived": 0, "deleted_months": 0, "dropped_partitions": 0}
+    for month in _months_with_logs(session, partitions, before=latest_start):
+        kept = [
+            org_id for org_id, days in retentions.items() if retention_start(days, now) <= month
+        ]
+        if month < default_start:
+            expired = or_(AuditLog.org_id.is_(None), AuditLog.org_id.not_in(kept)) if kept else true()  # type: ignore
+        else:
+            expired_org_ids = [org_id for org_id in retentions if org_id not in kept]
+            if not expired_org_ids:
+                continue
+            expired = AuditLog.org_id.in_(expired_org_ids)  # type: ignore
+        in_month = and_(AuditLog.created_at >= month, AuditLog.created_at < next_month(month))
+
+        org_ids = session.exec(select(AuditLog.org_id).where(in_month, expired).distinct()).all()
+        for org_id in org_ids:
+            stats["archived"] += archive_audit_logs(session, org_id, month)
+
+        if partitions and month in partitions and month < default_start and not kept:
+            session.execute(text(f"DROP TABLE IF EXISTS {partitions[month]}"))
+            stats["dropped_partitions"] += 1
+        if org_ids:
+            # Only hits the default partition once the month partition is dropped
+            session.execute(delete(AuditLog).where(in_month, expired))
+            stats["deleted_months"] += 1
+        session.commit()
+
+    return stats
+
+
+def run_audit_log_maintenance(session: Session) -> Dict[str, Any]:
+    """Scheduled job: partitions ahead, then retention"""
+    created = create_audit_log_partitions(session)
+    stats = apply_audit_log_retention(session)
+    if created or any(stats.values()):
+        logger.info(f"EE Audit log maintenance: created partitions {created}, {stats}")
+    return {"created_partitions": created, **stats}
@@ -0,0 +1,84 @@
+"""Materialized course progress per user and course
+
+Revision ID: 4f2a9c1d7e30
+Revises: 83da779bef84
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "4f2a9c1d7e30"
+down_revision: Union[str, None] = "83da779bef84"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "courseprogress",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("completed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_activity", sa.String(), nullable=False, server_default=""),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("course.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("org_id", sa.Integer(), sa.ForeignKey("organization.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("creation_date", sa.String(), nullable=False, server_default=""),
+        sa.Column("update_date", sa.String(), nullable=False, server_default=""),
+    )
+    op.create_index(
+        "ix_courseprogress_user_id_course_id", "courseprogress", ["user_id", "course_id"], unique=True
+    )
+    op.create_index("ix_courseprogress_course_id", "courseprogress", ["course_id"])
+
+    # Backfill from the existing trail runs, same counting as
+    # src/services/trail/progress.py (published activities, distinct steps)
+    op.execute(
+        """
+        INSERT INTO courseprogress
+            (user_id, course_id, org_id, completed_count, total_count,
+             last_activity, creation_date, update_date)
+        SELECT
+            run.user_id,
+            run.course_id,
+            min(run.org_id),
+            (
+                SELECT count(DISTINCT step.activity_id)
+                FROM trailstep step
+                WHERE step.user_id = run.user_id
+                  AND step.course_id = run.course_id
+                  AND step.complete
+                  AND step.activity_id IN (
+                      SELECT ca.activity_id
+                      FROM chapteractivity ca
+                      JOIN activity a ON a.id = ca.activity_id
+                      WHERE ca.course_id = run.course_id AND a.published
+                  )
+            ),
+            (
+                SELECT count(DISTINCT ca.activity_id)
+                FROM chapteractivity ca
+                JOIN activity a ON a.id = ca.activity_id
+                WHERE ca.course_id = run.course_id AND a.published
+            ),
+            coalesce((
+                SELECT max(step.update_date)
+                FROM trailstep step
+                WHERE step.user_id = run.user_id AND step.course_id = run.course_id
+            ), ''),
+            now()::text,
+            now()::text
+        FROM trailrun run
+        GROUP BY run.user_id, run.course_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_courseprogress_course_id", table_name="courseprogress")
+    op.drop_index("ix_courseprogress_user_id_course_id", table_name="courseprogress")
+    op.drop_table("courseprogress")
@@ -0,0 +1,57 @@
+"""Full-text search indexes for courses, collections and users
+
+Revision ID: 83da779bef84
+Revises: 9e031a0358d1, c1a2b3c4d5e6
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "83da779bef84"
+down_revision: Union[str, Sequence[str], None] = ("9e031a0358d1", "c1a2b3c4d5e6")
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must stay identical to search_vector() in src/services/search/fulltext.py,
+# Postgres only uses an expression index for the exact same expression.
+def _search_vector(*columns: str) -> str:
+    document = f"coalesce({columns[0]}, '')"
+    for column in columns[1:]:
+        document = f"(({document} || ' ') || coalesce({column}, ''))"
+    return f"to_tsvector('simple'::regconfig, {document})"
+
+
+SEARCH_INDEXES = {
+    "ix_course_search": (
+        "course",
+        _search_vector("name", "description", "about", "learnings", "tags"),
+    ),
+    "ix_collection_search": (
+        "collection",
+        _search_vector("name", "description"),
+    ),
+    "ix_user_search": (
+        "user",
+        _search_vector("username", "first_name", "last_name", "bio"),
+    ),
+}
+
+
+def upgrade() -> None:
+    # Built concurrently, these tables are read on every page
+    with op.get_context().autocommit_block():
+        for index_name, (table_name, expression) in SEARCH_INDEXES.items():
+            op.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} '
+                f'ON "{table_name}" USING GIN ({expression})'
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name in SEARCH_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
@@ -0,0 +1,56 @@
+"""Stripe webhook inbox
+
+Revision ID: a8c5e3f1d920
+Revises: f4b9c2e7a106
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a8c5e3f1d920"
+down_revision: Union[str, None] = "f4b9c2e7a106"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "paymentswebhookevent",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_id", sa.String(), nullable=False),
+        sa.Column("webhook_type", sa.String(), nullable=False, server_default=""),
+        sa.Column("event_type", sa.String(), nullable=False, server_default=""),
+        sa.Column("stripe_account_id", sa.String(), nullable=False, server_default=""),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "PROCESSING", "PROCESSED", "FAILED", name="paymentswebhookeventstatusenum"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.Column("creation_date", sa.DateTime(), nullable=False),
+        sa.Column("update_date", sa.DateTime(), nullable=False),
+    )
+    # Duplicate deliveries hit this index and are ignored
+    op.create_index("ix_paymentswebhookevent_event_id", "paymentswebhookevent", ["event_id"], unique=True)
+    # Oldest unfinished event of each account
+    op.create_index(
+        "ix_paymentswebhookevent_status_account_id",
+        "paymentswebhookevent",
+        ["status", "stripe_account_id", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_paymentswebhookevent_status_account_id", table_name="paymentswebhookevent")
+    op.drop_index("ix_paymentswebhookevent_event_id", table_name="paymentswebhookevent")
+    op.drop_table("paymentswebhookevent")
+    sa.Enum(name="paymentswebhookeventstatusenum").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,43 @@
+"""Composite indexes for keyset pagination of audit logs
+
+Revision ID: b7e4d2a91c05
+Revises: 4f2a9c1d7e30
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e4d2a91c05"
+down_revision: Union[str, None] = "4f2a9c1d7e30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Pages are ordered by (created_at, id) descending within an org
+AUDIT_LOG_INDEXES = {
+    "ix_auditlog_org_id_created_at": "(org_id, created_at DESC, id DESC)",
+    "ix_auditlog_org_id_user_id_created_at": "(org_id, user_id, created_at DESC, id DESC)",
+}
+
+
+def upgrade() -> None:
+    # The EE audit log table is created by the app, skip databases without it
+    if not sa.inspect(op.get_bind()).has_table("auditlog"):
+        return
+
+    # Built concurrently, audit logs are written on every mutation
+    with op.get_context().autocommit_block():
+        for index_name, columns in AUDIT_LOG_INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON auditlog {columns}"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name in AUDIT_LOG_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
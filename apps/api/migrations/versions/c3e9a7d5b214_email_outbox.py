@@ -0,0 +1,56 @@
+"""Email outbox
+
+Revision ID: c3e9a7d5b214
+Revises: d5f2b8e4a317
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e9a7d5b214"
+down_revision: Union[str, None] = "d5f2b8e4a317"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "emailoutbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("org_id", sa.Integer(), nullable=True),
+        sa.Column("to_email", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("body", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "SENDING", "SENT", "FAILED", name="emailoutboxstatusenum"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("claimed_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("creation_date", sa.DateTime(), nullable=False),
+        sa.Column("update_date", sa.DateTime(), nullable=False),
+    )
+    # Emails due
+    op.create_index("ix_emailoutbox_status_next_attempt_at", "emailoutbox", ["status", "next_attempt_at"])
+    # Emails of each org sent within the rate limit window
+    op.create_index("ix_emailoutbox_org_id_claimed_at", "emailoutbox", ["org_id", "claimed_at"])
+    # Emails claimed by a worker
+    op.create_index("ix_emailoutbox_locked_by", "emailoutbox", ["locked_by"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_emailoutbox_locked_by", table_name="emailoutbox")
+    op.drop_index("ix_emailoutbox_org_id_claimed_at", table_name="emailoutbox")
+    op.drop_index("ix_emailoutbox_status_next_attempt_at", table_name="emailoutbox")
+    op.drop_table("emailoutbox")
+    sa.Enum(name="emailoutboxstatusenum").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,135 @@
+"""Partition audit logs by month of created_at
+
+Revision ID: c3f81a6d2b47
+Revises: b7e4d2a91c05
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f81a6d2b47"
+down_revision: Union[str, None] = "b7e4d2a91c05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Months created ahead, the maintenance job of the app keeps it up after that
+PARTITIONS_AHEAD = 3
+
+AUDIT_LOG_INDEXES = {
+    "ix_auditlog_org_id_created_at": "(org_id, created_at DESC, id DESC)",
+    "ix_auditlog_org_id_user_id_created_at": "(org_id, user_id, created_at DESC, id DESC)",
+}
+
+AUDIT_LOG_COLUMNS = "id, user_id, org_id, action, resource, resource_id, method, path, status_code, payload, ip_address, created_at"
+
+
+def is_partitioned(bind) -> bool:
+    return bind.execute(
+        sa.text(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'auditlog'"
+        )
+    ).first() is not None
+
+
+def next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def create_partitions(oldest: datetime) -> None:
+    month = oldest.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = datetime.utcnow()
+    for _ in range(PARTITIONS_AHEAD):
+        last = next_month(last.replace(day=1))
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE auditlog_p{month:%Y_%m} PARTITION OF auditlog "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+        )
+        month = next_month(month)
+    op.execute("CREATE TABLE auditlog_default PARTITION OF auditlog DEFAULT")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    exists = sa.inspect(bind).has_table("auditlog")
+    if exists and is_partitioned(bind):
+        return
+
+    # The EE audit log table may have been created by the app already, it's
+    # moved aside and copied into the partitioned table.
+    if exists:
+        op.execute("ALTER TABLE auditlog RENAME TO auditlog_legacy")
+        op.execute("ALTER TABLE auditlog_legacy RENAME CONSTRAINT auditlog_pkey TO auditlog_legacy_pkey")
+        for index_name in AUDIT_LOG_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    else:
+        op.execute("CREATE SEQUENCE auditlog_id_seq")
+
+    # Partition keys must be part of the primary key. The payload becomes
+    # JSONB, stored decomposed and compressed.
+    op.execute(
+        """
+        CREATE TABLE auditlog (
+            id INTEGER NOT NULL DEFAULT nextval('auditlog_id_seq'),
+            user_id INTEGER REFERENCES "user" (id) ON DELETE SET NULL,
+            org_id INTEGER REFERENCES organization (id) ON DELETE SET NULL,
+            action VARCHAR NOT NULL,
+            resource VARCHAR NOT NULL,
+            resource_id VARCHAR,
+            method VARCHAR NOT NULL,
+            path VARCHAR NOT NULL,
+            status_code INTEGER NOT NULL,
+            payload JSONB,
+            ip_address VARCHAR,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE auditlog_id_seq OWNED BY auditlog.id")
+
+    oldest = None
+    if exists:
+        oldest = bind.execute(sa.text("SELECT min(created_at) FROM auditlog_legacy")).scalar()
+    create_partitions(oldest or datetime.utcnow())
+
+    for index_name, columns in AUDIT_LOG_INDEXES.items():
+        op.execute(f"CREATE INDEX {index_name} ON auditlog {columns}")
+
+    if exists:
+        op.execute(
+            f"INSERT INTO auditlog ({AUDIT_LOG_COLUMNS}) "
+            f"SELECT {AUDIT_LOG_COLUMNS.replace('payload', 'payload::jsonb')} FROM auditlog_legacy"
+        )
+        op.execute("DROP TABLE auditlog_legacy")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not sa.inspect(bind).has_table("auditlog"):
+        return
+    if not is_partitioned(bind):
+        return
+
+    op.execute("CREATE TABLE auditlog_unpartitioned (LIKE auditlog INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO auditlog_unpartitioned SELECT {AUDIT_LOG_COLUMNS} FROM auditlog")
+    op.execute("ALTER SEQUENCE auditlog_id_seq OWNED BY auditlog_unpartitioned.id")
+    # Drops the partitions too
+    op.execute("DROP TABLE auditlog")
+    op.execute("ALTER TABLE auditlog_unpartitioned RENAME TO auditlog")
+    op.execute("ALTER TABLE auditlog ADD PRIMARY KEY (id)")
+    op.execute("ALTER TABLE auditlog ALTER COLUMN payload TYPE JSON USING payload::json")
+    op.execute('ALTER TABLE auditlog ADD FOREIGN KEY (user_id) REFERENCES "user" (id) ON DELETE SET NULL')
+    op.execute("ALTER TABLE auditlog ADD FOREIGN KEY (org_id) REFERENCES organization (id) ON DELETE SET NULL")
+    for index_name, columns in AUDIT_LOG_INDEXES.items():
+        op.execute(f"CREATE INDEX {index_name} ON auditlog {columns}")
@@ -0,0 +1,80 @@
+"""Indexes for the hot lookup columns
+
+Revision ID: d5f2b8e4a317
+Revises: a8c5e3f1d920
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f2b8e4a317"
+down_revision: Union[str, None] = "a8c5e3f1d920"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+# Same indexes as the __table_args__ of the models, which create them on new
+# databases. See src/tests/db/test_query_plans.py for the queries they serve.
+HOT_LOOKUP_INDEXES = {
+    "ix_course_course_uuid": ("course", ["course_uuid"], True),
+    "ix_course_org_id": ("course", ["org_id"], False),
+    "ix_activity_activity_uuid": ("activity", ["activity_uuid"], True),
+    "ix_activity_course_id": ("activity", ["course_id"], False),
+    "ix_resourceauthor_resource_uuid_user_id": ("resourceauthor", ["resource_uuid", "user_id"], False),
+    "ix_resourceauthor_user_id": ("resourceauthor", ["user_id"], False),
+    "ix_trailstep_user_id_course_id": ("trailstep", ["user_id", "course_id"], False),
+    "ix_trailstep_user_id_activity_id": ("trailstep", ["user_id", "activity_id"], False),
+    "ix_trailrun_user_id_course_id": ("trailrun", ["user_id", "course_id"], False),
+    "ix_chapteractivity_chapter_id": ("chapteractivity", ["chapter_id"], False),
+    "ix_chapteractivity_activity_id": ("chapteractivity", ["activity_id"], False),
+    "ix_chapteractivity_course_id": ("chapteractivity", ["course_id"], False),
+    "ix_coursechapter_course_id": ("coursechapter", ["course_id"], False),
+    "ix_coursechapter_chapter_id": ("coursechapter", ["chapter_id"], False),
+    "ix_userorganization_user_id_org_id": ("userorganization", ["user_id", "org_id"], False),
+    "ix_userorganization_org_id": ("userorganization", ["org_id"], False),
+    "ix_assignmenttasksubmission_task_id_user_id": (
+        "assignmenttasksubmission",
+        ["assignment_task_id", "user_id"],
+        False,
+    ),
+}
+
+
+def _has_duplicates(table: str, columns: list[str]) -> bool:
+    column_list = ", ".join(columns)
+    statement = f"SELECT 1 FROM {table} GROUP BY {column_list} HAVING COUNT(*) > 1 LIMIT 1"
+    return op.get_bind().execute(sa.text(statement)).first() is not None
+
+
+def upgrade() -> None:
+    # Uniqueness is checked first, a failed concurrent build leaves an
+    # invalid index behind
+    unique = {
+        index_name
+        for index_name, (table, columns, is_unique) in HOT_LOOKUP_INDEXES.items()
+        if is_unique and not _has_duplicates(table, columns)
+    }
+    for index_name, (table, columns, is_unique) in HOT_LOOKUP_INDEXES.items():
+        if is_unique and index_name not in unique:
+            logger.warning(f"Duplicate values in {table}({', '.join(columns)}), {index_name} is created non unique")
+
+    # Built concurrently, these tables are written by every learner
+    with op.get_context().autocommit_block():
+        for index_name, (table, columns, _) in HOT_LOOKUP_INDEXES.items():
+            kind = "UNIQUE INDEX" if index_name in unique else "INDEX"
+            op.execute(
+                f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {index_name} ON {table} ({', '.join(columns)})"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name in HOT_LOOKUP_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
@@ -0,0 +1,47 @@
+"""Daily rollup of affiliate clicks
+
+Revision ID: e2d7a4c9f813
+Revises: c3f81a6d2b47
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e2d7a4c9f813"
+down_revision: Union[str, None] = "c3f81a6d2b47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "affiliateclickdailystats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("org_id", sa.BigInteger(), sa.ForeignKey("organization.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("affiliate_id", sa.BigInteger(), sa.ForeignKey("affiliate.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("clicks", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ix_affiliateclickdailystats_org_day_affiliate",
+        "affiliateclickdailystats",
+        ["org_id", "day", "affiliate_id"],
+        unique=True,
+    )
+    op.add_column("affiliateprogram", sa.Column("clicks_rolled_up_until", sa.Date(), nullable=True))
+
+    # Stats of a date range, and rollups of the days not rolled up yet
+    op.create_index("ix_affiliateclick_org_id_creation_date", "affiliateclick", ["org_id", "creation_date"])
+    op.create_index("ix_affiliateattribution_org_affiliate", "affiliateattribution", ["org_id", "affiliate_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_affiliateattribution_org_affiliate", table_name="affiliateattribution")
+    op.drop_index("ix_affiliateclick_org_id_creation_date", table_name="affiliateclick")
+    op.drop_column("affiliateprogram", "clicks_rolled_up_until")
+    op.drop_index("ix_affiliateclickdailystats_org_day_affiliate", table_name="affiliateclickdailystats")
+    op.drop_table("affiliateclickdailystats")
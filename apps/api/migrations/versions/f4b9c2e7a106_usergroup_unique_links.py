@@ -0,0 +1,49 @@
+"""Unique usergroup members and resources
+
+Revision ID: f4b9c2e7a106
+Revises: e2d7a4c9f813
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4b9c2e7a106"
+down_revision: Union[str, None] = "e2d7a4c9f813"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bulk adds insert with ON CONFLICT DO NOTHING, keep the oldest duplicate
+    op.execute(
+        """
+        DELETE FROM usergroupuser a USING usergroupuser b
+        WHERE a.usergroup_id = b.usergroup_id AND a.user_id = b.user_id AND a.id > b.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM usergroupresource a USING usergroupresource b
+        WHERE a.usergroup_id = b.usergroup_id AND a.resource_uuid = b.resource_uuid AND a.id > b.id
+        """
+    )
+    op.create_index(
+        "ix_usergroupuser_usergroup_id_user_id",
+        "usergroupuser",
+        ["usergroup_id", "user_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_usergroupresource_usergroup_id_resource_uuid",
+        "usergroupresource",
+        ["usergroup_id", "resource_uuid"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_usergroupresource_usergroup_id_resource_uuid", table_name="usergroupresource")
+    op.drop_index("ix_usergroupuser_usergroup_id_user_id", table_name="usergroupuser")
@@ -0,0 +1,127 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from redis.exceptions import RedisError
+from src.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache with LRU eviction and a per-entry
+    time to live. Each worker process holds its own copy, so it must only
+    store data that is either cheap to be slightly stale or explicitly
+    invalidated by the writers.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedVersions:
+    """
+    Versions of cached data, shared by every worker through Redis. Writers
+    bump the version of what they changed, readers cache an entry under the
+    version read before building it, so that an entry built before a write,
+    in any worker, is never served after it.
+
+    A version key lives `ttl` seconds after its last bump, which must be at
+    least the time to live of the cached entries: once it is gone, entries
+    cached under the absent version (0) before the bump have expired too.
+    Versions come from one counter per namespace and are never reused.
+
+    Without Redis, versions are only kept in process. When Redis fails,
+    `get` returns None and callers must bypass their cache.
+    """
+
+    def __init__(self, namespace: str, ttl: float):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local: dict[Hashable, tuple[int, float]] = {}
+        self._local_counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _key(self, key: Hashable) -> str:
+        return f"cache_version:{self.namespace}:{key}"
+
+    def get(self, key: Hashable) -> Optional[int]:
+        versions = self.get_many([key])
+        return versions[0] if versions is not None else None
+
+    def get_many(self, keys: list) -> Optional[tuple[int, ...]]:
+        r = get_redis_client()
+        if r is None:
+            now = time.monotonic()
+            with self._lock:
+                return tuple(
+                    version if expires_at > now else 0
+                    for version, expires_at in (self._local.get(key, (0, 0.0)) for key in keys)
+                )
+
+        try:
+            values = r.mget([self._key(key) for key in keys])
+        except RedisError as e:
+            logger.warning(f"Cache versions of {self.namespace} unavailable: {e}")
+            return None
+
+        return tuple(int(value) if value is not None else 0 for value in values)
+
+    def bump(self, key: Hashable) -> None:
+        r = get_redis_client()
+        if r is None:
+            now = time.monotonic()
+            with self._lock:
+                self._local[key] = (next(self._local_counter), now + self.ttl)
+                # Expired versions read as 0 anyway, this keeps the dict bounded
+                if len(self._local) > 1024:
+                    self._local = {
+                        name: entry for name, entry in self._local.items() if entry[1] > now
+                    }
+            return
+
+        try:
+            version = r.incr(f"cache_version:{self.namespace}")
+            r.set(self._key(key), version, ex=int(self.ttl))
+        except RedisError as e:
+            # Other workers keep their entries until they expire
+            logger.error(f"Could not bump the cache version of {self.namespace}:{key}: {e}")
@@ -0,0 +1,15 @@
+from typing import TypeAlias, Union
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Session given to the services of the read-heavy routers: a sync Session, or
+# an AsyncSession when the async engine mode is on (see get_async_db_session)
+DBSession: TypeAlias = Union[Session, AsyncSession]
+
+
+async def db_exec(db_session: DBSession, statement):
+    """Execute a statement on either kind of session and return its result"""
+    if isinstance(db_session, AsyncSession):
+        return await db_session.exec(statement)
+
+    return db_session.exec(statement)
@@ -0,0 +1,82 @@
+import logging
+import os
+from datetime import datetime
+from sqlmodel import Session, func, select
+from src.core.events.database import engine
+from src.db.organizations import Organization
+from src.db.user_organizations import UserOrganization
+from src.db.users import User
+from src.security.rbac.context import invalidate_user_roles_cache
+from src.services.users.cache import invalidate_user_session_cache
+
+
+def bootstrap_admin():
+    """
+    Bootstrap admin (Render free plan has no shell).
+    If NEXO_BOOTSTRAP_ADMIN_EMAIL matches an existing user's email, promote
+    them to admin (role_id=1) in the target org. Runs once at startup, so
+    the user has to sign up before the app is (re)started.
+
+    IMPORTANT: Remove this env var after bootstrapping.
+    """
+    bootstrap_email = (
+        os.getenv("NEXO_BOOTSTRAP_ADMIN_EMAIL")
+        or os.getenv("BOOTSTRAP_ADMIN_EMAIL")
+    )
+    bootstrap_org_slug = (
+        os.getenv("NEXO_BOOTSTRAP_ADMIN_ORG_SLUG")
+        or os.getenv("BOOTSTRAP_ADMIN_ORG_SLUG")
+        or "defaultorg"
+    )
+
+    if not bootstrap_email:
+        return
+
+    try:
+        with Session(engine) as db_session:
+            user = db_session.exec(
+                select(User).where(func.lower(User.email) == bootstrap_email.lower())
+            ).first()
+            if not user or user.id is None:
+                logging.warning(
+                    f"Bootstrap admin: no user with email '{bootstrap_email}'; cannot promote."
+                )
+                return
+
+            org = db_session.exec(
+                select(Organization).where(Organization.slug == bootstrap_org_slug)
+            ).first()
+            if not org or org.id is None:
+                logging.warning(
+                    f"Bootstrap admin: org '{bootstrap_org_slug}' not found; cannot promote."
+                )
+                return
+
+            uo = db_session.exec(
+                select(UserOrganization).where(
+                    UserOrganization.user_id == user.id,
+                    UserOrganization.org_id == org.id,
+                )
+            ).first()
+            if uo:
+                if int(uo.role_id) == 1:
+                    return
+                uo.role_id = 1
+                uo.update_date = str(datetime.now())
+            else:
+                uo = UserOrganization(
+                    user_id=int(user.id),
+                    org_id=int(org.id),
+                    role_id=1,
+                    creation_date=str(datetime.now()),
+                    update_date=str(datetime.now()),
+                )
+            db_session.add(uo)
+            db_session.commit()
+
+            invalidate_user_roles_cache(user.id)
+            invalidate_user_session_cache(user.id)
+            logging.info(f"Bootstrap admin: promoted '{bootstrap_email}' in '{bootstrap_org_slug}'.")
+    except Exception as e:
+        # Never block startup if bootstrap logic fails.
+        logging.warning(f"Bootstrap admin failed: {e}")
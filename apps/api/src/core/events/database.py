@@ -39,7 +39,10 @@ from urllib.parse import urlparse, urlunparse, quote, unquote, parse_qs
 from config.config import get_nexo_config
 from fastapi import FastAPI
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy import event
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 # Workaround for psycopg2 encoding issues on Windows
 # Patch psycopg2's connection to handle encoding errors
@@ -295,6 +298,34 @@ else:
     def receive_checkin(dbapi_connection, connection_record):
         logging.debug("Connection returned to pool")
 
+# Async engine, used by the read-heavy routers through get_async_db_session when
+# database_config.async_engine is on. The sync engine above is always created:
+# the other routers, the CLI and the migrations keep using it.
+async_engine: AsyncEngine | None = None
+
+if nexo_config.database_config.async_engine:
+    if is_testing:
+        async_engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    else:
+        # asyncpg takes the parsed parameters as well, no DSN string to decode
+        async_url = URL.create(
+            "postgresql+asyncpg",
+            username=db_user,
+            password=db_password,
+            host=db_host,
+            port=db_port,
+            database=db_name,
+        )
+        async_engine = create_async_engine(
+            async_url,
+            echo=False,
+            pool_pre_ping=True,
+            pool_size=20,
+            max_overflow=10,
+            pool_recycle=300,
+            pool_timeout=30,
+        )
+
 # Only create tables if not in test mode (tests will handle this themselves)
 # NOTE: We defer table creation to avoid encoding issues on Windows during module import
 # Tables will be created in connect_to_db() instead
@@ -304,6 +335,7 @@ else:
 
 async def connect_to_db(app: FastAPI):
     app.db_engine = engine  # type: ignore
+    app.async_db_engine = async_engine  # type: ignore
     logging.info("Nexo Academy database has been started.")
     # Only create tables if not in test mode
     if not is_testing:
@@ -313,6 +345,22 @@ def get_db_session():
     with Session(engine) as session:
         yield session
 
+async def get_async_db_session():
+    """
+    Session for the read-heavy routers (courses, chapters, trail, search, explore).
+    Yields an AsyncSession when the async engine mode is on, so queries don't block
+    the event loop, and the regular sync Session otherwise. The services behind
+    these routers accept both, see src.core.db_session.
+    """
+    if async_engine is None:
+        with Session(engine) as session:
+            yield session
+    else:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
 async def close_database(app: FastAPI):
+    if async_engine is not None:
+        await async_engine.dispose()
     logging.info("Nexo Academy has been shut down.")
     return app
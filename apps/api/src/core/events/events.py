@@ -1,11 +1,16 @@
+import asyncio
 from typing import Callable
 from fastapi import FastAPI
 from config.config import NexoConfig, get_nexo_config
 from src.core.events.autoinstall import auto_install
+from src.core.events.bootstrap import bootstrap_admin
 from src.core.events.content import check_content_directory
-from src.core.events.database import close_database, connect_to_db
+from src.core.events.database import close_database, connect_to_db, engine
 from src.core.events.logs import create_logs_dir
+from src.core.redis_client import close_redis_client
 from src.core.ee_hooks import run_ee_startup
+from src.services.affiliates.clicks import affiliate_click_flusher
+from src.services.email.outbox import email_outbox_worker
 
 
 def startup_app(app: FastAPI) -> Callable:
@@ -26,6 +31,15 @@ def startup_app(app: FastAPI) -> Callable:
         # Check if auto-installation is needed
         auto_install()
 
+        # Promote the bootstrap admin, if configured
+        bootstrap_admin()
+
+        # Save the buffered affiliate clicks in bulk
+        asyncio.create_task(affiliate_click_flusher(engine))
+
+        # Send the emails queued by requests
+        asyncio.create_task(email_outbox_worker(engine))
+
         # Start Enterprise Edition Startup tasks if available
         run_ee_startup(app)
 
@@ -35,5 +49,6 @@ def startup_app(app: FastAPI) -> Callable:
 def shutdown_app(app: FastAPI) -> Callable:
     async def close_app() -> None:
         await close_database(app)
+        close_redis_client()
 
     return close_app
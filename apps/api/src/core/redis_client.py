@@ -0,0 +1,50 @@
+import logging
+import threading
+from typing import Optional
+import redis
+from config.config import get_nexo_config
+
+logger = logging.getLogger(__name__)
+
+_redis_client: Optional[redis.Redis] = None
+_redis_client_lock = threading.Lock()
+
+
+def get_redis_client() -> Optional[redis.Redis]:
+    """
+    Return the process-wide Redis client, or None if Redis is not configured.
+
+    The client is created once and keeps its own connection pool, so callers
+    must not create clients of their own nor ping before every command.
+    Connection errors surface on the first command and are left to callers.
+    """
+    global _redis_client
+
+    if _redis_client is not None:
+        return _redis_client
+
+    with _redis_client_lock:
+        if _redis_client is None:
+            redis_conn_string = get_nexo_config().redis_config.redis_connection_string
+            if not redis_conn_string:
+                return None
+
+            _redis_client = redis.Redis.from_url(
+                redis_conn_string,
+                max_connections=50,
+                health_check_interval=30,
+                socket_keepalive=True,
+            )
+            logger.info("Redis connection pool created")
+
+    return _redis_client
+
+
+def close_redis_client() -> None:
+    global _redis_client
+
+    with _redis_client_lock:
+        if _redis_client is not None:
+            _redis_client.close()
+            _redis_client.connection_pool.disconnect()
+            _redis_client = None
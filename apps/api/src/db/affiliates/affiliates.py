@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from enum import Enum
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 from sqlmodel import SQLModel, Field, Column, BigInteger, ForeignKey, String
 
@@ -40,8 +40,10 @@ class AffiliateProgram(AffiliateProgramBase, table=True):
     org_id: int = Field(
         sa_column=Column(BigInteger, ForeignKey("organization.id", ondelete="CASCADE"))
     )
-    creation_date: datetime = Field(default=datetime.now())
-    update_date: datetime = Field(default=datetime.now())
+    creation_date: datetime = Field(default_factory=datetime.now)
+    update_date: datetime = Field(default_factory=datetime.now)
+    # Last day whose clicks are in AffiliateClickDailyStats
+    clicks_rolled_up_until: Optional[date] = None
 
 
 class AffiliateBase(SQLModel):
@@ -60,8 +62,8 @@ class Affiliate(AffiliateBase, table=True):
         default=None,
         sa_column=Column(BigInteger, ForeignKey("user.id", ondelete="SET NULL"), nullable=True),
     )
-    creation_date: datetime = Field(default=datetime.now())
-    update_date: datetime = Field(default=datetime.now())
+    creation_date: datetime = Field(default_factory=datetime.now)
+    update_date: datetime = Field(default_factory=datetime.now)
 
 
 class AffiliateCodeBase(SQLModel):
@@ -77,7 +79,7 @@ class AffiliateCode(AffiliateCodeBase, table=True):
     affiliate_id: int = Field(
         sa_column=Column(BigInteger, ForeignKey("affiliate.id", ondelete="CASCADE"))
     )
-    creation_date: datetime = Field(default=datetime.now())
+    creation_date: datetime = Field(default_factory=datetime.now)
 
 
 class AffiliateClickBase(SQLModel):
@@ -94,11 +96,24 @@ class AffiliateClick(AffiliateClickBase, table=True):
     affiliate_code_id: int = Field(
         sa_column=Column(BigInteger, ForeignKey("affiliatecode.id", ondelete="CASCADE"))
     )
-    creation_date: datetime = Field(default=datetime.now())
+    creation_date: datetime = Field(default_factory=datetime.now)
+
+
+class AffiliateClickDailyStats(SQLModel, table=True):
+    """Clicks per affiliate and day, rolled up from AffiliateClick"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    org_id: int = Field(
+        sa_column=Column(BigInteger, ForeignKey("organization.id", ondelete="CASCADE"))
+    )
+    affiliate_id: int = Field(
+        sa_column=Column(BigInteger, ForeignKey("affiliate.id", ondelete="CASCADE"))
+    )
+    day: date
+    clicks: int = 0
 
 
 class AffiliateAttributionBase(SQLModel):
-    attributed_at: datetime = Field(default=datetime.now())
+    attributed_at: datetime = Field(default_factory=datetime.now)
     expires_at: Optional[datetime] = None
     locked: bool = False
     locked_at: Optional[datetime] = None
@@ -135,7 +150,7 @@ class AffiliateCommissionBase(SQLModel):
     status: AffiliateCommissionStatusEnum = AffiliateCommissionStatusEnum.PENDING
     provider_event_id: str = ""  # stripe event id or checkout session id
     provider_subscription_id: Optional[str] = None
-    creation_date: datetime = Field(default=datetime.now())
+    creation_date: datetime = Field(default_factory=datetime.now)
     paid_at: Optional[datetime] = None
     reversed_at: Optional[datetime] = None
 
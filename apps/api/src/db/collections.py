@@ -36,6 +36,8 @@ class CollectionUpdate(CollectionBase):
 class CollectionRead(CollectionBase):
     id: int
     courses: list
+    # Courses in the collection, when `courses` only lists the first ones
+    courses_count: Optional[int] = None
     collection_uuid: str
     creation_date: str
     update_date: str
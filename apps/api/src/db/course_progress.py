@@ -0,0 +1,29 @@
+from typing import Optional
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlmodel import Field, SQLModel
+
+
+class CourseProgress(SQLModel, table=True):
+    """
+    Progress of a user in a course, maintained by the trail services.
+    Only published activities are counted (see src/services/trail/progress.py).
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    completed_count: int = 0
+    total_count: int = 0
+    last_activity: str = ""
+    # foreign keys
+    user_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"))
+    )
+    course_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("course.id", ondelete="CASCADE"))
+    )
+    org_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("organization.id", ondelete="CASCADE"))
+    )
+    # timestamps
+    creation_date: str = ""
+    update_date: str = ""
+
@@ -1,5 +1,5 @@
 from typing import Optional, Dict
-from sqlalchemy import JSON, Column, ForeignKey
+from sqlalchemy import JSON, Column, ForeignKey, Index
 from sqlmodel import Field, SQLModel
 from enum import Enum
 
@@ -203,6 +203,10 @@ class AssignmentTaskSubmissionUpdate(SQLModel):
 class AssignmentTaskSubmission(AssignmentTaskSubmissionBase, table=True):
     """Represents a submission for a specific assignment task with grade and feedback."""
 
+    __table_args__ = (
+        Index("ix_assignmenttasksubmission_task_id_user_id", "assignment_task_id", "user_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     assignment_task_submission_uuid: str
     task_submission: Dict = Field(default={}, sa_column=Column(JSON))
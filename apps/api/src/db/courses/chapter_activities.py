@@ -1,8 +1,14 @@
 from typing import Optional
-from sqlalchemy import BigInteger, Column, ForeignKey, Integer
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, Index
 from sqlmodel import Field, SQLModel
 
 class ChapterActivity(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_chapteractivity_chapter_id", "chapter_id"),
+        Index("ix_chapteractivity_activity_id", "activity_id"),
+        Index("ix_chapteractivity_course_id", "course_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     order: int
     chapter_id: int = Field(sa_column=Column(BigInteger, ForeignKey("chapter.id", ondelete="CASCADE")))
@@ -1,9 +1,14 @@
 from typing import Optional
-from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy import Column, ForeignKey, Integer, Index
 from sqlmodel import Field, SQLModel
 
 
 class CourseChapter(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_coursechapter_course_id", "course_id"),
+        Index("ix_coursechapter_chapter_id", "chapter_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     order: int
     course_id: int = Field(
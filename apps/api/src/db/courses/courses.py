@@ -1,5 +1,5 @@
 from typing import List, Optional
-from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy import Column, ForeignKey, Integer, Index
 from sqlmodel import Field, SQLModel
 from enum import Enum
 from src.db.users import UserRead
@@ -36,6 +36,11 @@ class CourseBase(SQLModel):
 
 
 class Course(CourseBase, table=True):
+    __table_args__ = (
+        Index("ix_course_course_uuid", "course_uuid", unique=True),
+        Index("ix_course_org_id", "org_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     org_id: int = Field(
         sa_column=Column(Integer, ForeignKey("organization.id", ondelete="CASCADE"))
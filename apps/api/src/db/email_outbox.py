@@ -0,0 +1,43 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class EmailOutboxStatusEnum(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailOutbox(SQLModel, table=True):
+    """
+    Emails waiting to be sent. Requests only record them here, and a
+    background worker sends them in batches, retrying the failed ones.
+    """
+
+    __table_args__ = (
+        Index("ix_emailoutbox_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_emailoutbox_org_id_claimed_at", "org_id", "claimed_at"),
+        Index("ix_emailoutbox_locked_by", "locked_by"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Emails of an org are rate limited together, system emails have no org
+    org_id: Optional[int] = None
+    to_email: str
+    subject: str
+    body: str
+    status: EmailOutboxStatusEnum = EmailOutboxStatusEnum.PENDING
+    attempts: int = 0
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = Field(default_factory=datetime.now)
+    # Lease of the worker sending the email, reclaimed once expired
+    locked_by: Optional[str] = None
+    locked_until: Optional[datetime] = None
+    claimed_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    creation_date: datetime = Field(default_factory=datetime.now)
+    update_date: datetime = Field(default_factory=datetime.now)
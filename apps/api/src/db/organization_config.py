@@ -62,6 +62,12 @@ class APIOrgConfig(BaseModel):
     limit: int = 10
 
 
+class AuditLogsOrgConfig(BaseModel):
+    enabled: bool = True
+    # Older logs are archived to the content store, then deleted
+    retention_days: int = 365
+
+
 class OrgFeatureConfig(BaseModel):
     courses: CourseOrgConfig = CourseOrgConfig()
     members: MemberOrgConfig = MemberOrgConfig()
@@ -74,6 +80,7 @@ class OrgFeatureConfig(BaseModel):
     analytics: AnalyticsOrgConfig = AnalyticsOrgConfig()
     collaboration: CollaborationOrgConfig = CollaborationOrgConfig()
     api: APIOrgConfig = APIOrgConfig()
+    audit_logs: AuditLogsOrgConfig = AuditLogsOrgConfig()
 
 
 # General
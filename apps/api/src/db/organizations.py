@@ -65,3 +65,10 @@ class OrganizationUser(BaseModel):
     from src.db.users import UserRead
     user: UserRead
     role: RoleRead
+
+
+class OrganizationUserPaginated(BaseModel):
+    items: list[OrganizationUser]
+    total: int
+    page: int
+    limit: int
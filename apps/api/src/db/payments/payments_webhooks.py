@@ -0,0 +1,36 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from sqlalchemy import JSON
+from sqlmodel import Field, SQLModel, Column, String
+
+
+class PaymentsWebhookEventStatusEnum(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class PaymentsWebhookEvent(SQLModel, table=True):
+    """
+    Inbox of the verified provider webhook events, processed in the
+    background. Deliveries of an already received event id are ignored.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    event_id: str = Field(sa_column=Column(String, unique=True, index=True))
+    webhook_type: str = ""
+    event_type: str = ""
+    # Events of the same account are processed one at a time, in order
+    stripe_account_id: str = ""
+    payload: dict = Field(default={}, sa_column=Column(JSON))
+    status: PaymentsWebhookEventStatusEnum = PaymentsWebhookEventStatusEnum.PENDING
+    attempts: int = 0
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = Field(default_factory=datetime.now)
+    # Lease of the worker processing the event, reclaimed once expired
+    locked_until: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+    creation_date: datetime = Field(default_factory=datetime.now)
+    update_date: datetime = Field(default_factory=datetime.now)
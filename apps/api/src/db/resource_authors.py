@@ -1,6 +1,6 @@
 from enum import Enum
 from typing import Optional
-from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy import Column, ForeignKey, Integer, Index
 from sqlmodel import Field, SQLModel
 
 
@@ -17,6 +17,11 @@ class ResourceAuthorshipStatusEnum(str, Enum):
 
 
 class ResourceAuthor(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_resourceauthor_resource_uuid_user_id", "resource_uuid", "user_id"),
+        Index("ix_resourceauthor_user_id", "user_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     resource_uuid: str
     user_id: int = Field(
@@ -1,6 +1,6 @@
 from typing import Optional
 from pydantic import BaseModel
-from sqlalchemy import JSON, Column, ForeignKey, Integer
+from sqlalchemy import JSON, Column, ForeignKey, Integer, Index
 from sqlmodel import Field, SQLModel
 from enum import Enum
 
@@ -19,6 +19,10 @@ class StatusEnum(str, Enum):
 
 
 class TrailRun(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_trailrun_user_id_course_id", "user_id", "course_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     data: dict = Field(default={}, sa_column=Column(JSON))
     status: StatusEnum = StatusEnum.STATUS_IN_PROGRESS
@@ -59,7 +63,8 @@ class TrailRunRead(BaseModel):
     # timestamps
     creation_date: Optional[str]
     update_date: Optional[str]
-    # number of activities in course
+    # number of published activities in course, and completed by the user
     course_total_steps: int
+    course_completed_steps: int = 0
     steps: list[TrailStep]
     pass
@@ -1,9 +1,14 @@
 from typing import Optional
-from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy import Column, ForeignKey, Integer, Index
 from sqlmodel import Field, SQLModel
 
 
 class UserOrganization(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_userorganization_user_id_org_id", "user_id", "org_id"),
+        Index("ix_userorganization_org_id", "org_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(default=None, foreign_key="user.id")
     org_id: int = Field(
@@ -1,9 +1,19 @@
 from typing import Optional
-from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy import Column, ForeignKey, Index, Integer
 from sqlmodel import Field, SQLModel
 
 
 class UserGroupResource(SQLModel, table=True):
+    __table_args__ = (
+        # Bulk adds insert with ON CONFLICT DO NOTHING on this index
+        Index(
+            "ix_usergroupresource_usergroup_id_resource_uuid",
+            "usergroup_id",
+            "resource_uuid",
+            unique=True,
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     usergroup_id: int = Field(
         sa_column=Column(Integer, ForeignKey("usergroup.id", ondelete="CASCADE"))
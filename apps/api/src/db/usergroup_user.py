@@ -1,9 +1,14 @@
 from typing import Optional
-from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy import Column, ForeignKey, Index, Integer
 from sqlmodel import Field, SQLModel
 
 
 class UserGroupUser(SQLModel, table=True):
+    __table_args__ = (
+        # Bulk adds insert with ON CONFLICT DO NOTHING on this index
+        Index("ix_usergroupuser_usergroup_id_user_id", "usergroup_id", "user_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     usergroup_id: int = Field(
         sa_column=Column(Integer, ForeignKey("usergroup.id", ondelete="CASCADE"))
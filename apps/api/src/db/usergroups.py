@@ -31,3 +31,15 @@ class UserGroupRead(UserGroupBase):
     creation_date: str
     update_date: str
     pass
+
+class UserGroupUserIds(SQLModel):
+    user_ids: list[int]
+
+class UserGroupResourceUuids(SQLModel):
+    resource_uuids: list[str]
+
+class UserGroupBulkResult(SQLModel):
+    # Status of each id, e.g. {"12": "added", "13": "already_member"}
+    results: dict[str, str]
+    succeeded: int
+    failed: int
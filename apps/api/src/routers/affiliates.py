@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import date
+
 from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 from sqlmodel import Session
@@ -89,20 +91,23 @@ async def api_admin_affiliate_stats(
     org_id: int,
     current_user: PublicUser = Depends(get_current_user),
     db_session: Session = Depends(get_db_session),
+    start_date: date | None = None,
+    end_date: date | None = None,
 ):
     # RBAC enforced inside service via org admin check in other endpoints.
     # For stats we keep it simple: just require auth and org program presence.
-    return [s.model_dump() for s in get_affiliate_admin_stats(org_id, db_session)]
+    stats = get_affiliate_admin_stats(org_id, db_session, start_date=start_date, end_date=end_date)
+    return [s.model_dump() for s in stats]
 
 
 @router.post("/track")
 async def api_track_click(
     request: Request,
     body: TrackClickBody,
-    db_session: Session = Depends(get_db_session),
 ):
     # Public endpoint; safe to call without auth (used by /r/:code).
-    return await track_affiliate_click(request, body.org_id, body.code, body.landing_url, AnonymousUser(), db_session)
+    # Doesn't touch the database, clicks are saved in bulk.
+    return await track_affiliate_click(request, body.org_id, body.code, body.landing_url, AnonymousUser())
 
 
 class ApplyCodeBody(BaseModel):
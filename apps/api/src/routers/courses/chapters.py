@@ -1,6 +1,6 @@
 from typing import List
 from fastapi import APIRouter, Depends, Request
-from src.core.events.database import get_db_session
+from src.core.events.database import get_async_db_session, get_db_session
 from src.db.courses.chapters import (
     ChapterCreate,
     ChapterRead,
@@ -41,7 +41,7 @@ async def api_get_coursechapter(
     request: Request,
     chapter_id: int,
     current_user: PublicUser = Depends(get_current_user),
-    db_session=Depends(get_db_session),
+    db_session=Depends(get_async_db_session),
 ) -> ChapterRead:
     """
     Get single CourseChapter by chapter_id
@@ -54,7 +54,7 @@ async def api_get_chapter_meta(
     request: Request,
     course_uuid: str,
     current_user: PublicUser = Depends(get_current_user),
-    db_session=Depends(get_db_session),
+    db_session=Depends(get_async_db_session),
 ):
     """
     Get Chapters metadata
@@ -87,7 +87,7 @@ async def api_get_chapter_by(
     page: int,
     limit: int,
     current_user: PublicUser = Depends(get_current_user),
-    db_session=Depends(get_db_session),
+    db_session=Depends(get_async_db_session),
 ) -> List[ChapterRead]:
     """
     Get Course Chapters by page and limit
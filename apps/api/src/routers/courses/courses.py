@@ -1,7 +1,8 @@
 from typing import List
 from fastapi import APIRouter, Depends, UploadFile, Form, Request
 from sqlmodel import Session
-from src.core.events.database import get_db_session
+from src.core.db_session import DBSession
+from src.core.events.database import get_async_db_session, get_db_session
 from src.db.courses.course_updates import (
     CourseUpdateCreate,
     CourseUpdateRead,
@@ -104,7 +105,7 @@ async def api_create_course_thumbnail(
 async def api_get_course(
     request: Request,
     course_uuid: str,
-    db_session: Session = Depends(get_db_session),
+    db_session: DBSession = Depends(get_async_db_session),
     current_user: PublicUser = Depends(get_current_user),
 ) -> CourseRead:
     """
@@ -119,7 +120,7 @@ async def api_get_course(
 async def api_get_course_by_id(
     request: Request,
     course_id: str,
-    db_session: Session = Depends(get_db_session),
+    db_session: DBSession = Depends(get_async_db_session),
     current_user: PublicUser = Depends(get_current_user),
 ) -> CourseRead:
     """
@@ -135,7 +136,7 @@ async def api_get_course_meta(
     request: Request,
     course_uuid: str,
     with_unpublished_activities: bool = False,
-    db_session: Session = Depends(get_db_session),
+    db_session: DBSession = Depends(get_async_db_session),
     current_user: PublicUser = Depends(get_current_user),
 ) -> FullCourseRead:
     """
@@ -152,7 +153,7 @@ async def api_get_course_by_orgslug(
     page: int,
     limit: int,
     org_slug: str,
-    db_session: Session = Depends(get_db_session),
+    db_session: DBSession = Depends(get_async_db_session),
     current_user: PublicUser = Depends(get_current_user),
 ) -> List[CourseRead]:
     """
@@ -170,7 +171,7 @@ async def api_search_courses(
     query: str,
     page: int = 1,
     limit: int = 10,
-    db_session: Session = Depends(get_db_session),
+    db_session: DBSession = Depends(get_async_db_session),
     current_user: PublicUser = Depends(get_current_user),
 ) -> List[CourseRead]:
     """
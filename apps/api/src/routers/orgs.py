@@ -1,4 +1,4 @@
-from typing import List, Literal
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, Request, UploadFile
 from sqlmodel import Session
 from src.services.orgs.invites import (
@@ -10,8 +10,12 @@ from src.services.orgs.invites import (
 )
 from src.services.orgs.join import JoinOrg, join_org
 from src.services.orgs.users import (
+    OrganizationUsersSort,
+    export_organization_users,
     get_list_of_invited_users,
+    get_list_of_invited_users_paginated,
     get_organization_users,
+    get_organization_users_paginated,
     invite_batch_users,
     remove_invited_user,
     remove_user_from_org,
@@ -24,6 +28,7 @@ from src.db.organizations import (
     OrganizationRead,
     OrganizationUpdate,
     OrganizationUser,
+    OrganizationUserPaginated,
 )
 from src.core.events.database import get_db_session
 from src.security.auth import get_current_user
@@ -106,6 +111,48 @@ async def api_get_org_users(
     return await get_organization_users(request, org_id, db_session, current_user)
 
 
+@router.get("/{org_id}/users/page/{page}/limit/{limit}")
+async def api_get_org_users_paginated(
+    request: Request,
+    org_id: str,
+    page: int,
+    limit: int,
+    role_id: Optional[int] = None,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    sort: OrganizationUsersSort = "username",
+    order: Literal["asc", "desc"] = "asc",
+    current_user: PublicUser = Depends(get_current_user),
+    db_session: Session = Depends(get_db_session),
+) -> OrganizationUserPaginated:
+    """
+    Get Org users by page and limit, filtered by role, name or email
+    """
+    return await get_organization_users_paginated(
+        request, org_id, db_session, current_user, page, limit, role_id, name, email, sort, order
+    )
+
+
+@router.get("/{org_id}/users/export")
+async def api_export_org_users(
+    request: Request,
+    org_id: str,
+    role_id: Optional[int] = None,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    sort: OrganizationUsersSort = "username",
+    order: Literal["asc", "desc"] = "asc",
+    current_user: PublicUser = Depends(get_current_user),
+    db_session: Session = Depends(get_db_session),
+):
+    """
+    Export Org users as CSV, streamed in chunks
+    """
+    return await export_organization_users(
+        request, org_id, db_session, current_user, role_id, name, email, sort, order
+    )
+
+
 @router.post("/join")
 async def api_join_an_org(
     request: Request,
@@ -273,6 +320,23 @@ async def api_get_org_users_invites(
     return await get_list_of_invited_users(request, org_id, db_session, current_user)
 
 
+@router.get("/{org_id}/invites/users/page/{page}/limit/{limit}")
+async def api_get_org_users_invites_paginated(
+    request: Request,
+    org_id: int,
+    page: int,
+    limit: int,
+    current_user: PublicUser = Depends(get_current_user),
+    db_session: Session = Depends(get_db_session),
+):
+    """
+    Get org users invites by page and limit, oldest first
+    """
+    return await get_list_of_invited_users_paginated(
+        request, org_id, page, limit, db_session, current_user
+    )
+
+
 @router.delete("/{org_id}/invites/users/{email}")
 async def api_delete_org_users_invites(
     request: Request,
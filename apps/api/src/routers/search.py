@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Request
-from sqlmodel import Session
-from src.core.events.database import get_db_session
+from src.core.db_session import DBSession
+from src.core.events.database import get_async_db_session
 from src.db.users import PublicUser
 from src.security.auth import get_current_user
 from src.services.search.search import search_across_org, SearchResult
@@ -14,7 +14,7 @@ async def api_search_across_org(
     query: str,
     page: int = 1,
     limit: int = 10,
-    db_session: Session = Depends(get_db_session),
+    db_session: DBSession = Depends(get_async_db_session),
     current_user: PublicUser = Depends(get_current_user),
 ) -> SearchResult:
     """
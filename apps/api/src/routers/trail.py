@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, Request
-from src.core.events.database import get_db_session
+from src.core.events.database import get_async_db_session, get_db_session
 from src.db.trails import TrailCreate, TrailRead
 from src.security.auth import get_current_user
 from src.services.trail.trail import (
@@ -34,7 +34,7 @@ async def api_start_trail(
 async def api_get_user_trail(
     request: Request,
     user=Depends(get_current_user),
-    db_session=Depends(get_db_session),
+    db_session=Depends(get_async_db_session),
 ) -> TrailRead:
     """
     Get a user trails
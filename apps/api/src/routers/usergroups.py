@@ -1,6 +1,14 @@
-from fastapi import APIRouter, Depends, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
 from sqlmodel import Session
-from src.db.usergroups import UserGroupCreate, UserGroupRead, UserGroupUpdate
+from src.db.usergroups import (
+    UserGroupBulkResult,
+    UserGroupCreate,
+    UserGroupRead,
+    UserGroupResourceUuids,
+    UserGroupUpdate,
+    UserGroupUserIds,
+)
 from src.db.users import PublicUser, UserRead
 from src.services.users.usergroups import (
     add_resources_to_usergroup,
@@ -11,6 +19,7 @@ from src.services.users.usergroups import (
     get_users_linked_to_usergroup,
     read_usergroup_by_id,
     read_usergroups_by_org_id,
+    read_users_from_csv,
     remove_resources_from_usergroup,
     remove_users_from_usergroup,
     update_usergroup_by_id,
@@ -129,69 +138,135 @@ async def api_delete_usergroup(
     return await delete_usergroup_by_id(request, db_session, current_user, usergroup_id)
 
 
-@router.post("/{usergroup_id}/add_users", tags=["usergroups"])
+def _ids_from_request(query_ids: Optional[str], body_ids: Optional[list]) -> str | list:
+    """Ids of the JSON body, or of the comma-separated query parameter"""
+    if body_ids is not None:
+        return body_ids
+    if query_ids:
+        return query_ids
+    raise HTTPException(status_code=400, detail="No ids provided")
+
+
+@router.post("/{usergroup_id}/add_users", response_model=UserGroupBulkResult, tags=["usergroups"])
 async def api_add_users_to_usergroup(
     *,
     request: Request,
     db_session: Session = Depends(get_db_session),
     current_user: PublicUser = Depends(get_current_user),
     usergroup_id: int,
-    user_ids: str,
-) -> str:
+    user_ids: Optional[str] = None,
+    body: Optional[UserGroupUserIds] = None,
+) -> UserGroupBulkResult:
+    """
+    Add Users to UserGroup, given as comma-separated user_ids or as a JSON
+    body {"user_ids": [...]}
+    """
+    return await add_users_to_usergroup(
+        request,
+        db_session,
+        current_user,
+        usergroup_id,
+        _ids_from_request(user_ids, body.user_ids if body else None),
+    )
+
+
+@router.post("/{usergroup_id}/add_users/csv", response_model=UserGroupBulkResult, tags=["usergroups"])
+async def api_add_users_to_usergroup_from_csv(
+    *,
+    request: Request,
+    db_session: Session = Depends(get_db_session),
+    current_user: PublicUser = Depends(get_current_user),
+    usergroup_id: int,
+    file: UploadFile,
+) -> UserGroupBulkResult:
     """
-    Add Users to UserGroup
+    Add Users to UserGroup from a CSV file of user ids or emails
     """
+    keys, by = await read_users_from_csv(file)
     return await add_users_to_usergroup(
-        request, db_session, current_user, usergroup_id, user_ids
+        request, db_session, current_user, usergroup_id, keys, by
     )
 
 
-@router.delete("/{usergroup_id}/remove_users", tags=["usergroups"])
+@router.delete("/{usergroup_id}/remove_users", response_model=UserGroupBulkResult, tags=["usergroups"])
 async def api_delete_users_from_usergroup(
     *,
     request: Request,
     db_session: Session = Depends(get_db_session),
     current_user: PublicUser = Depends(get_current_user),
     usergroup_id: int,
-    user_ids: str,
-) -> str:
+    user_ids: Optional[str] = None,
+    body: Optional[UserGroupUserIds] = None,
+) -> UserGroupBulkResult:
     """
     Delete Users from UserGroup
     """
     return await remove_users_from_usergroup(
-        request, db_session, current_user, usergroup_id, user_ids
+        request,
+        db_session,
+        current_user,
+        usergroup_id,
+        _ids_from_request(user_ids, body.user_ids if body else None),
+    )
+
+
+@router.post("/{usergroup_id}/remove_users/csv", response_model=UserGroupBulkResult, tags=["usergroups"])
+async def api_delete_users_from_usergroup_from_csv(
+    *,
+    request: Request,
+    db_session: Session = Depends(get_db_session),
+    current_user: PublicUser = Depends(get_current_user),
+    usergroup_id: int,
+    file: UploadFile,
+) -> UserGroupBulkResult:
+    """
+    Delete Users from UserGroup from a CSV file of user ids or emails
+    """
+    keys, by = await read_users_from_csv(file)
+    return await remove_users_from_usergroup(
+        request, db_session, current_user, usergroup_id, keys, by
     )
 
 
-@router.post("/{usergroup_id}/add_resources", tags=["usergroups"])
+@router.post("/{usergroup_id}/add_resources", response_model=UserGroupBulkResult, tags=["usergroups"])
 async def api_add_resources_to_usergroup(
     *,
     request: Request,
     db_session: Session = Depends(get_db_session),
     current_user: PublicUser = Depends(get_current_user),
     usergroup_id: int,
-    resource_uuids: str,
-) -> str:
+    resource_uuids: Optional[str] = None,
+    body: Optional[UserGroupResourceUuids] = None,
+) -> UserGroupBulkResult:
     """
     Add Resources to UserGroup
     """
     return await add_resources_to_usergroup(
-        request, db_session, current_user, usergroup_id, resource_uuids
+        request,
+        db_session,
+        current_user,
+        usergroup_id,
+        _ids_from_request(resource_uuids, body.resource_uuids if body else None),
     )
 
 
-@router.delete("/{usergroup_id}/remove_resources", tags=["usergroups"])
+@router.delete("/{usergroup_id}/remove_resources", response_model=UserGroupBulkResult, tags=["usergroups"])
 async def api_delete_resources_from_usergroup(
     *,
     request: Request,
     db_session: Session = Depends(get_db_session),
     current_user: PublicUser = Depends(get_current_user),
     usergroup_id: int,
-    resource_uuids: str,
-) -> str:
+    resource_uuids: Optional[str] = None,
+    body: Optional[UserGroupResourceUuids] = None,
+) -> UserGroupBulkResult:
     """
     Delete Resources from UserGroup
     """
     return await remove_resources_from_usergroup(
-        request, db_session, current_user, usergroup_id, resource_uuids
+        request,
+        db_session,
+        current_user,
+        usergroup_id,
+        _ids_from_request(resource_uuids, body.resource_uuids if body else None),
     )
@@ -91,7 +91,8 @@ CRITICAL SECURITY FIXES:
 
 from typing import Literal
 from fastapi import HTTPException, Request, status
-from sqlmodel import Session, select
+from sqlmodel import select
+from src.core.db_session import DBSession, db_exec
 from src.db.users import AnonymousUser, PublicUser
 from src.db.courses.courses import Course
 from src.db.resource_authors import ResourceAuthor, ResourceAuthorshipEnum, ResourceAuthorshipStatusEnum
@@ -108,7 +109,7 @@ async def courses_rbac_check(
     course_uuid: str,
     current_user: PublicUser | AnonymousUser,
     action: Literal["create", "read", "update", "delete"],
-    db_session: Session,
+    db_session: DBSession,
     require_course_ownership: bool = False,
 ) -> bool:
     """
@@ -177,7 +178,7 @@ async def courses_rbac_check(
                 ResourceAuthor.resource_uuid == course_uuid,
                 ResourceAuthor.user_id == current_user.id
             )
-            resource_author = db_session.exec(statement).first()
+            resource_author = (await db_exec(db_session, statement)).first()
             
             is_course_owner = False
             if resource_author:
@@ -218,7 +219,7 @@ async def courses_rbac_check_with_course_lookup(
     course_uuid: str,
     current_user: PublicUser | AnonymousUser,
     action: Literal["create", "read", "update", "delete"],
-    db_session: Session,
+    db_session: DBSession,
     require_course_ownership: bool = False,
 ) -> Course:
     """
@@ -247,7 +248,7 @@ async def courses_rbac_check_with_course_lookup(
     
     # First check if course exists
     statement = select(Course).where(Course.course_uuid == course_uuid)
-    course = db_session.exec(statement).first()
+    course = (await db_exec(db_session, statement)).first()
     
     if not course:
         raise HTTPException(
@@ -268,7 +269,7 @@ async def courses_rbac_check_for_activities(
     course_uuid: str,
     current_user: PublicUser | AnonymousUser,
     action: Literal["create", "read", "update", "delete"],
-    db_session: Session,
+    db_session: DBSession,
 ) -> bool:
     """
     Specialized RBAC check for activities that requires course ownership for non-read actions.
@@ -291,7 +292,7 @@ async def courses_rbac_check_for_assignments(
     course_uuid: str,
     current_user: PublicUser | AnonymousUser,
     action: Literal["create", "read", "update", "delete"],
-    db_session: Session,
+    db_session: DBSession,
 ) -> bool:
     """
     Specialized RBAC check for assignments that requires course ownership for non-read actions.
@@ -314,7 +315,7 @@ async def courses_rbac_check_for_chapters(
     course_uuid: str,
     current_user: PublicUser | AnonymousUser,
     action: Literal["create", "read", "update", "delete"],
-    db_session: Session,
+    db_session: DBSession,
 ) -> bool:
     """
     Specialized RBAC check for chapters that requires course ownership for non-read actions.
@@ -337,7 +338,7 @@ async def courses_rbac_check_for_certifications(
     course_uuid: str,
     current_user: PublicUser | AnonymousUser,
     action: Literal["create", "read", "update", "delete"],
-    db_session: Session,
+    db_session: DBSession,
 ) -> bool:
     """
     Specialized RBAC check for certifications that requires course ownership for non-read actions.
@@ -361,7 +362,7 @@ async def courses_rbac_check_for_collections(
     collection_uuid: str,
     current_user: PublicUser | AnonymousUser,
     action: Literal["create", "read", "update", "delete"],
-    db_session: Session,
+    db_session: DBSession,
 ) -> bool:
     """
     Specialized RBAC check for collections.
@@ -1,7 +1,7 @@
-import redis
-from redis.exceptions import AuthenticationError, ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
+from src.core.cache import SharedVersions, TTLCache
+from src.core.redis_client import get_redis_client
 from src.db.organization_config import OrganizationConfig
-from config.config import get_nexo_config
 from typing import Literal, TypeAlias
 from fastapi import HTTPException
 from sqlmodel import Session, select
@@ -20,72 +20,160 @@ FeatureSet: TypeAlias = Literal[
     "usergroups",
 ]
 
+# Features section of each org config, org configs are read on every limit
+# check but rarely written. Each worker holds its own copy, checked against
+# the shared versions below on every read.
+_org_features_cache = TTLCache(maxsize=2048, ttl=60)
 
-def check_limits_with_usage(
-    feature: FeatureSet,
-    org_id: int,
-    db_session: Session,
-):
+# Version of each org's features, shared by every worker and bumped by the
+# writers (see invalidate_org_features_cache), including the CLI: a feature
+# changed anywhere applies to all workers at once.
+_org_features_versions = SharedVersions("org_features", ttl=2 * 60)
+
+# Atomically increments the usage counter unless the limit is reached.
+# Returns the new usage, or -1 when the limit was already reached.
+_CHECK_AND_INCREASE_SCRIPT = """
+local usage = tonumber(redis.call('GET', KEYS[1]) or '0')
+if usage >= tonumber(ARGV[1]) then
+    return -1
+end
+return redis.call('INCR', KEYS[1])
+"""
+
+_check_and_increase_script = None
+
+
+def get_org_features(org_id: int, db_session: Session) -> dict | None:
+    # Read before the config, so that a change in the meantime isn't masked
+    version = _org_features_versions.get(org_id)
+    entry = _org_features_cache.get(org_id)
+    if entry is not None and version is not None and entry[0] == version:
+        return entry[1]
 
     # Get the Organization Config
     statement = select(OrganizationConfig).where(OrganizationConfig.org_id == org_id)
-    result = db_session.exec(statement)
-
-    org_config = result.first()
+    org_config = db_session.exec(statement).first()
 
     if org_config is None:
+        return None
+
+    features = org_config.config.get("features", {})
+    # Without the versions (Redis failing) the cache is bypassed
+    if version is not None:
+        _org_features_cache.set(org_id, (version, features))
+    return features
+
+
+def invalidate_org_features_cache(org_id: int) -> None:
+    _org_features_versions.bump(org_id)
+    _org_features_cache.delete(org_id)
+
+
+def _get_usage_redis():
+    r = get_redis_client()
+
+    if r is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Redis connection string not found",
+        )
+
+    return r
+
+
+def _usage_key(feature: FeatureSet, org_id: int) -> str:
+    return f"{feature}_usage:{org_id}"
+
+
+def _get_enabled_feature_limit(
+    feature: FeatureSet,
+    org_id: int,
+    db_session: Session,
+) -> int:
+    features = get_org_features(org_id, db_session)
+
+    if features is None:
         raise HTTPException(
             status_code=404,
             detail="Organization has no config",
         )
 
-    # Check if the Organizations has AI enabled
-    if org_config.config["features"][feature]["enabled"] == False:
+    # Check if the Organizations has the feature enabled
+    if features[feature]["enabled"] == False:
         raise HTTPException(
             status_code=403,
             detail=f"{feature.capitalize()} is not enabled for this organization",
         )
 
-    # Check limits
-    feature_limit = org_config.config["features"][feature]["limit"]
-
-    if feature_limit > 0:
-        NEXO_CONFIG = get_nexo_config()
-        redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
-
-        if not redis_conn_string:
-            raise HTTPException(
-                status_code=500,
-                detail="Redis connection string not found",
-            )
-
-        # Connect to Redis (only needed when limits are enforced)
-        try:
-            r = redis.Redis.from_url(redis_conn_string)
-            r.ping()
-        except (AuthenticationError, RedisConnectionError) as e:
-            # If Redis is misconfigured/unavailable, we can't enforce usage limits.
-            # Fail open for unlimited configs, fail closed only when limits must be enforced.
-            raise HTTPException(status_code=500, detail=f"Redis unavailable for usage limits: {e}")
-
-        # Get the number of feature usage
-        feature_usage = r.get(f"{feature}_usage:{org_id}")
-
-        # Get a number of feature asks
-        if feature_usage is None:
-            feature_usage_count = 0
-        else:
-            feature_usage_count = int(feature_usage)  # type: ignore
-
-        # Check if the Number of usage is less than the max_asks limit
-        if feature_limit <= feature_usage_count:
-            raise HTTPException(
-                status_code=403,
-                detail=f"Usage Limit has been reached for {feature.capitalize()}",
-            )
-        return True
+    return features[feature]["limit"]
+
+
+def check_limits_with_usage(
+    feature: FeatureSet,
+    org_id: int,
+    db_session: Session,
+):
+    feature_limit = _get_enabled_feature_limit(feature, org_id, db_session)
 
     # No limit => no need for Redis
+    if feature_limit <= 0:
+        return True
+
+    r = _get_usage_redis()
+
+    # Get the number of feature usage
+    try:
+        feature_usage = r.get(_usage_key(feature, org_id))
+    except RedisError as e:
+        # If Redis is misconfigured/unavailable, we can't enforce usage limits.
+        raise HTTPException(status_code=500, detail=f"Redis unavailable for usage limits: {e}")
+
+    feature_usage_count = int(feature_usage) if feature_usage is not None else 0  # type: ignore
+
+    # Check if the Number of usage is less than the limit
+    if feature_limit <= feature_usage_count:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Usage Limit has been reached for {feature.capitalize()}",
+        )
+    return True
+
+
+def check_limits_and_increase_feature_usage(
+    feature: FeatureSet,
+    org_id: int,
+    db_session: Session,
+):
+    """
+    Check the limit and count one usage in a single atomic Redis round trip.
+    Use it when the usage is consumed right away (e.g. an AI request, a
+    course creation), two concurrent requests can then never both take the
+    last slot. An action that fails afterwards gives its slot back with
+    release_feature_usage.
+    """
+    feature_limit = _get_enabled_feature_limit(feature, org_id, db_session)
+
+    if feature_limit <= 0:
+        return True
+
+    global _check_and_increase_script
+
+    r = _get_usage_redis()
+
+    # Registered once, then run with EVALSHA
+    if _check_and_increase_script is None or _check_and_increase_script.registered_client is not r:
+        _check_and_increase_script = r.register_script(_CHECK_AND_INCREASE_SCRIPT)
+
+    try:
+        feature_usage_count = _check_and_increase_script(keys=[_usage_key(feature, org_id)], args=[feature_limit])
+    except RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis unavailable for usage limits: {e}")
+
+    if int(feature_usage_count) < 0:  # type: ignore
+        raise HTTPException(
+            status_code=403,
+            detail=f"Usage Limit has been reached for {feature.capitalize()}",
+        )
     return True
 
 
@@ -95,71 +183,46 @@ def increase_feature_usage(
     db_session: Session,
 ):
     # Only track usage when a limit exists. If limit is 0/unlimited, avoid Redis dependency.
-    statement = select(OrganizationConfig).where(OrganizationConfig.org_id == org_id)
-    org_config = db_session.exec(statement).first()
-    if not org_config:
-        return True
     try:
-        feature_limit = org_config.config["features"][feature]["limit"]
+        features = get_org_features(org_id, db_session)
+        feature_limit = features[feature]["limit"] if features else 0
     except Exception:
         # If config schema is unexpected, don't block core flows.
         return True
     if not feature_limit or feature_limit <= 0:
         return True
 
-    NEXO_CONFIG = get_nexo_config()
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
-
-    if not redis_conn_string:
-        raise HTTPException(
-            status_code=500,
-            detail="Redis connection string not found",
-        )
-
-    # Connect to Redis
-    r = redis.Redis.from_url(redis_conn_string)
-    r.ping()
-
-    # Get the number of feature usage
-    feature_usage = r.get(f"{feature}_usage:{org_id}")
-
-    # Get a number of feature asks
-    if feature_usage is None:
-        feature_usage_count = 0
-    else:
-        feature_usage_count = int(feature_usage)  # type: ignore
+    r = _get_usage_redis()
 
     # Increment the feature usage
-    r.set(f"{feature}_usage:{org_id}", feature_usage_count + 1)
+    r.incr(_usage_key(feature, org_id))
     return True
 
 
-def decrease_feature_usage(
+def release_feature_usage(
     feature: FeatureSet,
     org_id: int,
     db_session: Session,
 ):
-    NEXO_CONFIG = get_nexo_config()
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
-
-    if not redis_conn_string:
-        raise HTTPException(
-            status_code=500,
-            detail="Redis connection string not found",
-        )
+    """
+    Give back the usage counted by check_limits_and_increase_feature_usage,
+    which only counts it for features with a limit.
+    """
+    features = get_org_features(org_id, db_session) or {}
+    feature_limit = features.get(feature, {}).get("limit", 0)
+    if not feature_limit or feature_limit <= 0:
+        return True
 
-    # Connect to Redis
-    r = redis.Redis.from_url(redis_conn_string)
+    return decrease_feature_usage(feature, org_id, db_session)
 
-    # Get the number of feature usage
-    feature_usage = r.get(f"{feature}_usage:{org_id}")
 
-    # Get a number of feature asks
-    if feature_usage is None:
-        feature_usage_count = 0
-    else:
-        feature_usage_count = int(feature_usage)  # type: ignore
+def decrease_feature_usage(
+    feature: FeatureSet,
+    org_id: int,
+    db_session: Session,
+):
+    r = _get_usage_redis()
 
-    # Increment the feature usage
-    r.set(f"{feature}_usage:{org_id}", feature_usage_count - 1)
+    # Decrement the feature usage
+    r.decr(_usage_key(feature, org_id))
     return True
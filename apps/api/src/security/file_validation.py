@@ -5,7 +5,7 @@ Validates file types and content to prevent unrestricted uploads (CWE-434).
 """
 
 import re
-from typing import List, Optional, Tuple
+from typing import BinaryIO, Iterator, List, Optional, Tuple
 from fastapi import HTTPException, UploadFile
 
 
@@ -74,36 +74,54 @@ FILE_TYPES = {
         'mime_types': ['application/pdf'],
         'max_size': 50 * 1024 * 1024,  # 50MB
         'validator': lambda content: content.startswith(b'%PDF-')
+    },
+    # Office documents are ZIP archives too
+    'archive': {
+        'extensions': ['.docx', '.pptx', '.zip'],
+        'mime_types': [
+            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+            'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+            'application/zip',
+        ],
+        'max_size': 50 * 1024 * 1024,  # 50MB
+        'validator': lambda content: content.startswith(b'PK\x03\x04')
     }
 }
 
 
+# Uploads are read and stored in chunks of this size, never as a whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Bytes needed by the content validators
+MAGIC_BYTES_LENGTH = 16
+
+
 def validate_upload(
     file: UploadFile,
     allowed_types: List[str],
     max_size: Optional[int] = None
-) -> Tuple[str, bytes]:
+) -> Tuple[str, Iterator[bytes]]:
     """
     Validate uploaded file for security and type compliance.
     
+    Only the first chunk is read here, to check the magic bytes. The rest of
+    the file is read while it is stored, and the size limit enforced as it
+    goes.
+    
     Args:
         file: The uploaded file
         allowed_types: List of allowed file types ('image', 'video', 'document')
         max_size: Maximum file size in bytes (auto-determined if None)
         
     Returns:
-        Tuple of (mime_type, file_content)
+        Tuple of (mime_type, chunks), chunks being an iterator over the file content
         
     Raises:
-        HTTPException: If validation fails
+        HTTPException: If validation fails, or while iterating over the chunks
+        if the file turns out to be too large
     """
     if not file or not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
     
-    # Read file content once
-    content = file.file.read()
-    file.file.seek(0)
-    
     # Get file extension and block SVG explicitly
     ext = '.' + file.filename.split('.')[-1].lower()
     if ext == '.svg':
@@ -120,19 +138,41 @@ def validate_upload(
         allowed_exts = [ext for t in allowed_types for ext in FILE_TYPES.get(t, {}).get('extensions', [])]
         raise HTTPException(status_code=415, detail=f"File type not allowed. Allowed: {allowed_exts}")
     
-    # Check file size
+    # Check file size, upfront when the multipart parser already knows it
     size_limit = max_size or config['max_size']
-    if len(content) > size_limit:
-        raise HTTPException(
-            status_code=413, 
-            detail=f"File too large ({len(content)/1024/1024:.1f}MB > {size_limit/1024/1024:.1f}MB)"
-        )
-    
-    # Validate file content
-    if not config['validator'](content):
+    if file.size is not None and file.size > size_limit:
+        _raise_too_large(file.size, size_limit)
+    
+    # Validate file content from its first bytes
+    file.file.seek(0)
+    head = file.file.read(UPLOAD_CHUNK_SIZE)
+    while 0 < len(head) < MAGIC_BYTES_LENGTH:
+        more = file.file.read(UPLOAD_CHUNK_SIZE)
+        if not more:
+            break
+        head += more
+    if not config['validator'](head[:MAGIC_BYTES_LENGTH]):
         raise HTTPException(status_code=415, detail="File appears to be corrupted or invalid")
     
-    return file.content_type, content
+    return file.content_type, _iter_limited(head, file.file, size_limit)
+
+
+def _raise_too_large(size: int, size_limit: int):
+    raise HTTPException(
+        status_code=413, 
+        detail=f"File too large ({size/1024/1024:.1f}MB > {size_limit/1024/1024:.1f}MB)"
+    )
+
+
+def _iter_limited(head: bytes, stream: BinaryIO, size_limit: int) -> Iterator[bytes]:
+    size = 0
+    chunk = head
+    while chunk:
+        size += len(chunk)
+        if size > size_limit:
+            _raise_too_large(size, size_limit)
+        yield chunk
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
 
 
 def get_safe_filename(original_filename: str, prefix: str = "") -> str:
@@ -0,0 +1,119 @@
+from typing import Optional
+from sqlalchemy import null
+from sqlmodel import select
+from src.core.cache import SharedVersions, TTLCache
+from src.core.db_session import DBSession, db_exec
+from src.db.resource_authors import ResourceAuthor
+from src.db.roles import Role
+from src.db.user_organizations import UserOrganization
+
+
+# Role sets shared across requests, keyed by user id. Each worker holds its
+# own copy, checked against the shared versions below on every read.
+_user_roles_cache = TTLCache(maxsize=4096, ttl=30)
+
+# Version of each user's roles, and of everyone's, shared by every worker and
+# bumped by the role and membership services (see invalidate_user_roles_cache):
+# a member removed or a role revoked in any worker stops authorizing requests
+# in all of them.
+_user_roles_versions = SharedVersions("user_roles", ttl=2 * 30)
+
+_ALL_USERS = "all"
+
+
+def _get_cached_user_roles(user_id: int, version) -> Optional[list[Role]]:
+    entry = _user_roles_cache.get(user_id)
+    if entry is None or version is None or entry[0] != version:
+        return None
+    return entry[1]
+
+
+class AuthorizationContext:
+    """
+    Authorization data memoized for the life of a single request.
+
+    A course page goes through several RBAC helpers, each of them needing
+    the same user roles and authorships. The context loads them once and
+    remembers the decisions already taken for (check, user, action, element).
+    """
+
+    def __init__(self):
+        self.roles: dict[int, list[Role]] = {}
+        self.authorships: dict[tuple[int, str], Optional[ResourceAuthor]] = {}
+        self.decisions: dict[tuple, bool] = {}
+
+    async def get_user_roles(self, user_id: int, db_session: DBSession) -> list[Role]:
+        roles = self.roles.get(user_id)
+        if roles is not None:
+            return roles
+
+        # Read before the roles, so that a change in the meantime isn't masked
+        version = _user_roles_versions.get_many([_ALL_USERS, user_id])
+        roles = _get_cached_user_roles(user_id, version)
+        if roles is None:
+            # Get user roles bound to an organization and standard roles
+            statement = (
+                select(Role)
+                .join(UserOrganization)
+                .where((UserOrganization.org_id == Role.org_id) | (Role.org_id == null()))
+                .where(UserOrganization.user_id == user_id)
+            )
+            # Detached copies, safe to share across sessions
+            result = await db_exec(db_session, statement)
+            roles = [Role.model_validate(role) for role in result.all()]
+            # Without the versions (Redis failing) the cache is bypassed
+            if version is not None:
+                _user_roles_cache.set(user_id, (version, roles))
+
+        self.roles[user_id] = roles
+        return roles
+
+    async def get_authorship(
+        self, user_id: int, element_uuid: str, db_session: DBSession
+    ) -> Optional[ResourceAuthor]:
+        key = (user_id, element_uuid)
+        if key not in self.authorships:
+            statement = select(ResourceAuthor).where(
+                ResourceAuthor.resource_uuid == element_uuid,
+                ResourceAuthor.user_id == user_id,
+            )
+            result = await db_exec(db_session, statement)
+            self.authorships[key] = result.first()
+
+        return self.authorships[key]
+
+    def get_decision(self, key: tuple) -> Optional[bool]:
+        return self.decisions.get(key)
+
+    def set_decision(self, key: tuple, value: bool) -> None:
+        self.decisions[key] = value
+
+
+def get_authorization_context(request) -> AuthorizationContext:
+    """
+    Return the authorization context attached to the request, creating it on
+    first use. Calls made without a request get a throwaway context.
+    """
+    state = getattr(request, "state", None)
+    if state is None:
+        return AuthorizationContext()
+
+    context = getattr(state, "authorization_context", None)
+    if not isinstance(context, AuthorizationContext):
+        context = AuthorizationContext()
+        state.authorization_context = context
+
+    return context
+
+
+def invalidate_user_roles_cache(user_id: int | None = None) -> None:
+    """
+    Drop cached role sets, for one user after a membership change or for
+    everyone after a role definition changed.
+    """
+    if user_id is None:
+        _user_roles_versions.bump(_ALL_USERS)
+        _user_roles_cache.clear()
+    else:
+        _user_roles_versions.bump(int(user_id))
+        _user_roles_cache.delete(int(user_id))
@@ -1,12 +1,12 @@
 from typing import Literal
 from fastapi import HTTPException, status, Request
-from sqlalchemy import null
-from sqlmodel import Session, select
+from sqlmodel import select
+from src.core.db_session import DBSession, db_exec
 from src.db.collections import Collection
 from src.db.courses.courses import Course
-from src.db.resource_authors import ResourceAuthor, ResourceAuthorshipEnum, ResourceAuthorshipStatusEnum
+from src.db.resource_authors import ResourceAuthorshipEnum, ResourceAuthorshipStatusEnum
 from src.db.roles import Role
-from src.db.user_organizations import UserOrganization
+from src.security.rbac.context import get_authorization_context
 from src.security.rbac.utils import check_element_type, check_course_permissions_with_own
 
 
@@ -15,7 +15,7 @@ async def authorization_verify_if_element_is_public(
     request,
     element_uuid: str,
     action: Literal["read"],
-    db_session: Session,
+    db_session: DBSession,
 ):
     element_nature = await check_element_type(element_uuid)
     # Verifies if the element is public
@@ -24,7 +24,7 @@ async def authorization_verify_if_element_is_public(
             statement = select(Course).where(
                 Course.public == True, Course.course_uuid == element_uuid
             )
-            course = db_session.exec(statement).first()
+            course = (await db_exec(db_session, statement)).first()
             if course:
                 return True
             else:
@@ -37,7 +37,7 @@ async def authorization_verify_if_element_is_public(
         statement = select(Collection).where(
             Collection.public == True, Collection.collection_uuid == element_uuid
         )
-        collection = db_session.exec(statement).first()
+        collection = (await db_exec(db_session, statement)).first()
         if collection:
             return True
         else:
@@ -58,17 +58,15 @@ async def authorization_verify_if_user_is_author(
     user_id: int,
     action: Literal["read", "update", "delete", "create"],
     element_uuid: str,
-    db_session: Session,
+    db_session: DBSession,
 ):
     # For create action, we don't need to check existing resource
     if action == "create":
         return True  # Allow creation if user is authenticated
         
     if action in ["update", "delete", "read"]:
-        statement = select(ResourceAuthor).where(
-            ResourceAuthor.resource_uuid == element_uuid
-        )
-        resource_author = db_session.exec(statement).first()
+        context = get_authorization_context(request)
+        resource_author = await context.get_authorship(int(user_id), element_uuid, db_session)
 
         if resource_author:
             if resource_author.user_id == int(user_id):
@@ -92,21 +90,19 @@ async def authorization_verify_based_on_roles(
     user_id: int,
     action: Literal["read", "update", "delete", "create"],
     element_uuid: str,
-    db_session: Session,
+    db_session: DBSession,
 ):
     element_type = await check_element_type(element_uuid)
 
-    # Get user roles bound to an organization and standard roles
-    statement = (
-        select(Role)
-        .join(UserOrganization)
-        .where((UserOrganization.org_id == Role.org_id) | (Role.org_id == null()))
-        .where(UserOrganization.user_id == user_id)
-    )
+    context = get_authorization_context(request)
+    decision_key = ("roles", user_id, action, element_uuid)
+    decision = context.get_decision(decision_key)
+    if decision is not None:
+        return decision
 
-    user_roles_in_organization_and_standard_roles = db_session.exec(statement).all()
+    # Get user roles bound to an organization and standard roles
+    user_roles_in_organization_and_standard_roles = await context.get_user_roles(user_id, db_session)
 
-    
     # Check if user is the author of the resource for "own" permissions
     is_author = False
     if action in ["update", "delete", "read"]:
@@ -114,6 +110,8 @@ async def authorization_verify_based_on_roles(
             request, user_id, action, element_uuid, db_session
         )
 
+    decision = False
+
     # Check all roles until we find one that grants the permission
     for role in user_roles_in_organization_and_standard_roles:
         role = Role.model_validate(role)
@@ -124,15 +122,18 @@ async def authorization_verify_based_on_roles(
                 # Special handling for courses with PermissionsWithOwn
                 if element_type == "courses":
                     if await check_course_permissions_with_own(element_rights, action, is_author):
-                        return True
+                        decision = True
+                        break
                 else:
                     # For non-course resources, only check general permissions
                     # (regular Permission class no longer has "own" permissions)
                     if getattr(element_rights, f"action_{action}", False):
-                        return True
-    
-    # If we get here, no role granted the permission
-    return False
+                        decision = True
+                        break
+
+    # If we get here without a match, no role granted the permission
+    context.set_decision(decision_key, decision)
+    return decision
 
 
 async def authorization_verify_based_on_org_admin_status(
@@ -140,19 +141,13 @@ async def authorization_verify_based_on_org_admin_status(
     user_id: int,
     action: Literal["read", "update", "delete", "create"],
     element_uuid: str,
-    db_session: Session,
+    db_session: DBSession,
 ):
     await check_element_type(element_uuid)
 
     # Get user roles bound to an organization and standard roles
-    statement = (
-        select(Role)
-        .join(UserOrganization)
-        .where((UserOrganization.org_id == Role.org_id) | (Role.org_id == null()))
-        .where(UserOrganization.user_id == user_id)
-    )
-
-    user_roles_in_organization_and_standard_roles = db_session.exec(statement).all()
+    context = get_authorization_context(request)
+    user_roles_in_organization_and_standard_roles = await context.get_user_roles(user_id, db_session)
 
     # Check if user has admin role (role_id 1 or 2) in any organization
     for role in user_roles_in_organization_and_standard_roles:
@@ -169,7 +164,7 @@ async def authorization_verify_based_on_roles_and_authorship(
     user_id: int,
     action: Literal["read", "update", "delete", "create"],
     element_uuid: str,
-    db_session: Session,
+    db_session: DBSession,
 ):
     isAuthor = await authorization_verify_if_user_is_author(
         request, user_id, action, element_uuid, db_session
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 import hashlib
 import os
 import secrets
 import string
 
 from fastapi import HTTPException, Request
-from sqlmodel import Session, select
+from sqlalchemy import delete, insert
+from sqlmodel import Session, func, select
 
 from src.db.organizations import Organization
 from src.db.users import PublicUser, AnonymousUser, InternalUser
@@ -17,6 +18,7 @@ from src.db.affiliates.affiliates import (
     AffiliateAttribution,
     AffiliateAttributionModelEnum,
     AffiliateClick,
+    AffiliateClickDailyStats,
     AffiliateCode,
     AffiliateCommission,
     AffiliateCommissionStatusEnum,
@@ -27,6 +29,7 @@ from src.db.affiliates.affiliates import (
 )
 from src.db.payments.payments_products import PaymentsProduct, PaymentProductTypeEnum
 from src.db.payments.payments_users import PaymentsUser
+from src.services.affiliates.clicks import buffer_affiliate_click
 
 
 def _now() -> datetime:
@@ -132,38 +135,45 @@ async def generate_affiliate_code(
     raise HTTPException(status_code=500, detail="Failed to generate unique affiliate code")
 
 
+def _client_ip(request: Request) -> str:
+    """
+    Address of the visitor, for click deduplication. The leftmost
+    X-Forwarded-For entries are set by the client and never trusted.
+    """
+    # Clicks relayed by the web app's /r/:code route carry the address it
+    # derived itself, along with the internal key
+    internal_key = os.environ.get("CLOUD_INTERNAL_KEY")
+    client_ip = request.headers.get("x-nexo-client-ip", "")
+    if client_ip and internal_key and secrets.compare_digest(
+        request.headers.get("cloudinternalkey", ""), internal_key
+    ):
+        return client_ip.strip()
+
+    # Otherwise the entry appended by our own proxy, the right-most one
+    forwarded_for = request.headers.get("x-forwarded-for", "")
+    if forwarded_for:
+        return forwarded_for.split(",")[-1].strip()
+    return getattr(getattr(request, "client", None), "host", "") or ""
+
+
 async def track_affiliate_click(
     request: Request,
     org_id: int,
     code: str,
     landing_url: str,
     current_user: PublicUser | AnonymousUser | InternalUser,
-    db_session: Session,
 ) -> dict:
-    # Public endpoint; do NOT require auth, but require org exists
-    org = db_session.exec(select(Organization).where(Organization.id == org_id)).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
-
-    code_obj = db_session.exec(
-        select(AffiliateCode).where(AffiliateCode.code == code, AffiliateCode.org_id == org_id)
-    ).first()
-    if not code_obj or code_obj.status != AffiliateStatusEnum.ACTIVE:
-        raise HTTPException(status_code=404, detail="Affiliate code not found")
-
-    ip = getattr(getattr(request, "client", None), "host", "") or ""
-    ua = request.headers.get("user-agent", "") or ""
-    click = AffiliateClick(
+    # Public endpoint; do NOT require auth. Clicks are buffered, deduplicated
+    # per visitor and window, and saved in bulk by the click flusher, which
+    # drops the clicks of unknown codes.
+    accepted = buffer_affiliate_click(
         org_id=org_id,
-        affiliate_code_id=code_obj.id or 0,
-        landing_url=landing_url[:500],
-        user_agent=ua[:500],
-        ip_hash=_hash_ip(ip),
+        code=code,
+        landing_url=landing_url,
+        user_agent=request.headers.get("user-agent", "") or "",
+        ip_hash=_hash_ip(_client_ip(request)),
     )
-    db_session.add(click)
-    db_session.commit()
-    db_session.refresh(click)
-    return {"ok": True, "click_id": click.id}
+    return {"ok": True, "accepted": accepted}
 
 
 def _get_active_attribution_for_user(
@@ -343,45 +353,176 @@ def record_commission_for_payment(
     return commission
 
 
-def get_affiliate_admin_stats(org_id: int, db_session: Session) -> list[AffiliateStatsRead]:
-    # naive aggregates (good enough for MVP; can be optimized later)
-    affiliates = list(db_session.exec(select(Affiliate).where(Affiliate.org_id == org_id)).all())
-    out: list[AffiliateStatsRead] = []
-    for a in affiliates:
-        code_ids = [c.id for c in db_session.exec(select(AffiliateCode).where(AffiliateCode.affiliate_id == a.id)).all()]
-        clicks = 0
-        if code_ids:
-            clicks = len(list(db_session.exec(select(AffiliateClick).where(AffiliateClick.affiliate_code_id.in_(code_ids))).all()))  # type: ignore
-
-        signups = len(list(db_session.exec(select(AffiliateAttribution).where(AffiliateAttribution.affiliate_id == a.id)).all()))
-        pending = list(
-            db_session.exec(
-                select(AffiliateCommission).where(
-                    AffiliateCommission.affiliate_id == a.id,
-                    AffiliateCommission.status == AffiliateCommissionStatusEnum.PENDING,  # type: ignore
-                )
-            ).all()
+def _day_bounds(column, start_date: date | None, end_date: date | None) -> list:
+    """Where clauses keeping a datetime column between two days, included"""
+    bounds = []
+    if start_date:
+        bounds.append(column >= datetime.combine(start_date, time.min))
+    if end_date:
+        bounds.append(column < datetime.combine(end_date + timedelta(days=1), time.min))
+    return bounds
+
+
+def _count_clicks(
+    org_id: int,
+    start_date: date | None,
+    end_date: date | None,
+    rolled_up_until: date | None,
+    db_session: Session,
+) -> dict[int, int]:
+    """
+    Clicks per affiliate. Once the history of the org was rolled up, the
+    daily counters are complete (the click flusher increments them) and
+    are read instead of the clicks themselves.
+    """
+    if rolled_up_until:
+        stmt = (
+            select(AffiliateClickDailyStats.affiliate_id, func.sum(AffiliateClickDailyStats.clicks))
+            .where(AffiliateClickDailyStats.org_id == org_id)
+            .group_by(AffiliateClickDailyStats.affiliate_id)
         )
-        paid = list(
-            db_session.exec(
-                select(AffiliateCommission).where(
-                    AffiliateCommission.affiliate_id == a.id,
-                    AffiliateCommission.status == AffiliateCommissionStatusEnum.PAID,  # type: ignore
-                )
-            ).all()
+        if start_date:
+            stmt = stmt.where(AffiliateClickDailyStats.day >= start_date)
+        if end_date:
+            stmt = stmt.where(AffiliateClickDailyStats.day <= end_date)
+    else:
+        stmt = (
+            select(AffiliateCode.affiliate_id, func.count(AffiliateClick.id))
+            .join(AffiliateCode, AffiliateCode.id == AffiliateClick.affiliate_code_id)  # type: ignore
+            .where(AffiliateClick.org_id == org_id, *_day_bounds(AffiliateClick.creation_date, start_date, end_date))
+            .group_by(AffiliateCode.affiliate_id)
         )
-        pending_amount = sum(int(x.amount_cents or 0) for x in pending)
-        paid_amount = sum(int(x.amount_cents or 0) for x in paid)
-        currency = pending[0].currency if pending else (paid[0].currency if paid else "USD")
-        out.append(
-            AffiliateStatsRead(
-                affiliate_id=a.id or 0,
-                clicks=clicks,
-                signups=signups,
-                pending_amount_cents=pending_amount,
-                paid_amount_cents=paid_amount,
-                currency=currency,
+    return {affiliate_id: int(count or 0) for affiliate_id, count in db_session.exec(stmt).all()}
+
+
+def get_affiliate_admin_stats(
+    org_id: int,
+    db_session: Session,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[AffiliateStatsRead]:
+    """
+    Clicks, signups and pending/paid commissions of every affiliate of the
+    org, optionally between two days (included). Each figure is one grouped
+    query, whatever the number of affiliates.
+    """
+    affiliate_ids = db_session.exec(
+        select(Affiliate.id).where(Affiliate.org_id == org_id).order_by(Affiliate.id)  # type: ignore
+    ).all()
+    if not affiliate_ids:
+        return []
+
+    # Read only: an org without a program has no rolled up clicks
+    program = db_session.exec(select(AffiliateProgram).where(AffiliateProgram.org_id == org_id)).first()
+    rolled_up_until = program.clicks_rolled_up_until if program else None
+    clicks = _count_clicks(org_id, start_date, end_date, rolled_up_until, db_session)
+
+    signups_stmt = (
+        select(AffiliateAttribution.affiliate_id, func.count(AffiliateAttribution.id))
+        .where(
+            AffiliateAttribution.org_id == org_id,
+            *_day_bounds(AffiliateAttribution.attributed_at, start_date, end_date),
+        )
+        .group_by(AffiliateAttribution.affiliate_id)
+    )
+    signups = {affiliate_id: int(count) for affiliate_id, count in db_session.exec(signups_stmt).all()}
+
+    commissions_stmt = (
+        select(
+            AffiliateCommission.affiliate_id,
+            AffiliateCommission.status,
+            AffiliateCommission.currency,
+            func.sum(AffiliateCommission.amount_cents),
+        )
+        .where(
+            AffiliateCommission.org_id == org_id,
+            AffiliateCommission.status.in_(  # type: ignore
+                [AffiliateCommissionStatusEnum.PENDING, AffiliateCommissionStatusEnum.PAID]
+            ),
+            *_day_bounds(AffiliateCommission.creation_date, start_date, end_date),
+        )
+        .group_by(AffiliateCommission.affiliate_id, AffiliateCommission.status, AffiliateCommission.currency)
+    )
+    pending: dict[int, int] = {}
+    paid: dict[int, int] = {}
+    currencies: dict[int, str] = {}
+    # Pending commissions first: their currency is the one reported
+    rows = sorted(
+        db_session.exec(commissions_stmt).all(),
+        key=lambda row: row[1] != AffiliateCommissionStatusEnum.PENDING,
+    )
+    for affiliate_id, status, currency, amount in rows:
+        totals = pending if status == AffiliateCommissionStatusEnum.PENDING else paid
+        totals[affiliate_id] = totals.get(affiliate_id, 0) + int(amount or 0)
+        currencies.setdefault(affiliate_id, currency)
+
+    return [
+        AffiliateStatsRead(
+            affiliate_id=affiliate_id or 0,
+            clicks=clicks.get(affiliate_id, 0),
+            signups=signups.get(affiliate_id, 0),
+            pending_amount_cents=pending.get(affiliate_id, 0),
+            paid_amount_cents=paid.get(affiliate_id, 0),
+            currency=currencies.get(affiliate_id, "USD"),
+        )
+        for affiliate_id in affiliate_ids
+    ]
+
+
+def rollup_affiliate_click_stats(db_session: Session, until: date | None = None) -> int:
+    """
+    Rebuild the daily click counters of every org from the clicks, for the
+    complete days (up to yesterday) not rolled up yet. New clicks are added
+    to the counters as they are flushed, this backfills the clicks saved
+    before and repairs the days flushed partially. Returns the number of
+    days rolled up, summed over the orgs.
+    """
+    until = until or datetime.now().date() - timedelta(days=1)
+    rolled_up = 0
+    for program in db_session.exec(select(AffiliateProgram)).all():
+        start = (
+            program.clicks_rolled_up_until + timedelta(days=1)
+            if program.clicks_rolled_up_until
+            else None
+        )
+        if start is None:
+            first_click = db_session.exec(
+                select(func.min(AffiliateClick.creation_date)).where(AffiliateClick.org_id == program.org_id)
+            ).one()
+            if first_click is None:
+                continue
+            start = first_click.date()
+        if start > until:
+            continue
+
+        # Idempotent: the days are recomputed from scratch
+        db_session.exec(
+            delete(AffiliateClickDailyStats).where(
+                AffiliateClickDailyStats.org_id == program.org_id,
+                AffiliateClickDailyStats.day >= start,
+                AffiliateClickDailyStats.day <= until,
+            )  # type: ignore
+        )
+        day = func.date(AffiliateClick.creation_date)
+        daily_clicks = (
+            select(
+                AffiliateClick.org_id,
+                AffiliateCode.affiliate_id,
+                day,
+                func.count(AffiliateClick.id),
+            )
+            .join(AffiliateCode, AffiliateCode.id == AffiliateClick.affiliate_code_id)  # type: ignore
+            .where(AffiliateClick.org_id == program.org_id, *_day_bounds(AffiliateClick.creation_date, start, until))
+            .group_by(AffiliateClick.org_id, AffiliateCode.affiliate_id, day)
+        )
+        db_session.exec(
+            insert(AffiliateClickDailyStats).from_select(  # type: ignore
+                ["org_id", "affiliate_id", "day", "clicks"], daily_clicks
             )
         )
-    return out
+        program.clicks_rolled_up_until = until
+        db_session.add(program)
+        rolled_up += (until - start).days + 1
 
+    db_session.commit()
+    return rolled_up
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+import redis
+from sqlalchemy import insert, update
+from sqlmodel import Session, select
+
+from src.core.cache import TTLCache
+from src.core.redis_client import get_redis_client
+from src.db.affiliates.affiliates import (
+    AffiliateClick,
+    AffiliateClickDailyStats,
+    AffiliateCode,
+    AffiliateStatusEnum,
+)
+
+logger = logging.getLogger(__name__)
+
+# Clicks on the same code from the same (hashed) IP within a window of this
+# many seconds count once.
+AFFILIATE_CLICK_DEDUPE_WINDOW = 30 * 60
+# Seconds between flushes, and clicks saved per flush at most
+AFFILIATE_CLICK_FLUSH_INTERVAL = 5
+AFFILIATE_CLICK_FLUSH_BATCH = 5000
+# In-process buffer used without Redis. The oldest clicks are dropped when full.
+AFFILIATE_CLICK_LOCAL_MAX = 100_000
+
+REDIS_AFFILIATE_CLICKS_KEY = "nexo:affiliate_clicks"
+REDIS_AFFILIATE_CLICK_SEEN_KEY = "nexo:affiliate_clicks:seen"
+
+# Remember the click for the window, and buffer it only if it wasn't seen
+_BUFFER_SCRIPT = """
+if redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+def _dedupe_key(org_id: int, code: str, ip_hash: str, now: float) -> str:
+    return f"{org_id}:{code}:{ip_hash}:{int(now // AFFILIATE_CLICK_DEDUPE_WINDOW)}"
+
+
+class RedisAffiliateClickBuffer:
+    """Clicks buffered in Redis, shared by every worker"""
+
+    backend = "redis"
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self._buffer = client.register_script(_BUFFER_SCRIPT)
+
+    def add(self, dedupe_key: str, entry: str) -> bool:
+        return bool(
+            self._buffer(
+                keys=[f"{REDIS_AFFILIATE_CLICK_SEEN_KEY}:{dedupe_key}", REDIS_AFFILIATE_CLICKS_KEY],
+                args=[AFFILIATE_CLICK_DEDUPE_WINDOW, entry],
+            )
+        )
+
+    def take(self, count: int) -> list[str]:
+        entries = self.client.lpop(REDIS_AFFILIATE_CLICKS_KEY, count) or []
+        return [e.decode() if isinstance(e, bytes) else e for e in entries]
+
+    def give_back(self, entries: list[str]) -> None:
+        if entries:
+            self.client.lpush(REDIS_AFFILIATE_CLICKS_KEY, *reversed(entries))
+
+    def depth(self) -> int:
+        return int(self.client.llen(REDIS_AFFILIATE_CLICKS_KEY))
+
+
+class LocalAffiliateClickBuffer:
+    """
+    In-process fallback when Redis is not available. Clicks are only
+    deduplicated within a worker, and lost if it stops before flushing.
+    """
+
+    backend = "memory"
+
+    def __init__(self, maxlen: int = AFFILIATE_CLICK_LOCAL_MAX):
+        self.entries: deque = deque(maxlen=maxlen)
+        self.seen = TTLCache(maxsize=maxlen, ttl=AFFILIATE_CLICK_DEDUPE_WINDOW)
+        self._lock = threading.Lock()
+
+    def add(self, dedupe_key: str, entry: str) -> bool:
+        with self._lock:
+            if self.seen.get(dedupe_key):
+                return False
+            self.seen.set(dedupe_key, True)
+            self.entries.append(entry)
+            return True
+
+    def take(self, count: int) -> list[str]:
+        with self._lock:
+            return [self.entries.popleft() for _ in range(min(count, len(self.entries)))]
+
+    def give_back(self, entries: list[str]) -> None:
+        with self._lock:
+            self.entries.extendleft(reversed(entries))
+
+    def depth(self) -> int:
+        return len(self.entries)
+
+
+_click_buffer = None
+_click_buffer_lock = threading.Lock()
+
+
+def get_affiliate_click_buffer():
+    """Redis backed buffer when Redis is configured, in-process buffer otherwise"""
+    global _click_buffer
+
+    if _click_buffer is None:
+        with _click_buffer_lock:
+            if _click_buffer is None:
+                client = get_redis_client()
+                _click_buffer = RedisAffiliateClickBuffer(client) if client else LocalAffiliateClickBuffer()
+    return _click_buffer
+
+
+def buffer_affiliate_click(
+    org_id: int,
+    code: str,
+    landing_url: str,
+    user_agent: str,
+    ip_hash: str,
+) -> bool:
+    """
+    Accept a click without touching the database. Returns False when it's a
+    duplicate of a click of the current window. Codes are checked when the
+    clicks are flushed.
+    """
+    now = time.time()
+    entry = json.dumps(
+        {
+            "org_id": org_id,
+            "code": code,
+            "landing_url": landing_url[:500],
+            "user_agent": user_agent[:500],
+            "ip_hash": ip_hash,
+            "creation_date": datetime.fromtimestamp(now).isoformat(),
+        }
+    )
+    dedupe_key = _dedupe_key(org_id, code, ip_hash, now)
+    try:
+        return get_affiliate_click_buffer().add(dedupe_key, entry)
+    except redis.RedisError as e:
+        logger.error(f"Failed to buffer affiliate click: {e}")
+        return False
+
+
+def _save_clicks(db_session: Session, clicks: list[dict]) -> int:
+    codes = {click["code"] for click in clicks}
+    active_codes = {
+        (org_id, code): (code_id, affiliate_id)
+        for code_id, code, org_id, affiliate_id in db_session.exec(
+            select(AffiliateCode.id, AffiliateCode.code, AffiliateCode.org_id, AffiliateCode.affiliate_id).where(
+                AffiliateCode.code.in_(codes),  # type: ignore
+                AffiliateCode.status == AffiliateStatusEnum.ACTIVE,
+            )
+        ).all()
+    }
+
+    rows = []
+    daily_clicks: Counter = Counter()
+    for click in clicks:
+        found = active_codes.get((click["org_id"], click["code"]))
+        if not found:
+            continue
+        code_id, affiliate_id = found
+        creation_date = datetime.fromisoformat(click["creation_date"])
+        rows.append(
+            {
+                "org_id": click["org_id"],
+                "affiliate_code_id": code_id,
+                "landing_url": click["landing_url"],
+                "user_agent": click["user_agent"],
+                "ip_hash": click["ip_hash"],
+                "creation_date": creation_date,
+            }
+        )
+        daily_clicks[(click["org_id"], affiliate_id, creation_date.date())] += 1
+
+    if not rows:
+        return 0
+
+    # executemany, sent as multi-row INSERT statements
+    db_session.connection().execute(insert(AffiliateClick.__table__), rows)  # type: ignore
+    # Counters are incremented in place, and created on the first click of the day
+    for (org_id, affiliate_id, day), count in daily_clicks.items():
+        result = db_session.exec(
+            update(AffiliateClickDailyStats)
+            .where(
+                AffiliateClickDailyStats.org_id == org_id,
+                AffiliateClickDailyStats.affiliate_id == affiliate_id,
+                AffiliateClickDailyStats.day == day,
+            )
+            .values(clicks=AffiliateClickDailyStats.clicks + count)  # type: ignore
+        )
+        if not result.rowcount:  # type: ignore
+            db_session.add(
+                AffiliateClickDailyStats(org_id=org_id, affiliate_id=affiliate_id, day=day, clicks=count)
+            )
+    db_session.commit()
+    return len(rows)
+
+
+def flush_affiliate_clicks(db_session: Session) -> int:
+    """
+    Save a batch of buffered clicks with a multi-row insert, and add them to
+    the daily counters. Clicks of unknown or disabled codes are dropped.
+    Returns the number of clicks saved.
+    """
+    buffer = get_affiliate_click_buffer()
+    entries = buffer.take(AFFILIATE_CLICK_FLUSH_BATCH)
+    if not entries:
+        return 0
+
+    clicks = []
+    for entry in entries:
+        try:
+            clicks.append(json.loads(entry))
+        except ValueError:
+            logger.error(f"Dropping malformed affiliate click: {entry[:200]}")
+
+    try:
+        return _save_clicks(db_session, clicks)
+    except Exception:
+        db_session.rollback()
+        buffer.give_back(entries)
+        raise
+
+
+async def affiliate_click_flusher(engine) -> None:
+    """Background task flushing the buffered clicks, off the event loop"""
+
+    def flush() -> int:
+        with Session(engine) as db_session:
+            return flush_affiliate_clicks(db_session)
+
+    while True:
+        await asyncio.sleep(AFFILIATE_CLICK_FLUSH_INTERVAL)
+        try:
+            # Keep going while batches come back full
+            while await asyncio.to_thread(flush) >= AFFILIATE_CLICK_FLUSH_BATCH:
+                pass
+        except Exception as e:
+            logger.error(f"Affiliate click flusher error: {e}")
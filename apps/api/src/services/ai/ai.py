@@ -2,10 +2,7 @@ from fastapi import Depends, HTTPException, Request
 from sqlmodel import Session, select
 from src.db.organization_config import OrganizationConfig
 from src.db.organizations import Organization
-from src.security.features_utils.usage import (
-    check_limits_with_usage,
-    increase_feature_usage,
-)
+from src.security.features_utils.usage import check_limits_and_increase_feature_usage
 from src.db.courses.courses import Course, CourseRead
 from src.core.events.database import get_db_session
 from src.db.users import PublicUser
@@ -94,8 +91,7 @@ def ai_start_activity_chat_session(
         )
 
     # Check limits and usage
-    check_limits_with_usage("ai", org.id, db_session)
-    increase_feature_usage("ai", org.id, db_session)
+    check_limits_and_increase_feature_usage("ai", org.id, db_session)
 
     if not activity:
         raise HTTPException(
@@ -225,8 +221,7 @@ def ai_send_activity_chat_message(
     org = db_session.exec(statement).first()
 
     # Check limits and usage
-    check_limits_with_usage("ai", course.org_id, db_session)
-    increase_feature_usage("ai", course.org_id, db_session)
+    check_limits_and_increase_feature_usage("ai", course.org_id, db_session)
 
     if not activity:
         raise HTTPException(
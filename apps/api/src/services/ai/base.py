@@ -1,10 +1,10 @@
 from typing import Optional, Dict, Any
 from uuid import uuid4
-import redis
 import json
 from openai import OpenAI
 
 from config.config import get_nexo_config
+from src.core.redis_client import get_redis_client
 
 NEXO_CONFIG = get_nexo_config()
 
@@ -73,15 +73,13 @@ def get_chat_session_history(aichat_uuid: Optional[str] = None) -> Dict[str, Any
     """Get or create a new chat session history using Redis"""
     session_id = aichat_uuid if aichat_uuid else f"aichat_{uuid4()}"
     
-    NEXO_CONFIG = get_nexo_config()
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
+    r = get_redis_client()
 
     message_history = []
     
-    if redis_conn_string:
+    if r is not None:
         try:
-            # Connect to Redis and get message history
-            r = redis.from_url(redis_conn_string)
+            # Get message history from the shared Redis pool
             history_data = r.get(f"chat_history:{session_id}")
             if history_data:
                 if isinstance(history_data, bytes):
@@ -104,15 +102,12 @@ def get_chat_session_history(aichat_uuid: Optional[str] = None) -> Dict[str, Any
 
 def save_message_to_history(aichat_uuid: str, user_message: str, ai_response: str):
     """Save a message exchange to Redis history"""
-    NEXO_CONFIG = get_nexo_config()
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
+    r = get_redis_client()
     
-    if not redis_conn_string:
+    if r is None:
         return
     
     try:
-        r = redis.from_url(redis_conn_string)
-        
         # Get existing history
         history_data = r.get(f"chat_history:{aichat_uuid}")
         if history_data:
@@ -1,3 +1,4 @@
+import os
 import uuid
 from fastapi import HTTPException, Request, UploadFile
 from src.services.blocks.schemas.files import BlockFile
@@ -40,9 +41,8 @@ async def upload_file_and_return_file_object(
         max_size=50 * 1024 * 1024  # 50MB
     )
 
-    # Get file metadata
-    file.file.seek(0)
-    content = await file.read()
+    # Get file metadata, without reading the file again
+    file_size = file.size if file.size is not None else file.file.seek(0, os.SEEK_END)
     
     # Extract actual name on disk and extension
     parts = filename.rsplit(".", 1)
@@ -53,7 +53,7 @@ async def upload_file_and_return_file_object(
         file_id=name_on_disk,
         file_format=ext,
         file_name=file.filename,
-        file_size=len(content),
+        file_size=file_size,
         file_type=file.content_type,
         activity_uuid=activity_uuid,
     )
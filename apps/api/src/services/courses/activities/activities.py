@@ -10,6 +10,8 @@ from datetime import datetime
 
 from src.services.payments.payments_access import check_activity_paid_access
 from src.security.courses_security import courses_rbac_check_for_activities
+from src.services.courses.cache import bump_course_version
+from src.services.trail.progress import refresh_course_progress
 
 
 ####################################################
@@ -84,9 +86,12 @@ async def create_activity(
 
     # Insert ChapterActivity link in DB
     db_session.add(activity_chapter)
+    refresh_course_progress(chapter.course_id, db_session)
     db_session.commit()
     db_session.refresh(activity_chapter)
 
+    bump_course_version(course.course_uuid)
+
     return ActivityRead.model_validate(activity)
 
 
@@ -184,15 +189,25 @@ async def update_activity(
 
     await courses_rbac_check_for_activities(request, course.course_uuid, current_user, "update", db_session)
 
+    # Publishing changes the progress of the learners
+    published_changed = (
+        activity_object.published is not None
+        and activity_object.published != activity.published
+    )
+
     # Update only the fields that were passed in
     for var, value in vars(activity_object).items():
         if value is not None:
             setattr(activity, var, value)
 
     db_session.add(activity)
+    if published_changed:
+        refresh_course_progress(course.id, db_session)  # type: ignore
     db_session.commit()
     db_session.refresh(activity)
 
+    bump_course_version(course.course_uuid)
+
     activity = ActivityRead.model_validate(activity)
 
     return activity
@@ -239,8 +254,11 @@ async def delete_activity(
 
     db_session.delete(activity_chapter)
     db_session.delete(activity)
+    refresh_course_progress(course.id, db_session)  # type: ignore
     db_session.commit()
 
+    bump_course_version(course.course_uuid)
+
     return {"detail": "Activity deleted"}
 
 
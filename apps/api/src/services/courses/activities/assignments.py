@@ -39,6 +39,7 @@ from src.services.courses.activities.uploads.sub_file import upload_submission_f
 from src.services.courses.activities.uploads.tasks_ref_files import (
     upload_reference_file,
 )
+from src.services.trail.progress import record_activity_progress
 from src.services.trail.trail import check_trail_presence
 from src.services.courses.certifications import check_course_completion_and_create_certificate
 from src.security.courses_security import courses_rbac_check_for_assignments
@@ -1279,6 +1280,7 @@ async def create_assignment_submission(
             update_date=str(datetime.now()),
         )
         db_session.add(trailstep)
+        record_activity_progress(user.id, course, activity, True, db_session)  # type: ignore
         db_session.commit()
         db_session.refresh(trailstep)
 
@@ -1704,11 +1706,14 @@ async def mark_activity_as_done_for_user(
         )
 
     # Mark activity as done
+    was_complete = trailstep.complete
     trailstep.complete = True
     trailstep.update_date = str(datetime.now())
 
     # Insert TrailStep in DB
     db_session.add(trailstep)
+    if not was_complete:
+        record_activity_progress(user.id, course, activity, True, db_session)  # type: ignore
     db_session.commit()
     db_session.refresh(trailstep)
 
@@ -16,6 +16,8 @@ from fastapi import HTTPException, status, UploadFile, Request
 from uuid import uuid4
 from datetime import datetime
 from src.security.courses_security import courses_rbac_check_for_activities
+from src.services.courses.cache import bump_course_version
+from src.services.trail.progress import refresh_course_progress
 
 
 async def create_documentpdf_activity(
@@ -104,6 +106,16 @@ async def create_documentpdf_activity(
         update_date=str(datetime.now()),
     )
 
+    # upload pdf, before the activity is created: the file may be rejected
+    if pdf_file and organization and course:
+        # get pdffile format
+        await upload_pdf(
+            pdf_file,
+            activity_uuid,
+            organization.org_uuid,
+            course.course_uuid,
+        )
+
     # Insert Activity in DB
     db_session.add(activity)
     db_session.commit()
@@ -120,19 +132,12 @@ async def create_documentpdf_activity(
         order=1,
     )
 
-    # upload pdf
-    if pdf_file and organization and course:
-        # get pdffile format
-        await upload_pdf(
-            pdf_file,
-            activity.activity_uuid,
-            organization.org_uuid,
-            course.course_uuid,
-        )
-
     # Insert ChapterActivity link in DB
     db_session.add(activity_chapter)
+    refresh_course_progress(coursechapter.course_id, db_session)
     db_session.commit()
     db_session.refresh(activity_chapter)
 
+    bump_course_version(course.course_uuid)
+
     return ActivityRead.model_validate(activity)
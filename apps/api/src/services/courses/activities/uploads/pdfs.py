@@ -1,18 +1,23 @@
+from fastapi import HTTPException
+from src.security.file_validation import validate_upload
 from src.services.utils.upload_content import upload_content
 
 
 async def upload_pdf(pdf_file, activity_uuid, org_uuid, course_uuid):
-    contents = pdf_file.file.read()
     pdf_format = pdf_file.filename.split(".")[-1]
+    _, chunks = validate_upload(pdf_file, ["document"])
 
     try:
         await upload_content(
             f"courses/{course_uuid}/activities/{activity_uuid}/documentpdf",
             "orgs",
             org_uuid,
-            contents,
+            chunks,
             f"documentpdf.{pdf_format}",
         )
 
+    except HTTPException:
+        # Too large, found while streaming it
+        raise
     except Exception:
         return {"message": "There was an error uploading the file"}
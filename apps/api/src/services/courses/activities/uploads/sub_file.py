@@ -1,3 +1,4 @@
+from src.security.file_validation import validate_upload
 from src.services.utils.upload_content import upload_content
 
 
@@ -10,14 +11,13 @@ async def upload_submission_file(
     assignment_uuid,
     assignment_task_uuid,
 ):
-    contents = file.file.read()
-    file.filename.split(".")[-1]
+    _, chunks = validate_upload(file, ["document", "archive", "video", "image"])
 
     await upload_content(
         f"courses/{course_uuid}/activities/{activity_uuid}/assignments/{assignment_uuid}/tasks/{assignment_task_uuid}/subs",
         "orgs",
         org_uuid,
-        contents,
+        chunks,
         f"{name_in_disk}",
         ["pdf", "docx", "mp4", "jpg", "jpeg", "png", "pptx", "zip"],
     )
@@ -1,19 +1,24 @@
 
+from fastapi import HTTPException
+from src.security.file_validation import validate_upload
 from src.services.utils.upload_content import upload_content
 
 
 async def upload_video(video_file, activity_uuid, org_uuid, course_uuid):
-    contents = video_file.file.read()
     video_format = video_file.filename.split(".")[-1]
+    _, chunks = validate_upload(video_file, ["video"])
 
     try:
         await upload_content(
             f"courses/{course_uuid}/activities/{activity_uuid}/video",
             'orgs',
             org_uuid,
-            contents,
+            chunks,
             f"video.{video_format}",
         )
 
+    except HTTPException:
+        # Too large, found while streaming it
+        raise
     except Exception:
         return {"message": "There was an error uploading the file"}
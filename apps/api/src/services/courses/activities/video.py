@@ -20,6 +20,8 @@ from fastapi import HTTPException, status, UploadFile, Request
 from uuid import uuid4
 from datetime import datetime
 from src.security.courses_security import courses_rbac_check_for_activities
+from src.services.courses.cache import bump_course_version
+from src.services.trail.progress import refresh_course_progress
 
 
 async def create_video_activity(
@@ -111,22 +113,22 @@ async def create_video_activity(
         update_date=str(datetime.now()),
     )
 
-    # create activity
-    activity = Activity.model_validate(activity_object)
-    db_session.add(activity)
-    db_session.commit()
-    db_session.refresh(activity)
-
-    # upload video
+    # upload video, before the activity is created: the file may be rejected
     if video_file and organization and course:
         # get videofile format
         await upload_video(
             video_file,
-            activity.activity_uuid,
+            activity_uuid,
             organization.org_uuid,
             course.course_uuid,
         )
 
+    # create activity
+    activity = Activity.model_validate(activity_object)
+    db_session.add(activity)
+    db_session.commit()
+    db_session.refresh(activity)
+
     # update chapter
     chapter_activity_object = ChapterActivity(
         chapter_id=chapter.id,  # type: ignore
@@ -140,9 +142,12 @@ async def create_video_activity(
 
     # Insert ChapterActivity link in DB
     db_session.add(chapter_activity_object)
+    refresh_course_progress(coursechapter.course_id, db_session)
     db_session.commit()
     db_session.refresh(chapter_activity_object)
 
+    bump_course_version(course.course_uuid)
+
     return ActivityRead.model_validate(activity)
 
 
@@ -238,8 +243,11 @@ async def create_external_video_activity(
 
     # Insert ChapterActivity link in DB
     db_session.add(chapter_activity_object)
+    refresh_course_progress(coursechapter.course_id, db_session)
     db_session.commit()
 
+    bump_course_version(course.course_uuid)
+
     return ActivityRead.model_validate(activity)
 
 
@@ -0,0 +1,98 @@
+from sqlmodel import Session, select
+from src.core.cache import SharedVersions, TTLCache
+from src.db.courses.courses import Course, FullCourseRead
+
+
+# Assembled FullCourseRead payloads, keyed by
+# (course_uuid, with_unpublished_activities, course version)
+_course_meta_cache = TTLCache(maxsize=512, ttl=300)
+
+# Current version of each course outline, shared by every worker. Every
+# write to a course, its chapters, activities or authors bumps it, which
+# makes previously cached payloads unreachable.
+_course_versions = SharedVersions("course_meta", ttl=2 * 300)
+
+
+def get_course_version(course_uuid: str) -> int | None:
+    return _course_versions.get(course_uuid)
+
+
+def bump_course_version(course_uuid: str) -> None:
+    _course_versions.bump(course_uuid)
+
+
+def bump_course_version_by_id(course_id: int, db_session: Session) -> None:
+    statement = select(Course.course_uuid).where(Course.id == course_id)
+    course_uuid = db_session.exec(statement).first()
+
+    if course_uuid:
+        bump_course_version(course_uuid)
+
+
+def get_cached_course_meta(
+    course_uuid: str, with_unpublished_activities: bool
+) -> FullCourseRead | None:
+    """
+    Return the cached outline of a course, if any. The payload is shared
+    between requests and must not be mutated. RBAC is not part of the cached
+    data and must be checked by the caller.
+    """
+    version = get_course_version(course_uuid)
+    if version is None:
+        return None
+    return _course_meta_cache.get(
+        (course_uuid, with_unpublished_activities, version)
+    )
+
+
+def set_cached_course_meta(
+    course_uuid: str,
+    with_unpublished_activities: bool,
+    version: int | None,
+    course_meta: FullCourseRead,
+) -> None:
+    """
+    Store an outline under the version that was current before it was built,
+    so that a write happening in the meantime is never masked.
+    """
+    if version is None:
+        return
+    _course_meta_cache.set(
+        (course_uuid, with_unpublished_activities, version), course_meta
+    )
+
+
+# Public collections listed to anonymous visitors, with their preview
+# courses, keyed by (org_id, page, limit, collections version)
+_public_collections_cache = TTLCache(maxsize=512, ttl=60)
+
+# Current version of each org's collections, shared by every worker and
+# bumped by every write to a collection or to one of the org's courses
+_collections_versions = SharedVersions("public_collections", ttl=2 * 60)
+
+
+def get_collections_version(org_id: int) -> int | None:
+    return _collections_versions.get(int(org_id))
+
+
+def bump_collections_version(org_id: int) -> None:
+    _collections_versions.bump(int(org_id))
+
+
+def get_cached_public_collections(org_id: int, page: int, limit: int) -> list | None:
+    """
+    Return the cached public collections of an org page, if any. The payload
+    is shared between requests and must not be mutated.
+    """
+    version = get_collections_version(org_id)
+    if version is None:
+        return None
+    return _public_collections_cache.get((int(org_id), page, limit, version))
+
+
+def set_cached_public_collections(
+    org_id: int, page: int, limit: int, version: int | None, collections: list
+) -> None:
+    if version is None:
+        return
+    _public_collections_cache.set((int(org_id), page, limit, version), collections)
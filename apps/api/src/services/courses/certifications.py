@@ -12,10 +12,9 @@ from src.db.courses.certifications import (
     CertificateUserRead,
 )
 from src.db.courses.courses import Course
-from src.db.courses.chapter_activities import ChapterActivity
-from src.db.trail_steps import TrailStep
 from src.db.users import PublicUser, AnonymousUser
 from src.security.courses_security import courses_rbac_check_for_certifications
+from src.services.trail.progress import get_course_progress
 
 
 ####################################################
@@ -370,6 +369,15 @@ async def get_user_certificates_for_course(
     return result
 
 
+def is_course_completed(user_id: int, course_id: int, db_session: Session) -> bool:
+    """
+    Whether the user completed every published activity of the course, read
+    from the maintained course progress in a single lookup.
+    """
+    progress = get_course_progress(user_id, course_id, db_session)
+    return bool(progress) and 0 < progress.total_count <= progress.completed_count  # type: ignore
+
+
 async def check_course_completion_and_create_certificate(
     request: Request,
     user_id: int,
@@ -385,41 +393,27 @@ async def check_course_completion_and_create_certificate(
     - The function is called from mark_activity_as_done_for_user which already has RBAC checks
     """
     
-    # Get all activities in the course
-    statement = select(ChapterActivity).where(ChapterActivity.course_id == course_id)
-    course_activities = db_session.exec(statement).all()
-    
-    if not course_activities:
-        return False  # No activities in course
-    
-    # Get all completed activities for this user in this course
-    statement = select(TrailStep).where(
-        TrailStep.user_id == user_id,
-        TrailStep.course_id == course_id,
-        TrailStep.complete == True
-    )
-    completed_activities = db_session.exec(statement).all()
-    
-    # Check if all activities are completed
-    if len(completed_activities) >= len(course_activities):
-        # All activities completed, check if certification exists for this course
-        statement = select(Certifications).where(Certifications.course_id == course_id)
-        certification = db_session.exec(statement).first()
-        
-        if certification and certification.id:
-            # SECURITY: Create certificate user link (system operation, no RBAC needed here)
-            # This is called from mark_activity_as_done_for_user which already has proper RBAC checks
-            try:
-                await create_certificate_user(request, user_id, certification.id, db_session)
-                return True
-            except HTTPException as e:
-                if e.status_code == 400 and "already has a certificate" in e.detail:
-                    # Certificate already exists, which is fine
-                    return True
-                else:
-                    raise e
-        
-    return False
+    # Nothing to do when the course has no certification
+    statement = select(Certifications).where(Certifications.course_id == course_id)
+    certification = db_session.exec(statement).first()
+
+    if not certification or not certification.id:
+        return False
+
+    if not is_course_completed(user_id, course_id, db_session):
+        return False
+
+    # SECURITY: Create certificate user link (system operation, no RBAC needed here)
+    # This is called from mark_activity_as_done_for_user which already has proper RBAC checks
+    try:
+        await create_certificate_user(request, user_id, certification.id, db_session)
+        return True
+    except HTTPException as e:
+        if e.status_code == 400 and "already has a certificate" in e.detail:
+            # Certificate already exists, which is fine
+            return True
+        else:
+            raise e
 
 
 async def get_certificate_by_user_certification_uuid(
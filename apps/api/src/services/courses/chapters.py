@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import List
 from uuid import uuid4
 from sqlmodel import Session, select
+from src.core.db_session import DBSession, db_exec
 from src.db.users import AnonymousUser, PublicUser
 from src.db.courses.course_chapters import CourseChapter
 from src.db.courses.activities import Activity, ActivityRead
@@ -16,6 +17,8 @@ from src.db.courses.chapters import (
 from src.db.courses.courses import Course
 from fastapi import HTTPException, status, Request
 from src.security.courses_security import courses_rbac_check_for_chapters
+from src.services.courses.cache import bump_course_version, bump_course_version_by_id
+from src.services.trail.progress import refresh_course_progress
 
 
 ####################################################
@@ -90,6 +93,8 @@ async def create_chapter(
         db_session.add(course_chapter)
         db_session.commit()
 
+    bump_course_version(course.course_uuid)
+
     return chapter
 
 
@@ -97,10 +102,10 @@ async def get_chapter(
     request: Request,
     chapter_id: int,
     current_user: PublicUser | AnonymousUser,
-    db_session: Session,
+    db_session: DBSession,
 ) -> ChapterRead:
     statement = select(Chapter).where(Chapter.id == chapter_id)
-    chapter = db_session.exec(statement).first()
+    chapter = (await db_exec(db_session, statement)).first()
 
     if not chapter:
         raise HTTPException(
@@ -109,7 +114,7 @@ async def get_chapter(
 
     # get COurse
     statement = select(Course).where(Course.id == chapter.course_id)
-    course = db_session.exec(statement).first()
+    course = (await db_exec(db_session, statement)).first()
 
     if not course:
         raise HTTPException(
@@ -127,7 +132,7 @@ async def get_chapter(
         .distinct(Activity.id) # type: ignore
     )
 
-    activities = db_session.exec(statement).all()
+    activities = (await db_exec(db_session, statement)).all()
 
     chapter = ChapterRead(
         **chapter.model_dump(),
@@ -165,6 +170,8 @@ async def update_chapter(
     db_session.commit()
     db_session.refresh(chapter)
 
+    bump_course_version_by_id(chapter.course_id, db_session)
+
     if chapter:
         chapter = await get_chapter(
             request, chapter.id, current_user, db_session  # type: ignore
@@ -198,25 +205,30 @@ async def delete_chapter(
         db_session.delete(chapter_activity)
 
     # Delete the chapter
+    course_id = chapter.course_id
     db_session.delete(chapter)
+    refresh_course_progress(course_id, db_session)
     db_session.commit()
 
+    bump_course_version_by_id(course_id, db_session)
+
     return {"detail": "chapter deleted"}
 
 
-async def get_course_chapters(
-    request: Request,
+async def get_course_outline(
     course_id: int,
-    db_session: Session,
-    current_user: PublicUser | AnonymousUser,
+    db_session: DBSession,
     with_unpublished_activities: bool,
-    page: int = 1,
-    limit: int = 10,
 ) -> List[ChapterRead]:
-
-    statement = select(Course).where(Course.id == course_id)
-    course = db_session.exec(statement).first()
-
+    """
+    Build the ordered chapters/activities tree of a course.
+
+    Chapters are fetched in one query and their activities in a second one
+    (ChapterActivity joined with Activity for every chapter of the course),
+    the tree is then assembled in memory. The number of queries does not
+    depend on the number of chapters or activities. No RBAC check is done here,
+    callers are responsible for it.
+    """
     statement = (
         select(Chapter)
         .join(CourseChapter, Chapter.id == CourseChapter.chapter_id) # type: ignore
@@ -225,37 +237,62 @@ async def get_course_chapters(
         .order_by(CourseChapter.order) # type: ignore
         .group_by(Chapter.id, CourseChapter.order) # type: ignore
     )
-    chapters = db_session.exec(statement).all()
+    chapters = [
+        ChapterRead(**chapter.model_dump(), activities=[])
+        for chapter in (await db_exec(db_session, statement)).all()
+    ]
 
-    chapters = [ChapterRead(**chapter.model_dump(), activities=[]) for chapter in chapters]
+    if not chapters:
+        return chapters
 
-    # RBAC check
-    await courses_rbac_check_for_chapters(request, course.course_uuid, current_user, "read", db_session)  # type: ignore
+    chapter_ids = {chapter.id for chapter in chapters}
 
-    # Get activities for each chapter
-    for chapter in chapters:
-        statement = (
-            select(ChapterActivity)
-            .where(ChapterActivity.chapter_id == chapter.id)
-            .order_by(ChapterActivity.order) # type: ignore
-            .distinct(ChapterActivity.id, ChapterActivity.order) # type: ignore
+    statement = (
+        select(ChapterActivity.chapter_id, Activity)
+        .join(Activity, Activity.id == ChapterActivity.activity_id) # type: ignore
+        .where(ChapterActivity.chapter_id.in_(chapter_ids)) # type: ignore
+        .order_by(ChapterActivity.chapter_id, ChapterActivity.order, ChapterActivity.id) # type: ignore
+    )
+    if not with_unpublished_activities:
+        statement = statement.where(Activity.published == True)
+
+    # Group activities by chapter, keeping the ChapterActivity order
+    activities_by_chapter = {}
+    for chapter_id, activity in (await db_exec(db_session, statement)).all():
+        activities_by_chapter.setdefault(chapter_id, []).append(
+            ActivityRead(**activity.model_dump())
         )
-        chapter_activities = db_session.exec(statement).all()
-
-        for chapter_activity in chapter_activities:
-            statement = (
-                select(Activity)
-                .where(Activity.id == chapter_activity.activity_id, with_unpublished_activities or Activity.published == True)
-                .distinct(Activity.id) # type: ignore
-            )
-            activity = db_session.exec(statement).first()
 
-            if activity:
-                chapter.activities.append(ActivityRead(**activity.model_dump()))
+    for chapter in chapters:
+        chapter.activities = list(activities_by_chapter.get(chapter.id, []))
 
     return chapters
 
 
+async def get_course_chapters(
+    request: Request,
+    course_id: int,
+    db_session: DBSession,
+    current_user: PublicUser | AnonymousUser,
+    with_unpublished_activities: bool,
+    page: int = 1,
+    limit: int = 10,
+) -> List[ChapterRead]:
+
+    statement = select(Course).where(Course.id == course_id)
+    course = (await db_exec(db_session, statement)).first()
+
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Course does not exist"
+        )
+
+    # RBAC check
+    await courses_rbac_check_for_chapters(request, course.course_uuid, current_user, "read", db_session)
+
+    return await get_course_outline(course_id, db_session, with_unpublished_activities)
+
+
 # Important Note : this is legacy code that has been used because
 # the frontend is still not adapted for the new data structure, this implementation is absolutely not the best one
 # and should not be used for future features
@@ -263,10 +300,10 @@ async def DEPRECEATED_get_course_chapters(
     request: Request,
     course_uuid: str,
     current_user: PublicUser,
-    db_session: Session,
+    db_session: DBSession,
 ):
     statement = select(Course).where(Course.course_uuid == course_uuid)
-    course = db_session.exec(statement).first()
+    course = (await db_exec(db_session, statement)).first()
 
     if not course:
         raise HTTPException(
@@ -276,19 +313,26 @@ async def DEPRECEATED_get_course_chapters(
     # RBAC check
     await courses_rbac_check_for_chapters(request, course.course_uuid, current_user, "read", db_session)
 
-    chapters_in_db = await get_course_chapters(request, course.id, db_session, current_user)  # type: ignore
-
-    # activities
+    # Editors need the full outline, unpublished activities included
+    chapters_in_db = await get_course_outline(course.id, db_session, True)  # type: ignore
 
     # chapters
     chapters = {}
+    activities_list = {}
+    chapterOrder = []
 
     for chapter in chapters_in_db:
         chapter_activityIds = []
 
         for activity in chapter.activities:
-            print("test", activity)
             chapter_activityIds.append(activity.activity_uuid)
+            activities_list[activity.activity_uuid] = {
+                "uuid": activity.activity_uuid,
+                "id": activity.id,
+                "name": activity.name,
+                "type": activity.activity_type,
+                "content": activity.content,
+            }
 
         chapters[chapter.chapter_uuid] = {
             "uuid": chapter.chapter_uuid,
@@ -296,39 +340,6 @@ async def DEPRECEATED_get_course_chapters(
             "name": chapter.name,
             "activityIds": chapter_activityIds,
         }
-
-    # activities
-    activities_list = {}
-    statement = (
-        select(Activity)
-        .join(ChapterActivity, ChapterActivity.activity_id == Activity.id) # type: ignore
-        .where(ChapterActivity.activity_id == Activity.id)
-        .group_by(Activity.id) # type: ignore
-    )
-    activities_in_db = db_session.exec(statement).all()
-
-    for activity in activities_in_db:
-        activities_list[activity.activity_uuid] = {
-            "uuid": activity.activity_uuid,
-            "id": activity.id,
-            "name": activity.name,
-            "type": activity.activity_type,
-            "content": activity.content,
-        }
-
-    # get chapter order
-    statement = (
-        select(Chapter)
-        .join(CourseChapter, CourseChapter.chapter_id == Chapter.id) # type: ignore
-        .where(CourseChapter.chapter_id == Chapter.id)
-        .group_by(Chapter.id, CourseChapter.order) # type: ignore
-        .order_by(CourseChapter.order) # type: ignore
-    )
-    chapters_in_db = db_session.exec(statement).all()
-
-    chapterOrder = []
-
-    for chapter in chapters_in_db:
         chapterOrder.append(chapter.chapter_uuid)
 
     final = {
@@ -450,6 +461,9 @@ async def reorder_chapters_and_activities(
     for ca in existing_chapter_activities:
         if (ca.chapter_id, ca.activity_id) not in activities_to_keep:
             db_session.delete(ca)
+    refresh_course_progress(course.id, db_session)  # type: ignore
     db_session.commit()
 
+    bump_course_version(course.course_uuid)
+
     return {"detail": "Chapters and activities reordered successfully"}
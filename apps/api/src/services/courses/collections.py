@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List
 from uuid import uuid4
-from sqlmodel import Session, select
+from sqlmodel import Session, func, select
 from src.db.users import AnonymousUser, PublicUser
 from src.db.collections import (
     Collection,
@@ -13,6 +13,12 @@ from src.db.collections_courses import CollectionCourse
 from src.db.courses.courses import Course
 from fastapi import HTTPException, status, Request
 from src.security.courses_security import courses_rbac_check_for_collections
+from src.services.courses.cache import (
+    bump_collections_version,
+    get_cached_public_collections,
+    get_collections_version,
+    set_cached_public_collections,
+)
 
 
 ####################################################
@@ -126,6 +132,8 @@ async def create_collection(
     db_session.commit()
     db_session.refresh(collection)
 
+    bump_collections_version(collection.org_id)
+
     # Get courses once again
     statement = (
         select(Course)
@@ -200,6 +208,8 @@ async def update_collection(
     db_session.commit()
     db_session.refresh(collection)
 
+    bump_collections_version(collection.org_id)
+
     # Get courses once again
     statement = (
         select(Course)
@@ -234,10 +244,14 @@ async def delete_collection(
         request, collection.collection_uuid, current_user, "delete", db_session
     )
 
+    org_id = collection.org_id
+
     # delete collection from database
     db_session.delete(collection)
     db_session.commit()
 
+    bump_collections_version(org_id)
+
     return {"detail": "Collection deleted"}
 
 
@@ -246,6 +260,61 @@ async def delete_collection(
 ####################################################
 
 
+# Courses listed with each collection of a page, the collection itself
+# lists all of them
+COLLECTION_PREVIEW_COURSES = 10
+# Largest page of collections
+COLLECTIONS_MAX_LIMIT = 50
+
+
+def _get_collections_preview_courses(
+    org_id: int,
+    collection_ids: list[int],
+    public_only: bool,
+    db_session: Session,
+) -> dict[int, tuple[list, int]]:
+    """
+    The first courses of each collection and their total, for a whole page of
+    collections in one query: courses are numbered within their collection
+    and only the first COLLECTION_PREVIEW_COURSES are fetched.
+    """
+    if not collection_ids:
+        return {}
+
+    filters = [
+        CollectionCourse.collection_id.in_(collection_ids),  # type: ignore
+        CollectionCourse.org_id == org_id,
+    ]
+    if public_only:
+        filters.append(Course.public == True)
+
+    ranked = (
+        select(
+            CollectionCourse.collection_id.label("collection_id"),  # type: ignore
+            CollectionCourse.course_id.label("course_id"),  # type: ignore
+            func.row_number()
+            .over(partition_by=CollectionCourse.collection_id, order_by=CollectionCourse.id)
+            .label("position"),
+            func.count().over(partition_by=CollectionCourse.collection_id).label("total"),
+        )
+        .join(Course, Course.id == CollectionCourse.course_id)  # type: ignore
+        .where(*filters)
+        .subquery()
+    )
+    statement = (
+        select(Course, ranked.c.collection_id, ranked.c.total)
+        .join(ranked, ranked.c.course_id == Course.id)
+        .where(ranked.c.position <= COLLECTION_PREVIEW_COURSES)
+        .order_by(ranked.c.collection_id, ranked.c.position)
+    )
+
+    courses: dict[int, tuple[list, int]] = {}
+    for course, collection_id, total in db_session.exec(statement).all():
+        courses.setdefault(collection_id, ([], total))[0].append(course.model_dump())
+
+    return courses
+
+
 async def get_collections(
     request: Request,
     org_id: str,
@@ -254,52 +323,40 @@ async def get_collections(
     page: int = 1,
     limit: int = 10,
 ) -> List[CollectionRead]:
-
-    statement_public = select(Collection).where(
-        Collection.org_id == org_id, Collection.public == True
-    )
-    statement_all = (
-        select(Collection).where(Collection.org_id == org_id).distinct(Collection.id) # type: ignore
-    )
-
-    if current_user.id == 0:
-        statement = statement_public
-    else:
-        statement = statement_all
+    """
+    A page of the org's collections with their first courses, in two queries.
+    Anonymous visitors only see public collections and courses, served from a
+    short lived cache as they hit the landing page the most.
+    """
+    page = max(page, 1)
+    limit = min(max(limit, 1), COLLECTIONS_MAX_LIMIT)
+    public_only = current_user.id == 0
+
+    if public_only:
+        collections = get_cached_public_collections(int(org_id), page, limit)
+        if collections is not None:
+            return collections
+        version = get_collections_version(int(org_id))
+
+    statement = select(Collection).where(Collection.org_id == org_id)
+    if public_only:
+        statement = statement.where(Collection.public == True)
+    statement = statement.order_by(Collection.id).offset((page - 1) * limit).limit(limit)  # type: ignore
 
     collections = db_session.exec(statement).all()
 
+    courses = _get_collections_preview_courses(
+        int(org_id), [collection.id for collection in collections], public_only, db_session  # type: ignore
+    )
+
     collections_with_courses = []
 
     for collection in collections:
-        statement_all = (
-            select(Course)
-            .join(CollectionCourse)
-            .where(
-                CollectionCourse.collection_id == collection.id,
-                CollectionCourse.org_id == collection.org_id
-            )
-            .distinct()
-        )
-        statement_public = (
-            select(Course)
-            .join(CollectionCourse)
-            .where(
-                CollectionCourse.collection_id == collection.id,
-                CollectionCourse.org_id == org_id,
-                Course.public == True
-            )
-            .distinct()
-        )
-        if current_user.id == 0:
-            statement = statement_public
-        else:
-            # RBAC check
-            statement = statement_all
-
-        courses = db_session.exec(statement).all()
-
-        collection = CollectionRead(**collection.model_dump(), courses=list(courses))
+        preview, total = courses.get(collection.id, ([], 0))  # type: ignore
+        collection = CollectionRead(**collection.model_dump(), courses=preview, courses_count=total)
         collections_with_courses.append(collection)
 
+    if public_only:
+        set_cached_public_collections(int(org_id), page, limit, version, collections_with_courses)
+
     return collections_with_courses
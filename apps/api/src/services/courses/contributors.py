@@ -6,6 +6,7 @@ from src.db.courses.courses import Course
 from src.db.resource_authors import ResourceAuthor, ResourceAuthorshipEnum, ResourceAuthorshipStatusEnum
 from src.security.rbac.rbac import authorization_verify_if_user_is_anon
 from src.security.courses_security import courses_rbac_check
+from src.services.courses.cache import bump_course_version
 from typing import List
 
 
@@ -66,6 +67,8 @@ async def apply_course_contributor(
     db_session.commit()
     db_session.refresh(resource_author)
 
+    bump_course_version(course_uuid)
+
     return {
         "detail": "Contributor application submitted successfully",
         "status": "pending"
@@ -136,6 +139,8 @@ async def update_course_contributor(
     db_session.commit()
     db_session.refresh(existing_authorship)
 
+    bump_course_version(course_uuid)
+
     return {
         "detail": "Contributor updated successfully",
         "status": "success"
@@ -280,7 +285,10 @@ async def add_bulk_course_contributors(
                 "username": username,
                 "reason": str(e)
             })
-            
+
+    if results["successful"]:
+        bump_course_version(course_uuid)
+
     return results 
 
 async def remove_bulk_course_contributors(
@@ -373,5 +381,8 @@ async def remove_bulk_course_contributors(
                 "username": username,
                 "reason": str(e)
             })
-            
+
+    if results["successful"]:
+        bump_course_version(course_uuid)
+
     return results 
\ No newline at end of file
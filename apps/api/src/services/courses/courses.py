@@ -1,13 +1,15 @@
 from typing import List
 from uuid import uuid4
-from sqlmodel import Session, select, or_, and_, text
+from sqlmodel import Session, select, or_, and_
+from sqlalchemy import exists
+from src.core.db_session import DBSession, db_exec
 from src.db.usergroup_resources import UserGroupResource
 from src.db.usergroup_user import UserGroupUser
 from src.db.organizations import Organization
 from src.security.features_utils.usage import (
-    check_limits_with_usage,
+    check_limits_and_increase_feature_usage,
     decrease_feature_usage,
-    increase_feature_usage,
+    release_feature_usage,
 )
 from src.db.resource_authors import ResourceAuthor, ResourceAuthorshipEnum, ResourceAuthorshipStatusEnum
 from src.db.users import PublicUser, AnonymousUser, User, UserRead
@@ -25,19 +27,27 @@ from src.security.rbac.rbac import (
     authorization_verify_based_on_org_admin_status,
 )
 from src.services.courses.thumbnails import upload_thumbnail
+from src.services.courses.cache import (
+    bump_collections_version,
+    bump_course_version,
+    get_cached_course_meta,
+    get_course_version,
+    set_cached_course_meta,
+)
 from fastapi import HTTPException, Request, UploadFile, status
 from datetime import datetime
 from src.security.courses_security import courses_rbac_check
+from src.services.search.fulltext import COURSE_SEARCH_COLUMNS, search_filter
 
 
 async def get_course(
     request: Request,
     course_uuid: str,
     current_user: PublicUser | AnonymousUser,
-    db_session: Session,
+    db_session: DBSession,
 ):
     statement = select(Course).where(Course.course_uuid == course_uuid)
-    course = db_session.exec(statement).first()
+    course = (await db_exec(db_session, statement)).first()
 
     if not course:
         raise HTTPException(
@@ -57,7 +67,7 @@ async def get_course(
             ResourceAuthor.id.asc() # type: ignore  
         )
     )
-    author_results = db_session.exec(authors_statement).all()
+    author_results = (await db_exec(db_session, authors_statement)).all()
 
     # Convert to AuthorWithRole objects
     authors = [
@@ -80,10 +90,10 @@ async def get_course_by_id(
     request: Request,
     course_id: str,
     current_user: PublicUser | AnonymousUser,
-    db_session: Session,
+    db_session: DBSession,
 ):
     statement = select(Course).where(Course.id == course_id)
-    course = db_session.exec(statement).first()
+    course = (await db_exec(db_session, statement)).first()
 
     if not course:
         raise HTTPException(
@@ -103,7 +113,7 @@ async def get_course_by_id(
             ResourceAuthor.id.asc() # type: ignore
         )
     )
-    author_results = db_session.exec(authors_statement).all()
+    author_results = (await db_exec(db_session, authors_statement)).all()
 
     # Convert to AuthorWithRole objects
     authors = [
@@ -127,10 +137,18 @@ async def get_course_meta(
     course_uuid: str,
     with_unpublished_activities: bool,
     current_user: PublicUser | AnonymousUser,
-    db_session: Session,
+    db_session: DBSession,
 ) -> FullCourseRead:
     # Avoid circular import
-    from src.services.courses.chapters import get_course_chapters
+    from src.services.courses.chapters import get_course_outline
+
+    # Serve the outline from cache, RBAC is still checked for every user
+    cached_course_meta = get_cached_course_meta(course_uuid, with_unpublished_activities)
+    if cached_course_meta:
+        await courses_rbac_check(request, course_uuid, current_user, "read", db_session)
+        return cached_course_meta
+
+    course_version = get_course_version(course_uuid)
 
     # Get course with authors in a single query using joins
     course_statement = (
@@ -140,7 +158,7 @@ async def get_course_meta(
         .where(Course.course_uuid == course_uuid)
         .order_by(ResourceAuthor.id.asc())  # type: ignore
     )
-    results = db_session.exec(course_statement).all()
+    results = (await db_exec(db_session, course_statement)).all()
 
     if not results:
         raise HTTPException(
@@ -155,10 +173,10 @@ async def get_course_meta(
     # RBAC check
     await courses_rbac_check(request, course.course_uuid, current_user, "read", db_session)
 
-    # Get course chapters
+    # Get course chapters (RBAC already checked above)
     chapters = []
     if course.id is not None:
-        chapters = await get_course_chapters(request, course.id, db_session, current_user, with_unpublished_activities)
+        chapters = await get_course_outline(course.id, db_session, with_unpublished_activities)
     
     # Convert to AuthorWithRole objects
     authors = [
@@ -178,60 +196,50 @@ async def get_course_meta(
         authors=authors,
         chapters=chapters
     )
-    
-    return course_read
 
+    set_cached_course_meta(course_uuid, with_unpublished_activities, course_version, course_read)
 
-async def get_courses_orgslug(
-    request: Request,
-    current_user: PublicUser | AnonymousUser,
-    org_slug: str,
-    db_session: Session,
-    page: int = 1,
-    limit: int = 10,
-) -> List[CourseRead]:
-    offset = (page - 1) * limit
+    return course_read
 
-    # Base query
-    query = (
-        select(Course)
-        .join(Organization)
-        .where(Organization.slug == org_slug)
-    )
 
+def _visible_courses_filter(current_user: PublicUser | AnonymousUser):
+    """Courses of an org that the user can list"""
     if isinstance(current_user, AnonymousUser):
         # For anonymous users, only show public courses
-        query = query.where(Course.public == True)
-    else:
-        # For authenticated users, show:
-        # 1. Public courses
-        # 2. Courses not in any UserGroup
-        # 3. Courses in UserGroups where the user is a member
-        # 4. Courses where the user is a resource author
-        query = (
-            query
-            .outerjoin(UserGroupResource, UserGroupResource.resource_uuid == Course.course_uuid)  # type: ignore
-            .outerjoin(UserGroupUser, and_(
-                UserGroupUser.usergroup_id == UserGroupResource.usergroup_id,
-                UserGroupUser.user_id == current_user.id
-            ))
-            .outerjoin(ResourceAuthor, ResourceAuthor.resource_uuid == Course.course_uuid)  # type: ignore
-            .where(or_(
-                Course.public == True,
-                UserGroupResource.resource_uuid == None,  # Courses not in any UserGroup # noqa: E711
-                UserGroupUser.user_id == current_user.id,  # Courses in UserGroups where user is a member
-                ResourceAuthor.user_id == current_user.id  # Courses where user is a resource author
-            ))
-        )
+        return Course.public == True
+
+    # For authenticated users, show:
+    # 1. Public courses
+    # 2. Courses not in any UserGroup
+    # 3. Courses in UserGroups where the user is a member
+    # 4. Courses where the user is a resource author
+    # EXISTS instead of joins, so that courses are never duplicated
+    in_any_usergroup = exists().where(
+        UserGroupResource.resource_uuid == Course.course_uuid
+    )
+    in_user_usergroup = exists().where(
+        UserGroupResource.resource_uuid == Course.course_uuid,
+        UserGroupUser.usergroup_id == UserGroupResource.usergroup_id,
+        UserGroupUser.user_id == current_user.id,
+    )
+    is_author = exists().where(
+        ResourceAuthor.resource_uuid == Course.course_uuid,
+        ResourceAuthor.user_id == current_user.id,
+    )
+    return or_(
+        Course.public == True,
+        ~in_any_usergroup,
+        in_user_usergroup,
+        is_author,
+    )
 
-    # Apply pagination
-    query = query.offset(offset).limit(limit).distinct()
 
-    courses = db_session.exec(query).all()
-    
+async def _build_course_reads(
+    courses: List[Course], db_session: DBSession
+) -> List[CourseRead]:
     if not courses:
         return []
-        
+
     # Get all course UUIDs
     course_uuids = [course.course_uuid for course in courses]
     
@@ -245,7 +253,7 @@ async def get_courses_orgslug(
         )
     )
     
-    author_results = db_session.exec(authors_query).all()
+    author_results = (await db_exec(db_session, authors_query)).all()
     
     # Create a dictionary mapping course_uuid to list of authors
     course_authors = {}
@@ -286,108 +294,64 @@ async def get_courses_orgslug(
     return course_reads
 
 
+async def get_courses_orgslug(
+    request: Request,
+    current_user: PublicUser | AnonymousUser,
+    org_slug: str,
+    db_session: DBSession,
+    page: int = 1,
+    limit: int = 10,
+) -> List[CourseRead]:
+    offset = (page - 1) * limit
+
+    query = (
+        select(Course)
+        .join(Organization)
+        .where(Organization.slug == org_slug)
+        .where(_visible_courses_filter(current_user))
+    )
+
+    # Apply pagination
+    query = query.offset(offset).limit(limit)
+
+    courses = (await db_exec(db_session, query)).all()
+
+    return await _build_course_reads(list(courses), db_session)
+
+
 async def search_courses(
     request: Request,
     current_user: PublicUser | AnonymousUser,
     org_slug: str,
     search_query: str,
-    db_session: Session,
+    db_session: DBSession,
     page: int = 1,
     limit: int = 10,
 ) -> List[CourseRead]:
     offset = (page - 1) * limit
 
-    # Base query
+    # Full-text match on the course fields, see src.services.search.fulltext
+    match, rank = search_filter(db_session, COURSE_SEARCH_COLUMNS, search_query)
+
     query = (
         select(Course)
         .join(Organization)
         .where(Organization.slug == org_slug)
-        .where(
-            or_(
-                text(f"LOWER(course.name) LIKE LOWER('%{search_query}%')"),
-                text(f"LOWER(course.description) LIKE LOWER('%{search_query}%')"),
-                text(f"LOWER(course.about) LIKE LOWER('%{search_query}%')"),
-                text(f"LOWER(course.learnings) LIKE LOWER('%{search_query}%')"),
-                text(f"LOWER(course.tags) LIKE LOWER('%{search_query}%')")
-            )
-        )
+        .where(match)
+        .where(_visible_courses_filter(current_user))
     )
 
-    if isinstance(current_user, AnonymousUser):
-        # For anonymous users, only show public courses
-        query = query.where(Course.public == True)
-    else:
-        # For authenticated users, show:
-        # 1. Public courses
-        # 2. Courses not in any UserGroup
-        # 3. Courses in UserGroups where the user is a member
-        # 4. Courses where the user is a resource author
-        query = (
-            query
-            .outerjoin(UserGroupResource, UserGroupResource.resource_uuid == Course.course_uuid)  # type: ignore
-            .outerjoin(UserGroupUser, and_(
-                UserGroupUser.usergroup_id == UserGroupResource.usergroup_id,
-                UserGroupUser.user_id == current_user.id
-            ))
-            .outerjoin(ResourceAuthor, ResourceAuthor.resource_uuid == Course.course_uuid)  # type: ignore
-            .where(or_(
-                Course.public == True,
-                UserGroupResource.resource_uuid == None,  # Courses not in any UserGroup # noqa: E711
-                UserGroupUser.user_id == current_user.id,  # Courses in UserGroups where user is a member
-                ResourceAuthor.user_id == current_user.id  # Courses where user is a resource author
-            ))
-        )
+    # Best matches first
+    if rank is not None:
+        query = query.order_by(rank.desc())
+    query = query.order_by(Course.id)  # type: ignore
 
     # Apply pagination
-    query = query.offset(offset).limit(limit).distinct()
-
-    courses = db_session.exec(query).all()
+    query = query.offset(offset).limit(limit)
 
-    # Fetch authors for each course
-    course_reads = []
-    for course in courses:
-        # Get course authors with their roles
-        authors_statement = (
-            select(ResourceAuthor, User)
-            .join(User, ResourceAuthor.user_id == User.id) # type: ignore
-            .where(ResourceAuthor.resource_uuid == course.course_uuid)
-            .order_by(
-                ResourceAuthor.id.asc() # type: ignore
-            )
-        )
-        author_results = db_session.exec(authors_statement).all()
-
-        # Convert to AuthorWithRole objects
-        authors = [
-            AuthorWithRole(
-                user=UserRead.model_validate(user),
-                authorship=resource_author.authorship,
-                authorship_status=resource_author.authorship_status,
-                creation_date=resource_author.creation_date,
-                update_date=resource_author.update_date
-            )
-            for resource_author, user in author_results
-        ]
-        
-        course_read = CourseRead.model_validate({
-            "id": course.id or 0,  # Ensure id is never None
-            "org_id": course.org_id,
-            "name": course.name,
-            "description": course.description or "",
-            "about": course.about or "",
-            "learnings": course.learnings or "",
-            "tags": course.tags or "",
-            "thumbnail_image": course.thumbnail_image or "",
-            "public": course.public,
-            "open_to_contributors": course.open_to_contributors,
-            "course_uuid": course.course_uuid,
-            "creation_date": course.creation_date,
-            "update_date": course.update_date,
-            "authors": authors
-        })
-        course_reads.append(course_read)
+    courses = (await db_exec(db_session, query)).all()
 
-    return course_reads
+    return await _build_course_reads(list(courses), db_session)
 
 
 async def create_course(
@@ -414,8 +378,9 @@ async def create_course(
     # For now, we'll use the existing RBAC check but with proper organization context
     await courses_rbac_check(request, "course_x", current_user, "create", db_session)
 
-    # Usage check
-    check_limits_with_usage("courses", org_id, db_session)
+    # Usage check, the slot is taken right away so that concurrent creations
+    # can't go over the limit together
+    check_limits_and_increase_feature_usage("courses", org_id, db_session)
 
     # Complete course object
     course.org_id = course.org_id
@@ -428,42 +393,48 @@ async def create_course(
     course.creation_date = str(datetime.now())
     course.update_date = str(datetime.now())
 
-    # Upload thumbnail
-    if thumbnail_file and thumbnail_file.filename:
-        name_in_disk = f"{course.course_uuid}_thumbnail_{uuid4()}.{thumbnail_file.filename.split('.')[-1]}"
-        await upload_thumbnail(
-            thumbnail_file, name_in_disk, org.org_uuid, course.course_uuid  # type: ignore
-        )
-        if thumbnail_type == ThumbnailType.IMAGE:
-            course.thumbnail_image = name_in_disk
+    try:
+        # Upload thumbnail
+        if thumbnail_file and thumbnail_file.filename:
+            name_in_disk = f"{course.course_uuid}_thumbnail_{uuid4()}.{thumbnail_file.filename.split('.')[-1]}"
+            await upload_thumbnail(
+                thumbnail_file, name_in_disk, org.org_uuid, course.course_uuid  # type: ignore
+            )
+            if thumbnail_type == ThumbnailType.IMAGE:
+                course.thumbnail_image = name_in_disk
+                course.thumbnail_type = ThumbnailType.IMAGE
+            elif thumbnail_type == ThumbnailType.VIDEO:
+                course.thumbnail_video = name_in_disk
+                course.thumbnail_type = ThumbnailType.VIDEO
+        else:
+            course.thumbnail_image = ""
+            course.thumbnail_video = ""
             course.thumbnail_type = ThumbnailType.IMAGE
-        elif thumbnail_type == ThumbnailType.VIDEO:
-            course.thumbnail_video = name_in_disk
-            course.thumbnail_type = ThumbnailType.VIDEO
-    else:
-        course.thumbnail_image = ""
-        course.thumbnail_video = ""
-        course.thumbnail_type = ThumbnailType.IMAGE
 
-    # Insert course
-    db_session.add(course)
-    db_session.commit()
-    db_session.refresh(course)
+        # Insert course
+        db_session.add(course)
+        db_session.commit()
+        db_session.refresh(course)
+
+        # SECURITY: Make the user the creator of the course
+        resource_author = ResourceAuthor(
+            resource_uuid=course.course_uuid,
+            user_id=current_user.id,
+            authorship=ResourceAuthorshipEnum.CREATOR,
+            authorship_status=ResourceAuthorshipStatusEnum.ACTIVE,
+            creation_date=str(datetime.now()),
+            update_date=str(datetime.now()),
+        )
 
-    # SECURITY: Make the user the creator of the course
-    resource_author = ResourceAuthor(
-        resource_uuid=course.course_uuid,
-        user_id=current_user.id,
-        authorship=ResourceAuthorshipEnum.CREATOR,
-        authorship_status=ResourceAuthorshipStatusEnum.ACTIVE,
-        creation_date=str(datetime.now()),
-        update_date=str(datetime.now()),
-    )
-
-    # Insert course author
-    db_session.add(resource_author)
-    db_session.commit()
-    db_session.refresh(resource_author)
+        # Insert course author
+        db_session.add(resource_author)
+        db_session.commit()
+        db_session.refresh(resource_author)
+    except BaseException:
+        # The course wasn't created, give its slot back
+        db_session.rollback()
+        release_feature_usage("courses", org_id, db_session)
+        raise
 
     # Get course authors with their roles
     authors_statement = (
@@ -488,9 +459,6 @@ async def create_course(
         for resource_author, user in author_results
     ]
 
-    # Feature usage
-    increase_feature_usage("courses", course.org_id, db_session)
-
     course = CourseRead(**course.model_dump(), authors=authors)
 
     return CourseRead.model_validate(course)
@@ -550,6 +518,9 @@ async def update_course_thumbnail(
     db_session.commit()
     db_session.refresh(course)
 
+    bump_course_version(course.course_uuid)
+    bump_collections_version(course.org_id)
+
     # Get course authors with their roles
     authors_statement = (
         select(ResourceAuthor, User)
@@ -655,6 +626,9 @@ async def update_course(
     db_session.commit()
     db_session.refresh(course)
 
+    bump_course_version(course.course_uuid)
+    bump_collections_version(course.org_id)
+
     # Get course authors with their roles
     authors_statement = (
         select(ResourceAuthor, User)
@@ -704,9 +678,14 @@ async def delete_course(
     # Feature usage
     decrease_feature_usage("courses", course.org_id, db_session)
 
+    org_id = course.org_id
+
     db_session.delete(course)
     db_session.commit()
 
+    bump_course_version(course_uuid)
+    bump_collections_version(org_id)
+
     return {"detail": "Course deleted"}
 
 
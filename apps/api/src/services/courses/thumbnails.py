@@ -1,16 +1,21 @@
+from fastapi import HTTPException
+from src.security.file_validation import validate_upload
 from src.services.utils.upload_content import upload_content
 
 
 async def upload_thumbnail(thumbnail_file, name_in_disk,  org_uuid, course_id):
-    contents = thumbnail_file.file.read()
+    _, chunks = validate_upload(thumbnail_file, ["image", "video"])
     try:
         await upload_content(
             f"courses/{course_id}/thumbnails",
             "orgs",
             org_uuid,
-            contents,
+            chunks,
             f"{name_in_disk}",
         )
 
+    except HTTPException:
+        # Too large, found while streaming it
+        raise
     except Exception:
         return {"message": "There was an error uploading the file"}
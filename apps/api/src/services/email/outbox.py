@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import and_, func, insert, or_, update
+from sqlmodel import Session, select
+from config.config import get_nexo_config
+from src.db.email_outbox import EmailOutbox, EmailOutboxStatusEnum
+from src.services.email.transports import EmailTransport, get_email_transport
+
+logger = logging.getLogger(__name__)
+
+# Concurrent senders per process
+EMAIL_OUTBOX_WORKERS = 2
+# Seconds between polls of an empty outbox
+EMAIL_OUTBOX_POLL_INTERVAL = 2
+# Seconds a sender may hold its emails before another one can take them over
+EMAIL_OUTBOX_LEASE = 5 * 60
+# Emails of an org sent per window. Senders check it before claiming, so
+# concurrent senders may go slightly over.
+EMAIL_OUTBOX_ORG_RATE_LIMIT = 100
+EMAIL_OUTBOX_ORG_RATE_WINDOW = 60
+# Failed sends are retried with an exponential backoff, then left FAILED
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE = 60
+EMAIL_OUTBOX_RETRY_MAX = 60 * 60
+
+
+def _available(now: datetime):
+    return and_(
+        EmailOutbox.next_attempt_at <= now,
+        or_(
+            EmailOutbox.status == EmailOutboxStatusEnum.PENDING,
+            and_(
+                EmailOutbox.status == EmailOutboxStatusEnum.SENDING,
+                EmailOutbox.locked_until < now,  # type: ignore
+            ),
+        ),
+    )
+
+
+def enqueue_emails(
+    db_session: Session,
+    messages: Iterable[tuple[str, str, str]],
+    org_id: Optional[int] = None,
+) -> int:
+    """
+    Record (to, subject, body) emails to be sent in the background, in one
+    INSERT. Returns the number of emails queued.
+    """
+    now = datetime.now()
+    rows = [
+        {
+            "org_id": org_id,
+            "to_email": to,
+            "subject": subject,
+            "body": body,
+            "status": EmailOutboxStatusEnum.PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "creation_date": now,
+            "update_date": now,
+        }
+        for to, subject, body in messages
+    ]
+    if not rows:
+        return 0
+
+    db_session.connection().execute(insert(EmailOutbox.__table__), rows)  # type: ignore
+    db_session.commit()
+
+    return len(rows)
+
+
+def claim_emails(
+    db_session: Session, batch_size: int = 100, now: Optional[datetime] = None
+) -> list[EmailOutbox]:
+    """
+    Take a batch of the emails due, oldest first, leased to the caller.
+    Orgs that reached their rate limit are skipped until their window passes.
+    """
+    now = now or datetime.now()
+
+    # Emails each org sent (or is sending) within the window
+    statement = (
+        select(EmailOutbox.org_id, func.count())
+        .where(
+            EmailOutbox.org_id.isnot(None),  # type: ignore
+            EmailOutbox.claimed_at >= now - timedelta(seconds=EMAIL_OUTBOX_ORG_RATE_WINDOW),  # type: ignore
+        )
+        .group_by(EmailOutbox.org_id)
+    )
+    budgets = {
+        org_id: EMAIL_OUTBOX_ORG_RATE_LIMIT - count
+        for org_id, count in db_session.exec(statement).all()
+    }
+
+    statement = (
+        select(EmailOutbox.id, EmailOutbox.org_id)
+        .where(_available(now))
+        .order_by(EmailOutbox.id)  # type: ignore
+        .limit(batch_size * 4)
+    )
+    email_ids = []
+    for email_id, org_id in db_session.exec(statement).all():
+        if org_id is not None:
+            budget = budgets.get(org_id, EMAIL_OUTBOX_ORG_RATE_LIMIT)
+            if budget <= 0:
+                continue
+            budgets[org_id] = budget - 1
+        email_ids.append(email_id)
+        if len(email_ids) >= batch_size:
+            break
+
+    if not email_ids:
+        return []
+
+    # Other senders may have taken some of them in the meantime
+    lease = uuid.uuid4().hex
+    db_session.exec(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(email_ids), _available(now))  # type: ignore
+        .values(
+            status=EmailOutboxStatusEnum.SENDING,
+            locked_by=lease,
+            locked_until=now + timedelta(seconds=EMAIL_OUTBOX_LEASE),
+            claimed_at=now,
+            attempts=EmailOutbox.attempts + 1,
+            update_date=now,
+        )
+    )
+    db_session.commit()
+
+    statement = (
+        select(EmailOutbox)
+        .where(EmailOutbox.locked_by == lease)
+        .order_by(EmailOutbox.id)  # type: ignore
+    )
+    return list(db_session.exec(statement).all())
+
+
+def mark_emails_sent(db_session: Session, email_ids: list[int]) -> None:
+    db_session.exec(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(email_ids))  # type: ignore
+        .values(
+            status=EmailOutboxStatusEnum.SENT,
+            sent_at=datetime.now(),
+            locked_by=None,
+            locked_until=None,
+            last_error=None,
+            update_date=datetime.now(),
+        )
+    )
+    db_session.commit()
+
+
+def mark_emails_failed(db_session: Session, email_ids: list[int], error: str) -> None:
+    """Schedule a retry with an exponential backoff, or give up"""
+    emails = db_session.exec(
+        select(EmailOutbox).where(EmailOutbox.id.in_(email_ids))  # type: ignore
+    ).all()
+
+    for email in emails:
+        if email.attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = EmailOutboxStatusEnum.FAILED
+        else:
+            email.status = EmailOutboxStatusEnum.PENDING
+            delay = min(EMAIL_OUTBOX_RETRY_BASE * 2 ** (email.attempts - 1), EMAIL_OUTBOX_RETRY_MAX)
+            email.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+        email.locked_by = None
+        email.locked_until = None
+        email.last_error = error[:2000]
+        email.update_date = datetime.now()
+        db_session.add(email)
+    db_session.commit()
+
+
+_missing_transport_logged = False
+
+
+def _log_missing_transport() -> None:
+    # Once per process, the worker polling every few seconds
+    global _missing_transport_logged
+
+    if not _missing_transport_logged:
+        logger.error("No Resend API key configured: emails are kept in the outbox, unsent")
+        _missing_transport_logged = True
+
+
+def send_outbox_emails(
+    db_session: Session, transport: Optional[EmailTransport] = None
+) -> int:
+    """
+    Send one batch of the outbox with a single provider call. Returns the
+    number of emails attempted, 0 once nothing is due.
+    """
+    transport = transport or get_email_transport()
+    if transport is None:
+        _log_missing_transport()
+        return 0
+
+    emails = claim_emails(db_session, transport.max_batch_size)
+    if not emails:
+        return 0
+
+    sender = get_nexo_config().mailing_config.system_email_address
+    messages = [
+        {
+            "from": "Nexo Academy <" + sender + ">",
+            "to": [email.to_email],
+            "subject": email.subject,
+            "html": email.body,
+        }
+        for email in emails
+    ]
+    email_ids = [email.id for email in emails]
+
+    try:
+        transport.send_batch(messages)
+        errors = {}
+    except Exception as e:
+        logger.warning(f"Sending {len(emails)} email(s) failed: {e}")
+        if len(messages) > 1:
+            errors = _send_one_by_one(transport, email_ids, messages)  # type: ignore
+        else:
+            errors = {str(e): email_ids}
+
+    failed = set()
+    for error, failed_ids in errors.items():
+        mark_emails_failed(db_session, failed_ids, error)
+        failed.update(failed_ids)
+    sent_ids = [email_id for email_id in email_ids if email_id not in failed]
+    if sent_ids:
+        mark_emails_sent(db_session, sent_ids)  # type: ignore
+
+    return len(emails)
+
+
+def _send_one_by_one(
+    transport: EmailTransport, email_ids: list[int], messages: list[dict]
+) -> dict[str, list[int]]:
+    """
+    Send the messages of a failed batch separately, so that one bad message
+    (e.g. a malformed address) doesn't fail the others. Returns the ids of
+    the emails that failed, by error.
+    """
+    errors: dict[str, list[int]] = {}
+    for email_id, message in zip(email_ids, messages):
+        try:
+            transport.send_batch([message])
+        except Exception as e:
+            errors.setdefault(str(e), []).append(email_id)
+    return errors
+
+
+async def email_outbox_worker(engine) -> None:
+    """
+    Background senders of the outbox. Each one runs in its own thread with
+    its own session, as the provider is called synchronously.
+    """
+
+    def work() -> int:
+        with Session(engine) as db_session:
+            return send_outbox_emails(db_session)
+
+    while True:
+        try:
+            sent = sum(
+                await asyncio.gather(
+                    *[asyncio.to_thread(work) for _ in range(EMAIL_OUTBOX_WORKERS)]
+                )
+            )
+        except Exception as e:
+            logger.error(f"Email outbox worker error: {e}")
+            sent = 0
+
+        if not sent:
+            await asyncio.sleep(EMAIL_OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,71 @@
+import logging
+import threading
+from typing import Optional, Protocol
+import resend
+from config.config import get_nexo_config
+
+logger = logging.getLogger(__name__)
+
+
+class EmailTransport(Protocol):
+    # Most emails sent in one call
+    max_batch_size: int
+
+    def send_batch(self, messages: list[dict]) -> None:
+        """Send Resend-style messages, raising if none of them could be sent"""
+        ...
+
+
+class ResendTransport:
+    """Resend batch API, up to 100 emails per call"""
+
+    max_batch_size = 100
+
+    def send_batch(self, messages: list[dict]) -> None:
+        resend.api_key = get_nexo_config().mailing_config.resend_api_key
+        resend.Batch.send(messages)  # type: ignore
+
+
+class StubTransport:
+    """
+    Keeps the emails in memory instead of sending them. Only used when asked
+    for: by tests, or with `mailing_config.stub_transport` in local setups.
+    """
+
+    max_batch_size = 100
+
+    def __init__(self):
+        self.sent: list[dict] = []
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages: list[dict]) -> None:
+        with self._lock:
+            self.sent.extend(messages)
+        for message in messages:
+            logger.info(f"Email not sent (stub transport): {message['subject']} to {message['to']}")
+
+
+_transport: Optional[EmailTransport] = None
+
+
+def get_email_transport() -> Optional[EmailTransport]:
+    """
+    The configured transport, or None when emails cannot be sent: they then
+    stay in the outbox until a Resend API key is configured.
+    """
+    global _transport
+
+    if _transport is None:
+        mailing_config = get_nexo_config().mailing_config
+        if mailing_config.stub_transport:
+            _transport = StubTransport()
+        elif mailing_config.resend_api_key:
+            _transport = ResendTransport()
+
+    return _transport
+
+
+def set_email_transport(transport: Optional[EmailTransport]) -> None:
+    """Replace the transport of the process, None going back to the configured one"""
+    global _transport
+    _transport = transport
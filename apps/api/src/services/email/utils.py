@@ -1,19 +1,18 @@
+from typing import Iterable, Optional
 from pydantic import EmailStr
-import resend
-from config.config import get_nexo_config
+from sqlmodel import Session
+from src.core.events.database import engine
+from src.services.email.outbox import enqueue_emails
 
 
-def send_email(to: EmailStr, subject: str, body: str):
-    nexo_config = get_nexo_config()
-    params = {
-        "from": "Nexo Academy <" + nexo_config.mailing_config.system_email_address + ">",
-        "to": [to],
-        "subject": subject,
-        "html": body,
-    }
+def send_emails(messages: Iterable[tuple[str, str, str]], org_id: Optional[int] = None) -> int:
+    """
+    Queue (to, subject, body) emails in the outbox, sent in the background
+    by the email outbox worker. Returns the number of emails queued.
+    """
+    with Session(engine) as db_session:
+        return enqueue_emails(db_session, messages, org_id)
 
-    resend.api_key = nexo_config.mailing_config.resend_api_key
-    email = resend.Emails.send(params)
 
-    return email
-        
+def send_email(to: EmailStr, subject: str, body: str, org_id: Optional[int] = None):
+    return send_emails([(to, subject, body)], org_id) == 1
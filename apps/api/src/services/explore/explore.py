@@ -1,6 +1,7 @@
 from typing import Optional
 from fastapi import HTTPException, Request
-from sqlmodel import Session, select
+from sqlmodel import select
+from src.core.db_session import DBSession, db_exec
 from sqlalchemy import text
 
 from src.db.courses.courses import Course, CourseRead, AuthorWithRole
@@ -21,7 +22,7 @@ def _get_sort_expression(salt: str):
 
 async def get_orgs_for_explore(
     request: Request,
-    db_session: Session,
+    db_session: DBSession,
     page: int = 1,
     limit: int = 10,
     label: str = "",
@@ -49,7 +50,7 @@ async def get_orgs_for_explore(
         .limit(limit)
     )
 
-    result = db_session.exec(statement)
+    result = await db_exec(db_session, statement)
     orgs = result.all()
 
     return [OrganizationRead.model_validate(org) for org in orgs]
@@ -58,11 +59,11 @@ async def get_orgs_for_explore(
 
 async def get_courses_for_an_org_explore(
     request: Request,
-    db_session: Session,
+    db_session: DBSession,
     org_uuid: str,
 ) -> list[CourseRead]:
     statement = select(Organization).where(Organization.org_uuid == org_uuid)
-    result = db_session.exec(statement)
+    result = await db_exec(db_session, statement)
     org = result.first()
 
     if not org:
@@ -72,7 +73,7 @@ async def get_courses_for_an_org_explore(
         )
     
     statement = select(Course).where(Course.org_id == org.id, Course.public == True)
-    result = db_session.exec(statement)
+    result = await db_exec(db_session, statement)
     courses = result.all()
 
     courses_list = []
@@ -85,10 +86,10 @@ async def get_courses_for_an_org_explore(
 async def get_course_for_explore(
     request: Request,
     course_id: str,
-    db_session: Session,
+    db_session: DBSession,
 ) -> CourseRead:
     statement = select(Course).where(Course.id == course_id)
-    result = db_session.exec(statement)
+    result = await db_exec(db_session, statement)
     
     course = result.first()
 
@@ -104,7 +105,7 @@ async def get_course_for_explore(
         .join(User, ResourceAuthor.user_id == User.id)
         .where(ResourceAuthor.resource_uuid == course.course_uuid)
     )
-    author_results = db_session.exec(authors_statement).all()
+    author_results = (await db_exec(db_session, authors_statement)).all()
 
     # Convert to AuthorWithRole objects
     authors = [
@@ -122,7 +123,7 @@ async def get_course_for_explore(
 
 async def search_orgs_for_explore(
     request: Request,
-    db_session: Session,
+    db_session: DBSession,
     search_query: str,
     label: Optional[str] = None,
     page: int = 1,
@@ -163,7 +164,7 @@ async def search_orgs_for_explore(
         .limit(limit)
     )
     
-    result = db_session.exec(statement)
+    result = await db_exec(db_session, statement)
     orgs = result.all()
 
     return [OrganizationRead.model_validate(org) for org in orgs]
@@ -171,10 +172,10 @@ async def search_orgs_for_explore(
 async def get_org_for_explore(
     request: Request,
     org_slug: str,
-    db_session: Session,
+    db_session: DBSession,
  ) -> OrganizationRead:
     statement = select(Organization).where(Organization.slug == org_slug)
-    result = db_session.exec(statement)
+    result = await db_exec(db_session, statement)
     org = result.first()
 
     if not org:
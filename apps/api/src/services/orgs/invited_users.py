@@ -0,0 +1,182 @@
+import json
+import time
+from datetime import timedelta
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from src.core.redis_client import get_redis_client
+
+# Invitations expire after 60 days
+INVITED_USERS_TTL = int(timedelta(days=60).total_seconds())
+# Keys per SCAN batch when migrating the former per-invitation keys
+INVITED_USERS_MIGRATION_BATCH = 500
+
+# Invitations of an org live in two keys: a hash of the invitations by email,
+# and a sorted set of the emails by expiry time, which orders the listing and
+# tells which invitations are expired without a key per invitation.
+
+
+def _invited_users_key(org_uuid: str) -> str:
+    return f"invited_users:org:{org_uuid}"
+
+
+def _invited_users_expiry_key(org_uuid: str) -> str:
+    return f"invited_users:org:{org_uuid}:expires"
+
+
+def get_invites_redis():
+    r = get_redis_client()
+
+    if r is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Redis connection string not found",
+        )
+
+    return r
+
+
+def get_invited_emails(
+    r, org_uuid: str, emails: Iterable[str], now: Optional[float] = None
+) -> set[str]:
+    """Emails with a pending invitation to the org, in one round trip"""
+    now = now if now is not None else time.time()
+    emails = list(emails)
+    if not emails:
+        return set()
+
+    pipe = r.pipeline(transaction=False)
+    for email in emails:
+        pipe.zscore(_invited_users_expiry_key(org_uuid), email)
+    scores = pipe.execute()
+
+    return {
+        email
+        for email, expires_at in zip(emails, scores)
+        if expires_at is not None and expires_at > now
+    }
+
+
+def store_invited_users(
+    r,
+    org_uuid: str,
+    invitations: dict[str, dict],
+    ttl: int = INVITED_USERS_TTL,
+    now: Optional[float] = None,
+) -> None:
+    """
+    Store invitations by email, in one transaction that also drops the
+    expired invitations of the org: reads never write.
+    """
+    now = now if now is not None else time.time()
+    key = _invited_users_key(org_uuid)
+    expiry_key = _invited_users_expiry_key(org_uuid)
+
+    expired = r.zrangebyscore(expiry_key, "-inf", now)
+
+    pipe = r.pipeline()
+    if expired:
+        pipe.hdel(key, *expired)
+        pipe.zremrangebyscore(expiry_key, "-inf", now)
+    if invitations:
+        pipe.hset(
+            key,
+            mapping={email: json.dumps(invitation) for email, invitation in invitations.items()},
+        )
+        pipe.zadd(expiry_key, {email: now + ttl for email in invitations})
+        # Both keys go away with the org's last invitation
+        pipe.expire(key, ttl)
+        pipe.expire(expiry_key, ttl)
+    pipe.execute()
+
+
+def list_invited_users(
+    r,
+    org_uuid: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    now: Optional[float] = None,
+) -> tuple[list[dict], int]:
+    """
+    Pending invitations of the org, oldest first, and their total: one
+    pipelined round trip for the emails and the count, one for the invitations.
+    """
+    now = now if now is not None else time.time()
+    expiry_key = _invited_users_expiry_key(org_uuid)
+
+    pipe = r.pipeline(transaction=False)
+    if limit is None:
+        pipe.zrangebyscore(expiry_key, f"({now}", "+inf")
+    else:
+        pipe.zrangebyscore(expiry_key, f"({now}", "+inf", start=offset, num=limit)
+    pipe.zcount(expiry_key, f"({now}", "+inf")
+    emails, total = pipe.execute()
+
+    if not emails:
+        return [], total
+
+    invitations = [
+        json.loads(invitation)
+        for invitation in r.hmget(_invited_users_key(org_uuid), emails)
+        if invitation
+    ]
+
+    return invitations, total
+
+
+def delete_invited_user(r, org_uuid: str, email: str) -> bool:
+    pipe = r.pipeline()
+    pipe.hdel(_invited_users_key(org_uuid), email)
+    pipe.zrem(_invited_users_expiry_key(org_uuid), email)
+    removed, _ = pipe.execute()
+
+    return bool(removed)
+
+
+def migrate_legacy_invited_users(r) -> int:
+    """
+    Move the invitations stored under one `invited_user:<email>:org:<uuid>`
+    key each into the per-org keys, keeping their remaining time to live.
+    Keys are walked with SCAN, which does not block Redis like KEYS.
+    Returns the number of invitations moved.
+    """
+    moved = 0
+    batch: list = []
+
+    def flush() -> int:
+        pipe = r.pipeline(transaction=False)
+        for legacy_key in batch:
+            pipe.get(legacy_key)
+            pipe.ttl(legacy_key)
+        values = pipe.execute()
+
+        now = time.time()
+        count = 0
+        for index, legacy_key in enumerate(batch):
+            invitation, ttl = values[2 * index], values[2 * index + 1]
+            if not invitation or ttl == -2:
+                continue
+
+            name = legacy_key.decode("utf-8") if isinstance(legacy_key, bytes) else legacy_key
+            email, org_uuid = name[len("invited_user:"):].rsplit(":org:", 1)
+            ttl = ttl if ttl > 0 else INVITED_USERS_TTL
+
+            pipe = r.pipeline()
+            pipe.hset(_invited_users_key(org_uuid), email, invitation)
+            pipe.zadd(_invited_users_expiry_key(org_uuid), {email: now + ttl})
+            pipe.expire(_invited_users_key(org_uuid), INVITED_USERS_TTL)
+            pipe.expire(_invited_users_expiry_key(org_uuid), INVITED_USERS_TTL)
+            pipe.delete(legacy_key)
+            pipe.execute()
+            count += 1
+
+        batch.clear()
+        return count
+
+    for legacy_key in r.scan_iter(match="invited_user:*:org:*", count=INVITED_USERS_MIGRATION_BATCH):
+        batch.append(legacy_key)
+        if len(batch) >= INVITED_USERS_MIGRATION_BATCH:
+            moved += flush()
+    if batch:
+        moved += flush()
+
+    return moved
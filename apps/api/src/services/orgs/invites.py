@@ -2,11 +2,9 @@ import json
 import random
 import string
 import uuid
-from pydantic import EmailStr
 import redis
 from datetime import datetime, timedelta
 from sqlmodel import Session, select
-from src.services.email.utils import send_email
 from config.config import get_nexo_config
 from src.services.orgs.orgs import rbac_check
 from src.db.users import AnonymousUser, PublicUser, UserRead
@@ -336,12 +334,16 @@ async def delete_invite_code(
     return keys
 
 
-def send_invite_email(
+def build_invite_emails(
     org: OrganizationRead,
     invite_code_uuid: str,
     user: UserRead,
-    email: EmailStr,
-):
+    emails: list[str],
+) -> list[tuple[str, str, str]]:
+    """
+    (to, subject, body) invitation emails to the org, for the outbox. Empty
+    when the invite code does not exist.
+    """
     NEXO_CONFIG = get_nexo_config()
     redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
 
@@ -360,19 +362,20 @@ def send_invite_email(
             detail="Could not connect to Redis",
         )
 
-    # Get invite code
+    # Get invite code, once for every email
     invite = r.keys(f"{invite_code_uuid}:org:{org.org_uuid}:code:*")  # type: ignore
 
-    # Send email
-    if invite:
-        invite = r.get(invite[0])
-        invite = json.loads(invite)  # type: ignore
+    if not invite:
+        return []
 
-        # send email
-        send_email(
-            to=email,
-            subject=f"You have been invited to {org.name}",
-            body=f"""
+    invite = r.get(invite[0])
+    invite = json.loads(invite)  # type: ignore
+
+    return [
+        (
+            email,
+            f"You have been invited to {org.name}",
+            f"""
 <html>
     <body>
         <p>Hello {email}</p>
@@ -383,8 +386,6 @@ def send_invite_email(
 </html>
 """,
         )
+        for email in emails
+    ]
 
-        return True
-
-    else:
-        return False
@@ -6,6 +6,8 @@ from sqlmodel import Session, select
 from src.db.organizations import Organization
 from src.db.user_organizations import UserOrganization
 from src.db.users import AnonymousUser, PublicUser, User
+from src.security.rbac.context import invalidate_user_roles_cache
+from src.services.users.cache import invalidate_user_session_cache
 from src.security.features_utils.usage import (
     check_limits_with_usage,
     increase_feature_usage,
@@ -88,6 +90,9 @@ async def join_org(
             db_session.add(user_organization)
             db_session.commit()
 
+            invalidate_user_roles_cache(user.id)
+            invalidate_user_session_cache(user.id)
+
             return "Great, You're part of the Organization"
 
         else:
@@ -110,6 +115,9 @@ async def join_org(
             db_session.add(user_organization)
             db_session.commit()
 
+            invalidate_user_roles_cache(user.id)
+            invalidate_user_session_cache(user.id)
+
             increase_feature_usage("members", org.id, db_session)
 
             return "Great, You're part of the Organization"
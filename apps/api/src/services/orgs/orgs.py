@@ -26,6 +26,9 @@ from src.security.rbac.rbac import (
     authorization_verify_based_on_org_admin_status,
     authorization_verify_if_user_is_anon,
 )
+from src.security.rbac.context import invalidate_user_roles_cache
+from src.services.users.cache import invalidate_user_session_cache
+from src.security.features_utils.usage import invalidate_org_features_cache
 from src.db.users import AnonymousUser, InternalUser, PublicUser
 from src.db.user_organizations import UserOrganization
 from src.db.organizations import (
@@ -158,6 +161,9 @@ async def create_org(
     db_session.commit()
     db_session.refresh(user_org)
 
+    invalidate_user_roles_cache(int(current_user.id))
+    invalidate_user_session_cache(int(current_user.id))
+
     org_config = org_config = OrganizationConfigBase(
         config_version="1.1å",
         general=OrgGeneralConfig(
@@ -261,6 +267,9 @@ async def create_org_with_config(
     db_session.commit()
     db_session.refresh(user_org)
 
+    invalidate_user_roles_cache(int(current_user.id))
+    invalidate_user_session_cache(int(current_user.id))
+
     org_config = submitted_config
 
     org_config = json.loads(org_config.json())
@@ -383,6 +392,8 @@ async def update_org_with_config_no_auth(
     db_session.commit()
     db_session.refresh(org_config)
 
+    invalidate_org_features_cache(org_config.org_id)
+
     return {"detail": "Organization updated"}
 
 
@@ -423,6 +434,8 @@ async def update_org_config(
     db_session.commit()
     db_session.refresh(org_config)
 
+    invalidate_org_features_cache(org_config.org_id)
+
     return {"detail": "Organization config updated"}
 
 
@@ -564,6 +577,8 @@ async def update_org_favicon(
     db_session.commit()
     db_session.refresh(org_config)
 
+    invalidate_org_features_cache(org_config.org_id)
+
     return {"name_in_disk": name_in_disk}
 
 async def delete_org(
@@ -724,6 +739,8 @@ async def update_org_signup_mechanism(
     db_session.commit()
     db_session.refresh(org_config)
 
+    invalidate_org_features_cache(org_config.org_id)
+
     return {"detail": "Signup mechanism updated"}
 
 
@@ -831,6 +848,8 @@ async def update_org_landing(
     db_session.commit()
     db_session.refresh(org_config)
 
+    invalidate_org_features_cache(org_config.org_id)
+
     return {"detail": "Landing object updated"}
 
 async def upload_org_landing_content_service(
@@ -1,13 +1,27 @@
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
+import csv
+import io
 import logging
+from typing import Iterator, Literal, Optional
 
-import redis
-from fastapi import HTTPException, Request
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import asc, desc, func, or_
 from sqlmodel import Session, select
+from src.core.events.database import engine
 from src.security.features_utils.usage import decrease_feature_usage
-from src.services.orgs.invites import send_invite_email
-from config.config import get_nexo_config
+from src.security.rbac.context import invalidate_user_roles_cache
+from src.services.users.cache import invalidate_user_session_cache
+from src.services.email.outbox import enqueue_emails
+from src.services.orgs.invites import build_invite_emails
+from src.services.orgs.invited_users import (
+    INVITED_USERS_TTL,
+    delete_invited_user,
+    get_invited_emails,
+    get_invites_redis,
+    list_invited_users,
+    store_invited_users,
+)
 from src.services.orgs.orgs import rbac_check
 from src.db.roles import Role, RoleRead
 from src.db.users import AnonymousUser, PublicUser, User, UserRead
@@ -16,15 +30,36 @@ from src.db.organizations import (
     Organization,
     OrganizationRead,
     OrganizationUser,
+    OrganizationUserPaginated,
 )
 
 
-async def get_organization_users(
+# Largest page of the paginated member listing
+ORG_USERS_MAX_LIMIT = 100
+# Rows per chunk of the CSV export (and per fetch of the server side cursor)
+ORG_USERS_EXPORT_CHUNK_SIZE = 1000
+
+ORG_USERS_CSV_HEADER = ["User ID", "Username", "First Name", "Last Name", "Email", "Role", "Joined"]
+
+OrganizationUsersSort = Literal["username", "email", "first_name", "last_name", "role", "joined"]
+
+_ORG_USERS_SORT_COLUMNS = {
+    "username": User.username,
+    "email": User.email,
+    "first_name": User.first_name,
+    "last_name": User.last_name,
+    "role": Role.name,
+    "joined": UserOrganization.creation_date,
+}
+
+
+async def _get_org(
     request: Request,
-    org_id: str,
+    org_id: str | int,
     db_session: Session,
     current_user: PublicUser | AnonymousUser,
-) -> list[OrganizationUser]:
+    action: Literal["read", "update"] = "read",
+) -> Organization:
     statement = select(Organization).where(Organization.id == org_id)
     result = db_session.exec(statement)
 
@@ -36,66 +71,184 @@ async def get_organization_users(
             detail="Organization not found",
         )
 
-    # RBAC check
-    await rbac_check(request, org.org_uuid, current_user, "read", db_session)
-
-    statement = (
-        select(User)
-        .join(UserOrganization)
-        .join(Organization)
-        .where(Organization.id == org_id)
-    )
-    users = db_session.exec(statement)
-    users = users.all()
-
-    org_users_list = []
-
-    for user in users:
-        statement = select(UserOrganization).where(
-            UserOrganization.user_id == user.id, UserOrganization.org_id == org_id
+    if action != "read" and isinstance(current_user, AnonymousUser):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="You should be logged in to be able to achieve this action",
         )
-        result = db_session.exec(statement)
-        user_org = result.first()
-
-        if not user_org:
-            logging.error(f"User {user.id} not found")
 
-            # skip this user
-            continue
+    # RBAC check, "update" standing for the org admins
+    await rbac_check(request, org.org_uuid, current_user, action, db_session)
 
-        statement = select(Role).where(Role.id == user_org.role_id)
-        result = db_session.exec(statement)
+    return org
 
-        role = result.first()
 
-        if not role:
-            logging.error(f"Role {user_org.role_id} not found")
-
-            # skip this user
-            continue
+def organization_users_filters(
+    org_id: int,
+    role_id: Optional[int] = None,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+) -> list:
+    """
+    Where clauses of the member queries, which join UserOrganization to User
+    and Role so that a membership without its user or role is left out.
+    """
+    filters = [UserOrganization.org_id == org_id]
+    if role_id is not None:
+        filters.append(UserOrganization.role_id == role_id)
+    if name:
+        filters.append(
+            or_(
+                User.username.ilike(f"%{name}%"),  # type: ignore
+                User.first_name.ilike(f"%{name}%"),  # type: ignore
+                User.last_name.ilike(f"%{name}%"),  # type: ignore
+            )
+        )
+    if email:
+        filters.append(User.email.ilike(f"%{email}%"))  # type: ignore
+    return filters
 
-        statement = select(User).where(User.id == user_org.user_id)
-        result = db_session.exec(statement)
 
-        user = result.first()
+def organization_users_statement(
+    filters: list,
+    sort: OrganizationUsersSort = "username",
+    order: Literal["asc", "desc"] = "asc",
+):
+    """Members with their role in one query, ordered by `sort` then user id"""
+    column = _ORG_USERS_SORT_COLUMNS[sort]
+    direction = desc if order == "desc" else asc
+    return (
+        select(User, Role, UserOrganization.creation_date)
+        .join(UserOrganization, UserOrganization.user_id == User.id)  # type: ignore
+        .join(Role, Role.id == UserOrganization.role_id)  # type: ignore
+        .where(*filters)
+        .order_by(direction(column), direction(User.id))  # type: ignore
+    )
 
-        if not user:
-            logging.error(f"User {user_org.user_id} not found")
 
-            # skip this user
-            continue
+async def get_organization_users(
+    request: Request,
+    org_id: str,
+    db_session: Session,
+    current_user: PublicUser | AnonymousUser,
+) -> list[OrganizationUser]:
+    org = await _get_org(request, org_id, db_session, current_user)
 
-        user = UserRead.model_validate(user)
-        role = RoleRead.model_validate(role)
+    statement = organization_users_statement(organization_users_filters(org.id))  # type: ignore
 
-        org_user = OrganizationUser(
-            user=user,
-            role=role,
+    return [
+        OrganizationUser(
+            user=UserRead.model_validate(user),
+            role=RoleRead.model_validate(role),
         )
+        for user, role, _ in db_session.exec(statement).all()
+    ]
+
 
-        org_users_list.append(org_user)
+async def get_organization_users_paginated(
+    request: Request,
+    org_id: str,
+    db_session: Session,
+    current_user: PublicUser | AnonymousUser,
+    page: int = 1,
+    limit: int = 20,
+    role_id: Optional[int] = None,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    sort: OrganizationUsersSort = "username",
+    order: Literal["asc", "desc"] = "asc",
+) -> OrganizationUserPaginated:
+    """
+    A page of the org members, filtered by role, name or email: one query for
+    the members and their roles, one for the total. Org admins only.
+    """
+    org = await _get_org(request, org_id, db_session, current_user, "update")
+
+    page = max(page, 1)
+    limit = min(max(limit, 1), ORG_USERS_MAX_LIMIT)
+    filters = organization_users_filters(org.id, role_id, name, email)  # type: ignore
+
+    count_statement = (
+        select(func.count())
+        .select_from(UserOrganization)
+        .join(User, UserOrganization.user_id == User.id)  # type: ignore
+        .join(Role, Role.id == UserOrganization.role_id)  # type: ignore
+        .where(*filters)
+    )
+    total = db_session.exec(count_statement).one()
 
-    return org_users_list
+    statement = (
+        organization_users_statement(filters, sort, order)
+        .offset((page - 1) * limit)
+        .limit(limit)
+    )
+    items = [
+        OrganizationUser(
+            user=UserRead.model_validate(user),
+            role=RoleRead.model_validate(role),
+        )
+        for user, role, _ in db_session.exec(statement).all()
+    ]
+
+    return OrganizationUserPaginated(items=items, total=total, page=page, limit=limit)
+
+
+def export_organization_users_rows(statement) -> Iterator[str]:
+    """
+    CSV chunks of the roster export. Rows are fetched with a server side
+    cursor on its own session, so memory stays constant whatever the org size.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(ORG_USERS_CSV_HEADER)
+
+    with Session(engine) as session:
+        results = session.exec(statement.execution_options(yield_per=ORG_USERS_EXPORT_CHUNK_SIZE))
+        for index, (user, role, joined) in enumerate(results, start=1):
+            writer.writerow([
+                user.id,
+                user.username,
+                user.first_name,
+                user.last_name,
+                user.email,
+                role.name,
+                joined,
+            ])
+            if index % ORG_USERS_EXPORT_CHUNK_SIZE == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+
+    yield output.getvalue()
+
+
+async def export_organization_users(
+    request: Request,
+    org_id: str,
+    db_session: Session,
+    current_user: PublicUser | AnonymousUser,
+    role_id: Optional[int] = None,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    sort: OrganizationUsersSort = "username",
+    order: Literal["asc", "desc"] = "asc",
+) -> StreamingResponse:
+    """
+    Stream the org roster as CSV, with the filters of the member listing.
+    Org admins only, the roster has every member's email.
+    """
+    org = await _get_org(request, org_id, db_session, current_user, "update")
+
+    filters = organization_users_filters(org.id, role_id, name, email)  # type: ignore
+    statement = organization_users_statement(filters, sort, order)
+
+    return StreamingResponse(
+        export_organization_users_rows(statement),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename=org_{org.id}_users_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        },
+    )
 
 
 async def remove_user_from_org(
@@ -148,6 +301,9 @@ async def remove_user_from_org(
     db_session.delete(user_org)
     db_session.commit()
 
+    invalidate_user_roles_cache(user_id)
+    invalidate_user_session_cache(user_id)
+
     decrease_feature_usage("members", org_id, db_session)
 
     return {"detail": "User removed from org"}
@@ -232,6 +388,9 @@ async def update_user_role(
     db_session.commit()
     db_session.refresh(user_org)
 
+    invalidate_user_roles_cache(int(user_id))
+    invalidate_user_session_cache(int(user_id))
+
     return {"detail": "User role updated"}
 
 
@@ -243,16 +402,6 @@ async def invite_batch_users(
     db_session: Session,
     current_user: PublicUser | AnonymousUser,
 ):
-    # Redis init
-    NEXO_CONFIG = get_nexo_config()
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
-
-    if not redis_conn_string:
-        raise HTTPException(
-            status_code=500,
-            detail="Redis connection string not found",
-        )
-
     statement = select(Organization).where(Organization.id == org_id)
     result = db_session.exec(statement)
 
@@ -271,57 +420,40 @@ async def invite_batch_users(
     # RBAC check
     await rbac_check(request, org.org_uuid, current_user, "create", db_session)
 
-    # Connect to Redis
-    r = redis.Redis.from_url(redis_conn_string)
-
-    if not r:
-        raise HTTPException(
-            status_code=500,
-            detail="Could not connect to Redis",
-        )
-
-    invite_list = emails.split(",")
+    r = get_invites_redis()
 
-    # invitations expire after 60 days
-    ttl = int(timedelta(days=60).total_seconds())
+    # Distinct emails, in the order given
+    invite_list = list(dict.fromkeys(email.strip() for email in emails.split(",") if email.strip()))
 
-    for email in invite_list:
-        email = email.strip()
+    already_invited = get_invited_emails(r, org.org_uuid, invite_list)
 
-        # Check if user is already invited
-        invited_user = r.get(f"invited_user:{email}:org:{org.org_uuid}")
+    org = OrganizationRead.model_validate(org)
+    user = UserRead.model_validate(user)
 
-        if invited_user:
-            logging.error(f"User {email} already invited")
-            # skip this user
-            continue
+    invite_list = [email for email in invite_list if email not in already_invited]
+    for email in already_invited:
+        logging.error(f"User {email} already invited")
 
-        org = OrganizationRead.model_validate(org)
-        user = UserRead.model_validate(user)
+    # Emails are only queued, and sent in the background
+    messages = build_invite_emails(org, invite_code_uuid, user, invite_list)
+    isEmailSent = bool(messages)
 
-        isEmailSent = send_invite_email(
-            org,
-            invite_code_uuid,
-            user,
-            email,
-        )
-
-        invited_user_object = {
+    invitations = {
+        email: {
             "email": email,
             "org_id": org.id,
             "invite_code_uuid": invite_code_uuid,
             "pending": True,
             "email_sent": isEmailSent,
-            "expires": ttl,
+            "expires": INVITED_USERS_TTL,
             "created_at": datetime.now().isoformat(),
             "created_by": current_user.user_uuid,
         }
+        for email in invite_list
+    }
 
-        invited_user = r.set(
-            f"invited_user:{email}:org:{org.org_uuid}",
-            json.dumps(invited_user_object),
-            ex=ttl,
-        )
+    store_invited_users(r, org.org_uuid, invitations)
+    enqueue_emails(db_session, messages, org.id)
 
     return {"detail": "Users invited"}
 
@@ -332,16 +464,6 @@ async def get_list_of_invited_users(
     db_session: Session,
     current_user: PublicUser | AnonymousUser,
 ):
-    # Redis init
-    NEXO_CONFIG = get_nexo_config()
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
-
-    if not redis_conn_string:
-        raise HTTPException(
-            status_code=500,
-            detail="Redis connection string not found",
-        )
-
     statement = select(Organization).where(Organization.id == org_id)
     result = db_session.exec(statement)
 
@@ -356,26 +478,42 @@ async def get_list_of_invited_users(
     # RBAC check
     await rbac_check(request, org.org_uuid, current_user, "read", db_session)
 
-    # Connect to Redis
-    r = redis.Redis.from_url(redis_conn_string)
+    r = get_invites_redis()
+
+    invited_users_list, _ = list_invited_users(r, org.org_uuid)
 
-    if not r:
+    return invited_users_list
+
+
+async def get_list_of_invited_users_paginated(
+    request: Request,
+    org_id: int,
+    page: int,
+    limit: int,
+    db_session: Session,
+    current_user: PublicUser | AnonymousUser,
+):
+    statement = select(Organization).where(Organization.id == org_id)
+    result = db_session.exec(statement)
+
+    org = result.first()
+
+    if not org:
         raise HTTPException(
-            status_code=500,
-            detail="Could not connect to Redis",
+            status_code=404,
+            detail="Organization not found",
         )
 
-    invited_users = r.keys(f"invited_user:*:org:{org.org_uuid}")
+    # RBAC check
+    await rbac_check(request, org.org_uuid, current_user, "read", db_session)
 
-    invited_users_list = []
+    r = get_invites_redis()
 
-    for user in invited_users:
-        invited_user = r.get(user)
-        if invited_user:
-            invited_user = json.loads(invited_user.decode("utf-8"))
-            invited_users_list.append(invited_user)
+    page = max(page, 1)
+    limit = min(max(limit, 1), ORG_USERS_MAX_LIMIT)
+    items, total = list_invited_users(r, org.org_uuid, (page - 1) * limit, limit)
 
-    return invited_users_list
+    return {"items": items, "total": total, "page": page, "limit": limit}
 
 
 async def remove_invited_user(
@@ -385,16 +523,6 @@ async def remove_invited_user(
     db_session: Session,
     current_user: PublicUser | AnonymousUser,
 ):
-    # Redis init
-    NEXO_CONFIG = get_nexo_config()
-    redis_conn_string = NEXO_CONFIG.redis_config.redis_connection_string
-
-    if not redis_conn_string:
-        raise HTTPException(
-            status_code=500,
-            detail="Redis connection string not found",
-        )
-
     statement = select(Organization).where(Organization.id == org_id)
     result = db_session.exec(statement)
 
@@ -409,23 +537,12 @@ async def remove_invited_user(
     # RBAC check
     await rbac_check(request, org.org_uuid, current_user, "delete", db_session)
 
-    # Connect to Redis
-    r = redis.Redis.from_url(redis_conn_string)
+    r = get_invites_redis()
 
-    if not r:
-        raise HTTPException(
-            status_code=500,
-            detail="Could not connect to Redis",
-        )
-
-    invited_user = r.get(f"invited_user:{email}:org:{org.org_uuid}")
-
-    if not invited_user:
+    if not delete_invited_user(r, org.org_uuid, email):
         raise HTTPException(
             status_code=404,
             detail="User not found",
         )
 
-    r.delete(f"invited_user:{email}:org:{org.org_uuid}")
-
     return {"detail": "User removed"}
@@ -0,0 +1,58 @@
+from src.core.cache import SharedVersions, TTLCache
+
+
+# Products a user paid for (active subscriptions and completed payments),
+# keyed by user id. Each worker holds its own copy, checked against the
+# shared versions below on every read.
+_entitlements_cache = TTLCache(maxsize=8192, ttl=60)
+
+# Version of each user's entitlements, and of everyone's, shared by every
+# worker and bumped on every payment status change: a payment processed by
+# any worker (e.g. the webhook worker) unlocks access in all of them, and a
+# set read before the change is never stored after it.
+_entitlement_versions = SharedVersions("entitlements", ttl=2 * 60)
+
+_ALL_USERS = "all"
+
+
+def get_entitlements_version(user_id: int) -> tuple[int, ...] | None:
+    return _entitlement_versions.get_many([_ALL_USERS, int(user_id)])
+
+
+def get_cached_entitlements(user_id: int) -> frozenset[int] | None:
+    entry = _entitlements_cache.get(int(user_id))
+    if entry is None:
+        return None
+
+    version, product_ids = entry
+    current_version = get_entitlements_version(user_id)
+    if current_version is None or version != current_version:
+        return None
+
+    return product_ids
+
+
+def set_cached_entitlements(
+    user_id: int, version: tuple[int, ...] | None, product_ids: frozenset[int]
+) -> None:
+    """
+    Store the products of a user under the version that was current before
+    they were read, so that a payment happening in the meantime is never
+    masked.
+    """
+    if version is None:
+        return
+    _entitlements_cache.set(int(user_id), (version, product_ids))
+
+
+def invalidate_entitlements_cache(user_id: int | None = None) -> None:
+    """
+    Drop cached entitlements, for one user after one of their payments
+    changed, or for everyone.
+    """
+    if user_id is None:
+        _entitlement_versions.bump(_ALL_USERS)
+        _entitlements_cache.clear()
+    else:
+        _entitlement_versions.bump(int(user_id))
+        _entitlements_cache.delete(int(user_id))
@@ -1,12 +1,182 @@
+from typing import Iterable, Optional
 from sqlmodel import Session, select
-from src.security.rbac.rbac import authorization_verify_if_user_is_author
+from src.security.rbac.context import get_authorization_context
 from src.db.payments.payments_users import PaymentStatusEnum, PaymentsUser
 from src.db.users import PublicUser, AnonymousUser
 from src.db.payments.payments_courses import PaymentsCourse
 from src.db.courses.activities import Activity
 from src.db.courses.courses import Course
+from src.db.resource_authors import (
+    ResourceAuthor,
+    ResourceAuthorshipEnum,
+    ResourceAuthorshipStatusEnum,
+)
+from src.services.payments.cache import (
+    get_cached_entitlements,
+    get_entitlements_version,
+    set_cached_entitlements,
+)
 from fastapi import HTTPException, Request
 
+
+def get_user_entitlements(user_id: int, db_session: Session) -> frozenset[int]:
+    """
+    Ids of the products a user has an active subscription or a completed
+    payment for. Cached for a short time, see src/services/payments/cache.py
+    """
+    product_ids = get_cached_entitlements(user_id)
+    if product_ids is not None:
+        return product_ids
+
+    version = get_entitlements_version(user_id)
+    statement = select(PaymentsUser.payment_product_id).where(
+        PaymentsUser.user_id == user_id,
+        PaymentsUser.status.in_(  # type: ignore
+            [PaymentStatusEnum.ACTIVE, PaymentStatusEnum.COMPLETED]
+        ),
+    )
+    product_ids = frozenset(db_session.exec(statement).all())
+    set_cached_entitlements(user_id, version, product_ids)
+
+    return product_ids
+
+
+async def _resolve_paid_access(
+    request: Optional[Request],
+    courses: dict[int, tuple[str, int]],
+    user: PublicUser | AnonymousUser,
+    db_session: Session,
+) -> dict[int, bool]:
+    """
+    Paid access of a user to each of `courses` ({course_id: (course_uuid, org_id)}),
+    with one query for the product links, one for the user's entitlements
+    (cached) and one for authorship of the courses still locked.
+    """
+    context = get_authorization_context(request)
+    access: dict[int, bool] = {}
+
+    # Decisions already taken during this request
+    pending = {}
+    for course_id, course in courses.items():
+        decision = context.get_decision(("paid_access", user.id, course_id))
+        if decision is None:
+            pending[course_id] = course
+        else:
+            access[course_id] = decision
+
+    if not pending:
+        return access
+
+    # Products linked to each course (within the course's org)
+    products: dict[int, set[int]] = {course_id: set() for course_id in pending}
+    statement = select(
+        PaymentsCourse.course_id,
+        PaymentsCourse.org_id,
+        PaymentsCourse.payment_product_id,
+    ).where(PaymentsCourse.course_id.in_(list(pending)))  # type: ignore
+    for course_id, org_id, product_id in db_session.exec(statement).all():
+        if org_id == pending[course_id][1]:
+            products[course_id].add(product_id)
+
+    # Courses not linked to any product are free
+    locked = [course_id for course_id, product_ids in products.items() if product_ids]
+    resolved = {course_id: True for course_id in pending if not products[course_id]}
+
+    # Anonymous users have no access to paid courses
+    if locked and isinstance(user, AnonymousUser):
+        resolved.update({course_id: False for course_id in locked})
+        locked = []
+
+    # Access through any of the linked products
+    if locked:
+        entitlements = get_user_entitlements(user.id, db_session)
+        for course_id in locked:
+            resolved[course_id] = bool(products[course_id] & entitlements)
+        locked = [course_id for course_id in locked if not resolved[course_id]]
+
+    # Authors of a course always have access to it
+    if locked:
+        uuids = {pending[course_id][0]: course_id for course_id in locked}
+        statement = select(ResourceAuthor.resource_uuid).where(
+            ResourceAuthor.user_id == user.id,
+            ResourceAuthor.resource_uuid.in_(list(uuids)),  # type: ignore
+            ResourceAuthor.authorship.in_(  # type: ignore
+                [
+                    ResourceAuthorshipEnum.CREATOR,
+                    ResourceAuthorshipEnum.MAINTAINER,
+                    ResourceAuthorshipEnum.CONTRIBUTOR,
+                ]
+            ),
+            ResourceAuthor.authorship_status == ResourceAuthorshipStatusEnum.ACTIVE,
+        )
+        for course_uuid in db_session.exec(statement).all():
+            resolved[uuids[course_uuid]] = True
+
+    for course_id, decision in resolved.items():
+        context.set_decision(("paid_access", user.id, course_id), decision)
+    access.update(resolved)
+
+    return access
+
+
+async def get_courses_paid_access(
+    request: Optional[Request],
+    course_ids: Iterable[int],
+    user: PublicUser | AnonymousUser,
+    db_session: Session,
+) -> dict[int, bool]:
+    """
+    Paid access of a user to many courses at once, e.g. for a catalog.
+    Unknown course ids are left out of the result.
+    """
+    course_ids = list(set(course_ids))
+    if not course_ids:
+        return {}
+
+    statement = select(Course.id, Course.course_uuid, Course.org_id).where(
+        Course.id.in_(course_ids)  # type: ignore
+    )
+    courses = {
+        course_id: (course_uuid, org_id)
+        for course_id, course_uuid, org_id in db_session.exec(statement).all()
+    }
+
+    return await _resolve_paid_access(request, courses, user, db_session)
+
+
+async def get_activities_paid_access(
+    request: Optional[Request],
+    activity_ids: Iterable[int],
+    user: PublicUser | AnonymousUser,
+    db_session: Session,
+) -> dict[int, bool]:
+    """
+    Paid access of a user to many activities at once, e.g. for a course
+    outline. Unknown activity ids are left out of the result.
+    """
+    activity_ids = list(set(activity_ids))
+    if not activity_ids:
+        return {}
+
+    statement = (
+        select(Activity.id, Course.id, Course.course_uuid, Course.org_id)
+        .join(Course, Activity.course_id == Course.id)  # type: ignore
+        .where(Activity.id.in_(activity_ids))  # type: ignore
+    )
+    activity_courses = {}
+    courses = {}
+    for activity_id, course_id, course_uuid, org_id in db_session.exec(statement).all():
+        activity_courses[activity_id] = course_id
+        courses[course_id] = (course_uuid, org_id)
+
+    access = await _resolve_paid_access(request, courses, user, db_session)
+
+    return {
+        activity_id: access[course_id]
+        for activity_id, course_id in activity_courses.items()
+    }
+
+
 async def check_activity_paid_access(
     request: Request,
     activity_id: int,
@@ -20,61 +190,19 @@ async def check_activity_paid_access(
     - Activity is in a free course
     - User has a valid subscription for the course
     """
+    access = await get_activities_paid_access(request, [activity_id], user, db_session)
 
-
-    # Get activity and associated course
-    statement = select(Activity).where(Activity.id == activity_id)
-    activity = db_session.exec(statement).first()
-
-    if not activity:
+    if activity_id not in access:
         raise HTTPException(status_code=404, detail="Activity not found")
 
-    # Check if course exists
-    statement = select(Course).where(Course.id == activity.course_id)
-    course = db_session.exec(statement).first()
-
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-    
-    # Check if user is author of the course
-    is_course_author = await authorization_verify_if_user_is_author(request, user.id, "update", course.course_uuid, db_session)
-
-    if is_course_author:
-        return True
-
-    # Check if course is linked to one or more products (within the same org).
-    statement = select(PaymentsCourse).where(
-        PaymentsCourse.course_id == course.id,
-        PaymentsCourse.org_id == course.org_id,
-    )
-    course_payments = db_session.exec(statement).all()
-
-    # If course is not linked to any product, it's free
-    if not course_payments:
-        return True
-    
-    # Anonymous users have no access to paid activities
-    if isinstance(user, AnonymousUser):
-        return False
-    
-    # Check if user has a valid subscription or payment for ANY linked product.
-    product_ids = [pc.payment_product_id for pc in course_payments]
-    statement = select(PaymentsUser).where(
-        PaymentsUser.user_id == user.id,
-        PaymentsUser.payment_product_id.in_(product_ids),  # type: ignore
-        PaymentsUser.status.in_(  # type: ignore
-            [PaymentStatusEnum.ACTIVE, PaymentStatusEnum.COMPLETED]
-        ),
-    )
-    access = db_session.exec(statement).first()
-
-    return bool(access)
+    return access[activity_id]
 
 async def check_course_paid_access(
     course_id: int,
     org_id: int,
     user: PublicUser | AnonymousUser,
     db_session: Session,
+    request: Optional[Request] = None,
 ) -> bool:
     """
     Check if a user has paid access to a specific course
@@ -83,37 +211,9 @@ async def check_course_paid_access(
     - Course is free (not linked to any product)
     - User has a valid subscription for the course
     """
-    # Check if course exists
-    statement = select(Course).where(Course.id == course_id)
-    course = db_session.exec(statement).first()
+    access = await get_courses_paid_access(request, [course_id], user, db_session)
 
-    if not course:
+    if course_id not in access:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    # Check if course is linked to one or more products (within the provided org).
-    statement = select(PaymentsCourse).where(
-        PaymentsCourse.course_id == course.id,
-        PaymentsCourse.org_id == org_id,
-    )
-    course_payments = db_session.exec(statement).all()
-
-    # If course is not linked to any product, it's free
-    if not course_payments:
-        return True
-
-    # Anonymous users have no access to paid courses
-    if isinstance(user, AnonymousUser):
-        return False
-
-    # Check if user has a valid subscription
-    product_ids = [pc.payment_product_id for pc in course_payments]
-    statement = select(PaymentsUser).where(
-        PaymentsUser.user_id == user.id,
-        PaymentsUser.payment_product_id.in_(product_ids),  # type: ignore
-        PaymentsUser.status.in_(  # type: ignore
-            [PaymentStatusEnum.ACTIVE, PaymentStatusEnum.COMPLETED]
-        ),
-    )
-    subscription = db_session.exec(statement).first()
-
-    return bool(subscription)
+    return access[course_id]
@@ -27,6 +27,7 @@ from src.services.payments.payments_users import (
     delete_payment_user,
 )
 from src.services.affiliates.affiliates import record_commission_for_payment
+from src.services.payments.cache import invalidate_entitlements_cache
 
 
 async def get_stripe_connected_account_id(
@@ -567,6 +568,7 @@ async def verify_stripe_checkout_session(
     db_session.add(payment_user)
     db_session.commit()
     db_session.refresh(payment_user)
+    invalidate_entitlements_cache(payment_user.user_id)
 
     # Record affiliate commission:
     # - one-time: on paid/complete
@@ -9,6 +9,7 @@ from src.db.resource_authors import ResourceAuthor
 from src.db.users import InternalUser, PublicUser, AnonymousUser, User, UserRead
 from src.db.organizations import Organization
 from src.services.orgs.orgs import rbac_check
+from src.services.payments.cache import invalidate_entitlements_cache
 from datetime import datetime
 
 async def create_payment_user(
@@ -60,6 +61,7 @@ async def create_payment_user(
         ]:
             db_session.delete(existing_payment_user)
             db_session.commit()
+            invalidate_entitlements_cache(user_id)
         else:
             raise HTTPException(status_code=400, detail="User already has purchase for this product")
 
@@ -75,6 +77,7 @@ async def create_payment_user(
     db_session.add(payment_user)
     db_session.commit()
     db_session.refresh(payment_user)
+    invalidate_entitlements_cache(user_id)
 
     return payment_user
 
@@ -138,6 +141,8 @@ async def update_payment_user_status(
     db_session.add(payment_user)
     db_session.commit()
     db_session.refresh(payment_user)
+    # Webhooks change the access of the user through here
+    invalidate_entitlements_cache(payment_user.user_id)
 
     return payment_user
 
@@ -192,6 +197,7 @@ async def delete_payment_user(
     # Delete payment user
     db_session.delete(payment_user)
     db_session.commit()
+    invalidate_entitlements_cache(payment_user.user_id)
 
 
 async def get_owned_courses(
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import func, insert, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+from src.db.payments.payments_webhooks import (
+    PaymentsWebhookEvent,
+    PaymentsWebhookEventStatusEnum,
+)
+
+# Concurrent workers per process, each working on a different account
+STRIPE_WEBHOOK_WORKERS = 4
+# Seconds between polls of an empty inbox
+STRIPE_WEBHOOK_POLL_INTERVAL = 2
+# Seconds a worker may hold an event before another one can take it over
+STRIPE_WEBHOOK_LEASE = 5 * 60
+# Failed attempts are retried with an exponential backoff, then the event is
+# left FAILED for the replay command
+STRIPE_WEBHOOK_MAX_ATTEMPTS = 8
+STRIPE_WEBHOOK_RETRY_BASE = 30
+STRIPE_WEBHOOK_RETRY_MAX = 60 * 60
+
+_UNFINISHED = [
+    PaymentsWebhookEventStatusEnum.PENDING,
+    PaymentsWebhookEventStatusEnum.PROCESSING,
+]
+
+
+def enqueue_stripe_event(
+    db_session: Session,
+    event_id: str,
+    webhook_type: str,
+    event_type: str,
+    stripe_account_id: str,
+    payload: dict,
+) -> bool:
+    """
+    Store a verified event in the inbox. Returns False when the event id was
+    already received, Stripe delivering an event at least once.
+    """
+    row = {
+        "event_id": event_id,
+        "webhook_type": webhook_type,
+        "event_type": event_type,
+        "stripe_account_id": stripe_account_id,
+        "payload": payload,
+        "status": PaymentsWebhookEventStatusEnum.PENDING,
+        "attempts": 0,
+        "next_attempt_at": datetime.now(),
+        "creation_date": datetime.now(),
+        "update_date": datetime.now(),
+    }
+
+    # Duplicates are absorbed by the unique index on event_id
+    dialect = db_session.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(PaymentsWebhookEvent.__table__).on_conflict_do_nothing()  # type: ignore
+    elif dialect == "sqlite":
+        statement = sqlite.insert(PaymentsWebhookEvent.__table__).on_conflict_do_nothing()  # type: ignore
+    else:
+        existing = db_session.exec(
+            select(PaymentsWebhookEvent.id).where(PaymentsWebhookEvent.event_id == event_id)
+        ).first()
+        if existing:
+            return False
+        statement = insert(PaymentsWebhookEvent.__table__)  # type: ignore
+
+    result = db_session.connection().execute(statement, row)
+    db_session.commit()
+
+    return bool(result.rowcount)
+
+
+def claim_stripe_event(
+    db_session: Session, now: Optional[datetime] = None
+) -> Optional[PaymentsWebhookEvent]:
+    """
+    Take the next event due, leased to the caller. Only the oldest unfinished
+    event of each account can be taken, so that the events of an account are
+    applied in the order they were received.
+    """
+    now = now or datetime.now()
+
+    heads = (
+        select(func.min(PaymentsWebhookEvent.id))
+        .where(PaymentsWebhookEvent.status.in_(_UNFINISHED))  # type: ignore
+        .group_by(PaymentsWebhookEvent.stripe_account_id)
+    )
+    available = or_(
+        PaymentsWebhookEvent.status == PaymentsWebhookEventStatusEnum.PENDING,
+        PaymentsWebhookEvent.locked_until < now,  # type: ignore
+    )
+    statement = (
+        select(PaymentsWebhookEvent.id)
+        .where(
+            PaymentsWebhookEvent.id.in_(heads),  # type: ignore
+            PaymentsWebhookEvent.next_attempt_at <= now,
+            available,
+        )
+        .order_by(PaymentsWebhookEvent.id)  # type: ignore
+        .limit(STRIPE_WEBHOOK_WORKERS * 2)
+    )
+
+    for event_id in db_session.exec(statement).all():
+        # Another worker may have taken it in the meantime
+        result = db_session.exec(
+            update(PaymentsWebhookEvent)
+            .where(
+                PaymentsWebhookEvent.id == event_id,  # type: ignore
+                PaymentsWebhookEvent.status.in_(_UNFINISHED),  # type: ignore
+                available,
+            )
+            .values(
+                status=PaymentsWebhookEventStatusEnum.PROCESSING,
+                locked_until=now + timedelta(seconds=STRIPE_WEBHOOK_LEASE),
+                attempts=PaymentsWebhookEvent.attempts + 1,
+                update_date=now,
+            )
+        )
+        db_session.commit()
+        if result.rowcount:  # type: ignore
+            return db_session.get(PaymentsWebhookEvent, event_id)
+
+    return None
+
+
+def mark_stripe_event_processed(db_session: Session, event_id: int) -> None:
+    event = db_session.get(PaymentsWebhookEvent, event_id)
+    if not event:
+        return
+
+    event.status = PaymentsWebhookEventStatusEnum.PROCESSED
+    event.processed_at = datetime.now()
+    event.locked_until = None
+    event.last_error = None
+    event.update_date = datetime.now()
+    db_session.add(event)
+    db_session.commit()
+
+
+def mark_stripe_event_failed(db_session: Session, event_id: int, error: str) -> None:
+    """Schedule a retry with an exponential backoff, or give up"""
+    event = db_session.get(PaymentsWebhookEvent, event_id)
+    if not event:
+        return
+
+    if event.attempts >= STRIPE_WEBHOOK_MAX_ATTEMPTS:
+        event.status = PaymentsWebhookEventStatusEnum.FAILED
+    else:
+        event.status = PaymentsWebhookEventStatusEnum.PENDING
+        delay = min(STRIPE_WEBHOOK_RETRY_BASE * 2 ** (event.attempts - 1), STRIPE_WEBHOOK_RETRY_MAX)
+        event.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+    event.locked_until = None
+    event.last_error = error[:2000]
+    event.update_date = datetime.now()
+    db_session.add(event)
+    db_session.commit()
+
+
+def requeue_stripe_events(db_session: Session, event_id: Optional[str] = None) -> int:
+    """
+    Put events back in the inbox to be processed again: one event by its
+    Stripe id, or every failed event. Returns the number of events requeued.
+    """
+    statement = update(PaymentsWebhookEvent).values(
+        status=PaymentsWebhookEventStatusEnum.PENDING,
+        attempts=0,
+        next_attempt_at=datetime.now(),
+        locked_until=None,
+        last_error=None,
+        update_date=datetime.now(),
+    )
+    if event_id:
+        statement = statement.where(PaymentsWebhookEvent.event_id == event_id)  # type: ignore
+    else:
+        statement = statement.where(
+            PaymentsWebhookEvent.status == PaymentsWebhookEventStatusEnum.FAILED  # type: ignore
+        )
+
+    result = db_session.exec(statement)
+    db_session.commit()
+
+    return result.rowcount  # type: ignore
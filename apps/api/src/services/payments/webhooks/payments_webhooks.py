@@ -1,4 +1,6 @@
-from typing import Literal
+import asyncio
+import json
+from typing import Literal, Optional
 from fastapi import HTTPException, Request
 from sqlmodel import Session, select
 import stripe
@@ -12,6 +14,14 @@ from src.services.payments.payments_config import update_payments_config
 from src.services.payments.utils.stripe_utils import get_org_id_from_stripe_account
 from src.services.affiliates.affiliates import record_commission_for_payment
 from src.db.payments.payments_users import PaymentsUser
+from src.services.payments.webhooks.inbox import (
+    STRIPE_WEBHOOK_POLL_INTERVAL,
+    STRIPE_WEBHOOK_WORKERS,
+    claim_stripe_event,
+    enqueue_stripe_event,
+    mark_stripe_event_failed,
+    mark_stripe_event_processed,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +31,13 @@ async def handle_stripe_webhook(
     webhook_type: Literal["connect", "standard"],
     db_session: Session,
 ) -> dict:
+    """
+    Verify a Stripe webhook and store it in the inbox. The event is processed
+    in the background by the webhook worker, see inbox.py
+    """
     # Get Stripe credentials
     creds = await get_stripe_internal_credentials()
     webhook_secret = creds.get(f'stripe_webhook_{webhook_type}_secret')
-    stripe.api_key = creds.get("stripe_secret_key")
     
     if not webhook_secret:
         logger.error("Stripe webhook secret not configured")
@@ -44,195 +57,274 @@ async def handle_stripe_webhook(
         logger.error(stripe.SignatureVerificationError)
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    try:
-        event_type = event.type
-        event_data = event.data.object
-        event_id = getattr(event, "id", None) or ""
-
-        # Get organization ID based on the event type
-        stripe_account_id = event.account
-        if not stripe_account_id:
-            logger.error("Stripe account ID not found")
-            raise HTTPException(status_code=400, detail="Stripe account ID not found")
-        
-        org_id = await get_org_id_from_stripe_account(stripe_account_id, db_session)
-
-        # Handle internal account events
-        if event_type == 'account.application.authorized':
-            statement = select(PaymentsConfig).where(PaymentsConfig.org_id == org_id)
-            config = db_session.exec(statement).first()
-            
-            if not config:
-                logger.error("No payments configuration found for this organization")
-                raise HTTPException(
-                    status_code=404,
-                    detail="No payments configuration found for this organization"
-                )
+    # Every event we handle belongs to a connected account
+    if not event.account:
+        logger.warning(f"Ignoring Stripe event {event.id} without account")
+        return {"status": "ignored", "message": "Stripe account ID not found"}
+
+    received = enqueue_stripe_event(
+        db_session,
+        event_id=event.id,
+        webhook_type=webhook_type,
+        event_type=event.type,
+        stripe_account_id=event.account,
+        payload=json.loads(payload),
+    )
+
+    return {"status": "received" if received else "duplicate"}
+
+
+async def process_stripe_event(
+    payload: dict,
+    db_session: Session,
+    request: Optional[Request] = None,
+) -> dict:
+    """
+    Apply a verified Stripe event. Called by the webhook worker, possibly
+    more than once for the same event: every branch is idempotent.
+    """
+    creds = await get_stripe_internal_credentials()
+    stripe.api_key = creds.get("stripe_secret_key")
+    event = stripe.Event.construct_from(payload, stripe.api_key)
+
+    event_type = event.type
+    event_data = event.data.object
+    event_id = getattr(event, "id", None) or ""
+
+    # Get organization ID based on the event type
+    stripe_account_id = event.account
+    if not stripe_account_id:
+        logger.error("Stripe account ID not found")
+        raise HTTPException(status_code=400, detail="Stripe account ID not found")
+    
+    org_id = await get_org_id_from_stripe_account(stripe_account_id, db_session)
 
-            config_data = config.model_dump()
-            config_data.update({
-                "enabled": True,
-                "active": True,
-                "provider_config": {
-                    **config.provider_config,
-                    "onboarding_completed": True
-                }
-            })
-            await update_payments_config(
-                request,
-                org_id,
-                PaymentsConfigUpdate(**config_data),
-                InternalUser(),
-                db_session,
+    # Handle internal account events
+    if event_type == 'account.application.authorized':
+        statement = select(PaymentsConfig).where(PaymentsConfig.org_id == org_id)
+        config = db_session.exec(statement).first()
+        
+        if not config:
+            logger.error("No payments configuration found for this organization")
+            raise HTTPException(
+                status_code=404,
+                detail="No payments configuration found for this organization"
             )
 
-            logger.info(f"Account authorized for organization {org_id}")
-            return {"status": "success", "message": "Account authorized successfully"}
-
-        elif event_type == 'account.application.deauthorized':
-            statement = select(PaymentsConfig).where(PaymentsConfig.org_id == org_id)
-            config = db_session.exec(statement).first()
-            
-            if not config:
-                raise HTTPException(
-                    status_code=404,
-                    detail="No payments configuration found for this organization"
-                )
+        config_data = config.model_dump()
+        config_data.update({
+            "enabled": True,
+            "active": True,
+            "provider_config": {
+                **config.provider_config,
+                "onboarding_completed": True
+            }
+        })
+        await update_payments_config(
+            request,
+            org_id,
+            PaymentsConfigUpdate(**config_data),
+            InternalUser(),
+            db_session,
+        )
 
-            config_data = config.model_dump()
-            config_data.update({
-                "enabled": True,
-                "active": False,
-                "provider_config": {
-                    **config.provider_config,
-                    "onboarding_completed": False
-                }
-            })
-            await update_payments_config(
-                request,
-                org_id,
-                PaymentsConfigUpdate(**config_data),
-                InternalUser(),
-                db_session,
+        logger.info(f"Account authorized for organization {org_id}")
+        return {"status": "success", "message": "Account authorized successfully"}
+
+    elif event_type == 'account.application.deauthorized':
+        statement = select(PaymentsConfig).where(PaymentsConfig.org_id == org_id)
+        config = db_session.exec(statement).first()
+        
+        if not config:
+            raise HTTPException(
+                status_code=404,
+                detail="No payments configuration found for this organization"
             )
 
-            logger.info(f"Account deauthorized for organization {org_id}")
-            return {"status": "success", "message": "Account deauthorized successfully"}
-
-        # Handle payment-related events
-        elif event_type == "checkout.session.completed":
-            session = event_data
-            payment_user_id = int(session.get("metadata", {}).get("payment_user_id"))
-
-            if session.get("mode") == "subscription":
-                if session.get("subscription"):
-                    # Persist subscription id on the PaymentsUser so we can attribute recurring invoices.
-                    subscription_id = session.get("subscription")
-                    statement = select(PaymentsUser).where(PaymentsUser.id == payment_user_id, PaymentsUser.org_id == org_id)
-                    pu = db_session.exec(statement).first()
-                    if pu:
-                        data = pu.provider_specific_data or {}
-                        data["stripe_subscription_id"] = subscription_id
-                        data["stripe_checkout_session_id"] = session.get("id")
-                        pu.provider_specific_data = data
-                        db_session.add(pu)
-                        db_session.commit()
-                    await update_payment_user_status(
-                        request=request,
+        config_data = config.model_dump()
+        config_data.update({
+            "enabled": True,
+            "active": False,
+            "provider_config": {
+                **config.provider_config,
+                "onboarding_completed": False
+            }
+        })
+        await update_payments_config(
+            request,
+            org_id,
+            PaymentsConfigUpdate(**config_data),
+            InternalUser(),
+            db_session,
+        )
+
+        logger.info(f"Account deauthorized for organization {org_id}")
+        return {"status": "success", "message": "Account deauthorized successfully"}
+
+    # Handle payment-related events
+    elif event_type == "checkout.session.completed":
+        session = event_data
+        payment_user_id = int(session.get("metadata", {}).get("payment_user_id"))
+
+        if session.get("mode") == "subscription":
+            if session.get("subscription"):
+                # Persist subscription id on the PaymentsUser so we can attribute recurring invoices.
+                subscription_id = session.get("subscription")
+                statement = select(PaymentsUser).where(PaymentsUser.id == payment_user_id, PaymentsUser.org_id == org_id)
+                pu = db_session.exec(statement).first()
+                if pu:
+                    data = pu.provider_specific_data or {}
+                    data["stripe_subscription_id"] = subscription_id
+                    data["stripe_checkout_session_id"] = session.get("id")
+                    pu.provider_specific_data = data
+                    db_session.add(pu)
+                    db_session.commit()
+                await update_payment_user_status(
+                    request=request,
+                    org_id=org_id,
+                    payment_user_id=payment_user_id,
+                    status=PaymentStatusEnum.ACTIVE,
+                    current_user=InternalUser(),
+                    db_session=db_session,
+                )
+                # Record affiliate commission for cycle 1
+                try:
+                    record_commission_for_payment(
                         org_id=org_id,
                         payment_user_id=payment_user_id,
-                        status=PaymentStatusEnum.ACTIVE,
-                        current_user=InternalUser(),
+                        provider_event_id=event_id or session.get("id") or f"checkout:{payment_user_id}",
+                        provider_subscription_id=str(subscription_id) if subscription_id else None,
                         db_session=db_session,
                     )
-                    # Record affiliate commission for cycle 1
-                    try:
-                        record_commission_for_payment(
-                            org_id=org_id,
-                            payment_user_id=payment_user_id,
-                            provider_event_id=event_id or session.get("id") or f"checkout:{payment_user_id}",
-                            provider_subscription_id=str(subscription_id) if subscription_id else None,
-                            db_session=db_session,
-                        )
-                    except Exception:
-                        pass
-            else:
-                if session.get("payment_status") == "paid":
-                    await update_payment_user_status(
-                        request=request,
+                except Exception:
+                    pass
+        else:
+            if session.get("payment_status") == "paid":
+                await update_payment_user_status(
+                    request=request,
+                    org_id=org_id,
+                    payment_user_id=payment_user_id,
+                    status=PaymentStatusEnum.COMPLETED,
+                    current_user=InternalUser(),
+                    db_session=db_session,
+                )
+                # Record affiliate commission for one-time payment
+                try:
+                    record_commission_for_payment(
                         org_id=org_id,
                         payment_user_id=payment_user_id,
-                        status=PaymentStatusEnum.COMPLETED,
-                        current_user=InternalUser(),
+                        provider_event_id=event_id or session.get("id") or f"checkout:{payment_user_id}",
+                        provider_subscription_id=None,
                         db_session=db_session,
                     )
-                    # Record affiliate commission for one-time payment
+                except Exception:
+                    pass
+
+    elif event_type == "customer.subscription.deleted":
+        subscription = event_data
+        payment_user_id = int(subscription.get("metadata", {}).get("payment_user_id"))
+
+        await update_payment_user_status(
+            request=request,
+            org_id=org_id,
+            payment_user_id=payment_user_id,
+            status=PaymentStatusEnum.CANCELLED,
+            current_user=InternalUser(),
+            db_session=db_session,
+        )
+
+    elif event_type == "invoice.paid":
+        invoice = event_data
+        sub_id = invoice.get("subscription")
+        if sub_id:
+            try:
+                sub = stripe.Subscription.retrieve(sub_id, stripe_account=stripe_account_id)
+                payment_user_id_raw = (sub.get("metadata") or {}).get("payment_user_id")
+                if payment_user_id_raw:
+                    payment_user_id = int(payment_user_id_raw)
+                    # Record affiliate commission for recurring cycle
                     try:
                         record_commission_for_payment(
                             org_id=org_id,
                             payment_user_id=payment_user_id,
-                            provider_event_id=event_id or session.get("id") or f"checkout:{payment_user_id}",
-                            provider_subscription_id=None,
+                            provider_event_id=event_id or f"invoice:{invoice.get('id')}",
+                            provider_subscription_id=str(sub_id),
                             db_session=db_session,
                         )
                     except Exception:
                         pass
+            except Exception:
+                pass
 
-        elif event_type == "customer.subscription.deleted":
-            subscription = event_data
-            payment_user_id = int(subscription.get("metadata", {}).get("payment_user_id"))
-
-            await update_payment_user_status(
-                request=request,
-                org_id=org_id,
-                payment_user_id=payment_user_id,
-                status=PaymentStatusEnum.CANCELLED,
-                current_user=InternalUser(),
-                db_session=db_session,
-            )
+    elif event_type == "payment_intent.payment_failed":
+        payment_intent = event_data
+        payment_user_id = int(payment_intent.get("metadata", {}).get("payment_user_id"))
 
-        elif event_type == "invoice.paid":
-            invoice = event_data
-            sub_id = invoice.get("subscription")
-            if sub_id:
-                try:
-                    sub = stripe.Subscription.retrieve(sub_id, stripe_account=stripe_account_id)
-                    payment_user_id_raw = (sub.get("metadata") or {}).get("payment_user_id")
-                    if payment_user_id_raw:
-                        payment_user_id = int(payment_user_id_raw)
-                        # Record affiliate commission for recurring cycle
-                        try:
-                            record_commission_for_payment(
-                                org_id=org_id,
-                                payment_user_id=payment_user_id,
-                                provider_event_id=event_id or f"invoice:{invoice.get('id')}",
-                                provider_subscription_id=str(sub_id),
-                                db_session=db_session,
-                            )
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
+        await update_payment_user_status(
+            request=request,
+            org_id=org_id,
+            payment_user_id=payment_user_id,
+            status=PaymentStatusEnum.FAILED,
+            current_user=InternalUser(),
+            db_session=db_session,
+        )
 
-        elif event_type == "payment_intent.payment_failed":
-            payment_intent = event_data
-            payment_user_id = int(payment_intent.get("metadata", {}).get("payment_user_id"))
-
-            await update_payment_user_status(
-                request=request,
-                org_id=org_id,
-                payment_user_id=payment_user_id,
-                status=PaymentStatusEnum.FAILED,
-                current_user=InternalUser(),
-                db_session=db_session,
-            )
+    else:
+        logger.warning(f"Unhandled event type: {event_type}")
+        return {"status": "ignored", "message": f"Unhandled event type: {event_type}"}
+
+    return {"status": "success"}
 
-        else:
-            logger.warning(f"Unhandled event type: {event_type}")
-            return {"status": "ignored", "message": f"Unhandled event type: {event_type}"}
 
-        return {"status": "success"}
+async def process_next_stripe_event(db_session: Session) -> bool:
+    """Process the next event due in the inbox. Returns False when there is none"""
+    event = claim_stripe_event(db_session)
+    if not event:
+        return False
 
+    event_id = event.id
+    try:
+        await process_stripe_event(event.payload, db_session)
     except Exception as e:
-        logger.error(f"Error processing webhook: {str(e)}")
-        raise HTTPException(status_code=400, detail=f"Error processing webhook: {str(e)}") 
\ No newline at end of file
+        db_session.rollback()
+        error = getattr(e, "detail", None) or str(e) or type(e).__name__
+        logger.error(f"Stripe event {event.event_id} failed (attempt {event.attempts}): {error}")
+        mark_stripe_event_failed(db_session, event_id, str(error))  # type: ignore
+    else:
+        mark_stripe_event_processed(db_session, event_id)  # type: ignore
+
+    return True
+
+
+async def process_stripe_events(db_session: Session, limit: int = 100) -> int:
+    """Process up to `limit` events due, returns the number of events processed"""
+    processed = 0
+    while processed < limit and await process_next_stripe_event(db_session):
+        processed += 1
+    return processed
+
+
+async def stripe_webhook_worker(engine) -> None:
+    """
+    Background pool processing the webhook inbox. Each worker runs in its own
+    thread with its own session, as the handlers call Stripe and the database
+    synchronously.
+    """
+
+    def work() -> int:
+        with Session(engine) as db_session:
+            return asyncio.run(process_stripe_events(db_session))
+
+    while True:
+        try:
+            processed = sum(
+                await asyncio.gather(
+                    *[asyncio.to_thread(work) for _ in range(STRIPE_WEBHOOK_WORKERS)]
+                )
+            )
+        except Exception as e:
+            logger.error(f"Stripe webhook worker error: {e}")
+            processed = 0
+
+        if not processed:
+            await asyncio.sleep(STRIPE_WEBHOOK_POLL_INTERVAL)
@@ -6,6 +6,8 @@ from src.security.rbac.rbac import (
     authorization_verify_based_on_roles_and_authorship,
     authorization_verify_if_user_is_anon,
 )
+from src.security.rbac.context import invalidate_user_roles_cache
+from src.services.users.cache import invalidate_user_session_cache
 from src.db.users import AnonymousUser, PublicUser
 from src.db.roles import Role, RoleCreate, RoleRead, RoleUpdate, RoleTypeEnum
 from src.db.organizations import Organization
@@ -589,6 +591,10 @@ async def update_role(
     db_session.commit()
     db_session.refresh(role)
 
+    # Rights changed for every member holding this role
+    invalidate_user_roles_cache()
+    invalidate_user_session_cache()
+
     role = RoleRead(**role.model_dump())
 
     return role
@@ -633,6 +639,9 @@ async def delete_role(
     db_session.delete(role)
     db_session.commit()
 
+    invalidate_user_roles_cache()
+    invalidate_user_session_cache()
+
     return "Role deleted"
 
 
@@ -0,0 +1,67 @@
+import re
+from sqlalchemy import and_, func, literal_column, or_, true
+from src.core.db_session import DBSession
+from src.db.collections import Collection
+from src.db.courses.courses import Course
+from src.db.users import User
+
+# Text search configuration used by the GIN indexes (see the
+# full_text_search migration). 'simple' does no stemming, which suits
+# content written in any language and makes prefix matching predictable.
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+# Searched columns of each table. The indexes are built on the exact same
+# expressions, keep them in sync with the migration.
+COURSE_SEARCH_COLUMNS = (
+    Course.name,
+    Course.description,
+    Course.about,
+    Course.learnings,
+    Course.tags,
+)
+COLLECTION_SEARCH_COLUMNS = (Collection.name, Collection.description)
+USER_SEARCH_COLUMNS = (User.username, User.first_name, User.last_name, User.bio)
+
+
+def search_terms(search_query: str) -> list[str]:
+    """Split a user query into lowercase words, dropping any operator"""
+    return re.findall(r"\w+", search_query.lower())
+
+
+def search_vector(columns):
+    """
+    to_tsvector of the concatenated columns. Literals are inlined so that the
+    expression matches the indexed one with server side parameters (asyncpg).
+    """
+    document = func.coalesce(columns[0], literal_column("''"))
+    for column in columns[1:]:
+        document = document.op("||")(literal_column("' '")).op("||")(
+            func.coalesce(column, literal_column("''"))
+        )
+    return func.to_tsvector(SEARCH_CONFIG, document)
+
+
+def search_filter(db_session: DBSession, columns, search_query: str):
+    """
+    Return (where clause, rank expression) matching rows that contain every
+    word of the query as a prefix.
+
+    On Postgres this goes through the tsvector GIN indexes and ranks with
+    ts_rank. Other databases (SQLite in tests) fall back to LIKE on every
+    column, and there is no rank (None).
+    """
+    terms = search_terms(search_query)
+    if not terms:
+        return true(), None
+
+    if db_session.get_bind().dialect.name == "postgresql":
+        vector = search_vector(columns)
+        query = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms))
+        return vector.op("@@")(query), func.ts_rank(vector, query)
+
+    conditions = [
+        or_(*[func.lower(column).like(f"%{term}%") for column in columns])
+        for term in terms
+    ]
+    return and_(*conditions), None
+
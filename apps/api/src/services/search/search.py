@@ -1,6 +1,7 @@
 from typing import List, TypeVar
 from fastapi import Request
-from sqlmodel import Session, select, or_, text, and_
+from sqlmodel import select, or_, and_
+from src.core.db_session import DBSession, db_exec
 from sqlalchemy import true as sa_true
 from pydantic import BaseModel
 from src.db.users import PublicUser, AnonymousUser, UserRead, User
@@ -10,6 +11,11 @@ from src.db.collections_courses import CollectionCourse
 from src.db.organizations import Organization
 from src.db.user_organizations import UserOrganization
 from src.services.courses.courses import search_courses
+from src.services.search.fulltext import (
+    COLLECTION_SEARCH_COLUMNS,
+    USER_SEARCH_COLUMNS,
+    search_filter,
+)
 
 T = TypeVar('T')
 
@@ -26,7 +32,7 @@ async def search_across_org(
     current_user: PublicUser | AnonymousUser,
     org_slug: str,
     search_query: str,
-    db_session: Session,
+    db_session: DBSession,
     page: int = 1,
     limit: int = 10,
 ) -> SearchResult:
@@ -37,7 +43,7 @@ async def search_across_org(
 
     # Get organization
     org_statement = select(Organization).where(Organization.slug == org_slug)
-    org = db_session.exec(org_statement).first()
+    org = (await db_exec(db_session, org_statement)).first()
     
     if not org:
         return SearchResult(courses=[], collections=[], users=[])
@@ -46,34 +52,24 @@ async def search_across_org(
     courses = await search_courses(request, current_user, org_slug, search_query, db_session, page, limit)
 
     # Search collections
+    collections_match, collections_rank = search_filter(
+        db_session, COLLECTION_SEARCH_COLUMNS, search_query
+    )
     collections_query = (
         select(Collection)
         .where(Collection.org_id == org.id)
-        .where(
-            or_(
-                text('LOWER("collection".name) LIKE LOWER(:pattern)'),
-                text('LOWER("collection".description) LIKE LOWER(:pattern)')
-            )
-        )
-        .params(pattern=f"%{search_query}%")
+        .where(collections_match)
     )
 
     # Search users
+    users_match, users_rank = search_filter(db_session, USER_SEARCH_COLUMNS, search_query)
     users_query = (
         select(User)
         .join(UserOrganization, and_(
             UserOrganization.user_id == User.id,
             UserOrganization.org_id == org.id
         ))
-        .where(
-            or_(
-                text('LOWER("user".username) LIKE LOWER(:pattern) OR ' +
-                     'LOWER("user".first_name) LIKE LOWER(:pattern) OR ' +
-                     'LOWER("user".last_name) LIKE LOWER(:pattern) OR ' +
-                     'LOWER("user".bio) LIKE LOWER(:pattern)')
-            )
-        )
-        .params(pattern=f"%{search_query}%")
+        .where(users_match)
     )
 
     if isinstance(current_user, AnonymousUser):
@@ -91,27 +87,41 @@ async def search_across_org(
             )
         )
 
+    # Best matches first
+    if collections_rank is not None:
+        collections_query = collections_query.order_by(collections_rank.desc())
+    if users_rank is not None:
+        users_query = users_query.order_by(users_rank.desc())
+    collections_query = collections_query.order_by(Collection.id)  # type: ignore
+    users_query = users_query.order_by(User.id)  # type: ignore
+
     # Apply pagination to queries
-    collections = db_session.exec(collections_query.offset(offset).limit(limit)).all()
-    users = db_session.exec(users_query.offset(offset).limit(limit)).all()
+    collections = (await db_exec(db_session, collections_query.offset(offset).limit(limit))).all()
+    users = (await db_exec(db_session, users_query.offset(offset).limit(limit))).all()
 
-    # Convert collections to CollectionRead objects with courses
-    collection_reads = []
-    for collection in collections:
-        # Get courses in collection
+    # Get the courses of all the collections in a single query
+    collection_courses = {}
+    if collections:
         statement = (
-            select(Course)
-            .select_from(Course)
-            .join(CollectionCourse, and_(
-                CollectionCourse.course_id == Course.id,
-                CollectionCourse.collection_id == collection.id,
-                CollectionCourse.org_id == collection.org_id
-            ))
-            .distinct()
+            select(CollectionCourse.collection_id, Course)
+            .join(Course, CollectionCourse.course_id == Course.id)  # type: ignore
+            .join(Collection, CollectionCourse.collection_id == Collection.id)  # type: ignore
+            .where(CollectionCourse.collection_id.in_([collection.id for collection in collections]))  # type: ignore
+            .where(CollectionCourse.org_id == Collection.org_id)
+            .order_by(CollectionCourse.collection_id, CollectionCourse.id)  # type: ignore
+        )
+        for collection_id, course in (await db_exec(db_session, statement)).all():
+            courses_of_collection = collection_courses.setdefault(collection_id, {})
+            courses_of_collection.setdefault(course.id, course)
+
+    # Convert collections to CollectionRead objects with courses
+    collection_reads = [
+        CollectionRead(
+            **collection.model_dump(),
+            courses=list(collection_courses.get(collection.id, {}).values()),
         )
-        collection_courses = list(db_session.exec(statement).all())
-        collection_read = CollectionRead(**collection.model_dump(), courses=collection_courses)
-        collection_reads.append(collection_read)
+        for collection in collections
+    ]
 
     # Convert users to UserRead objects
     user_reads = [UserRead.model_validate(user) for user in users]
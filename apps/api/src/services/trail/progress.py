@@ -0,0 +1,196 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, distinct, insert, literal, update
+from sqlmodel import Session, func, select
+from src.db.course_progress import CourseProgress
+from src.db.courses.activities import Activity
+from src.db.courses.chapter_activities import ChapterActivity
+from src.db.courses.courses import Course
+from src.db.trail_runs import TrailRun
+from src.db.trail_steps import TrailStep
+
+
+####################################################
+# Counting
+####################################################
+
+
+def _published_activity_ids(course_id):
+    return (
+        select(ChapterActivity.activity_id)
+        .join(Activity, Activity.id == ChapterActivity.activity_id)  # type: ignore
+        .where(ChapterActivity.course_id == course_id, Activity.published == True)
+    )
+
+
+def total_activities_count(course_id):
+    """Number of published activities of a course, as a scalar subquery"""
+    return (
+        _published_activity_ids(course_id)
+        .with_only_columns(func.count(distinct(ChapterActivity.activity_id)))
+        .scalar_subquery()
+    )
+
+
+def completed_activities_count(user_id, course_id):
+    """
+    Number of published activities of a course the user completed, as a
+    scalar subquery. Duplicate steps are only counted once.
+    """
+    return (
+        select(func.count(distinct(TrailStep.activity_id)))
+        .where(
+            TrailStep.user_id == user_id,
+            TrailStep.course_id == course_id,
+            TrailStep.complete == True,
+            TrailStep.activity_id.in_(_published_activity_ids(course_id)),  # type: ignore
+        )
+        .scalar_subquery()
+    )
+
+
+####################################################
+# Maintenance
+####################################################
+# Nothing here commits, the changes are committed by the caller together with
+# the trail steps or the course structure edit they account for.
+
+
+def get_course_progress(
+    user_id: int, course_id: int, db_session: Session
+) -> Optional[CourseProgress]:
+    statement = select(CourseProgress).where(
+        CourseProgress.user_id == user_id, CourseProgress.course_id == course_id
+    )
+    return db_session.exec(statement).first()
+
+
+def create_course_progress(
+    user_id: int, course: Course, db_session: Session
+) -> CourseProgress:
+    """Create the progress of a user starting a course, counted from the steps"""
+    statement = select(
+        completed_activities_count(user_id, course.id),
+        total_activities_count(course.id),
+    )
+    completed_count, total_count = db_session.exec(statement).one()  # type: ignore
+
+    progress = CourseProgress(
+        user_id=user_id,
+        course_id=course.id,  # type: ignore
+        org_id=course.org_id,
+        completed_count=completed_count,
+        total_count=total_count,
+        creation_date=str(datetime.now()),
+        update_date=str(datetime.now()),
+    )
+    db_session.add(progress)
+    return progress
+
+
+def record_activity_progress(
+    user_id: int,
+    course: Course,
+    activity: Activity,
+    completed: bool,
+    db_session: Session,
+) -> CourseProgress:
+    """
+    Account for a completed step that was added (completed=True) or removed
+    (completed=False). The counter is moved in place, this does not depend on
+    the size of the course.
+    """
+    progress = get_course_progress(user_id, course.id, db_session)  # type: ignore
+    if not progress:
+        # Pending step changes are flushed before counting
+        progress = create_course_progress(user_id, course, db_session)
+    elif activity.published:
+        progress.completed_count = CourseProgress.completed_count + (1 if completed else -1)  # type: ignore
+
+    progress.last_activity = str(datetime.now())
+    progress.update_date = str(datetime.now())
+    db_session.add(progress)
+    return progress
+
+
+def refresh_course_progress(course_id: int, db_session: Session) -> None:
+    """
+    Recount the progress of every learner of a course after its structure
+    changed (activities added, removed, published or unpublished).
+    """
+    statement = (
+        update(CourseProgress)
+        .where(CourseProgress.course_id == course_id)  # type: ignore
+        .values(
+            completed_count=completed_activities_count(
+                CourseProgress.user_id, CourseProgress.course_id
+            ),
+            total_count=total_activities_count(course_id),
+            update_date=str(datetime.now()),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db_session.exec(statement)  # type: ignore
+
+
+def delete_course_progress(user_id: int, course_id: int, db_session: Session) -> None:
+    statement = delete(CourseProgress).where(
+        CourseProgress.user_id == user_id,  # type: ignore
+        CourseProgress.course_id == course_id,  # type: ignore
+    )
+    db_session.exec(statement)  # type: ignore
+
+
+####################################################
+# Rebuild
+####################################################
+
+
+def rebuild_course_progress(db_session: Session, course_id: Optional[int] = None) -> int:
+    """
+    Rebuild the progress of every trail run from the trail steps, for all
+    courses or a single one. Returns the number of progress rows.
+    """
+    statement = delete(CourseProgress)
+    if course_id is not None:
+        statement = statement.where(CourseProgress.course_id == course_id)  # type: ignore
+    db_session.exec(statement)  # type: ignore
+
+    last_activity = (
+        select(func.coalesce(func.max(TrailStep.update_date), ""))
+        .where(
+            TrailStep.user_id == TrailRun.user_id,
+            TrailStep.course_id == TrailRun.course_id,
+        )
+        .scalar_subquery()
+    )
+    now = literal(str(datetime.now()))
+    runs = select(
+        TrailRun.user_id,
+        TrailRun.course_id,
+        func.min(TrailRun.org_id),
+        completed_activities_count(TrailRun.user_id, TrailRun.course_id),
+        total_activities_count(TrailRun.course_id),
+        last_activity,
+        now,
+        now,
+    ).group_by(TrailRun.user_id, TrailRun.course_id)  # type: ignore
+    if course_id is not None:
+        runs = runs.where(TrailRun.course_id == course_id)
+
+    statement = insert(CourseProgress).from_select(
+        [
+            "user_id",
+            "course_id",
+            "org_id",
+            "completed_count",
+            "total_count",
+            "last_activity",
+            "creation_date",
+            "update_date",
+        ],
+        runs,
+    )
+    result = db_session.exec(statement)  # type: ignore
+    db_session.commit()
+    return result.rowcount
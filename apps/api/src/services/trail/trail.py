@@ -1,8 +1,9 @@
 from datetime import datetime
 from uuid import uuid4
-from src.db.courses.chapter_activities import ChapterActivity
 from fastapi import HTTPException, Request, status
 from sqlmodel import Session, select
+from src.core.db_session import DBSession, db_exec
+from src.db.course_progress import CourseProgress
 from src.db.courses.activities import Activity
 from src.db.courses.courses import Course
 from src.db.trail_runs import TrailRun, TrailRunRead
@@ -10,6 +11,86 @@ from src.db.trail_steps import TrailStep
 from src.db.trails import Trail, TrailCreate, TrailRead
 from src.db.users import AnonymousUser, PublicUser
 from src.services.courses.certifications import check_course_completion_and_create_certificate
+from src.services.trail.progress import (
+    create_course_progress,
+    delete_course_progress,
+    get_course_progress,
+    record_activity_progress,
+)
+
+
+async def build_trail_read(
+    trail: Trail,
+    db_session: DBSession,
+    user_id: int | None = None,
+) -> TrailRead:
+    """
+    Assemble a TrailRead with its runs, steps, courses and the progress of
+    each course. Everything is loaded with a fixed number of set-based
+    queries, whatever the number of runs or steps.
+    """
+    statement = select(TrailRun).where(TrailRun.trail_id == trail.id)
+    if user_id is not None:
+        statement = statement.where(TrailRun.user_id == user_id)
+    trail_runs_in_db = (await db_exec(db_session, statement)).all()
+
+    # Steps of all the runs
+    trail_run_ids = [trail_run.id for trail_run in trail_runs_in_db]
+    trail_steps_in_db = []
+    if trail_run_ids:
+        statement = (
+            select(TrailStep)
+            .where(TrailStep.trailrun_id.in_(trail_run_ids))  # type: ignore
+            .order_by(TrailStep.id)  # type: ignore
+        )
+        if user_id is not None:
+            statement = statement.where(TrailStep.user_id == user_id)
+        trail_steps_in_db = (await db_exec(db_session, statement)).all()
+
+    # Shared course map for runs and steps
+    course_ids = {trail_run.course_id for trail_run in trail_runs_in_db} | {
+        trail_step.course_id for trail_step in trail_steps_in_db
+    }
+    courses = {}
+    course_progress = {}
+    if course_ids:
+        statement = select(Course).where(Course.id.in_(course_ids))  # type: ignore
+        courses = {course.id: course for course in (await db_exec(db_session, statement)).all()}
+
+        # Maintained progress of the user in each course
+        statement = select(CourseProgress).where(
+            CourseProgress.user_id == trail.user_id,
+            CourseProgress.course_id.in_(course_ids),  # type: ignore
+        )
+        course_progress = {
+            progress.course_id: progress
+            for progress in (await db_exec(db_session, statement)).all()
+        }
+
+    trail_steps_by_run = {}
+    for trail_step in trail_steps_in_db:
+        trail_step = TrailStep(**trail_step.__dict__)
+        trail_step.data = dict(course=courses.get(trail_step.course_id))
+        trail_steps_by_run.setdefault(trail_step.trailrun_id, []).append(trail_step)
+
+    trail_runs = []
+    for trail_run in trail_runs_in_db:
+        course = courses.get(trail_run.course_id)
+        progress = course_progress.get(trail_run.course_id)
+        trail_runs.append(
+            TrailRunRead(
+                **trail_run.__dict__,
+                course=course.model_dump() if course else {},
+                steps=trail_steps_by_run.get(trail_run.id, []),
+                course_total_steps=progress.total_count if progress else 0,
+                course_completed_steps=progress.completed_count if progress else 0,
+            )
+        )
+
+    return TrailRead(
+        **trail.model_dump(),
+        runs=trail_runs,
+    )
 
 
 async def create_user_trail(
@@ -47,56 +128,17 @@ async def create_user_trail(
 async def get_user_trails(
     request: Request,
     user: PublicUser,
-    db_session: Session,
+    db_session: DBSession,
 ) -> TrailRead:
     statement = select(Trail).where(Trail.user_id == user.id)
-    trail = db_session.exec(statement).first()
+    trail = (await db_exec(db_session, statement)).first()
 
     if not trail:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Trail not found"
         )
 
-    statement = select(TrailRun).where(TrailRun.trail_id == trail.id)
-    trail_runs = db_session.exec(statement).all()
-
-    trail_runs = [
-        TrailRunRead(**trail_run.__dict__, course={}, steps=[], course_total_steps=0)
-        for trail_run in trail_runs
-    ]
-
-    # Add course object and total activities in a course to trail runs
-    for trail_run in trail_runs:
-        statement = select(Course).where(Course.id == trail_run.course_id)
-        course = db_session.exec(statement).first()
-        trail_run.course = course.model_dump() if course else {}
-
-        # Add number of activities (steps) in a course
-        statement = select(ChapterActivity).where(
-            ChapterActivity.course_id == trail_run.course_id
-        )
-        course_total_steps = db_session.exec(statement)
-        # count number of activities in a this list
-        trail_run.course_total_steps = len(course_total_steps.all())
-
-    for trail_run in trail_runs:
-        statement = select(TrailStep).where(TrailStep.trailrun_id == trail_run.id)
-        trail_steps = db_session.exec(statement).all()
-
-        trail_steps = [TrailStep(**trail_step.__dict__) for trail_step in trail_steps]
-        trail_run.steps = trail_steps
-
-        for trail_step in trail_steps:
-            statement = select(Course).where(Course.id == trail_step.course_id)
-            course = db_session.exec(statement).first()
-            trail_step.data = dict(course=course)
-
-    trail_read = TrailRead(
-        **trail.model_dump(),
-        runs=trail_runs,
-    )
-
-    return trail_read
+    return await build_trail_read(trail, db_session)
 
 
 async def check_trail_presence(
@@ -142,46 +184,7 @@ async def get_user_trail_with_orgid(
         db_session=db_session,
     )
 
-    statement = select(TrailRun).where(TrailRun.trail_id == trail.id)
-    trail_runs = db_session.exec(statement).all()
-
-    trail_runs = [
-        TrailRunRead(**trail_run.__dict__, course={}, steps=[], course_total_steps=0)
-        for trail_run in trail_runs
-    ]
-
-    # Add course object and total activities in a course to trail runs
-    for trail_run in trail_runs:
-        statement = select(Course).where(Course.id == trail_run.course_id)
-        course = db_session.exec(statement).first()
-        trail_run.course = course.model_dump() if course else {}
-
-        # Add number of activities (steps) in a course
-        statement = select(ChapterActivity).where(
-            ChapterActivity.course_id == trail_run.course_id
-        )
-        course_total_steps = db_session.exec(statement)
-        # count number of activities in a this list
-        trail_run.course_total_steps = len(course_total_steps.all())
-
-    for trail_run in trail_runs:
-        statement = select(TrailStep).where(TrailStep.trailrun_id == trail_run.id)
-        trail_steps = db_session.exec(statement).all()
-
-        trail_steps = [TrailStep(**trail_step.__dict__) for trail_step in trail_steps]
-        trail_run.steps = trail_steps
-
-        for trail_step in trail_steps:
-            statement = select(Course).where(Course.id == trail_step.course_id)
-            course = db_session.exec(statement).first()
-            trail_step.data = dict(course=course)
-
-    trail_read = TrailRead(
-        **trail.model_dump(),
-        runs=trail_runs,
-    )
-
-    return trail_read
+    return await build_trail_read(trail, db_session)
 
 
 async def add_activity_to_trail(
@@ -253,6 +256,7 @@ async def add_activity_to_trail(
             update_date=str(datetime.now()),
         )
         db_session.add(trailstep)
+        record_activity_progress(user.id, course, activity, True, db_session)
         db_session.commit()
         db_session.refresh(trailstep)
 
@@ -262,32 +266,7 @@ async def add_activity_to_trail(
             request, user.id, course.id, db_session
         )
 
-    statement = select(TrailRun).where(TrailRun.trail_id == trail.id , TrailRun.user_id == user.id)
-    trail_runs = db_session.exec(statement).all()
-
-    trail_runs = [
-        TrailRunRead(**trail_run.__dict__, course={}, steps=[], course_total_steps=0)
-        for trail_run in trail_runs
-    ]
-
-    for trail_run in trail_runs:
-        statement = select(TrailStep).where(TrailStep.trailrun_id == trail_run.id, TrailStep.user_id == user.id)
-        trail_steps = db_session.exec(statement).all()
-
-        trail_steps = [TrailStep(**trail_step.__dict__) for trail_step in trail_steps]
-        trail_run.steps = trail_steps
-
-        for trail_step in trail_steps:
-            statement = select(Course).where(Course.id == trail_step.course_id)
-            course = db_session.exec(statement).first()
-            trail_step.data = dict(course=course)
-
-    trail_read = TrailRead(
-        **trail.model_dump(),
-        runs=trail_runs,
-    )
-
-    return trail_read
+    return await build_trail_read(trail, db_session, user_id=user.id)
 
 async def remove_activity_from_trail(
     request: Request,
@@ -332,35 +311,12 @@ async def remove_activity_from_trail(
 
     if trail_step:
         db_session.delete(trail_step)
+        if trail_step.complete:
+            record_activity_progress(user.id, course, activity, False, db_session)
         db_session.commit()
 
     # Get updated trail data
-    statement = select(TrailRun).where(TrailRun.trail_id == trail.id, TrailRun.user_id == user.id)
-    trail_runs = db_session.exec(statement).all()
-
-    trail_runs = [
-        TrailRunRead(**trail_run.__dict__, course={}, steps=[], course_total_steps=0)
-        for trail_run in trail_runs
-    ]
-
-    for trail_run in trail_runs:
-        statement = select(TrailStep).where(TrailStep.trailrun_id == trail_run.id, TrailStep.user_id == user.id)
-        trail_steps = db_session.exec(statement).all()
-
-        trail_steps = [TrailStep(**trail_step.__dict__) for trail_step in trail_steps]
-        trail_run.steps = trail_steps
-
-        for trail_step in trail_steps:
-            statement = select(Course).where(Course.id == trail_step.course_id)
-            course = db_session.exec(statement).first()
-            trail_step.data = dict(course=course)
-
-    trail_read = TrailRead(
-        **trail.model_dump(),
-        runs=trail_runs,
-    )
-
-    return trail_read
+    return await build_trail_read(trail, db_session, user_id=user.id)
 
 
 async def add_course_to_trail(
@@ -413,35 +369,12 @@ async def add_course_to_trail(
             update_date=str(datetime.now()),
         )
         db_session.add(trail_run)
+        if not get_course_progress(user.id, course.id, db_session):  # type: ignore
+            create_course_progress(user.id, course, db_session)
         db_session.commit()
         db_session.refresh(trail_run)
 
-    statement = select(TrailRun).where(TrailRun.trail_id == trail.id, TrailRun.user_id == user.id)
-    trail_runs = db_session.exec(statement).all()
-
-    trail_runs = [
-        TrailRunRead(**trail_run.__dict__, course={}, steps=[], course_total_steps=0)
-        for trail_run in trail_runs
-    ]
-
-    for trail_run in trail_runs:
-        statement = select(TrailStep).where(TrailStep.trailrun_id == trail_run.id , TrailStep.user_id == user.id)
-        trail_steps = db_session.exec(statement).all()
-
-        trail_steps = [TrailStep(**trail_step.__dict__) for trail_step in trail_steps]
-        trail_run.steps = trail_steps
-
-        for trail_step in trail_steps:
-            statement = select(Course).where(Course.id == trail_step.course_id)
-            course = db_session.exec(statement).first()
-            trail_step.data = dict(course=course)
-
-    trail_read = TrailRead(
-        **trail.model_dump(),
-        runs=trail_runs,
-    )
-
-    return trail_read
+    return await build_trail_read(trail, db_session, user_id=user.id)
 
 
 async def remove_course_from_trail(
@@ -475,7 +408,8 @@ async def remove_course_from_trail(
 
     if trail_run:
         db_session.delete(trail_run)
-        db_session.commit()
+    delete_course_progress(user.id, course.id, db_session)  # type: ignore
+    db_session.commit()
 
     # Delete all trail steps for this course
     statement = select(TrailStep).where(TrailStep.course_id == course.id, TrailStep.user_id == user.id)
@@ -485,29 +419,4 @@ async def remove_course_from_trail(
         db_session.delete(trail_step)
         db_session.commit()
 
-    statement = select(TrailRun).where(TrailRun.trail_id == trail.id, TrailRun.user_id == user.id)
-    trail_runs = db_session.exec(statement).all()
-
-    trail_runs = [
-        TrailRunRead(**trail_run.__dict__, course={}, steps=[], course_total_steps=0)
-        for trail_run in trail_runs
-    ]
-
-    for trail_run in trail_runs:
-        statement = select(TrailStep).where(TrailStep.trailrun_id == trail_run.id, TrailStep.user_id == user.id)
-        trail_steps = db_session.exec(statement).all()
-
-        trail_steps = [TrailStep(**trail_step.__dict__) for trail_step in trail_steps]
-        trail_run.steps = trail_steps
-
-        for trail_step in trail_steps:
-            statement = select(Course).where(Course.id == trail_step.course_id)
-            course = db_session.exec(statement).first()
-            trail_step.data = dict(course=course)
-
-    trail_read = TrailRead(
-        **trail.model_dump(),
-        runs=trail_runs,
-    )
-
-    return trail_read
+    return await build_trail_read(trail, db_session, user_id=user.id)
@@ -0,0 +1,61 @@
+from src.core.cache import SharedVersions, TTLCache
+from src.db.users import UserSession
+
+
+# Assembled UserSession payloads, keyed by user id. The frontend asks for the
+# session on almost every navigation, entries are kept for a short time only.
+# Each worker holds its own copy, checked against the shared versions below.
+_user_session_cache = TTLCache(maxsize=4096, ttl=30)
+
+# Version of each user session, and of everyone's, shared by every worker.
+# Role and membership changes bump it in whichever worker handles them, which
+# makes previously cached sessions unreachable in all of them.
+_user_session_versions = SharedVersions("user_sessions", ttl=2 * 30)
+
+_ALL_USERS = "all"
+
+
+def get_user_session_version(user_id: int) -> tuple[int, ...] | None:
+    return _user_session_versions.get_many([_ALL_USERS, int(user_id)])
+
+
+def get_cached_user_session(user_id: int) -> UserSession | None:
+    """
+    Return the cached session of a user, if any. The payload is shared
+    between requests and must not be mutated.
+    """
+    entry = _user_session_cache.get(int(user_id))
+    if entry is None:
+        return None
+
+    version, user_session = entry
+    current_version = get_user_session_version(user_id)
+    if current_version is None or version != current_version:
+        return None
+
+    return user_session
+
+
+def set_cached_user_session(
+    user_id: int, version: tuple[int, ...] | None, user_session: UserSession
+) -> None:
+    """
+    Store a session under the version that was current before it was built,
+    so that a change happening in the meantime is never masked.
+    """
+    if version is None:
+        return
+    _user_session_cache.set(int(user_id), (version, user_session))
+
+
+def invalidate_user_session_cache(user_id: int | None = None) -> None:
+    """
+    Drop cached sessions, for one user after a profile or membership change,
+    or for everyone after a role definition changed.
+    """
+    if user_id is None:
+        _user_session_versions.bump(_ALL_USERS)
+        _user_session_cache.clear()
+    else:
+        _user_session_versions.bump(int(user_id))
+        _user_session_cache.delete(int(user_id))
@@ -1,8 +1,11 @@
+import csv
 from datetime import datetime
-import logging
-from typing import Literal
+import io
+from typing import Iterable, Iterator, Literal
 from uuid import uuid4
-from fastapi import HTTPException, Request
+from fastapi import HTTPException, Request, UploadFile
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, select
 from src.security.features_utils.usage import (
     check_limits_with_usage,
@@ -15,7 +18,13 @@ from src.security.rbac.rbac import (
 from src.db.usergroup_resources import UserGroupResource
 from src.db.usergroup_user import UserGroupUser
 from src.db.organizations import Organization
-from src.db.usergroups import UserGroup, UserGroupCreate, UserGroupRead, UserGroupUpdate
+from src.db.usergroups import (
+    UserGroup,
+    UserGroupBulkResult,
+    UserGroupCreate,
+    UserGroupRead,
+    UserGroupUpdate,
+)
 from src.db.users import AnonymousUser, InternalUser, PublicUser, User, UserRead
 
 
@@ -272,77 +281,60 @@ async def delete_usergroup_by_id(
     return "UserGroup deleted successfully"
 
 
-async def add_users_to_usergroup(
-    request: Request,
-    db_session: Session,
-    current_user: PublicUser | AnonymousUser | InternalUser,
-    usergroup_id: int,
-    user_ids: str,
-) -> str:
+## Bulk membership ##
 
-    statement = select(UserGroup).where(UserGroup.id == usergroup_id)
-    usergroup = db_session.exec(statement).first()
+# Ids looked up per IN (...) query, and accepted per request
+USERGROUP_BULK_CHUNK_SIZE = 1000
+USERGROUP_BULK_MAX_ITEMS = 50_000
 
-    if not usergroup:
+
+def _parse_ids(values: str | Iterable) -> list[str]:
+    """Ids from a comma-separated string or a list, deduplicated in order"""
+    if isinstance(values, str):
+        values = values.split(",")
+    ids = list(dict.fromkeys(str(value).strip() for value in values))
+    ids = [value for value in ids if value]
+    if len(ids) > USERGROUP_BULK_MAX_ITEMS:
         raise HTTPException(
-            status_code=404,
-            detail="UserGroup not found",
+            status_code=400,
+            detail=f"At most {USERGROUP_BULK_MAX_ITEMS} items can be processed at once",
         )
+    return ids
 
-    # RBAC check
-    await rbac_check(
-        request,
-        usergroup_uuid=usergroup.usergroup_uuid,
-        current_user=current_user,
-        action="create",
-        db_session=db_session,
-    )
-
-    user_ids_array = user_ids.split(",")
-
-    for user_id in user_ids_array:
-        statement = select(User).where(User.id == user_id)
-        user = db_session.exec(statement).first()
 
-        # Check if User is already Linked to UserGroup
-        statement = select(UserGroupUser).where(
-            UserGroupUser.usergroup_id == usergroup_id,
-            UserGroupUser.user_id == user_id,
-        )
-        usergroup_user = db_session.exec(statement).first()
+def _chunks(values: list) -> Iterator[list]:
+    for i in range(0, len(values), USERGROUP_BULK_CHUNK_SIZE):
+        yield values[i : i + USERGROUP_BULK_CHUNK_SIZE]
 
-        if usergroup_user:
-            logging.error(f"User with id {user_id} already exists in UserGroup")
-            continue
 
-        if user:
-            # Add user to UserGroup
-            if user.id is not None:
-                usergroup_obj = UserGroupUser(
-                    usergroup_id=usergroup_id,
-                    user_id=user.id,
-                    org_id=usergroup.org_id,
-                    creation_date=str(datetime.now()),
-                    update_date=str(datetime.now()),
-                )
+def _insert_ignoring_duplicates(db_session: Session, model, rows: list[dict]) -> None:
+    """Multi-row INSERT ... ON CONFLICT DO NOTHING, for concurrent bulk adds"""
+    if not rows:
+        return
+    dialect = db_session.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(model.__table__).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        statement = sqlite.insert(model.__table__).on_conflict_do_nothing()
+    else:
+        statement = insert(model.__table__)
+    db_session.connection().execute(statement, rows)
 
-                db_session.add(usergroup_obj)
-                db_session.commit()
-                db_session.refresh(usergroup_obj)
-        else:
-            logging.error(f"User with id {user_id} not found")
 
-    return "Users added to UserGroup successfully"
+def _bulk_result(results: dict[str, str], success: str) -> UserGroupBulkResult:
+    succeeded = sum(1 for status in results.values() if status == success)
+    return UserGroupBulkResult(
+        results=results, succeeded=succeeded, failed=len(results) - succeeded
+    )
 
 
-async def remove_users_from_usergroup(
+async def _get_usergroup_with_rbac(
     request: Request,
     db_session: Session,
-    current_user: PublicUser | AnonymousUser,
+    current_user: PublicUser | AnonymousUser | InternalUser,
     usergroup_id: int,
-    user_ids: str,
-) -> str:
-
+    action: Literal["create", "delete"],
+) -> UserGroup:
     statement = select(UserGroup).where(UserGroup.id == usergroup_id)
     usergroup = db_session.exec(statement).first()
 
@@ -357,84 +349,211 @@ async def remove_users_from_usergroup(
         request,
         usergroup_uuid=usergroup.usergroup_uuid,
         current_user=current_user,
-        action="delete",
+        action=action,
         db_session=db_session,
     )
+    return usergroup
 
-    user_ids_array = user_ids.split(",")
 
-    for user_id in user_ids_array:
-        statement = select(UserGroupUser).where(
-            UserGroupUser.user_id == user_id, UserGroupUser.usergroup_id == usergroup_id
+def _resolve_users(
+    db_session: Session, keys: list[str], by: Literal["id", "email"]
+) -> tuple[dict[str, int], dict[str, str]]:
+    """
+    User ids of the keys (ids or emails) found, and the status of the others
+    """
+    results: dict[str, str] = {}
+    if by == "id":
+        lookups = {}
+        for key in keys:
+            if key.isdigit():
+                lookups[int(key)] = key
+            else:
+                results[key] = "invalid_id"
+        column = User.id
+    else:
+        lookups = {key: key for key in keys}
+        column = User.email
+
+    found: dict[str, int] = {}
+    for chunk in _chunks(list(lookups)):
+        for user_id, value in db_session.exec(
+            select(User.id, column).where(column.in_(chunk))  # type: ignore
+        ).all():
+            found[lookups[value]] = user_id
+
+    for key in lookups.values():
+        if key not in found:
+            results[key] = "user_not_found"
+    return found, results
+
+
+def _usergroup_member_ids(db_session: Session, usergroup_id: int, user_ids: list[int]) -> set[int]:
+    members: set[int] = set()
+    for chunk in _chunks(user_ids):
+        members.update(
+            db_session.exec(
+                select(UserGroupUser.user_id).where(
+                    UserGroupUser.usergroup_id == usergroup_id,
+                    UserGroupUser.user_id.in_(chunk),  # type: ignore
+                )
+            ).all()
         )
-        usergroup_user = db_session.exec(statement).first()
+    return members
 
-        if usergroup_user:
-            db_session.delete(usergroup_user)
-            db_session.commit()
-        else:
-            logging.error(f"User with id {user_id} not found in UserGroup")
 
-    return "Users removed from UserGroup successfully"
+def _add_users(
+    db_session: Session, usergroup: UserGroup, keys: list[str], by: Literal["id", "email"]
+) -> UserGroupBulkResult:
+    users, results = _resolve_users(db_session, keys, by)
+    members = _usergroup_member_ids(db_session, usergroup.id, list(users.values()))  # type: ignore
 
+    now = str(datetime.now())
+    rows = []
+    for key, user_id in users.items():
+        if user_id in members:
+            results[key] = "already_member"
+            continue
+        results[key] = "added"
+        rows.append(
+            {
+                "usergroup_id": usergroup.id,
+                "user_id": user_id,
+                "org_id": usergroup.org_id,
+                "creation_date": now,
+                "update_date": now,
+            }
+        )
 
-async def add_resources_to_usergroup(
+    _insert_ignoring_duplicates(db_session, UserGroupUser, rows)
+    db_session.commit()
+    return _bulk_result({key: results[key] for key in keys}, "added")
+
+
+def _remove_users(
+    db_session: Session, usergroup: UserGroup, keys: list[str], by: Literal["id", "email"]
+) -> UserGroupBulkResult:
+    users, results = _resolve_users(db_session, keys, by)
+    members = _usergroup_member_ids(db_session, usergroup.id, list(users.values()))  # type: ignore
+
+    for key, user_id in users.items():
+        results[key] = "removed" if user_id in members else "not_member"
+    for chunk in _chunks(list(members)):
+        db_session.exec(
+            delete(UserGroupUser).where(
+                UserGroupUser.usergroup_id == usergroup.id,  # type: ignore
+                UserGroupUser.user_id.in_(chunk),  # type: ignore
+            )
+        )
+    db_session.commit()
+    return _bulk_result({key: results[key] for key in keys}, "removed")
+
+
+async def read_users_from_csv(file: UploadFile) -> tuple[list[str], Literal["id", "email"]]:
+    """
+    Users of a CSV upload: the user_id (or id) or email column when there is
+    a header, the first column otherwise.
+    """
+    content = (await file.read()).decode("utf-8-sig", errors="replace")
+    rows = [row for row in csv.reader(io.StringIO(content)) if row and row[0].strip()]
+    if not rows:
+        return [], "id"
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    column, by = 0, "id"
+    if "user_id" in header or "id" in header:
+        column = header.index("user_id" if "user_id" in header else "id")
+        rows = rows[1:]
+    elif "email" in header:
+        column, by = header.index("email"), "email"
+        rows = rows[1:]
+    elif "@" in rows[0][0]:
+        by = "email"
+
+    keys = [row[column] for row in rows if len(row) > column]
+    return _parse_ids(keys), by  # type: ignore
+
+
+async def add_users_to_usergroup(
     request: Request,
     db_session: Session,
-    current_user: PublicUser | AnonymousUser,
+    current_user: PublicUser | AnonymousUser | InternalUser,
     usergroup_id: int,
-    resources_uuids: str,
-) -> str:
-
-    statement = select(UserGroup).where(UserGroup.id == usergroup_id)
-    usergroup = db_session.exec(statement).first()
+    user_ids: str | Iterable,
+    by: Literal["id", "email"] = "id",
+) -> UserGroupBulkResult:
+    """
+    Add users (comma-separated or list of ids, or emails) to the UserGroup in
+    one transaction, whatever their number.
+    """
+    usergroup = await _get_usergroup_with_rbac(
+        request, db_session, current_user, usergroup_id, "create"
+    )
+    return _add_users(db_session, usergroup, _parse_ids(user_ids), by)
 
-    if not usergroup:
-        raise HTTPException(
-            status_code=404,
-            detail="UserGroup not found",
-        )
 
-    # RBAC check
-    await rbac_check(
-        request,
-        usergroup_uuid=usergroup.usergroup_uuid,
-        current_user=current_user,
-        action="create",
-        db_session=db_session,
+async def remove_users_from_usergroup(
+    request: Request,
+    db_session: Session,
+    current_user: PublicUser | AnonymousUser,
+    usergroup_id: int,
+    user_ids: str | Iterable,
+    by: Literal["id", "email"] = "id",
+) -> UserGroupBulkResult:
+    usergroup = await _get_usergroup_with_rbac(
+        request, db_session, current_user, usergroup_id, "delete"
     )
+    return _remove_users(db_session, usergroup, _parse_ids(user_ids), by)
 
-    resources_uuids_array = resources_uuids.split(",")
 
-    for resource_uuid in resources_uuids_array:
-        # Check if a link between UserGroup and Resource already exists
-        statement = select(UserGroupResource).where(
-            UserGroupResource.usergroup_id == usergroup_id,
-            UserGroupResource.resource_uuid == resource_uuid,
+def _linked_resource_uuids(db_session: Session, usergroup_id: int, resource_uuids: list[str]) -> set[str]:
+    linked: set[str] = set()
+    for chunk in _chunks(resource_uuids):
+        linked.update(
+            db_session.exec(
+                select(UserGroupResource.resource_uuid).where(
+                    UserGroupResource.usergroup_id == usergroup_id,
+                    UserGroupResource.resource_uuid.in_(chunk),  # type: ignore
+                )
+            ).all()
         )
-        usergroup_resource = db_session.exec(statement).first()
+    return linked
 
-        if usergroup_resource:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Resource {resource_uuid} already exists in UserGroup",
-            )
-            continue
 
-        # TODO : Find a way to check if resource really exists
-        usergroup_obj = UserGroupResource(
-            usergroup_id=usergroup_id,
-            resource_uuid=resource_uuid,
-            org_id=usergroup.org_id,
-            creation_date=str(datetime.now()),
-            update_date=str(datetime.now()),
+async def add_resources_to_usergroup(
+    request: Request,
+    db_session: Session,
+    current_user: PublicUser | AnonymousUser,
+    usergroup_id: int,
+    resources_uuids: str | Iterable,
+) -> UserGroupBulkResult:
+    usergroup = await _get_usergroup_with_rbac(
+        request, db_session, current_user, usergroup_id, "create"
+    )
+    resource_uuids = _parse_ids(resources_uuids)
+    linked = _linked_resource_uuids(db_session, usergroup_id, resource_uuids)
+
+    # TODO : Find a way to check if resource really exists
+    now = str(datetime.now())
+    results = {}
+    rows = []
+    for resource_uuid in resource_uuids:
+        if resource_uuid in linked:
+            results[resource_uuid] = "already_linked"
+            continue
+        results[resource_uuid] = "added"
+        rows.append(
+            {
+                "usergroup_id": usergroup_id,
+                "resource_uuid": resource_uuid,
+                "org_id": usergroup.org_id,
+                "creation_date": now,
+                "update_date": now,
+            }
         )
 
-        db_session.add(usergroup_obj)
-        db_session.commit()
-        db_session.refresh(usergroup_obj)
-
-    return "Resources added to UserGroup successfully"
+    _insert_ignoring_duplicates(db_session, UserGroupResource, rows)
+    db_session.commit()
+    return _bulk_result(results, "added")
 
 
 async def remove_resources_from_usergroup(
@@ -442,42 +561,27 @@ async def remove_resources_from_usergroup(
     db_session: Session,
     current_user: PublicUser | AnonymousUser,
     usergroup_id: int,
-    resources_uuids: str,
-) -> str:
-
-    statement = select(UserGroup).where(UserGroup.id == usergroup_id)
-    usergroup = db_session.exec(statement).first()
-
-    if not usergroup:
-        raise HTTPException(
-            status_code=404,
-            detail="UserGroup not found",
-        )
-
-    # RBAC check
-    await rbac_check(
-        request,
-        usergroup_uuid=usergroup.usergroup_uuid,
-        current_user=current_user,
-        action="delete",
-        db_session=db_session,
+    resources_uuids: str | Iterable,
+) -> UserGroupBulkResult:
+    await _get_usergroup_with_rbac(
+        request, db_session, current_user, usergroup_id, "delete"
     )
-
-    resources_uuids_array = resources_uuids.split(",")
-
-    for resource_uuid in resources_uuids_array:
-        statement = select(UserGroupResource).where(
-            UserGroupResource.resource_uuid == resource_uuid
+    resource_uuids = _parse_ids(resources_uuids)
+    linked = _linked_resource_uuids(db_session, usergroup_id, resource_uuids)
+
+    results = {
+        resource_uuid: "removed" if resource_uuid in linked else "not_linked"
+        for resource_uuid in resource_uuids
+    }
+    for chunk in _chunks(list(linked)):
+        db_session.exec(
+            delete(UserGroupResource).where(
+                UserGroupResource.usergroup_id == usergroup_id,  # type: ignore
+                UserGroupResource.resource_uuid.in_(chunk),  # type: ignore
+            )
         )
-        usergroup_resource = db_session.exec(statement).first()
-
-        if usergroup_resource:
-            db_session.delete(usergroup_resource)
-            db_session.commit()
-        else:
-            logging.error(f"resource with uuid {resource_uuid} not found in UserGroup")
-
-    return "Resources removed from UserGroup successfully"
+    db_session.commit()
+    return _bulk_result(results, "removed")
 
 
 ## 🔒 RBAC Utils ##
@@ -13,6 +13,12 @@ from src.services.users.emails import (
 )
 from src.services.orgs.invites import get_invite_code
 from src.services.users.avatars import upload_avatar
+from src.services.users.cache import (
+    get_cached_user_session,
+    get_user_session_version,
+    invalidate_user_session_cache,
+    set_cached_user_session,
+)
 from src.db.roles import Role, RoleRead
 from src.security.rbac.rbac import (
     authorization_verify_based_on_roles_and_authorship,
@@ -287,6 +293,8 @@ async def update_user(
     db_session.commit()
     db_session.refresh(user)
 
+    invalidate_user_session_cache(user.id)
+
     user = UserRead.model_validate(user)
 
     return user
@@ -327,6 +335,8 @@ async def update_user_avatar(
     db_session.commit()
     db_session.refresh(user)
 
+    invalidate_user_session_cache(user.id)
+
     user = UserRead.model_validate(user)
 
     return user
@@ -495,105 +505,48 @@ async def get_user_session(
     if getattr(current_user, "user_uuid", None) == "user_admin":
         return await _synthetic_site_session(db_session, is_admin=True)
 
-    # Get user from DB
-    statement = select(User).where(User.user_uuid == current_user.user_uuid)
-    user = db_session.exec(statement).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=400,
-            detail="User does not exist",
-        )
-
-    user = UserRead.model_validate(user)
+    # Sessions are rebuilt at most once per short TTL or membership change
+    cached_user_session = get_cached_user_session(current_user.id)
+    if cached_user_session is not None:
+        return cached_user_session
 
-    # ------------------------------------------------------------
-    # Bootstrap admin (Render free plan has no shell).
-    # If NEXO_BOOTSTRAP_ADMIN_EMAIL matches the logged-in user's email,
-    # promote them to admin (role_id=1) in the target org.
-    #
-    # IMPORTANT: Remove this env var after bootstrapping.
-    # ------------------------------------------------------------
-    try:
-        import os
-        import logging
-
-        bootstrap_email = (
-            os.getenv("NEXO_BOOTSTRAP_ADMIN_EMAIL")
-            or os.getenv("BOOTSTRAP_ADMIN_EMAIL")
-        )
-        bootstrap_org_slug = (
-            os.getenv("NEXO_BOOTSTRAP_ADMIN_ORG_SLUG")
-            or os.getenv("BOOTSTRAP_ADMIN_ORG_SLUG")
-            or "defaultorg"
-        )
+    user_session_version = get_user_session_version(current_user.id)
 
-        if bootstrap_email and (user.email or "").lower() == bootstrap_email.lower():
-            org = db_session.exec(
-                select(Organization).where(Organization.slug == bootstrap_org_slug)
-            ).first()
-            if not org or org.id is None:
-                logging.warning(
-                    f"Bootstrap admin: org '{bootstrap_org_slug}' not found; cannot promote."
-                )
-            else:
-                uo = db_session.exec(
-                    select(UserOrganization).where(
-                        UserOrganization.user_id == user.id,
-                        UserOrganization.org_id == org.id,
-                    )
-                ).first()
-                if uo:
-                    if int(uo.role_id) != 1:
-                        uo.role_id = 1
-                        uo.update_date = str(datetime.now())
-                        db_session.add(uo)
-                        db_session.commit()
-                else:
-                    uo = UserOrganization(
-                        user_id=int(user.id),
-                        org_id=int(org.id),
-                        role_id=1,
-                        creation_date=str(datetime.now()),
-                        update_date=str(datetime.now()),
-                    )
-                    db_session.add(uo)
-                    db_session.commit()
-    except Exception:
-        # Never block session retrieval if bootstrap logic fails.
-        pass
-
-    # Get roles and orgs
+    # Get user, roles and orgs in a single query
     statement = (
-        select(UserOrganization)
-        .where(UserOrganization.user_id == user.id)
-        .join(Organization)
+        select(User, Role, Organization)
+        .outerjoin(UserOrganization, UserOrganization.user_id == User.id)  # type: ignore
+        .outerjoin(Organization, Organization.id == UserOrganization.org_id)  # type: ignore
+        .outerjoin(Role, Role.id == UserOrganization.role_id)  # type: ignore
+        .where(User.user_uuid == current_user.user_uuid)
+        .order_by(UserOrganization.id)  # type: ignore
     )
-    user_organizations = db_session.exec(statement).all()
+    results = db_session.exec(statement).all()
 
-    roles = []
-
-    for user_organization in user_organizations:
-        role_statement = select(Role).where(Role.id == user_organization.role_id)
-        role = db_session.exec(role_statement).first()
-
-        org_statement = select(Organization).where(
-            Organization.id == user_organization.org_id
+    if not results:
+        raise HTTPException(
+            status_code=400,
+            detail="User does not exist",
         )
-        org = db_session.exec(org_statement).first()
 
-        roles.append(
-            UserRoleWithOrg(
-                role=RoleRead.model_validate(role),
-                org=OrganizationRead.model_validate(org),
-            )
+    user = UserRead.model_validate(results[0][0])
+
+    roles = [
+        UserRoleWithOrg(
+            role=RoleRead.model_validate(role),
+            org=OrganizationRead.model_validate(org),
         )
+        for _, role, org in results
+        if role is not None and org is not None
+    ]
 
     user_session = UserSession(
         user=user,
         roles=roles,
     )
 
+    set_cached_user_session(user.id, user_session_version, user_session)
+
     return user_session
 
 
@@ -653,6 +606,8 @@ async def delete_user_by_id(
     db_session.delete(user)
     db_session.commit()
 
+    invalidate_user_session_cache(user_id)
+
     return "User deleted"
 
 
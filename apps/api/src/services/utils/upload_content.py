@@ -1,10 +1,39 @@
-from typing import Literal, Optional
+import asyncio
+import itertools
+import os
+import tempfile
+import threading
+from typing import BinaryIO, Iterable, Iterator, Literal, Optional, Union
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-import os
 from fastapi import HTTPException, UploadFile
 from config.config import get_nexo_config
-from src.security.file_validation import validate_upload
+from src.security.file_validation import UPLOAD_CHUNK_SIZE, validate_upload
+
+# Content to store: bytes, a binary file object, or an iterable of chunks
+FileContent = Union[bytes, BinaryIO, Iterable[bytes]]
+
+# Parts of S3 multipart uploads (at least 5MB, except the last one). Smaller
+# files are sent with a single put_object.
+S3_MULTIPART_PART_SIZE = 8 * 1024 * 1024
+S3_MAX_POOL_CONNECTIONS = 32
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def _get_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode of stored files. mkstemp creates them readable by their owner only,
+# they get the mode open() would have given them so that a static server or
+# sidecar running as another user can still read them. Read once at import,
+# os.umask can't be read without setting it.
+STORED_FILE_MODE = 0o666 & ~_get_umask()
 
 
 def ensure_directory_exists(directory: str):
@@ -36,6 +65,89 @@ def _get_s3_bucket_and_endpoint() -> tuple[str, str | None]:
     return bucket, endpoint
 
 
+def get_s3_client():
+    """
+    S3 client shared by every upload. boto3 clients are thread-safe and keep
+    a pool of connections, creating one per upload is slow and wasteful.
+    """
+    global _s3_client
+
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _, endpoint_url = _get_s3_bucket_and_endpoint()
+                _s3_client = boto3.client(
+                    "s3",
+                    endpoint_url=endpoint_url,
+                    config=Config(
+                        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                        retries={"max_attempts": 3, "mode": "standard"},
+                    ),
+                )
+    return _s3_client
+
+
+def _iter_chunks(content: FileContent) -> Iterator[bytes]:
+    if isinstance(content, (bytes, bytearray)):
+        yield bytes(content)
+    elif hasattr(content, "read"):
+        while chunk := content.read(UPLOAD_CHUNK_SIZE):  # type: ignore
+            yield chunk
+    else:
+        yield from content  # type: ignore
+
+
+def _iter_parts(chunks: Iterator[bytes], part_size: int) -> Iterator[bytes]:
+    """Regroup chunks in parts of part_size bytes, the last one being smaller"""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _write_to_filesystem(full_dir: str, file_and_format: str, chunks: Iterator[bytes]):
+    # Written to a temporary file next to the target, then renamed, so that
+    # readers never see a partial file and a failed upload leaves no trace
+    fd, tmp_path = tempfile.mkstemp(dir=full_dir, prefix=f".{file_and_format}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.chmod(tmp_path, STORED_FILE_MODE)
+        os.replace(tmp_path, os.path.join(full_dir, file_and_format))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_to_s3(bucket_name: str, key: str, chunks: Iterator[bytes]):
+    s3 = get_s3_client()
+    parts = _iter_parts(chunks, S3_MULTIPART_PART_SIZE)
+
+    first = next(parts, b"")
+    second = next(parts, None)
+    if second is None:
+        s3.put_object(Bucket=bucket_name, Key=key, Body=first)
+        return
+
+    upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=key)["UploadId"]
+    try:
+        uploaded = []
+        for number, part in enumerate(itertools.chain([first, second], parts), start=1):
+            response = s3.upload_part(Bucket=bucket_name, Key=key, UploadId=upload_id, PartNumber=number, Body=part)
+            uploaded.append({"PartNumber": number, "ETag": response["ETag"]})
+        s3.complete_multipart_upload(
+            Bucket=bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": uploaded}
+        )
+    except BaseException:
+        s3.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+        raise
+
+
 async def upload_file(
     file: UploadFile,
     directory: str,
@@ -63,8 +175,8 @@ async def upload_file(
     from uuid import uuid4
     from src.security.file_validation import get_safe_filename
     
-    # Validate the file
-    _, content = validate_upload(file, allowed_types, max_size)
+    # Validate the file, its content is streamed to the store
+    _, chunks = validate_upload(file, allowed_types, max_size)
     
     # Generate safe filename
     filename = get_safe_filename(file.filename, f"{uuid4()}_{filename_prefix}")
@@ -74,7 +186,7 @@ async def upload_file(
         directory=directory,
         type_of_dir=type_of_dir,
         uuid=uuid,
-        file_binary=content,
+        file_binary=chunks,
         file_and_format=filename,
         allowed_formats=None,  # Already validated
     )
@@ -86,18 +198,12 @@ async def upload_content(
     directory: str,
     type_of_dir: Literal["orgs", "users"],
     uuid: str,  # org_uuid or user_uuid
-    file_binary: bytes,
+    file_binary: FileContent,
     file_and_format: str,
     allowed_formats: Optional[list[str]] = None,
 ):
-    # Get Nexo Academy Config
-    nexo_config = get_nexo_config()
-
     file_format = file_and_format.split(".")[-1].strip().lower()
 
-    # Get content delivery method
-    content_delivery = nexo_config.hosting_config.content_delivery.type
-
     # Check if format file is allowed
     if allowed_formats:
         if file_format not in allowed_formats:
@@ -106,6 +212,25 @@ async def upload_content(
                 detail=f"File format {file_format} not allowed",
             )
 
+    # Disk and network writes stay off the event loop
+    await asyncio.to_thread(write_content, directory, type_of_dir, uuid, file_binary, file_and_format)
+
+
+def write_content(
+    directory: str,
+    type_of_dir: Literal["orgs", "users"],
+    uuid: str,  # org_uuid or user_uuid
+    file_binary: FileContent,
+    file_and_format: str,
+):
+    """
+    Store a file on the configured content store, without any validation.
+    The content is written chunk by chunk and never held in memory as a
+    whole. Synchronous, for background jobs running off the event loop.
+    """
+    content_delivery = get_nexo_config().hosting_config.content_delivery.type
+    chunks = _iter_chunks(file_binary)
+
     if content_delivery == "filesystem":
         filesystem_root = _get_filesystem_root()
         rel_dir = os.path.join(type_of_dir, uuid, directory)
@@ -113,27 +238,16 @@ async def upload_content(
         ensure_directory_exists(full_dir)
 
         # upload file to server
-        with open(os.path.join(full_dir, file_and_format), "wb") as f:
-            f.write(file_binary)
-            f.close()
+        _write_to_filesystem(full_dir, file_and_format, chunks)
 
     elif content_delivery == "s3api":
-        # Upload directly to S3 from memory.
-        bucket_name, endpoint_url = _get_s3_bucket_and_endpoint()
+        bucket_name, _ = _get_s3_bucket_and_endpoint()
         key = f"content/{type_of_dir}/{uuid}/{directory}/{file_and_format}"
 
-        s3 = boto3.client(
-            "s3",
-            endpoint_url=endpoint_url,
-        )
-
         try:
-            s3.put_object(Bucket=bucket_name, Key=key, Body=file_binary)
-            # Verify object exists (helps surface auth/bucket issues clearly)
-            s3.head_object(
-                Bucket=bucket_name,
-                Key=key,
-            )
+            _write_to_s3(bucket_name, key, chunks)
+        except HTTPException:
+            raise
         except ClientError as e:
             raise HTTPException(status_code=500, detail=f"S3 upload failed: {e}")
         except Exception as e:
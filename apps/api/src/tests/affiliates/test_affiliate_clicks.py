@@ -0,0 +1,82 @@
+from datetime import date
+from unittest.mock import Mock
+import pytest
+from fastapi import Request
+from sqlmodel import Session, select
+from src.db.affiliates.affiliates import AffiliateClick, AffiliateClickDailyStats
+from src.db.users import AnonymousUser
+from src.services.affiliates import clicks
+from src.services.affiliates.affiliates import (
+    get_affiliate_admin_stats,
+    rollup_affiliate_click_stats,
+    track_affiliate_click,
+)
+from src.services.affiliates.clicks import LocalAffiliateClickBuffer, flush_affiliate_clicks
+from src.tests.affiliates.test_affiliate_stats import seed_affiliates
+from src.tests.utils.courses_data_for_tests import count_queries
+
+
+@pytest.fixture
+def click_buffer(monkeypatch):
+    buffer = LocalAffiliateClickBuffer()
+    monkeypatch.setattr(clicks, "_click_buffer", buffer)
+    return buffer
+
+
+@pytest.fixture(autouse=True)
+def internal_key(monkeypatch):
+    monkeypatch.setenv("CLOUD_INTERNAL_KEY", "internal")
+
+
+async def click(code: str, ip: str, headers: dict | None = None) -> dict:
+    # As relayed by the web app's /r/:code route
+    request = Mock(spec=Request)
+    request.headers = headers or {"x-nexo-client-ip": ip, "cloudinternalkey": "internal", "user-agent": "test"}
+    return await track_affiliate_click(request, 1, code, "https://example.com", AnonymousUser())
+
+
+@pytest.mark.asyncio
+async def test_clicks_are_deduplicated_then_saved_in_bulk(engine, click_buffer):
+    with Session(engine) as db_session:
+        seed_affiliates(db_session)
+        # History rolled up, the counters are read from now on
+        rollup_affiliate_click_stats(db_session, until=date(2026, 1, 2))
+
+    for ip in ["1.1.1.1", "1.1.1.1", "2.2.2.2"]:
+        await click("CODE1", ip)
+    assert (await click("CODE2", "1.1.1.1"))["accepted"]
+    assert not (await click("CODE2", "1.1.1.1"))["accepted"]
+    # Checked when flushed
+    await click("UNKNOWN", "1.1.1.1")
+    assert click_buffer.depth() == 4
+
+    with Session(engine) as db_session:
+        with count_queries(engine) as queries:
+            assert flush_affiliate_clicks(db_session) == 3
+        inserts = [query for query in queries if query.lstrip().upper().startswith("INSERT INTO AFFILIATECLICK ")]
+        assert len(inserts) == 1
+        assert click_buffer.depth() == 0
+
+        assert len(db_session.exec(select(AffiliateClick)).all()) == 8
+        today = db_session.exec(
+            select(AffiliateClickDailyStats.clicks).where(AffiliateClickDailyStats.day == date.today())
+        ).all()
+        assert sorted(today) == [1, 2]
+        assert [s.clicks for s in get_affiliate_admin_stats(1, db_session)] == [6, 2]
+
+    # Counters of today are incremented in place
+    await click("CODE1", "3.3.3.3")
+    with Session(engine) as db_session:
+        assert flush_affiliate_clicks(db_session) == 1
+        assert [s.clicks for s in get_affiliate_admin_stats(1, db_session)] == [7, 2]
+
+
+@pytest.mark.asyncio
+async def test_spoofed_client_addresses_do_not_bypass_deduplication(click_buffer):
+    # Rotating the leftmost X-Forwarded-For entry, or sending the relay header
+    # without the internal key, still counts as the proxy's client
+    for spoofed in ["1.1.1.1", "2.2.2.2", "3.3.3.3"]:
+        await click("CODE1", spoofed, {"x-forwarded-for": f"{spoofed}, 10.0.0.1", "user-agent": "test"})
+        await click("CODE1", spoofed, {"x-nexo-client-ip": spoofed, "x-forwarded-for": "10.0.0.1", "user-agent": "test"})
+        await click("CODE1", spoofed, {"x-nexo-client-ip": spoofed, "cloudinternalkey": "guess", "x-forwarded-for": "10.0.0.1"})
+    assert click_buffer.depth() == 1
@@ -0,0 +1,130 @@
+from datetime import date, datetime
+from sqlmodel import Session, select
+from src.db.affiliates.affiliates import (
+    Affiliate,
+    AffiliateAttribution,
+    AffiliateClick,
+    AffiliateCode,
+    AffiliateCommission,
+    AffiliateCommissionStatusEnum,
+    AffiliateProgram,
+)
+from src.db.organizations import Organization
+from src.services.affiliates.affiliates import (
+    get_affiliate_admin_stats,
+    get_or_create_affiliate_program,
+    rollup_affiliate_click_stats,
+)
+from src.tests.utils.courses_data_for_tests import count_queries, seed_user
+
+
+def add_affiliate(db_session: Session, clicks_on_first_day: int) -> int:
+    affiliate = Affiliate(org_id=1, name="Affiliate")
+    db_session.add(affiliate)
+    db_session.commit()
+    code = AffiliateCode(org_id=1, affiliate_id=affiliate.id, code=f"CODE{affiliate.id}")  # type: ignore
+    db_session.add(code)
+    db_session.commit()
+    # Clicks on Jan 1st, and one on Jan 2nd
+    for day in [1] * clicks_on_first_day + [2]:
+        db_session.add(
+            AffiliateClick(org_id=1, affiliate_code_id=code.id, creation_date=datetime(2026, 1, day, 12))  # type: ignore
+        )
+    db_session.commit()
+    return affiliate.id  # type: ignore
+
+
+def seed_affiliates(db_session: Session) -> tuple[int, int]:
+    db_session.add(Organization(id=1, name="Org", slug="org", email="org@example.com", org_uuid="org_test"))
+    user = seed_user(db_session)
+    get_or_create_affiliate_program(1, db_session)
+    first = add_affiliate(db_session, 3)
+    second = add_affiliate(db_session, 0)
+
+    db_session.add(
+        AffiliateAttribution(org_id=1, user_id=user.id, affiliate_id=first, attributed_at=datetime(2026, 1, 2))  # type: ignore
+    )
+    for status, amount, day in [
+        (AffiliateCommissionStatusEnum.PENDING, 500, 1),
+        (AffiliateCommissionStatusEnum.PENDING, 250, 2),
+        (AffiliateCommissionStatusEnum.PAID, 1000, 1),
+        (AffiliateCommissionStatusEnum.REVERSED, 9999, 1),
+    ]:
+        db_session.add(
+            AffiliateCommission(
+                org_id=1,
+                affiliate_id=first,
+                user_id=user.id,  # type: ignore
+                currency="EUR",
+                amount_cents=amount,
+                status=status,
+                provider_event_id=f"evt_{status.value}_{day}",
+                creation_date=datetime(2026, 1, day, 12),
+            )
+        )
+    db_session.commit()
+    return first, second
+
+
+def summary(stats) -> list[tuple]:
+    return [
+        (s.clicks, s.signups, s.pending_amount_cents, s.paid_amount_cents, s.currency)
+        for s in stats
+    ]
+
+
+def test_stats_are_aggregated_in_constant_queries(engine):
+    with Session(engine) as db_session:
+        seed_affiliates(db_session)
+
+        with count_queries(engine) as queries:
+            stats = get_affiliate_admin_stats(1, db_session)
+        assert summary(stats) == [(4, 1, 750, 1000, "EUR"), (1, 0, 0, 0, "USD")]
+
+        for _ in range(3):
+            add_affiliate(db_session, 2)
+        with count_queries(engine) as more_queries:
+            assert len(get_affiliate_admin_stats(1, db_session)) == 5
+        assert len(more_queries) == len(queries)
+
+
+def test_stats_between_two_days(engine):
+    with Session(engine) as db_session:
+        seed_affiliates(db_session)
+
+        stats = get_affiliate_admin_stats(1, db_session, start_date=date(2026, 1, 2))
+        assert summary(stats) == [(1, 1, 250, 0, "EUR"), (1, 0, 0, 0, "USD")]
+
+        stats = get_affiliate_admin_stats(1, db_session, end_date=date(2026, 1, 1))
+        assert summary(stats) == [(3, 0, 500, 1000, "EUR"), (0, 0, 0, 0, "USD")]
+
+
+def test_rolled_up_days_are_read_from_daily_counters(engine):
+    with Session(engine) as db_session:
+        seed_affiliates(db_session)
+
+        assert rollup_affiliate_click_stats(db_session, until=date(2026, 1, 1)) == 1
+        # Already rolled up
+        assert rollup_affiliate_click_stats(db_session, until=date(2026, 1, 1)) == 0
+
+        # The clicks of Jan 2nd were saved without going through the click
+        # flusher, they are only counted once rolled up
+        stats = get_affiliate_admin_stats(1, db_session)
+        assert [s.clicks for s in stats] == [3, 0]
+
+        assert rollup_affiliate_click_stats(db_session, until=date(2026, 1, 2)) == 1
+        stats = get_affiliate_admin_stats(1, db_session)
+        assert [s.clicks for s in stats] == [4, 1]
+        stats = get_affiliate_admin_stats(1, db_session, start_date=date(2026, 1, 2))
+        assert [s.clicks for s in stats] == [1, 1]
+
+
+def test_stats_never_create_the_program(engine):
+    with Session(engine) as db_session:
+        db_session.add(Organization(id=1, name="Org", slug="org", email="org@example.com", org_uuid="org_test"))
+        add_affiliate(db_session, 2)
+
+        assert [s.clicks for s in get_affiliate_admin_stats(1, db_session)] == [3]
+        # Unknown org
+        assert get_affiliate_admin_stats(42, db_session) == []
+        assert db_session.exec(select(AffiliateProgram)).all() == []
@@ -1,5 +1,6 @@
 import sys
 import os
+import pytest
 
 # Ensure src/ is on the Python path for all tests
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -8,4 +9,58 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 os.environ["TESTING"] = "true"
 
 # Suppress logfire warnings in tests
-os.environ["LOGFIRE_IGNORE_NO_CONFIG"] = "1" 
\ No newline at end of file
+os.environ["LOGFIRE_IGNORE_NO_CONFIG"] = "1"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """
+    Isolated SQLite database with all the tables created. File backed, so
+    that async sessions (aiosqlite) see the same data as the sync engine.
+    """
+    from sqlmodel import SQLModel, create_engine
+    import src.core.events.database  # noqa: F401 (registers every model)
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(params=["sync", "async"])
+def session_mode(request):
+    """Run the read path services with a sync Session and with an AsyncSession"""
+    return request.param
+
+
+@pytest.fixture(autouse=True)
+def clear_authorization_cache():
+    """Role sets are cached across requests, don't leak them between tests"""
+    from src.security.rbac.context import invalidate_user_roles_cache
+
+    invalidate_user_roles_cache()
+    yield
+    invalidate_user_roles_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_user_session_cache():
+    """User sessions are cached across requests, don't leak them between tests"""
+    from src.services.users.cache import invalidate_user_session_cache
+
+    invalidate_user_session_cache()
+    yield
+    invalidate_user_session_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_org_features_cache():
+    """Org feature configs are cached across requests, don't leak them between tests"""
+    from src.security.features_utils.usage import _org_features_cache
+
+    _org_features_cache.clear()
+    yield
+    _org_features_cache.clear()
@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import Mock
+from fastapi import Request
+from sqlmodel import Session, select
+from src.db.courses.activities import Activity
+from src.db.courses.certifications import CertificateUser, Certifications
+from src.db.trail_runs import TrailRun
+from src.db.trail_steps import TrailStep
+from src.services.courses.certifications import (
+    check_course_completion_and_create_certificate,
+    is_course_completed,
+)
+from src.services.trail.progress import rebuild_course_progress
+from src.tests.utils.courses_data_for_tests import count_queries, seed_course, seed_user
+
+
+def complete_activities(db_session: Session, course_id: int, user_id: int, activities) -> None:
+    db_session.add(
+        TrailRun(
+            trail_id=1,
+            course_id=course_id,
+            org_id=1,
+            user_id=user_id,
+            creation_date="",
+            update_date="",
+        )
+    )
+    for activity in activities:
+        db_session.add(
+            TrailStep(
+                complete=True,
+                teacher_verified=False,
+                grade="",
+                trailrun_id=1,
+                trail_id=1,
+                activity_id=activity.id,  # type: ignore
+                course_id=course_id,
+                org_id=1,
+                user_id=user_id,
+                creation_date="",
+                update_date="",
+            )
+        )
+    db_session.commit()
+    rebuild_course_progress(db_session)
+
+
+def course_activities(db_session: Session, course_id: int, published: bool):
+    return db_session.exec(
+        select(Activity)
+        .where(Activity.course_id == course_id, Activity.published == published)
+        .order_by(Activity.id)  # type: ignore
+    ).all()
+
+
+def test_unpublished_activities_are_not_required(engine):
+    with Session(engine) as db_session:
+        # Every other activity is unpublished
+        course_id = seed_course(db_session, 2, 4)
+        user_id = seed_user(db_session).id
+
+        published = course_activities(db_session, course_id, True)
+        complete_activities(db_session, course_id, user_id, published[:-1])  # type: ignore
+        assert not is_course_completed(user_id, course_id, db_session)  # type: ignore
+
+        complete_activities(db_session, course_id, user_id, published[-1:])  # type: ignore
+        assert is_course_completed(user_id, course_id, db_session)  # type: ignore
+
+
+def test_duplicate_and_unpublished_steps_dont_complete_the_course(engine):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 1, 4)
+        user_id = seed_user(db_session).id
+
+        published = course_activities(db_session, course_id, True)
+        unpublished = course_activities(db_session, course_id, False)
+        # As many steps as published activities, but one of them is missing
+        complete_activities(db_session, course_id, user_id, [published[0]] * 2)
+        complete_activities(db_session, course_id, user_id, unpublished)  # type: ignore
+
+        assert not is_course_completed(user_id, course_id, db_session)  # type: ignore
+
+
+def test_course_without_published_activities_is_not_completed(engine):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 1, 0)
+        user_id = seed_user(db_session).id
+
+        assert not is_course_completed(user_id, course_id, db_session)  # type: ignore
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("activities_per_chapter", [2, 20])
+async def test_completion_check_query_count_is_constant(engine, activities_per_chapter):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 3, activities_per_chapter)
+        user_id = seed_user(db_session).id
+        db_session.add(Certifications(certification_uuid="certification_test", course_id=course_id))
+        db_session.commit()
+        complete_activities(
+            db_session, course_id, user_id, course_activities(db_session, course_id, True)  # type: ignore
+        )
+
+        with count_queries(engine) as queries:
+            # Course not completed yet by this user
+            assert not await check_course_completion_and_create_certificate(
+                Mock(spec=Request), user_id + 1, course_id, db_session  # type: ignore
+            )
+        # certification, progress
+        assert len(queries) == 2
+
+        assert await check_course_completion_and_create_certificate(
+            Mock(spec=Request), user_id, course_id, db_session  # type: ignore
+        )
+        certificates = db_session.exec(
+            select(CertificateUser).where(CertificateUser.user_id == user_id)
+        ).all()
+        assert len(certificates) == 1
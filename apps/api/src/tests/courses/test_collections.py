@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi import Request
+from sqlmodel import Session
+from src.db.collections import Collection
+from src.db.collections_courses import CollectionCourse
+from src.db.courses.courses import Course
+from src.db.users import AnonymousUser, PublicUser
+from src.services.courses.cache import bump_collections_version
+from src.services.courses.collections import delete_collection, get_collections
+from src.tests.utils.courses_data_for_tests import count_queries, seed_course, seed_user
+
+
+def seed_collections(db_session: Session) -> None:
+    seed_course(db_session, 0, 0)
+    for index in range(12):
+        db_session.add(
+            Course(
+                id=100 + index,
+                name=f"Course {index}",
+                public=index != 1,
+                open_to_contributors=False,
+                org_id=1,
+                course_uuid=f"course_{index}",
+            )
+        )
+    for collection_id, public in ((1, True), (2, False), (3, True)):
+        db_session.add(
+            Collection(
+                id=collection_id,
+                name=f"Collection {collection_id}",
+                public=public,
+                org_id=1,
+                collection_uuid=f"collection_{collection_id}",
+            )
+        )
+    db_session.commit()
+
+    links = [(1, 100 + index) for index in range(12)] + [(2, 100), (3, 101)]
+    for collection_id, course_id in links:
+        db_session.add(
+            CollectionCourse(
+                collection_id=collection_id, course_id=course_id, org_id=1, creation_date="", update_date=""
+            )
+        )
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_collections_are_paginated_with_capped_previews(engine):
+    with Session(engine) as db_session:
+        seed_collections(db_session)
+        user = PublicUser.model_validate(seed_user(db_session))
+
+        with count_queries(engine) as queries:
+            collections = await get_collections(Mock(spec=Request), "1", user, db_session, 1, 2)
+
+        # Collections of the page, then all their courses at once
+        assert len(queries) == 2
+        assert [collection.id for collection in collections] == [1, 2]
+        assert [course["id"] for course in collections[0].courses] == list(range(100, 110))
+        assert (collections[0].courses_count, collections[1].courses_count) == (12, 1)
+
+        collections = await get_collections(Mock(spec=Request), "1", user, db_session, 2, 2)
+        assert [collection.id for collection in collections] == [3]
+        assert [course["id"] for course in collections[0].courses] == [101]
+
+
+@pytest.mark.asyncio
+async def test_public_collections_are_cached_for_anonymous_visitors(engine):
+    bump_collections_version(1)
+    with Session(engine) as db_session:
+        seed_collections(db_session)
+
+        first = await get_collections(Mock(spec=Request), "1", AnonymousUser(), db_session, 1, 10)
+        # Public collections and courses only
+        assert [collection.id for collection in first] == [1, 3]
+        assert first[0].courses_count == 11 and first[1].courses == []
+
+        with count_queries(engine) as queries:
+            second = await get_collections(Mock(spec=Request), "1", AnonymousUser(), db_session, 1, 10)
+        assert queries == [] and second is first
+
+        with patch(
+            "src.services.courses.collections.courses_rbac_check_for_collections", new_callable=AsyncMock
+        ):
+            await delete_collection(Mock(spec=Request), "collection_3", AnonymousUser(), db_session)  # type: ignore
+
+        third = await get_collections(Mock(spec=Request), "1", AnonymousUser(), db_session, 1, 10)
+        assert [collection.id for collection in third] == [1]
@@ -0,0 +1,124 @@
+import pytest
+from redis.exceptions import RedisError
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi import HTTPException, Request
+from sqlmodel import Session
+from src.core import cache as core_cache
+from src.core.cache import SharedVersions
+from src.db.users import AnonymousUser
+from src.services.courses.cache import bump_course_version
+from src.services.courses.courses import get_course_meta
+from src.tests.utils.courses_data_for_tests import count_queries, open_session, seed_course
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for shared cache versions"""
+
+    def __init__(self):
+        self.store = {}
+        self.down = False
+
+    def incr(self, key):
+        self.store[key] = int(self.store.get(key, 0)) + 1
+        return self.store[key]
+
+    def set(self, key, value, ex=None):
+        self.store[key] = str(value).encode()
+
+    def mget(self, keys):
+        if self.down:
+            raise RedisError("connection refused")
+        return [self.store.get(key) for key in keys]
+
+
+@pytest.mark.asyncio
+async def test_course_meta_is_served_from_cache_until_version_bump(engine, session_mode):
+    with Session(engine) as db_session:
+        seed_course(db_session, 2, 2)
+    bump_course_version("course_test")
+
+    async with open_session(engine, session_mode) as (db_session, session_engine):
+        with patch(
+            "src.services.courses.courses.courses_rbac_check", new_callable=AsyncMock
+        ) as rbac_check:
+            first = await get_course_meta(
+                Mock(spec=Request), "course_test", True, AnonymousUser(), db_session
+            )
+
+            with count_queries(session_engine) as queries:
+                second = await get_course_meta(
+                    Mock(spec=Request), "course_test", True, AnonymousUser(), db_session
+                )
+
+            # Cached payload, but RBAC is checked on every call
+            assert queries == []
+            assert second is first
+            assert rbac_check.await_count == 2
+
+            bump_course_version("course_test")
+            third = await get_course_meta(
+                Mock(spec=Request), "course_test", True, AnonymousUser(), db_session
+            )
+
+    assert third is not first
+    assert third.chapters == first.chapters
+
+
+@pytest.mark.asyncio
+async def test_cached_course_meta_still_enforces_rbac(engine, session_mode):
+    with Session(engine) as db_session:
+        seed_course(db_session, 1, 1)
+    bump_course_version("course_test")
+
+    async with open_session(engine, session_mode) as (db_session, _):
+        with patch(
+            "src.services.courses.courses.courses_rbac_check", new_callable=AsyncMock
+        ):
+            await get_course_meta(
+                Mock(spec=Request), "course_test", False, AnonymousUser(), db_session
+            )
+
+        with patch(
+            "src.services.courses.courses.courses_rbac_check",
+            new_callable=AsyncMock,
+            side_effect=HTTPException(status_code=403),
+        ):
+            with pytest.raises(HTTPException) as e:
+                await get_course_meta(
+                    Mock(spec=Request), "course_test", False, AnonymousUser(), db_session
+                )
+
+    assert e.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_public_course_meta_with_rbac(engine, session_mode):
+    with Session(engine) as db_session:
+        seed_course(db_session, 2, 3)
+    bump_course_version("course_test")
+
+    async with open_session(engine, session_mode) as (db_session, _):
+        course_meta = await get_course_meta(
+            Mock(spec=Request), "course_test", False, AnonymousUser(), db_session
+        )
+
+    assert course_meta.course_uuid == "course_test"
+    assert [len(chapter.activities) for chapter in course_meta.chapters] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_course_edits_in_another_worker_invalidate_the_cache(engine, monkeypatch):
+    r = FakeRedis()
+    monkeypatch.setattr(core_cache, "get_redis_client", lambda: r)
+    with Session(engine) as db_session:
+        seed_course(db_session, 1, 1)
+
+        with patch("src.services.courses.courses.courses_rbac_check", new_callable=AsyncMock):
+            first = await get_course_meta(Mock(spec=Request), "course_test", True, AnonymousUser(), db_session)
+            assert await get_course_meta(Mock(spec=Request), "course_test", True, AnonymousUser(), db_session) is first
+
+            # Bumped by another worker, through the shared versions
+            SharedVersions("course_meta", ttl=600).bump("course_test")
+            second = await get_course_meta(Mock(spec=Request), "course_test", True, AnonymousUser(), db_session)
+
+    assert second is not first
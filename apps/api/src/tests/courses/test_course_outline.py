@@ -0,0 +1,40 @@
+import pytest
+from sqlmodel import Session
+from src.services.courses.chapters import get_course_outline
+from src.tests.utils.courses_data_for_tests import count_queries, open_session, seed_course
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chapters_count,activities_per_chapter", [(2, 2), (20, 10)])
+async def test_course_outline_query_count_is_constant(engine, session_mode, chapters_count, activities_per_chapter):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, chapters_count, activities_per_chapter)
+
+    async with open_session(engine, session_mode) as (db_session, session_engine):
+        with count_queries(session_engine) as queries:
+            chapters = await get_course_outline(course_id, db_session, True)
+
+    assert len(queries) == 2
+    assert len(chapters) == chapters_count
+    assert all(len(chapter.activities) == activities_per_chapter for chapter in chapters)
+
+
+@pytest.mark.asyncio
+async def test_course_outline_ordering_and_published_filter(engine, session_mode):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 3, 4)
+
+    async with open_session(engine, session_mode) as (db_session, _):
+        chapters = await get_course_outline(course_id, db_session, False)
+
+    # CourseChapter.order is reversed compared to insertion
+    assert [chapter.chapter_uuid for chapter in chapters] == [
+        "chapter_2",
+        "chapter_1",
+        "chapter_0",
+    ]
+    # ChapterActivity.order is reversed too, and only published activities are kept
+    assert [activity.activity_uuid for activity in chapters[0].activities] == [
+        "activity_2_2",
+        "activity_2_0",
+    ]
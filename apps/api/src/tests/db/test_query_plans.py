@@ -0,0 +1,127 @@
+"""
+Query plans of the lookups made on every request. Runs on SQLite, and on
+Postgres when NEXO_TEST_POSTGRES_URL points to a database the tests may
+create a schema in. Postgres is asked to avoid sequential scans, so that a
+lookup without an index still shows one on the few seeded rows.
+"""
+import importlib.util
+import json
+import os
+import pytest
+from pathlib import Path
+from sqlalchemy import create_engine, text
+from sqlmodel import Session, SQLModel, select
+from src.db.courses.activities import Activity
+from src.db.courses.assignments import AssignmentTaskSubmission
+from src.db.courses.chapter_activities import ChapterActivity
+from src.db.courses.course_chapters import CourseChapter
+from src.db.courses.courses import Course
+from src.db.resource_authors import ResourceAuthor
+from src.db.trail_runs import TrailRun
+from src.db.trail_steps import TrailStep
+from src.db.user_organizations import UserOrganization
+from src.tests.utils.courses_data_for_tests import seed_course
+
+MIGRATION = Path(__file__).parents[3] / "migrations/versions/d5f2b8e4a317_hot_lookup_indexes.py"
+
+# (table, statement) of the lookups in src/services that must use an index
+HOT_QUERIES = {
+    "course_by_uuid": ("course", select(Course).where(Course.course_uuid == "course_test")),
+    "courses_of_org": ("course", select(Course).where(Course.org_id == 1)),
+    "activity_by_uuid": ("activity", select(Activity).where(Activity.activity_uuid == "activity_0_0")),
+    "activities_of_course": ("activity", select(Activity).where(Activity.course_id == 1)),
+    "authorship": (
+        "resourceauthor",
+        select(ResourceAuthor).where(ResourceAuthor.resource_uuid == "course_test", ResourceAuthor.user_id == 1),
+    ),
+    "authors_of_resource": ("resourceauthor", select(ResourceAuthor).where(ResourceAuthor.resource_uuid == "course_test")),
+    "resources_of_author": ("resourceauthor", select(ResourceAuthor).where(ResourceAuthor.user_id == 1)),
+    "steps_of_course": ("trailstep", select(TrailStep).where(TrailStep.user_id == 1, TrailStep.course_id == 1)),
+    "step_of_activity": ("trailstep", select(TrailStep).where(TrailStep.activity_id == 1, TrailStep.user_id == 1)),
+    "run_of_course": ("trailrun", select(TrailRun).where(TrailRun.user_id == 1, TrailRun.course_id == 1)),
+    "activities_of_chapter": ("chapteractivity", select(ChapterActivity).where(ChapterActivity.chapter_id == 1)),
+    "chapter_of_activity": ("chapteractivity", select(ChapterActivity).where(ChapterActivity.activity_id == 1)),
+    "chapters_of_course": ("coursechapter", select(CourseChapter).where(CourseChapter.course_id == 1)),
+    "membership": (
+        "userorganization",
+        select(UserOrganization).where(UserOrganization.user_id == 1, UserOrganization.org_id == 1),
+    ),
+    "members_of_org": ("userorganization", select(UserOrganization).where(UserOrganization.org_id == 1)),
+    "task_submission": (
+        "assignmenttasksubmission",
+        select(AssignmentTaskSubmission).where(
+            AssignmentTaskSubmission.assignment_task_id == 1, AssignmentTaskSubmission.user_id == 1
+        ),
+    ),
+}
+
+
+@pytest.fixture
+def plan_engine(request):
+    postgres_url = os.environ.get("NEXO_TEST_POSTGRES_URL")
+    if not postgres_url:
+        yield request.getfixturevalue("engine")
+        return
+
+    import src.core.events.database  # noqa: F401 (registers every model)
+
+    schema = f"query_plans_{os.getpid()}"
+    admin = create_engine(postgres_url)
+    with admin.begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(postgres_url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        SQLModel.metadata.create_all(engine)
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+def sequential_scans(connection, sql: str) -> list[str]:
+    """Tables read with a full scan in the plan of the query"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SET enable_seqscan = off"))
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        nodes, scans = [plan[0]["Plan"]], []
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                scans.append(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return scans
+
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return [
+        row.detail.split()[1]
+        for row in rows
+        if row.detail.startswith("SCAN") and "INDEX" not in row.detail
+    ]
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_lookups_use_an_index(plan_engine, name):
+    table, statement = HOT_QUERIES[name]
+    with Session(plan_engine) as db_session:
+        seed_course(db_session, 2, 2)
+
+    with plan_engine.connect() as connection:
+        sql = str(statement.compile(plan_engine, compile_kwargs={"literal_binds": True}))
+        assert table not in sequential_scans(connection, sql), sql
+
+
+def test_migration_matches_the_models():
+    spec = importlib.util.spec_from_file_location("hot_lookup_indexes", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(migration)  # type: ignore
+
+    declared = {
+        index.name: (table.name, [column.name for column in index.columns], bool(index.unique))
+        for table in SQLModel.metadata.tables.values()
+        for index in table.indexes
+        if index.name in migration.HOT_LOOKUP_INDEXES
+    }
+    assert declared == migration.HOT_LOOKUP_INDEXES
@@ -0,0 +1,97 @@
+import json
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+from ee.db.audit_logs import AuditLog
+from ee.middleware import audit as audit_middleware
+from ee.middleware.audit import AUDIT_MAX_BODY_BYTES, EEAuditLogMiddleware
+from ee.services import audit
+from ee.services.audit import LocalAuditLogQueue, flush_audit_logs_to_db
+from src.db.courses.courses import Course
+from src.tests.utils.courses_data_for_tests import seed_course
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = LocalAuditLogQueue()
+    monkeypatch.setattr(audit, "_audit_log_queue", queue)
+    return queue
+
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    monkeypatch.setattr(audit_middleware, "engine", engine)
+    app = FastAPI()
+    app.add_middleware(EEAuditLogMiddleware)
+
+    @app.api_route("/api/v1/courses/{course_uuid}", methods=["GET", "POST", "DELETE"])
+    async def course(course_uuid: str, request: Request):
+        body = await request.body()
+        if request.method == "DELETE":
+            with Session(engine) as db_session:
+                db_session.delete(db_session.exec(select(Course)).one())
+                db_session.commit()
+        return {"received": len(body)}
+
+    return TestClient(app)
+
+
+def queued_logs(queue):
+    return [json.loads(entry) for entry in queue.entries]
+
+
+def test_reads_are_not_audited(client, queue):
+    assert client.get("/api/v1/courses/course_test").status_code == 200
+    assert not queue.entries
+
+
+def test_multipart_bodies_are_streamed_not_captured(engine, client, queue):
+    with Session(engine) as db_session:
+        seed_course(db_session, 1, 1)
+
+    upload = b"x" * (AUDIT_MAX_BODY_BYTES * 4)
+    response = client.post("/api/v1/courses/course_test", files={"file": ("video.mp4", upload)})
+    assert response.json()["received"] > len(upload)
+
+    (log,) = queued_logs(queue)
+    assert log["payload"] == {"_type": "multipart/form-data"}
+    # The org is only looked up when flushing
+    assert log["org_id"] is None
+    assert log["org_references"][1] == {"course_id": "course_test"}
+
+    with Session(engine) as db_session:
+        assert flush_audit_logs_to_db(db_session) == 1
+        saved = db_session.exec(select(AuditLog)).one()
+        assert (saved.org_id, saved.resource, saved.status_code) == (1, "courses", 200)
+
+
+def test_json_bodies_are_captured_and_scrubbed(client, queue):
+    response = client.post(
+        "/api/v1/courses/course_test", json={"name": "Course", "password": "secret", "org_id": 1}
+    )
+    assert response.json()["received"] > 0
+
+    (log,) = queued_logs(queue)
+    assert log["payload"] == {"name": "Course", "org_id": 1}
+    assert log["org_references"][0] == {"org_id": 1}
+
+
+def test_large_json_bodies_are_not_captured(client, queue):
+    response = client.post(
+        "/api/v1/courses/course_test", json={"content": "x" * AUDIT_MAX_BODY_BYTES}
+    )
+    assert response.json()["received"] > AUDIT_MAX_BODY_BYTES
+
+    (log,) = queued_logs(queue)
+    assert log["payload"] is None
+
+
+def test_deleted_resources_are_resolved_before_deletion(engine, client, queue):
+    with Session(engine) as db_session:
+        seed_course(db_session, 1, 1)
+
+    assert client.delete("/api/v1/courses/course_test").status_code == 200
+
+    (log,) = queued_logs(queue)
+    assert log["org_id"] == 1
@@ -0,0 +1,218 @@
+import json
+import time
+from collections import deque
+import pytest
+from sqlmodel import Session, select
+from ee.db.audit_logs import AuditLog
+from ee.services import audit
+from ee.services.audit import (
+    REDIS_AUDIT_CONSUMERS_KEY,
+    REDIS_AUDIT_LOG_KEY,
+    REDIS_AUDIT_PROCESSING_KEY,
+    LocalAuditLogQueue,
+    RedisAuditLogQueue,
+    flush_audit_logs_to_db,
+    get_audit_pipeline_stats,
+    queue_audit_log,
+)
+from src.tests.utils.courses_data_for_tests import count_queries
+
+
+class FakeRedis:
+    """Lists, sorted sets and the two queue scripts of ee.services.audit"""
+
+    def __init__(self):
+        self.lists = {}
+        self.sorted_sets = {}
+
+    def lpush(self, key, *values):
+        for value in values:
+            self.lists.setdefault(key, []).insert(0, value)
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start : end + 1]
+
+    def lindex(self, key, index):
+        items = self.lists.get(key, [])
+        return items[index] if items else None
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key, low, high):
+        members = self.sorted_sets.get(key, {})
+        return [member for member, score in members.items() if score <= high]
+
+    def zrem(self, key, member):
+        self.sorted_sets.get(key, {}).pop(member, None)
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class Pipeline:
+            def __init__(self):
+                self.results = []
+
+            def llen(self, key):
+                self.results.append(fake.llen(key))
+
+            def execute(self):
+                return self.results
+
+        return Pipeline()
+
+    def register_script(self, script):
+        fake = self
+
+        def dequeue(keys, args):
+            items = fake.lists.get(keys[0], [])
+            batch = items[-int(args[0]) :]
+            fake.lists[keys[0]] = items[: len(items) - len(batch)]
+            fake.rpush(keys[1], *batch)
+            return batch
+
+        def requeue(keys):
+            items = fake.lists.pop(keys[0], [])
+            fake.rpush(keys[1], *items)
+            return len(items)
+
+        return dequeue if script == audit._DEQUEUE_SCRIPT else requeue
+
+
+def audit_log_entry(index: int, **overrides) -> str:
+    data = {
+        "user_id": None,
+        "org_id": 1,
+        "action": f"POST /api/v1/courses/{index}",
+        "resource": "courses",
+        "resource_id": str(index),
+        "method": "POST",
+        "path": f"/api/v1/courses/{index}",
+        "status_code": 200,
+        "payload": {"index": index},
+        "ip_address": None,
+        "created_at": "2026-01-01T00:00:00",
+    }
+    data.update(overrides)
+    return json.dumps(data)
+
+
+@pytest.fixture
+def local_queue(monkeypatch):
+    queue = LocalAuditLogQueue()
+    monkeypatch.setattr(audit, "_audit_log_queue", queue)
+    monkeypatch.setitem(audit._pipeline_stats, "batch_size", audit.AUDIT_BATCH_MIN)
+    return queue
+
+
+@pytest.mark.asyncio
+async def test_flush_saves_batches_with_multi_row_inserts(engine, local_queue):
+    for index in range(250):
+        await queue_audit_log(
+            user_id=None,
+            org_id=1,
+            action="POST /api/v1/courses",
+            resource="courses",
+            method="POST",
+            path="/api/v1/courses",
+            status_code=200,
+            payload={"index": index},
+        )
+    assert get_audit_pipeline_stats()["queue_depth"] == 250
+
+    with Session(engine) as db_session:
+        with count_queries(engine) as queries:
+            assert flush_audit_logs_to_db(db_session) == 250
+
+        # Batch of 100, then a batch of up to 200 with the remaining 150
+        inserts = [query for query in queries if query.lstrip().upper().startswith("INSERT")]
+        assert len(inserts) == 2
+        assert len(db_session.exec(select(AuditLog)).all()) == 250
+
+    stats = get_audit_pipeline_stats()
+    assert stats["backend"] == "memory"
+    assert (stats["queue_depth"], stats["processing_depth"]) == (0, 0)
+    assert stats["last_flush_count"] == 250
+
+
+def test_failed_batch_is_kept_then_saved_log_by_log(engine, local_queue):
+    local_queue.push(audit_log_entry(1))
+    # status_code is required, this log can't be saved
+    local_queue.push(audit_log_entry(2, status_code=None))
+    local_queue.push(audit_log_entry(3))
+
+    with Session(engine) as db_session:
+        assert flush_audit_logs_to_db(db_session) == 0
+        assert len(local_queue.in_flight()) == 3
+
+        assert flush_audit_logs_to_db(db_session) == 2
+        assert local_queue.in_flight() == []
+        saved = db_session.exec(select(AuditLog.resource_id).order_by(AuditLog.resource_id)).all()  # type: ignore
+        assert saved == ["1", "3"]
+
+
+def test_redis_queue_moves_batches_through_a_processing_list(engine, monkeypatch):
+    client = FakeRedis()
+    queue = RedisAuditLogQueue(client)  # type: ignore
+    monkeypatch.setattr(audit, "_audit_log_queue", queue)
+    monkeypatch.setitem(audit._pipeline_stats, "batch_size", audit.AUDIT_BATCH_MIN)
+
+    for index in range(5):
+        queue.push(audit_log_entry(index))
+    # Buffered until forwarded
+    assert client.llen(REDIS_AUDIT_LOG_KEY) == 0
+    assert queue.forward() == 5
+
+    # Oldest first
+    assert [json.loads(entry)["resource_id"] for entry in queue.dequeue(2)] == ["0", "1"]
+    assert len(queue.in_flight()) == 2
+    assert client.llen(REDIS_AUDIT_LOG_KEY) == 3
+
+    # Entries of a consumer that stopped in the middle of a flush, and of one
+    # still flushing
+    client.rpush(f"{REDIS_AUDIT_PROCESSING_KEY}:gone:1", audit_log_entry(5))
+    client.rpush(f"{REDIS_AUDIT_PROCESSING_KEY}:alive:1", audit_log_entry(6))
+    client.zadd(REDIS_AUDIT_CONSUMERS_KEY, {"gone:1": time.time() - audit.AUDIT_CONSUMER_TTL - 1})
+    client.zadd(REDIS_AUDIT_CONSUMERS_KEY, {"alive:1": time.time()})
+    assert queue.recover() == 1
+    assert client.llen(f"{REDIS_AUDIT_PROCESSING_KEY}:alive:1") == 1
+    assert "gone:1" not in client.sorted_sets[REDIS_AUDIT_CONSUMERS_KEY]
+
+    with Session(engine) as db_session:
+        assert flush_audit_logs_to_db(db_session) == 6
+
+    assert client.llen(REDIS_AUDIT_LOG_KEY) == 0
+    assert queue.in_flight() == []
+    assert get_audit_pipeline_stats()["backend"] == "redis"
+
+
+def test_entries_that_failed_to_forward_are_kept_before_newer_ones():
+    client = FakeRedis()
+    queue = RedisAuditLogQueue(client)  # type: ignore
+    queue.outbox = deque(maxlen=3)
+
+    def lpush(key, *values):
+        # Logs of requests served while the push is failing
+        queue.push(audit_log_entry(3))
+        queue.push(audit_log_entry(4))
+        raise ConnectionError("Redis is down")
+
+    for index in range(3):
+        queue.push(audit_log_entry(index))
+    client.lpush = lpush
+    with pytest.raises(ConnectionError):
+        queue.forward()
+
+    # Room for one of the entries that weren't pushed, the newest
+    assert [json.loads(entry)["resource_id"] for entry in queue.outbox] == ["2", "3", "4"]
+    assert queue.dropped == 2
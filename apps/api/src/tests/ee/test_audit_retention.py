@@ -0,0 +1,91 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlmodel import Session, select
+from ee.db.audit_logs import AuditLog
+from ee.services import audit_retention
+from ee.services.audit_retention import (
+    apply_audit_log_retention,
+    create_audit_log_partitions,
+    get_audit_log_retention_days,
+    next_month,
+    retention_start,
+)
+from src.db.organization_config import OrganizationConfig
+from src.db.organizations import Organization
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+@pytest.fixture
+def archives(monkeypatch):
+    archives = {}
+
+    def write_content(directory, type_of_dir, uuid, file_binary, file_and_format):
+        archives[f"{type_of_dir}/{uuid}/{directory}/{file_and_format}"] = [
+            json.loads(line) for line in gzip.decompress(file_binary).splitlines()
+        ]
+
+    monkeypatch.setattr(audit_retention, "write_content", write_content)
+    return archives
+
+
+def add_log(db_session: Session, org_id, days_ago: int):
+    db_session.add(
+        AuditLog(
+            org_id=org_id,
+            action="POST /api/v1/courses",
+            resource="courses",
+            method="POST",
+            path="/api/v1/courses",
+            status_code=200,
+            payload={"days_ago": days_ago},
+            created_at=NOW - timedelta(days=days_ago),
+        )
+    )
+
+
+def test_retention_expires_whole_months():
+    assert get_audit_log_retention_days({}) == 365
+    assert get_audit_log_retention_days({"features": {"audit_logs": {"retention_days": 30}}}) == 30
+    # 30 days before Oct 17 is Sep 17, September is kept entirely
+    assert retention_start(30, NOW) == datetime(2026, 9, 1)
+    assert next_month(datetime(2026, 12, 1)) == datetime(2027, 1, 1)
+
+
+def test_expired_logs_are_archived_per_org_then_deleted(engine, archives):
+    with Session(engine) as db_session:
+        # Org 1 keeps 30 days of logs, org 2 has no config and keeps 365
+        db_session.add(Organization(id=1, name="Short", slug="short", email="a@example.com", org_uuid="org_short"))
+        db_session.add(Organization(id=2, name="Long", slug="long", email="b@example.com", org_uuid="org_long"))
+        db_session.add(
+            OrganizationConfig(org_id=1, config={"features": {"audit_logs": {"retention_days": 30}}})
+        )
+        for org_id in (1, 2, None):
+            for days_ago in (400, 60, 0):
+                add_log(db_session, org_id, days_ago)
+        db_session.commit()
+
+        # Nothing to partition on SQLite
+        assert create_audit_log_partitions(db_session, NOW) == []
+        stats = apply_audit_log_retention(db_session, NOW)
+
+        assert stats["archived"] == 4
+        remaining = db_session.exec(select(AuditLog.org_id, AuditLog.payload)).all()
+        assert sorted(
+            (org_id or 0, payload["days_ago"]) for org_id, payload in remaining
+        ) == [(0, 0), (0, 60), (1, 0), (2, 0), (2, 60)]
+
+        # Runs again without archiving anything twice
+        assert apply_audit_log_retention(db_session, NOW)["archived"] == 0
+
+    assert sorted(archives) == [
+        "orgs/_deleted/audit_logs/2025_09.jsonl.gz",
+        "orgs/org_long/audit_logs/2025_09.jsonl.gz",
+        "orgs/org_short/audit_logs/2025_09.jsonl.gz",
+        "orgs/org_short/audit_logs/2026_08.jsonl.gz",
+    ]
+    (log,) = archives["orgs/org_short/audit_logs/2026_08.jsonl.gz"]
+    assert log["payload"] == {"days_ago": 60}
+    assert log["created_at"].startswith("2026-08-18")
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from sqlalchemy import update
+from sqlmodel import Session, select
+from src.db.email_outbox import EmailOutbox, EmailOutboxStatusEnum
+from src.services.email import outbox, transports
+from src.services.email.outbox import enqueue_emails, send_outbox_emails
+from src.services.email.transports import StubTransport, get_email_transport, set_email_transport
+from src.tests.utils.courses_data_for_tests import count_queries
+
+
+class FailingTransport:
+    max_batch_size = 100
+
+    def send_batch(self, messages):
+        raise RuntimeError("provider unavailable")
+
+
+class RejectingTransport(StubTransport):
+    """Rejects any call with an invalid address in it, like the provider"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def send_batch(self, messages):
+        self.calls += 1
+        if any("@" not in message["to"][0] for message in messages):
+            raise ValueError("Invalid `to` field")
+        super().send_batch(messages)
+
+
+def statuses(db_session: Session) -> dict:
+    emails = db_session.exec(select(EmailOutbox)).all()
+    result = {}
+    for email in emails:
+        result[email.status] = result.get(email.status, 0) + 1
+    return result
+
+
+def test_emails_are_sent_in_batches_within_the_org_rate_limit(engine, monkeypatch):
+    monkeypatch.setattr(outbox, "EMAIL_OUTBOX_ORG_RATE_LIMIT", 120)
+    transport = StubTransport()
+    with Session(engine) as db_session:
+        with count_queries(engine) as queries:
+            queued = enqueue_emails(
+                db_session, [(f"learner{index}@example.com", "Invitation", "<p>Hi</p>") for index in range(150)], 1
+            )
+        assert queued == 150
+        assert len([query for query in queries if query.lstrip().upper().startswith("INSERT")]) == 1
+        enqueue_emails(db_session, [(f"user{index}@example.com", "Welcome", "<p>Hi</p>") for index in range(5)])
+
+        # A full batch, then the rest of the org's budget and the system emails
+        assert send_outbox_emails(db_session, transport) == 100
+        assert send_outbox_emails(db_session, transport) == 25
+        assert send_outbox_emails(db_session, transport) == 0
+
+        assert statuses(db_session) == {EmailOutboxStatusEnum.SENT: 125, EmailOutboxStatusEnum.PENDING: 30}
+        assert transport.sent[0]["to"] == ["learner0@example.com"]
+        assert transport.sent[0]["html"] == "<p>Hi</p>"
+
+
+def test_failed_emails_are_retried_with_backoff_then_given_up(engine, monkeypatch):
+    monkeypatch.setattr(outbox, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2)
+    with Session(engine) as db_session:
+        enqueue_emails(db_session, [("learner@example.com", "Reset your password", "<p>Code</p>")])
+
+        assert send_outbox_emails(db_session, FailingTransport()) == 1
+        email = db_session.exec(select(EmailOutbox)).one()
+        assert (email.status, email.attempts, email.last_error) == (
+            EmailOutboxStatusEnum.PENDING, 1, "provider unavailable"
+        )
+        assert email.next_attempt_at > datetime.now() + timedelta(seconds=30)
+        # Not due yet
+        assert send_outbox_emails(db_session, FailingTransport()) == 0
+
+        db_session.exec(update(EmailOutbox).values(next_attempt_at=datetime.now()))  # type: ignore
+        db_session.commit()
+        assert send_outbox_emails(db_session, FailingTransport()) == 1
+        db_session.refresh(email)
+        assert (email.status, email.attempts) == (EmailOutboxStatusEnum.FAILED, 2)
+
+
+def test_emails_stay_queued_without_a_configured_transport(engine, monkeypatch):
+    mailing_config = Mock(resend_api_key="", stub_transport=False)
+    monkeypatch.setattr(transports, "get_nexo_config", lambda: Mock(mailing_config=mailing_config))
+    set_email_transport(None)
+    with Session(engine) as db_session:
+        enqueue_emails(db_session, [("learner@example.com", "Welcome", "<p>Hi</p>")])
+
+        # No stub unless asked for: nothing is marked sent without being sent
+        assert send_outbox_emails(db_session) == 0
+        assert statuses(db_session) == {EmailOutboxStatusEnum.PENDING: 1}
+
+        mailing_config.stub_transport = True
+        assert isinstance(get_email_transport(), StubTransport)
+        assert send_outbox_emails(db_session) == 1
+    set_email_transport(None)
+
+
+def test_a_bad_message_only_fails_itself(engine):
+    transport = RejectingTransport()
+    with Session(engine) as db_session:
+        enqueue_emails(
+            db_session, [(to, "Invitation", "<p>Hi</p>") for to in ["learner0@example.com", "not an email", "learner2@example.com"]]
+        )
+
+        assert send_outbox_emails(db_session, transport) == 3
+        # The batch, then each message on its own
+        assert transport.calls == 4
+        assert [message["to"] for message in transport.sent] == [["learner0@example.com"], ["learner2@example.com"]]
+
+        assert statuses(db_session) == {EmailOutboxStatusEnum.SENT: 2, EmailOutboxStatusEnum.PENDING: 1}
+        failed = db_session.exec(select(EmailOutbox).where(EmailOutbox.status == EmailOutboxStatusEnum.PENDING)).one()
+        assert (failed.to_email, failed.last_error) == ("not an email", "Invalid `to` field")
@@ -0,0 +1,217 @@
+import fnmatch
+import json
+from unittest.mock import Mock
+import pytest
+from fastapi import Request
+from sqlmodel import Session, select
+from src.db.email_outbox import EmailOutbox
+from src.db.organizations import Organization
+from src.db.users import InternalUser
+from src.services.orgs import invited_users, users as org_users
+from src.services.orgs.invited_users import (
+    list_invited_users,
+    migrate_legacy_invited_users,
+    store_invited_users,
+)
+from src.services.orgs.users import (
+    get_list_of_invited_users,
+    get_list_of_invited_users_paginated,
+    invite_batch_users,
+    remove_invited_user,
+)
+from src.tests.utils.courses_data_for_tests import seed_user
+
+
+def _score(bound):
+    if bound in ("-inf", "+inf"):
+        return float(bound), False
+    bound = str(bound)
+    if bound.startswith("("):
+        return float(bound[1:]), True
+    return float(bound), False
+
+
+class FakeRedis:
+    """
+    Just enough of redis.Redis for the invitation store. There is no KEYS:
+    listing invitations must not scan the keyspace.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        self.strings = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def _call(self, name, *args, **kwargs):
+        self.round_trips += 1
+        return getattr(self, f"_{name}")(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not hasattr(self, f"_{name}"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+            def execute(self):
+                fake.round_trips += 1
+                return [getattr(fake, f"_{name}")(*args, **kwargs) for name, args, kwargs in self.commands]
+
+        return Pipeline()
+
+    def _hset(self, key, field=None, value=None, mapping=None):
+        values = dict(mapping or {})
+        if field is not None:
+            values[field] = value
+        target = self.hashes.setdefault(key, {})
+        for name, item in values.items():
+            target[name.decode() if isinstance(name, bytes) else name] = item.encode() if isinstance(item, str) else item
+        return len(values)
+
+    def _hmget(self, key, fields):
+        target = self.hashes.get(key, {})
+        return [target.get(field.decode() if isinstance(field, bytes) else field) for field in fields]
+
+    def _hdel(self, key, *fields):
+        target = self.hashes.get(key, {})
+        return sum(target.pop(field.decode() if isinstance(field, bytes) else field, None) is not None for field in fields)
+
+    def _zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def _zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+    def _zrem(self, key, *members):
+        target = self.zsets.get(key, {})
+        return sum(target.pop(member, None) is not None for member in members)
+
+    def _in_range(self, key, low, high):
+        (low, low_open), (high, high_open) = _score(low), _score(high)
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        return [
+            member for member, score in members
+            if (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+        ]
+
+    def _zrangebyscore(self, key, low, high, start=None, num=None):
+        members = self._in_range(key, low, high)
+        if start is not None:
+            members = members[start:start + num]
+        return [member.encode() for member in members]
+
+    def _zcount(self, key, low, high):
+        return len(self._in_range(key, low, high))
+
+    def _zremrangebyscore(self, key, low, high):
+        return self._zrem(key, *self._in_range(key, low, high))
+
+    def _expire(self, key, ttl):
+        self.ttls[key] = ttl
+        return True
+
+    def _get(self, key):
+        return self.strings.get(key.decode() if isinstance(key, bytes) else key)
+
+    def _ttl(self, key):
+        return self.ttls.get(key.decode() if isinstance(key, bytes) else key, -1)
+
+    def _delete(self, key):
+        return int(self.strings.pop(key.decode() if isinstance(key, bytes) else key, None) is not None)
+
+    def scan_iter(self, match, count=None):
+        return iter([key.encode() for key in list(self.strings) if fnmatch.fnmatch(key, match)])
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    r = FakeRedis()
+    monkeypatch.setattr(invited_users, "get_redis_client", lambda: r)
+    monkeypatch.setattr(
+        org_users,
+        "build_invite_emails",
+        lambda org, code, user, emails: [(email, "Invitation", code) for email in emails],
+    )
+    return r
+
+
+def seed_org(db_session: Session) -> InternalUser:
+    db_session.add(Organization(id=1, name="Org", slug="org", email="org@example.com", org_uuid="org_test"))
+    db_session.commit()
+    sender = seed_user(db_session, "admin")
+    return InternalUser(id=sender.id)  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_invitations_are_stored_per_org_and_listed_in_pages(engine, fake_redis):
+    with Session(engine) as db_session:
+        current_user = seed_org(db_session)
+
+        await invite_batch_users(
+            Mock(spec=Request), 1, "a@example.com, b@example.com,a@example.com,", "code_1", db_session, current_user
+        )
+        fake_redis.round_trips = 0
+        await invite_batch_users(
+            Mock(spec=Request), 1, "b@example.com,c@example.com", "code_2", db_session, current_user
+        )
+        # Pending check, expired lookup, then one transaction
+        assert fake_redis.round_trips == 3
+        # The invitation emails are queued, not sent during the request
+        queued = db_session.exec(select(EmailOutbox.to_email, EmailOutbox.org_id)).all()
+        assert queued == [("a@example.com", 1), ("b@example.com", 1), ("c@example.com", 1)]
+
+        invited = await get_list_of_invited_users(Mock(spec=Request), 1, db_session, current_user)
+        assert [(user["email"], user["invite_code_uuid"]) for user in invited] == [
+            ("a@example.com", "code_1"),
+            ("b@example.com", "code_1"),
+            ("c@example.com", "code_2"),
+        ]
+
+        fake_redis.round_trips = 0
+        page = await get_list_of_invited_users_paginated(Mock(spec=Request), 1, 2, 2, db_session, current_user)
+        assert fake_redis.round_trips == 2
+        assert [user["email"] for user in page["items"]] == ["c@example.com"]
+        assert (page["total"], page["page"], page["limit"]) == (3, 2, 2)
+
+        await remove_invited_user(Mock(spec=Request), 1, "a@example.com", db_session, current_user)
+        invited = await get_list_of_invited_users(Mock(spec=Request), 1, db_session, current_user)
+        assert [user["email"] for user in invited] == ["b@example.com", "c@example.com"]
+        with pytest.raises(Exception) as error:
+            await remove_invited_user(Mock(spec=Request), 1, "a@example.com", db_session, current_user)
+        assert error.value.status_code == 404  # type: ignore
+
+
+def test_expired_invitations_are_hidden_then_dropped(fake_redis):
+    store_invited_users(fake_redis, "org_test", {"old@example.com": {"email": "old@example.com"}}, ttl=10, now=100)
+    store_invited_users(fake_redis, "org_test", {"new@example.com": {"email": "new@example.com"}}, ttl=10, now=105)
+
+    items, total = list_invited_users(fake_redis, "org_test", now=112)
+    assert ([item["email"] for item in items], total) == (["new@example.com"], 1)
+
+    store_invited_users(fake_redis, "org_test", {}, now=112)
+    assert list(fake_redis.hashes["invited_users:org:org_test"]) == ["new@example.com"]
+    assert list(fake_redis.zsets["invited_users:org:org_test:expires"]) == ["new@example.com"]
+
+
+def test_legacy_invitation_keys_are_migrated(fake_redis):
+    fake_redis.strings["invited_user:a@example.com:org:org_test"] = json.dumps({"email": "a@example.com"}).encode()
+    fake_redis.ttls["invited_user:a@example.com:org:org_test"] = 3600
+    fake_redis.strings["invited_user:b@example.com:org:org_other"] = json.dumps({"email": "b@example.com"}).encode()
+    fake_redis.strings["invite_code:org:org_test:code:abc"] = b"{}"
+
+    assert migrate_legacy_invited_users(fake_redis) == 2
+
+    assert list(fake_redis.strings) == ["invite_code:org:org_test:code:abc"]
+    assert [item["email"] for item in list_invited_users(fake_redis, "org_test")[0]] == ["a@example.com"]
+    assert [item["email"] for item in list_invited_users(fake_redis, "org_other")[0]] == ["b@example.com"]
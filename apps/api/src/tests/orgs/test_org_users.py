@@ -0,0 +1,121 @@
+import csv
+import io
+from unittest.mock import Mock
+import pytest
+from fastapi import HTTPException, Request
+from sqlmodel import Session
+from src.db.organizations import Organization
+from src.db.roles import Role
+from src.db.user_organizations import UserOrganization
+from src.db.users import AnonymousUser, InternalUser, PublicUser
+from src.services.orgs import users as org_users
+from src.services.orgs.users import (
+    export_organization_users,
+    get_organization_users,
+    get_organization_users_paginated,
+)
+from src.tests.utils.courses_data_for_tests import count_queries, seed_user
+
+
+def seed_members(db_session: Session, count: int) -> None:
+    db_session.add(Organization(id=1, name="Org", slug="org", email="org@example.com", org_uuid="org_test"))
+    db_session.add(Organization(id=2, name="Other", slug="other", email="other@example.com", org_uuid="org_other"))
+    db_session.add(Role(id=1, name="Admin", description=""))
+    db_session.add(Role(id=4, name="User", description=""))
+    db_session.commit()
+
+    for index in range(count):
+        user = seed_user(db_session, f"member{index:02d}")
+        db_session.add(
+            UserOrganization(
+                user_id=user.id,  # type: ignore
+                org_id=1,
+                role_id=1 if index % 5 == 0 else 4,
+                creation_date=f"2024-01-{index + 1:02d}",
+                update_date="",
+            )
+        )
+    outsider = seed_user(db_session, "outsider")
+    db_session.add(
+        UserOrganization(user_id=outsider.id, org_id=2, role_id=4, creation_date="", update_date="")  # type: ignore
+    )
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_members_are_listed_with_their_role_in_one_query(engine):
+    with Session(engine) as db_session:
+        seed_members(db_session, 12)
+
+        with count_queries(engine) as queries:
+            members = await get_organization_users(Mock(spec=Request), "1", db_session, InternalUser(id=0))
+
+        # Organization, then the members joined to their roles
+        assert len(queries) == 2
+        assert len(members) == 12
+        assert members[0].user.username == "member00" and members[0].role.name == "Admin"
+        assert "outsider" not in [member.user.username for member in members]
+
+
+@pytest.mark.asyncio
+async def test_members_are_paginated_filtered_and_sorted(engine):
+    with Session(engine) as db_session:
+        seed_members(db_session, 12)
+
+        with count_queries(engine) as queries:
+            result = await get_organization_users_paginated(
+                Mock(spec=Request), "1", db_session, InternalUser(id=0), page=2, limit=5
+            )
+        # Organization, total, then the page
+        assert len(queries) == 3
+        assert (result.total, result.page, result.limit) == (12, 2, 5)
+        assert [member.user.username for member in result.items] == [f"member{index:02d}" for index in range(5, 10)]
+
+        result = await get_organization_users_paginated(
+            Mock(spec=Request), "1", db_session, InternalUser(id=0), role_id=1, sort="joined", order="desc"
+        )
+        assert result.total == 3
+        assert [member.user.username for member in result.items] == ["member10", "member05", "member00"]
+
+        result = await get_organization_users_paginated(
+            Mock(spec=Request), "1", db_session, InternalUser(id=0), name="ER1", email="example.com"
+        )
+        assert [member.user.username for member in result.items] == ["member10", "member11"]
+
+
+@pytest.mark.asyncio
+async def test_roster_is_exported_as_csv(engine, monkeypatch):
+    monkeypatch.setattr(org_users, "engine", engine)
+    monkeypatch.setattr(org_users, "ORG_USERS_EXPORT_CHUNK_SIZE", 4)
+    with Session(engine) as db_session:
+        seed_members(db_session, 10)
+
+        response = await export_organization_users(Mock(spec=Request), "1", db_session, InternalUser(id=0))
+        chunks = [chunk async for chunk in response.body_iterator]
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))  # type: ignore
+    # Header and 4 rows, 4 rows, then the last 2
+    assert len(chunks) == 3
+    assert rows[0] == org_users.ORG_USERS_CSV_HEADER
+    assert [row[1] for row in rows[1:]] == [f"member{index:02d}" for index in range(10)]
+    assert rows[1][4:] == ["member00@example.com", "Admin", "2024-01-01"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("username, status_code", [(None, 401), ("member01", 403)])
+async def test_roster_is_only_listed_and_exported_for_org_admins(engine, username, status_code):
+    with Session(engine) as db_session:
+        seed_members(db_session, 2)
+        if username is None:
+            current_user = AnonymousUser()
+        else:
+            # member01 has the User role
+            current_user = PublicUser(id=2, username=username, first_name="", last_name="", email=f"{username}@example.com", user_uuid=f"user_{username}")
+
+        with pytest.raises(HTTPException) as error:
+            await get_organization_users_paginated(Mock(spec=Request), "1", db_session, current_user)
+        assert error.value.status_code == status_code
+
+        with pytest.raises(HTTPException) as error:
+            await export_organization_users(Mock(spec=Request), "1", db_session, current_user)
+        assert error.value.status_code == status_code
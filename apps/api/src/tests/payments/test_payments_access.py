@@ -0,0 +1,147 @@
+import pytest
+from unittest.mock import Mock
+from fastapi import HTTPException, Request
+from sqlmodel import Session, select
+from src.db.courses.activities import Activity
+from src.db.courses.courses import Course
+from src.db.payments.payments_courses import PaymentsCourse
+from src.db.payments.payments_users import PaymentStatusEnum, PaymentsUser
+from src.db.resource_authors import (
+    ResourceAuthor,
+    ResourceAuthorshipEnum,
+    ResourceAuthorshipStatusEnum,
+)
+from src.core import cache as core_cache
+from src.core.cache import SharedVersions
+from src.db.users import AnonymousUser, InternalUser, PublicUser
+from src.services.payments.cache import invalidate_entitlements_cache
+from src.services.payments.payments_access import (
+    check_activity_paid_access,
+    get_activities_paid_access,
+    get_courses_paid_access,
+)
+from src.services.payments.payments_users import update_payment_user_status
+from src.tests.courses.test_course_meta_cache import FakeRedis
+from src.tests.utils.courses_data_for_tests import count_queries, seed_course, seed_user
+
+
+@pytest.fixture(autouse=True)
+def clear_entitlements_cache():
+    invalidate_entitlements_cache()
+    yield
+    invalidate_entitlements_cache()
+
+
+def seed_catalog(db_session: Session) -> tuple[list[int], PublicUser, PublicUser]:
+    """Course 1 sold by product 1, course 2 by product 2, course 3 free"""
+    course_ids = [seed_course(db_session, 1, 2)]
+    for index in (2, 3):
+        course = Course(name=f"Course {index}", public=True, open_to_contributors=False, org_id=1, course_uuid=f"course_{index}")
+        db_session.add(course)
+        db_session.commit()
+        course_ids.append(course.id)  # type: ignore
+
+    learner = seed_user(db_session, "learner")
+    author = seed_user(db_session, "author")
+    db_session.add(PaymentsCourse(course_id=course_ids[0], payment_product_id=1, org_id=1))
+    db_session.add(PaymentsCourse(course_id=course_ids[1], payment_product_id=2, org_id=1))
+    db_session.add(PaymentsUser(user_id=learner.id, org_id=1, payment_product_id=1, status=PaymentStatusEnum.ACTIVE))  # type: ignore
+    db_session.add(
+        ResourceAuthor(
+            resource_uuid="course_2",
+            user_id=author.id,  # type: ignore
+            authorship=ResourceAuthorshipEnum.CREATOR,
+            authorship_status=ResourceAuthorshipStatusEnum.ACTIVE,
+        )
+    )
+    db_session.commit()
+    return course_ids, PublicUser.model_validate(learner), PublicUser.model_validate(author)
+
+
+@pytest.mark.asyncio
+async def test_courses_access_is_resolved_in_a_few_queries(engine):
+    with Session(engine) as db_session:
+        course_ids, learner, author = seed_catalog(db_session)
+
+        request = Mock(spec=Request)
+        with count_queries(engine) as queries:
+            access = await get_courses_paid_access(request, course_ids + [999], learner, db_session)
+        assert access == {course_ids[0]: True, course_ids[1]: False, course_ids[2]: True}
+        # Courses, product links, entitlements and authorship
+        assert len(queries) == 4
+
+        # Decisions are kept for the rest of the request
+        with count_queries(engine) as queries:
+            assert await get_courses_paid_access(request, course_ids, learner, db_session) == access
+        assert len(queries) == 1
+
+        # Entitlements are cached across requests
+        with count_queries(engine) as queries:
+            assert await get_courses_paid_access(Mock(spec=Request), course_ids, learner, db_session) == access
+        assert len(queries) == 3
+
+        access = await get_courses_paid_access(Mock(spec=Request), course_ids, author, db_session)
+        assert access == {course_ids[0]: False, course_ids[1]: True, course_ids[2]: True}
+        access = await get_courses_paid_access(Mock(spec=Request), course_ids, AnonymousUser(), db_session)
+        assert access == {course_ids[0]: False, course_ids[1]: False, course_ids[2]: True}
+
+
+@pytest.mark.asyncio
+async def test_activities_access_follows_their_course(engine):
+    with Session(engine) as db_session:
+        course_ids, learner, _ = seed_catalog(db_session)
+        activity_ids = list(db_session.exec(select(Activity.id)).all())
+
+        access = await get_activities_paid_access(Mock(spec=Request), activity_ids, learner, db_session)
+        assert access == {activity_id: True for activity_id in activity_ids}
+        access = await get_activities_paid_access(Mock(spec=Request), activity_ids, AnonymousUser(), db_session)
+        assert access == {activity_id: False for activity_id in activity_ids}
+
+        with pytest.raises(HTTPException) as error:
+            await check_activity_paid_access(Mock(spec=Request), 999, learner, db_session)
+        assert error.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_payment_status_changes_invalidate_entitlements(engine):
+    with Session(engine) as db_session:
+        course_ids, learner, _ = seed_catalog(db_session)
+        assert (await get_courses_paid_access(Mock(spec=Request), course_ids[:1], learner, db_session))[course_ids[0]]
+
+        # As done by the webhook when a subscription is deleted
+        payment_user = db_session.exec(select(PaymentsUser)).one()
+        await update_payment_user_status(
+            Mock(spec=Request), 1, payment_user.id, PaymentStatusEnum.CANCELLED, InternalUser(), db_session  # type: ignore
+        )
+        access = await get_courses_paid_access(Mock(spec=Request), course_ids[:1], learner, db_session)
+        assert access == {course_ids[0]: False}
+
+
+@pytest.mark.asyncio
+async def test_payments_processed_by_another_worker_unlock_access(engine, monkeypatch):
+    r = FakeRedis()
+    monkeypatch.setattr(core_cache, "get_redis_client", lambda: r)
+    with Session(engine) as db_session:
+        course_ids, learner, _ = seed_catalog(db_session)
+        payment_user = db_session.exec(select(PaymentsUser)).one()
+        payment_user.status = PaymentStatusEnum.PENDING
+        db_session.add(payment_user)
+        db_session.commit()
+
+        # "No entitlement" is cached by this worker
+        assert not (await get_courses_paid_access(None, course_ids[:1], learner, db_session))[course_ids[0]]
+
+        # The payment completes in another worker, sharing the versions in Redis
+        payment_user.status = PaymentStatusEnum.ACTIVE
+        db_session.add(payment_user)
+        db_session.commit()
+        SharedVersions("entitlements", ttl=120).bump(learner.id)
+
+        assert (await get_courses_paid_access(None, course_ids[:1], learner, db_session))[course_ids[0]]
+
+        # Without Redis the cache is bypassed rather than trusted
+        r.down = True
+        payment_user.status = PaymentStatusEnum.CANCELLED
+        db_session.add(payment_user)
+        db_session.commit()
+        assert not (await get_courses_paid_access(None, course_ids[:1], learner, db_session))[course_ids[0]]
@@ -0,0 +1,134 @@
+import hashlib
+import hmac
+import json
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock
+from fastapi import Request
+from sqlmodel import Session, select
+from src.db.organizations import Organization
+from src.db.payments.payments import PaymentsConfig
+from src.db.payments.payments_users import PaymentStatusEnum, PaymentsUser
+from src.db.payments.payments_webhooks import (
+    PaymentsWebhookEvent,
+    PaymentsWebhookEventStatusEnum,
+)
+from src.services.payments.webhooks import inbox, payments_webhooks
+from src.services.payments.webhooks.inbox import enqueue_stripe_event, requeue_stripe_events
+from src.services.payments.webhooks.payments_webhooks import (
+    handle_stripe_webhook,
+    process_stripe_events,
+)
+from src.tests.utils.courses_data_for_tests import count_queries, seed_user
+
+WEBHOOK_SECRET = "whsec_test"
+
+
+@pytest.fixture(autouse=True)
+def stripe_credentials(monkeypatch):
+    async def get_credentials():
+        return {"stripe_webhook_connect_secret": WEBHOOK_SECRET, "stripe_secret_key": "sk_test"}
+
+    monkeypatch.setattr(payments_webhooks, "get_stripe_internal_credentials", get_credentials)
+
+
+def signed_request(payload: bytes) -> Request:
+    timestamp = int(time.time())
+    signature = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    request = Mock(spec=Request)
+    request.body = AsyncMock(return_value=payload)
+    request.headers = {"stripe-signature": f"t={timestamp},v1={signature}"}
+    return request
+
+
+def stripe_event(event_id: str, account: str, event_type: str, data: dict) -> dict:
+    return {
+        "id": event_id,
+        "object": "event",
+        "account": account,
+        "type": event_type,
+        "data": {"object": data},
+    }
+
+
+def seed_payments(db_session: Session) -> None:
+    for org_id, account in [(1, "acct_1"), (2, "acct_2")]:
+        db_session.add(Organization(id=org_id, name="Org", slug=f"org{org_id}", email="org@example.com", org_uuid=f"org_{org_id}"))
+        db_session.add(PaymentsConfig(org_id=org_id, provider_specific_id=account))
+    user = seed_user(db_session)
+    for payment_user_id, org_id in [(1, 1), (2, 2)]:
+        db_session.add(PaymentsUser(id=payment_user_id, user_id=user.id, org_id=org_id, payment_product_id=1))  # type: ignore
+    db_session.commit()
+
+
+def checkout_completed(event_id: str, account: str, payment_user_id) -> dict:
+    return stripe_event(
+        event_id,
+        account,
+        "checkout.session.completed",
+        {"id": f"cs_{event_id}", "mode": "payment", "payment_status": "paid", "metadata": {"payment_user_id": payment_user_id}},
+    )
+
+
+def statuses(db_session: Session) -> dict:
+    db_session.expire_all()
+    return {event.event_id: event.status for event in db_session.exec(select(PaymentsWebhookEvent)).all()}
+
+
+@pytest.mark.asyncio
+async def test_webhook_is_stored_once_and_processed_later(engine):
+    with Session(engine) as db_session:
+        seed_payments(db_session)
+        payload = json.dumps(checkout_completed("evt_1", "acct_1", "1")).encode()
+
+        assert await handle_stripe_webhook(signed_request(payload), "connect", db_session) == {"status": "received"}
+        # A redelivery is a single insert hitting the unique index
+        with count_queries(engine) as queries:
+            response = await handle_stripe_webhook(signed_request(payload), "connect", db_session)
+        assert response == {"status": "duplicate"}
+        assert len(queries) == 1
+        assert db_session.get(PaymentsUser, 1).status == PaymentStatusEnum.PENDING  # type: ignore
+
+        assert await process_stripe_events(db_session) == 1
+        assert statuses(db_session) == {"evt_1": PaymentsWebhookEventStatusEnum.PROCESSED}
+        assert db_session.get(PaymentsUser, 1).status == PaymentStatusEnum.COMPLETED  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_failed_events_are_retried_in_order_then_replayed(engine, monkeypatch):
+    monkeypatch.setattr(inbox, "STRIPE_WEBHOOK_MAX_ATTEMPTS", 2)
+    with Session(engine) as db_session:
+        seed_payments(db_session)
+        for event in [
+            checkout_completed("evt_broken", "acct_1", None),
+            checkout_completed("evt_next", "acct_1", "1"),
+            checkout_completed("evt_other", "acct_2", "2"),
+        ]:
+            enqueue_stripe_event(db_session, event["id"], "connect", event["type"], event["account"], event)
+
+        # The next event of the account waits for the failed one to be retried
+        assert await process_stripe_events(db_session) == 2
+        assert statuses(db_session) == {
+            "evt_broken": PaymentsWebhookEventStatusEnum.PENDING,
+            "evt_next": PaymentsWebhookEventStatusEnum.PENDING,
+            "evt_other": PaymentsWebhookEventStatusEnum.PROCESSED,
+        }
+        broken = db_session.exec(select(PaymentsWebhookEvent).where(PaymentsWebhookEvent.event_id == "evt_broken")).one()
+        assert broken.attempts == 1 and broken.last_error
+        assert await process_stripe_events(db_session) == 0
+
+        # Once the retries are exhausted the account moves on
+        broken.next_attempt_at = broken.creation_date
+        db_session.add(broken)
+        db_session.commit()
+        assert await process_stripe_events(db_session) == 2
+        assert statuses(db_session)["evt_broken"] == PaymentsWebhookEventStatusEnum.FAILED
+        assert statuses(db_session)["evt_next"] == PaymentsWebhookEventStatusEnum.PROCESSED
+
+        # Replays go through the inbox again, in order
+        assert requeue_stripe_events(db_session) == 1
+        assert requeue_stripe_events(db_session, "evt_other") == 1
+        assert await process_stripe_events(db_session) == 2
+        events = statuses(db_session)
+        assert events["evt_broken"] == PaymentsWebhookEventStatusEnum.PENDING
+        assert events["evt_other"] == PaymentsWebhookEventStatusEnum.PROCESSED
@@ -0,0 +1,138 @@
+import importlib.util
+import os
+import re
+import pytest
+from unittest.mock import Mock
+from fastapi import Request
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session
+from src.db.collections import Collection
+from src.db.collections_courses import CollectionCourse
+from src.db.courses.courses import Course
+from src.db.user_organizations import UserOrganization
+from src.db.users import AnonymousUser
+from src.services.search.fulltext import (
+    COLLECTION_SEARCH_COLUMNS,
+    COURSE_SEARCH_COLUMNS,
+    USER_SEARCH_COLUMNS,
+    search_vector,
+)
+from src.services.search.search import search_across_org
+from src.tests.utils.courses_data_for_tests import count_queries, open_session, seed_course, seed_user
+
+
+def seed_search_data(db_session: Session, collections_count: int) -> None:
+    course_id = seed_course(db_session, 1, 1)
+    course = db_session.get(Course, course_id)
+    course.name = "Python for data science"  # type: ignore
+    db_session.add(course)
+
+    other_course = Course(
+        name="Cooking basics",
+        description=None,
+        about=None,
+        learnings=None,
+        tags=None,
+        public=True,
+        open_to_contributors=False,
+        org_id=course.org_id,  # type: ignore
+        course_uuid="course_other",
+    )
+    db_session.add(other_course)
+    db_session.commit()
+
+    for i in range(collections_count):
+        collection = Collection(
+            name=f"Python track {i}",
+            description="",
+            public=True,
+            org_id=course.org_id,  # type: ignore
+            collection_uuid=f"collection_{i}",
+        )
+        db_session.add(collection)
+        db_session.commit()
+        for collection_course in (course, other_course):
+            db_session.add(
+                CollectionCourse(
+                    collection_id=collection.id,  # type: ignore
+                    course_id=collection_course.id,  # type: ignore
+                    org_id=course.org_id,  # type: ignore
+                    creation_date="",
+                    update_date="",
+                )
+            )
+
+    user = seed_user(db_session, "pythonista")
+    db_session.add(
+        UserOrganization(
+            user_id=user.id,  # type: ignore
+            org_id=course.org_id,  # type: ignore
+            role_id=4,
+            creation_date="",
+            update_date="",
+        )
+    )
+    db_session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("collections_count", [1, 10])
+async def test_search_across_org_query_count_is_constant(engine, session_mode, collections_count):
+    with Session(engine) as db_session:
+        seed_search_data(db_session, collections_count)
+
+    async with open_session(engine, session_mode) as (db_session, session_engine):
+        with count_queries(session_engine) as queries:
+            result = await search_across_org(
+                Mock(spec=Request), AnonymousUser(), "testorg", "pyth", db_session, 1, 20
+            )
+
+    # org, courses, course authors, collections, users, collection courses
+    assert len(queries) == 6
+    assert [course.course_uuid for course in result.courses] == ["course_test"]
+    assert len(result.collections) == collections_count
+    assert all(
+        [course.course_uuid for course in collection.courses] == ["course_test", "course_other"]
+        for collection in result.collections
+    )
+    assert [user.username for user in result.users] == ["pythonista"]
+
+
+@pytest.mark.asyncio
+async def test_search_matches_every_word(engine):
+    with Session(engine) as db_session:
+        seed_search_data(db_session, 1)
+
+        result = await search_across_org(
+            Mock(spec=Request), AnonymousUser(), "testorg", "data python", db_session
+        )
+        assert [course.course_uuid for course in result.courses] == ["course_test"]
+
+        result = await search_across_org(
+            Mock(spec=Request), AnonymousUser(), "testorg", "python cooking", db_session
+        )
+        assert result.courses == []
+
+
+def test_search_vectors_match_the_migration_indexes():
+    path = os.path.join(
+        os.path.dirname(__file__),
+        "../../../migrations/versions/83da779bef84_full_text_search.py",
+    )
+    spec = importlib.util.spec_from_file_location("full_text_search", path)
+    migration = importlib.util.module_from_spec(spec)  # type: ignore
+    spec.loader.exec_module(migration)  # type: ignore
+
+    def normalize(expression: str) -> str:
+        # Parentheses, quotes and table prefixes don't change the expression
+        expression = re.sub(r"\w+\.", "", expression.replace('"', ""))
+        return re.sub(r"[\s()]", "", expression)
+
+    for index_name, columns in [
+        ("ix_course_search", COURSE_SEARCH_COLUMNS),
+        ("ix_collection_search", COLLECTION_SEARCH_COLUMNS),
+        ("ix_user_search", USER_SEARCH_COLUMNS),
+    ]:
+        compiled = str(search_vector(columns).compile(dialect=postgresql.dialect()))
+        _, expression = migration.SEARCH_INDEXES[index_name]
+        assert normalize(compiled) == normalize(expression)
@@ -417,4 +417,91 @@ class TestRBAC:
     async def test_authorization_verify_if_user_is_anon_authenticated_user(self):
         """Test authenticated user verification"""
         # Should not raise any exception
-        await authorization_verify_if_user_is_anon(user_id=1) 
\ No newline at end of file
+        await authorization_verify_if_user_is_anon(user_id=1) 
+
+    @pytest.mark.asyncio
+    async def test_authorization_decisions_are_memoized_per_request(self, mock_request, mock_db_session, mock_role, mock_resource_author):
+        """Test that roles, authorships and decisions are loaded once per request"""
+        mock_db_session.exec.return_value.all.return_value = [mock_role]
+        mock_db_session.exec.return_value.first.return_value = mock_resource_author
+
+        for _ in range(3):
+            assert await authorization_verify_based_on_roles_and_authorship(
+                request=mock_request,
+                user_id=1,
+                action="read",
+                element_uuid="course_123",
+                db_session=mock_db_session
+            ) is True
+            assert await authorization_verify_based_on_org_admin_status(
+                request=mock_request,
+                user_id=1,
+                action="update",
+                element_uuid="course_123",
+                db_session=mock_db_session
+            ) is True
+
+        # One query for the roles, one for the authorship
+        assert mock_db_session.exec.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_role_sets_are_invalidated_on_membership_change(self, mock_db_session, mock_role):
+        """Test that the cross-request role cache is dropped by invalidation"""
+        from src.security.rbac.context import invalidate_user_roles_cache
+
+        mock_db_session.exec.return_value.all.return_value = [mock_role]
+
+        for _ in range(2):
+            await authorization_verify_based_on_org_admin_status(
+                request=Mock(spec=Request),
+                user_id=1,
+                action="read",
+                element_uuid="course_123",
+                db_session=mock_db_session
+            )
+        assert mock_db_session.exec.call_count == 1
+
+        invalidate_user_roles_cache(1)
+        await authorization_verify_based_on_org_admin_status(
+            request=Mock(spec=Request),
+            user_id=1,
+            action="read",
+            element_uuid="course_123",
+            db_session=mock_db_session
+        )
+        assert mock_db_session.exec.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_role_changes_in_another_worker_invalidate_role_sets(self, mock_db_session, mock_role, monkeypatch):
+        """Test that role sets follow the versions shared through Redis"""
+        from src.core import cache as core_cache
+        from src.core.cache import SharedVersions
+        from src.tests.courses.test_course_meta_cache import FakeRedis
+
+        r = FakeRedis()
+        monkeypatch.setattr(core_cache, "get_redis_client", lambda: r)
+        mock_db_session.exec.return_value.all.return_value = [mock_role]
+
+        async def check():
+            await authorization_verify_based_on_org_admin_status(
+                request=Mock(spec=Request),
+                user_id=1,
+                action="read",
+                element_uuid="course_123",
+                db_session=mock_db_session
+            )
+
+        await check()
+        await check()
+        assert mock_db_session.exec.call_count == 1
+
+        # The membership changes in another worker
+        SharedVersions("user_roles", ttl=60).bump(1)
+        await check()
+        assert mock_db_session.exec.call_count == 2
+
+        # Without Redis the cache is bypassed rather than trusted
+        r.down = True
+        await check()
+        await check()
+        assert mock_db_session.exec.call_count == 4
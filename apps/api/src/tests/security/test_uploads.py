@@ -0,0 +1,140 @@
+import io
+import pytest
+from fastapi import HTTPException, UploadFile
+from src.security.file_validation import FILE_TYPES
+from src.services.courses.activities.uploads.sub_file import upload_submission_file
+from src.services.courses.activities.uploads.videos import upload_video
+from src.services.utils import upload_content
+from src.services.utils.upload_content import upload_file, write_content
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 8
+MP4 = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 4
+
+
+class FakeS3:
+    """Just enough of the boto3 S3 client for uploads"""
+
+    def __init__(self):
+        self.calls = []
+        self.objects = {}
+        self.parts = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.calls.append("put_object")
+        self.objects[Key] = Body
+
+    def create_multipart_upload(self, Bucket, Key):
+        self.calls.append("create_multipart_upload")
+        self.parts[Key] = []
+        return {"UploadId": "upload"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append("upload_part")
+        self.parts[Key].append(Body)
+        return {"ETag": f"etag{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append("complete_multipart_upload")
+        self.objects[Key] = b"".join(self.parts.pop(Key))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append("abort_multipart_upload")
+        self.parts.pop(Key)
+
+
+@pytest.fixture
+def filesystem(monkeypatch, tmp_path):
+    monkeypatch.setenv("NEXO_CONTENT_DELIVERY_TYPE", "filesystem")
+    monkeypatch.setenv("NEXO_CONTENT_ROOT", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("NEXO_CONTENT_DELIVERY_TYPE", "s3api")
+    monkeypatch.setenv("NEXO_S3_API_BUCKET_NAME", "bucket")
+    monkeypatch.setattr(upload_content, "S3_MULTIPART_PART_SIZE", 10)
+    client = FakeS3()
+    monkeypatch.setattr(upload_content, "get_s3_client", lambda: client)
+    return client
+
+
+def upload(content: bytes, filename: str = "logo.png") -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=filename)
+
+
+@pytest.mark.asyncio
+async def test_uploads_are_streamed_to_disk(filesystem, monkeypatch):
+    monkeypatch.setattr("src.security.file_validation.UPLOAD_CHUNK_SIZE", 16)
+    content = PNG + b"x" * 100
+
+    filename = await upload_file(upload(content), "logos", "orgs", "org_test", ["image"], "logo")
+
+    directory = filesystem / "orgs" / "org_test" / "logos"
+    assert (directory / filename).read_bytes() == content
+    assert [path.name for path in directory.iterdir()] == [filename]
+    # Not left readable by the API user only, as created by mkstemp
+    assert (directory / filename).stat().st_mode & 0o777 == upload_content.STORED_FILE_MODE
+
+
+@pytest.mark.asyncio
+async def test_invalid_uploads_leave_nothing_behind(filesystem, monkeypatch):
+    monkeypatch.setattr("src.security.file_validation.UPLOAD_CHUNK_SIZE", 16)
+
+    with pytest.raises(HTTPException) as error:
+        await upload_file(upload(b"<html>" + b"x" * 20), "logos", "orgs", "org_test", ["image"], "logo")
+    assert error.value.status_code == 415
+
+    # The size limit is enforced while the file is written
+    with pytest.raises(HTTPException) as error:
+        await upload_file(upload(PNG + b"x" * 100), "logos", "orgs", "org_test", ["image"], "logo", max_size=64)
+    assert error.value.status_code == 413
+    assert list((filesystem / "orgs" / "org_test" / "logos").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_activity_uploads_are_validated(filesystem, monkeypatch):
+    monkeypatch.setattr("src.security.file_validation.UPLOAD_CHUNK_SIZE", 16)
+    monkeypatch.setitem(FILE_TYPES["video"], "max_size", 64)
+    directory = filesystem / "orgs" / "org_test" / "courses" / "course_test" / "activities" / "activity_test" / "video"
+
+    with pytest.raises(HTTPException) as error:
+        await upload_video(upload(b"<html>" + b"x" * 20, "video.mp4"), "activity_test", "org_test", "course_test")
+    assert error.value.status_code == 415
+
+    # The size limit is enforced while the video is written
+    with pytest.raises(HTTPException) as error:
+        await upload_video(upload(MP4 + b"x" * 100, "video.mp4"), "activity_test", "org_test", "course_test")
+    assert error.value.status_code == 413
+    assert list(directory.iterdir()) == []
+
+    await upload_video(upload(MP4 + b"x" * 10, "video.mp4"), "activity_test", "org_test", "course_test")
+    assert (directory / "video.mp4").read_bytes() == MP4 + b"x" * 10
+
+    # Office documents are checked as ZIP archives
+    args = ("activity_test", "org_test", "course_test", "assignment_test", "task_test")
+    await upload_submission_file(upload(b"PK\x03\x04" + b"x" * 20, "answer.docx"), "answer.docx", *args)
+    with pytest.raises(HTTPException) as error:
+        await upload_submission_file(upload(b"MZ" + b"x" * 20, "answer.docx"), "answer.docx", *args)
+    assert error.value.status_code == 415
+
+
+def test_large_files_use_a_multipart_upload(s3):
+    write_content("videos", "orgs", "org_test", io.BytesIO(b"a" * 25), "video.mp4")
+    assert s3.calls == ["create_multipart_upload"] + ["upload_part"] * 3 + ["complete_multipart_upload"]
+    assert s3.objects["content/orgs/org_test/videos/video.mp4"] == b"a" * 25
+
+    s3.calls.clear()
+    write_content("logos", "orgs", "org_test", b"small", "logo.png")
+    assert s3.calls == ["put_object"]
+
+
+def test_failed_multipart_uploads_are_aborted(s3):
+    def chunks():
+        yield b"a" * 25
+        raise HTTPException(status_code=413, detail="File too large")
+
+    with pytest.raises(HTTPException):
+        write_content("videos", "orgs", "org_test", chunks(), "video.mp4")
+    assert s3.calls[-1] == "abort_multipart_upload"
+    assert "content/orgs/org_test/videos/video.mp4" not in s3.objects
@@ -0,0 +1,206 @@
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi import HTTPException, Request, UploadFile
+from sqlmodel import Session, select
+from src.core import cache as core_cache
+from src.core.cache import SharedVersions
+from src.db.courses.courses import CourseCreate
+from src.db.organizations import Organization
+from src.db.organization_config import OrganizationConfig
+from src.security.features_utils import usage
+from src.services.courses.courses import create_course
+from src.security.features_utils.usage import (
+    check_limits_and_increase_feature_usage,
+    check_limits_with_usage,
+    get_org_features,
+    invalidate_org_features_cache,
+    release_feature_usage,
+)
+from src.tests.courses.test_course_meta_cache import FakeRedis as FakeVersionsRedis
+from src.tests.utils.courses_data_for_tests import count_queries
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for usage accounting"""
+
+    def __init__(self):
+        self.store = {}
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        return self.store.get(key)
+
+    def incr(self, key):
+        self.calls += 1
+        self.store[key] = self.store.get(key, 0) + 1
+        return self.store[key]
+
+    def decr(self, key):
+        self.calls += 1
+        self.store[key] = self.store.get(key, 0) - 1
+        return self.store[key]
+
+    def register_script(self, script):
+        fake = self
+
+        class Script:
+            registered_client = fake
+
+            def __call__(self, keys, args):
+                fake.calls += 1
+                if fake.store.get(keys[0], 0) >= int(args[0]):
+                    return -1
+                fake.store[keys[0]] = fake.store.get(keys[0], 0) + 1
+                return fake.store[keys[0]]
+
+        return Script()
+
+
+@pytest.fixture
+def org_id(engine):
+    with Session(engine) as db_session:
+        org = Organization(
+            name="Test Org",
+            slug="testorg",
+            email="test@example.com",
+            org_uuid="org_test",
+        )
+        db_session.add(org)
+        db_session.commit()
+        db_session.refresh(org)
+
+        org_config = OrganizationConfig(
+            org_id=org.id,  # type: ignore
+            config={"features": {"ai": {"enabled": True, "limit": 2}}},
+            creation_date="",
+            update_date="",
+        )
+        db_session.add(org_config)
+        db_session.commit()
+
+        return org.id
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    r = FakeRedis()
+    monkeypatch.setattr(usage, "get_redis_client", lambda: r)
+    monkeypatch.setattr(usage, "_check_and_increase_script", None)
+    return r
+
+
+def test_org_features_are_cached(engine, org_id):
+    with Session(engine) as db_session:
+        assert get_org_features(org_id, db_session) == {"ai": {"enabled": True, "limit": 2}}
+
+        with count_queries(engine) as queries:
+            get_org_features(org_id, db_session)
+        assert queries == []
+
+        invalidate_org_features_cache(org_id)
+        with count_queries(engine) as queries:
+            get_org_features(org_id, db_session)
+        assert len(queries) == 1
+
+
+def test_limit_check_costs_one_redis_call(engine, org_id, fake_redis):
+    with Session(engine) as db_session:
+        get_org_features(org_id, db_session)
+        fake_redis.calls = 0
+
+        with count_queries(engine) as queries:
+            assert check_limits_with_usage("ai", org_id, db_session) is True
+        assert queries == []
+        assert fake_redis.calls == 1
+
+
+def test_check_and_increase_stops_at_limit(engine, org_id, fake_redis):
+    with Session(engine) as db_session:
+        assert check_limits_and_increase_feature_usage("ai", org_id, db_session) is True
+        assert check_limits_and_increase_feature_usage("ai", org_id, db_session) is True
+
+        with pytest.raises(HTTPException) as exc_info:
+            check_limits_and_increase_feature_usage("ai", org_id, db_session)
+        assert exc_info.value.status_code == 403
+        assert fake_redis.store[f"ai_usage:{org_id}"] == 2
+
+
+def test_feature_changes_in_another_worker_invalidate_the_features(
+    engine, org_id, monkeypatch
+):
+    r = FakeVersionsRedis()
+    monkeypatch.setattr(core_cache, "get_redis_client", lambda: r)
+
+    with Session(engine) as db_session:
+        get_org_features(org_id, db_session)
+        with count_queries(engine) as queries:
+            get_org_features(org_id, db_session)
+        assert queries == []
+
+        # e.g. the set-org-feature CLI
+        SharedVersions("org_features", ttl=60).bump(org_id)
+        with count_queries(engine) as queries:
+            get_org_features(org_id, db_session)
+        assert len(queries) == 1
+
+        # Versions unavailable, the cache is bypassed
+        r.down = True
+        with count_queries(engine) as queries:
+            get_org_features(org_id, db_session)
+        assert len(queries) == 1
+
+
+def test_release_gives_back_a_counted_usage(engine, org_id, fake_redis):
+    with Session(engine) as db_session:
+        check_limits_and_increase_feature_usage("ai", org_id, db_session)
+        check_limits_and_increase_feature_usage("ai", org_id, db_session)
+
+        release_feature_usage("ai", org_id, db_session)
+        assert fake_redis.store[f"ai_usage:{org_id}"] == 1
+        assert check_limits_and_increase_feature_usage("ai", org_id, db_session) is True
+
+        # Unlimited features are never counted, nor released
+        fake_redis.calls = 0
+        release_feature_usage("courses", org_id, db_session)
+        assert fake_redis.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_course_creation_releases_its_slot(engine, org_id, fake_redis):
+    with Session(engine) as db_session:
+        org_config = db_session.exec(
+            select(OrganizationConfig).where(OrganizationConfig.org_id == org_id)
+        ).one()
+        org_config.config = {"features": {"courses": {"enabled": True, "limit": 1}}}
+        db_session.add(org_config)
+        db_session.commit()
+        invalidate_org_features_cache(org_id)
+
+        thumbnail = Mock(spec=UploadFile)
+        thumbnail.filename = "thumbnail.png"
+        course = CourseCreate(
+            name="Course",
+            description="",
+            about="",
+            learnings="",
+            tags="",
+            public=True,
+            open_to_contributors=False,
+            org_id=org_id,
+        )
+        with patch(
+            "src.services.courses.courses.courses_rbac_check", new_callable=AsyncMock
+        ), patch(
+            "src.services.courses.courses.upload_thumbnail",
+            new=AsyncMock(side_effect=HTTPException(status_code=400)),
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await create_course(
+                    Mock(spec=Request), org_id, course, Mock(id=1), db_session, thumbnail
+                )
+        assert exc_info.value.status_code == 400
+
+        # The only slot is still free
+        assert fake_redis.store[f"courses_usage:{org_id}"] == 0
+        assert check_limits_and_increase_feature_usage("courses", org_id, db_session) is True
@@ -0,0 +1,116 @@
+import pytest
+from unittest.mock import Mock
+from fastapi import Request
+from sqlmodel import Session, select
+from src.db.course_progress import CourseProgress
+from src.db.courses.activities import Activity
+from src.db.courses.courses import Course
+from src.db.users import PublicUser
+from src.services.trail.progress import (
+    get_course_progress,
+    rebuild_course_progress,
+    refresh_course_progress,
+)
+from src.services.trail.trail import (
+    add_activity_to_trail,
+    add_course_to_trail,
+    remove_activity_from_trail,
+    remove_course_from_trail,
+)
+from src.tests.utils.courses_data_for_tests import count_queries, seed_course, seed_user
+
+
+def published_activities(db_session: Session, course_id: int, published: bool = True):
+    return db_session.exec(
+        select(Activity)
+        .where(Activity.course_id == course_id, Activity.published == published)
+        .order_by(Activity.id)  # type: ignore
+    ).all()
+
+
+@pytest.mark.asyncio
+async def test_progress_follows_the_trail(engine):
+    with Session(engine) as db_session:
+        # Every other activity is unpublished, 4 published activities
+        course_id = seed_course(db_session, 2, 4)
+        user = PublicUser(**seed_user(db_session).model_dump())
+        published = published_activities(db_session, course_id)
+        unpublished = published_activities(db_session, course_id, False)
+
+        for activity in published[:2] + unpublished[:1]:
+            trail = await add_activity_to_trail(Mock(spec=Request), user, activity.activity_uuid, db_session)
+        # Completing an activity twice doesn't count twice
+        await add_activity_to_trail(Mock(spec=Request), user, published[0].activity_uuid, db_session)
+
+        progress = get_course_progress(user.id, course_id, db_session)
+        assert (progress.completed_count, progress.total_count) == (2, 4)  # type: ignore
+        assert trail.runs[0].course_completed_steps == 2
+        assert trail.runs[0].course_total_steps == 4
+
+        await remove_activity_from_trail(Mock(spec=Request), user, published[0].activity_uuid, db_session)
+        db_session.refresh(progress)
+        assert progress.completed_count == 1  # type: ignore
+
+        await remove_course_from_trail(Mock(spec=Request), user, "course_test", db_session)
+        assert get_course_progress(user.id, course_id, db_session) is None
+
+        await add_course_to_trail(Mock(spec=Request), user, "course_test", db_session)
+        progress = get_course_progress(user.id, course_id, db_session)
+        assert (progress.completed_count, progress.total_count) == (0, 4)  # type: ignore
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("activities_per_chapter", [2, 20])
+async def test_completing_an_activity_query_count_is_constant(engine, activities_per_chapter):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 3, activities_per_chapter)
+        user = PublicUser(**seed_user(db_session).model_dump())
+        first, second = published_activities(db_session, course_id)[:2]
+        await add_activity_to_trail(Mock(spec=Request), user, first.activity_uuid, db_session)
+
+        with count_queries(engine) as queries:
+            await add_activity_to_trail(Mock(spec=Request), user, second.activity_uuid, db_session)
+        queries_count = len(queries)
+
+    # Same number of queries whatever the size of the course
+    assert queries_count == 17
+
+
+@pytest.mark.asyncio
+async def test_structure_edits_refresh_the_progress(engine):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 1, 4)
+        user = PublicUser(**seed_user(db_session).model_dump())
+        unpublished = published_activities(db_session, course_id, False)
+
+        await add_activity_to_trail(Mock(spec=Request), user, unpublished[0].activity_uuid, db_session)
+        progress = get_course_progress(user.id, course_id, db_session)
+        assert (progress.completed_count, progress.total_count) == (0, 2)  # type: ignore
+
+        unpublished[0].published = True
+        db_session.add(unpublished[0])
+        refresh_course_progress(course_id, db_session)
+        db_session.commit()
+
+        db_session.refresh(progress)
+        assert (progress.completed_count, progress.total_count) == (1, 3)  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_the_maintained_progress(engine):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 2, 3)
+        user = PublicUser(**seed_user(db_session).model_dump())
+        for activity in db_session.exec(select(Activity)).all()[:4]:
+            await add_activity_to_trail(Mock(spec=Request), user, activity.activity_uuid, db_session)
+
+        def snapshot():
+            return [
+                (p.user_id, p.course_id, p.completed_count, p.total_count)
+                for p in db_session.exec(select(CourseProgress)).all()
+            ]
+
+        maintained = snapshot()
+        course = db_session.get(Course, course_id)
+        assert rebuild_course_progress(db_session, course.id) == 1  # type: ignore
+        assert snapshot() == maintained == [(user.id, course_id, 3, 4)]
@@ -0,0 +1,75 @@
+import pytest
+from sqlmodel import Session, select
+from src.db.courses.chapter_activities import ChapterActivity
+from src.db.trail_runs import TrailRun
+from src.db.trail_steps import TrailStep
+from src.db.trails import Trail
+from src.services.trail.progress import rebuild_course_progress
+from src.services.trail.trail import build_trail_read
+from src.tests.utils.courses_data_for_tests import count_queries, open_session, seed_course, seed_user
+
+
+def seed_trail(db_session: Session, course_id: int, user_id: int, completed_steps: int) -> Trail:
+    trail = Trail(org_id=1, user_id=user_id, trail_uuid="trail_test")
+    db_session.add(trail)
+    db_session.commit()
+
+    trail_run = TrailRun(
+        trail_id=trail.id,  # type: ignore
+        course_id=course_id,
+        org_id=1,
+        user_id=user_id,
+        creation_date="",
+        update_date="",
+    )
+    db_session.add(trail_run)
+    db_session.commit()
+
+    chapter_activities = db_session.exec(
+        select(ChapterActivity).where(ChapterActivity.course_id == course_id)
+    ).all()
+    for chapter_activity in chapter_activities[:completed_steps]:
+        db_session.add(
+            TrailStep(
+                complete=True,
+                teacher_verified=False,
+                grade="",
+                trailrun_id=trail_run.id,  # type: ignore
+                trail_id=trail.id,  # type: ignore
+                activity_id=chapter_activity.activity_id,
+                course_id=course_id,
+                org_id=1,
+                user_id=user_id,
+                creation_date="",
+                update_date="",
+            )
+        )
+    db_session.commit()
+    rebuild_course_progress(db_session)
+    db_session.refresh(trail)
+    return trail
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("completed_steps", [1, 30])
+async def test_build_trail_read_query_count_is_constant(engine, session_mode, completed_steps):
+    with Session(engine) as db_session:
+        course_id = seed_course(db_session, 5, 6)
+        user_id = seed_user(db_session).id
+        trail = seed_trail(db_session, course_id, user_id, completed_steps)  # type: ignore
+
+    async with open_session(engine, session_mode) as (db_session, session_engine):
+        with count_queries(session_engine) as queries:
+            trail_read = await build_trail_read(trail, db_session, user_id=user_id)
+
+    # runs, steps, courses, progress
+    assert len(queries) == 4
+    assert len(trail_read.runs) == 1
+
+    trail_run = trail_read.runs[0]
+    assert trail_run.course["course_uuid"] == "course_test"
+    # Every other activity is unpublished
+    assert trail_run.course_total_steps == 15
+    assert trail_run.course_completed_steps == (completed_steps + 1) // 2
+    assert len(trail_run.steps) == completed_steps
+    assert all(step.data["course"].id == course_id for step in trail_run.steps)
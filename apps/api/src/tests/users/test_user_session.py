@@ -0,0 +1,105 @@
+import pytest
+from unittest.mock import Mock
+from fastapi import Request
+from sqlmodel import Session
+from src.core import cache as core_cache
+from src.core.cache import SharedVersions
+from src.db.organizations import Organization
+from src.db.roles import Role
+from src.db.user_organizations import UserOrganization
+from src.db.users import PublicUser
+from src.services.users.cache import invalidate_user_session_cache
+from src.services.users.users import get_user_session
+from src.tests.courses.test_course_meta_cache import FakeRedis
+from src.tests.utils.courses_data_for_tests import count_queries, seed_user
+
+
+def seed_memberships(db_session: Session, user_id: int, orgs_count: int) -> None:
+    for i in range(orgs_count):
+        org = Organization(
+            name=f"Org {i}",
+            slug=f"org{i}",
+            email=f"org{i}@example.com",
+            org_uuid=f"org_{i}",
+        )
+        role = Role(name=f"Role {i}", description=None, role_uuid=f"role_{i}")
+        db_session.add(org)
+        db_session.add(role)
+        db_session.commit()
+
+        db_session.add(
+            UserOrganization(
+                user_id=user_id,
+                org_id=org.id,  # type: ignore
+                role_id=role.id,  # type: ignore
+                creation_date="",
+                update_date="",
+            )
+        )
+        db_session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("orgs_count", [0, 1, 5])
+async def test_user_session_is_built_with_one_query(engine, orgs_count):
+    with Session(engine) as db_session:
+        user = seed_user(db_session)
+        current_user = PublicUser.model_validate(user)
+        seed_memberships(db_session, current_user.id, orgs_count)
+
+    with Session(engine) as db_session:
+        with count_queries(engine) as queries:
+            user_session = await get_user_session(Mock(spec=Request), db_session, current_user)
+
+    assert len(queries) == 1
+    assert user_session.user.user_uuid == "user_learner"
+    assert [role.org.slug for role in user_session.roles] == [f"org{i}" for i in range(orgs_count)]
+    assert [role.role.name for role in user_session.roles] == [f"Role {i}" for i in range(orgs_count)]
+
+
+@pytest.mark.asyncio
+async def test_user_session_is_cached_until_invalidated(engine):
+    with Session(engine) as db_session:
+        user = seed_user(db_session)
+        current_user = PublicUser.model_validate(user)
+        seed_memberships(db_session, current_user.id, 1)
+
+    with Session(engine) as db_session:
+        first = await get_user_session(Mock(spec=Request), db_session, current_user)
+
+        with count_queries(engine) as queries:
+            second = await get_user_session(Mock(spec=Request), db_session, current_user)
+        assert queries == []
+        assert second is first
+
+        invalidate_user_session_cache(current_user.id)
+        with count_queries(engine) as queries:
+            third = await get_user_session(Mock(spec=Request), db_session, current_user)
+        assert len(queries) == 1
+        assert third is not first
+
+
+@pytest.mark.asyncio
+async def test_membership_changes_in_another_worker_invalidate_the_session(engine, monkeypatch):
+    r = FakeRedis()
+    monkeypatch.setattr(core_cache, "get_redis_client", lambda: r)
+    with Session(engine) as db_session:
+        user = seed_user(db_session)
+        current_user = PublicUser.model_validate(user)
+        seed_memberships(db_session, current_user.id, 1)
+
+    with Session(engine) as db_session:
+        first = await get_user_session(Mock(spec=Request), db_session, current_user)
+        assert await get_user_session(Mock(spec=Request), db_session, current_user) is first
+
+        # Another worker changes the membership, sharing the versions in Redis
+        SharedVersions("user_sessions", ttl=60).bump(current_user.id)
+        second = await get_user_session(Mock(spec=Request), db_session, current_user)
+        assert second is not first
+
+        # Without Redis the cache is bypassed rather than trusted
+        r.down = True
+        with count_queries(engine) as queries:
+            await get_user_session(Mock(spec=Request), db_session, current_user)
+            await get_user_session(Mock(spec=Request), db_session, current_user)
+        assert len(queries) == 2
@@ -0,0 +1,131 @@
+import io
+from unittest.mock import Mock
+import pytest
+from fastapi import Request, UploadFile
+from sqlmodel import Session, select
+from src.db.organizations import Organization
+from src.db.usergroup_resources import UserGroupResource
+from src.db.usergroup_user import UserGroupUser
+from src.db.usergroups import UserGroup
+from src.db.users import InternalUser
+from src.services.users.usergroups import (
+    _insert_ignoring_duplicates,
+    add_resources_to_usergroup,
+    add_users_to_usergroup,
+    read_users_from_csv,
+    remove_resources_from_usergroup,
+    remove_users_from_usergroup,
+)
+from src.tests.utils.courses_data_for_tests import count_queries, seed_user
+
+
+def seed_usergroups(db_session: Session) -> list[int]:
+    db_session.add(Organization(id=1, name="Org", slug="org", email="org@example.com", org_uuid="org_test"))
+    for usergroup_id in (1, 2):
+        db_session.add(
+            UserGroup(id=usergroup_id, name="Cohort", description="", org_id=1, usergroup_uuid=f"usergroup_{usergroup_id}")
+        )
+    db_session.commit()
+    return [seed_user(db_session, f"learner{index}").id for index in range(4)]  # type: ignore
+
+
+def member_ids(db_session: Session, usergroup_id: int = 1) -> list[int]:
+    return sorted(
+        db_session.exec(select(UserGroupUser.user_id).where(UserGroupUser.usergroup_id == usergroup_id)).all()
+    )
+
+
+@pytest.mark.asyncio
+async def test_users_are_added_in_one_transaction(engine):
+    with Session(engine) as db_session:
+        user_ids = seed_usergroups(db_session)
+        await add_users_to_usergroup(Mock(spec=Request), db_session, InternalUser(id=0), 1, str(user_ids[0]))
+
+        with count_queries(engine) as queries:
+            result = await add_users_to_usergroup(
+                Mock(spec=Request), db_session, InternalUser(id=0), 1, [*user_ids, 999, "abc", user_ids[1]]
+            )
+
+        assert result.results == {
+            str(user_ids[0]): "already_member",
+            str(user_ids[1]): "added",
+            str(user_ids[2]): "added",
+            str(user_ids[3]): "added",
+            "999": "user_not_found",
+            "abc": "invalid_id",
+        }
+        assert (result.succeeded, result.failed) == (3, 3)
+        # Usergroup, users, members, then a single INSERT
+        inserts = [query for query in queries if query.lstrip().upper().startswith("INSERT")]
+        assert len(queries) == 4 and len(inserts) == 1
+        assert member_ids(db_session) == sorted(user_ids)
+
+
+@pytest.mark.asyncio
+async def test_users_are_removed_from_their_usergroup_only(engine):
+    with Session(engine) as db_session:
+        user_ids = seed_usergroups(db_session)
+        await add_users_to_usergroup(Mock(spec=Request), db_session, InternalUser(id=0), 1, user_ids[:2])
+        await add_users_to_usergroup(Mock(spec=Request), db_session, InternalUser(id=0), 2, user_ids[:2])
+
+        result = await remove_users_from_usergroup(
+            Mock(spec=Request), db_session, InternalUser(id=0), 1, f"{user_ids[0]},{user_ids[2]}"
+        )
+        assert result.results == {str(user_ids[0]): "removed", str(user_ids[2]): "not_member"}
+        assert member_ids(db_session) == [user_ids[1]]
+        assert member_ids(db_session, 2) == user_ids[:2]
+
+
+@pytest.mark.asyncio
+async def test_csv_uploads_accept_ids_or_emails(engine):
+    with Session(engine) as db_session:
+        user_ids = seed_usergroups(db_session)
+
+        upload = UploadFile(io.BytesIO(b"name,email\nA,learner0@example.com\nB,nobody@example.com\n"))
+        keys, by = await read_users_from_csv(upload)
+        result = await add_users_to_usergroup(Mock(spec=Request), db_session, InternalUser(id=0), 1, keys, by)
+        assert result.results == {"learner0@example.com": "added", "nobody@example.com": "user_not_found"}
+
+        upload = UploadFile(io.BytesIO(f"{user_ids[1]}\n{user_ids[2]}\n".encode()))
+        assert await read_users_from_csv(upload) == ([str(user_ids[1]), str(user_ids[2])], "id")
+
+
+@pytest.mark.asyncio
+async def test_resources_are_linked_and_unlinked_in_bulk(engine):
+    with Session(engine) as db_session:
+        seed_usergroups(db_session)
+        await add_resources_to_usergroup(Mock(spec=Request), db_session, InternalUser(id=0), 2, "course_a")
+
+        result = await add_resources_to_usergroup(
+            Mock(spec=Request), db_session, InternalUser(id=0), 1, ["course_a", "course_b"]
+        )
+        assert result.results == {"course_a": "added", "course_b": "added"}
+        result = await add_resources_to_usergroup(
+            Mock(spec=Request), db_session, InternalUser(id=0), 1, "course_b,course_c"
+        )
+        assert result.results == {"course_b": "already_linked", "course_c": "added"}
+
+        result = await remove_resources_from_usergroup(
+            Mock(spec=Request), db_session, InternalUser(id=0), 1, ["course_a", "course_d"]
+        )
+        assert result.results == {"course_a": "removed", "course_d": "not_linked"}
+        links = db_session.exec(select(UserGroupResource.usergroup_id, UserGroupResource.resource_uuid)).all()
+        assert sorted(links) == [(1, "course_b"), (1, "course_c"), (2, "course_a")]
+
+
+def test_existing_links_are_not_inserted_twice(engine):
+    with Session(engine) as db_session:
+        user_ids = seed_usergroups(db_session)
+        member = {"usergroup_id": 1, "user_id": user_ids[0], "org_id": 1, "creation_date": "", "update_date": ""}
+        resource = {"usergroup_id": 1, "resource_uuid": "course_a", "org_id": 1, "creation_date": "", "update_date": ""}
+        _insert_ignoring_duplicates(db_session, UserGroupUser, [member])
+        _insert_ignoring_duplicates(db_session, UserGroupResource, [resource])
+        db_session.commit()
+
+        # As a concurrent bulk add would: the unique indexes absorb the pairs
+        _insert_ignoring_duplicates(db_session, UserGroupUser, [member, {**member, "user_id": user_ids[1]}])
+        _insert_ignoring_duplicates(db_session, UserGroupResource, [resource])
+        db_session.commit()
+
+        assert member_ids(db_session) == user_ids[:2]
+        assert db_session.exec(select(UserGroupResource.resource_uuid)).all() == ["course_a"]
@@ -0,0 +1,140 @@
+from contextlib import asynccontextmanager, contextmanager
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.db.organizations import Organization
+from src.db.users import User
+from src.db.courses.courses import Course
+from src.db.courses.chapters import Chapter
+from src.db.courses.course_chapters import CourseChapter
+from src.db.courses.activities import Activity, ActivityTypeEnum, ActivitySubTypeEnum
+from src.db.courses.chapter_activities import ChapterActivity
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements sent to the engine inside the block"""
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@asynccontextmanager
+async def open_session(engine, session_mode: str):
+    """
+    Yield (db_session, engine) for the database of the given sync engine, the
+    session being a Session or an AsyncSession depending on session_mode.
+    Queries are to be counted on the yielded engine.
+    """
+    if session_mode == "sync":
+        with Session(engine) as db_session:
+            yield db_session, engine
+        return
+
+    async_engine = create_async_engine(
+        engine.url.set(drivername="sqlite+aiosqlite"),
+    )
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as db_session:
+            yield db_session, async_engine
+    finally:
+        await async_engine.dispose()
+
+
+def seed_course(db_session: Session, chapters_count: int, activities_per_chapter: int) -> int:
+    org = Organization(
+        name="Test Org",
+        slug="testorg",
+        email="test@example.com",
+        org_uuid="org_test",
+    )
+    db_session.add(org)
+    db_session.commit()
+
+    course = Course(
+        name="Course",
+        description=None,
+        about=None,
+        learnings=None,
+        tags=None,
+        public=True,
+        open_to_contributors=False,
+        org_id=org.id,  # type: ignore
+        course_uuid="course_test",
+    )
+    db_session.add(course)
+    db_session.commit()
+
+    for chapter_index in range(chapters_count):
+        chapter = Chapter(
+            name=f"Chapter {chapter_index}",
+            org_id=org.id,  # type: ignore
+            course_id=course.id,  # type: ignore
+            chapter_uuid=f"chapter_{chapter_index}",
+        )
+        db_session.add(chapter)
+        db_session.commit()
+
+        # Chapters are stored in reverse order to check CourseChapter ordering
+        db_session.add(
+            CourseChapter(
+                order=chapters_count - chapter_index,
+                course_id=course.id,  # type: ignore
+                chapter_id=chapter.id,  # type: ignore
+                org_id=org.id,  # type: ignore
+                creation_date="",
+                update_date="",
+            )
+        )
+
+        for activity_index in range(activities_per_chapter):
+            activity = Activity(
+                name=f"Activity {chapter_index}.{activity_index}",
+                activity_type=ActivityTypeEnum.TYPE_DYNAMIC,
+                activity_sub_type=ActivitySubTypeEnum.SUBTYPE_DYNAMIC_PAGE,
+                published=activity_index % 2 == 0,
+                org_id=org.id,  # type: ignore
+                course_id=course.id,  # type: ignore
+                activity_uuid=f"activity_{chapter_index}_{activity_index}",
+            )
+            db_session.add(activity)
+            db_session.commit()
+
+            db_session.add(
+                ChapterActivity(
+                    order=activities_per_chapter - activity_index,
+                    chapter_id=chapter.id,  # type: ignore
+                    activity_id=activity.id,  # type: ignore
+                    course_id=course.id,  # type: ignore
+                    org_id=org.id,  # type: ignore
+                    creation_date="",
+                    update_date="",
+                )
+            )
+        db_session.commit()
+
+    return course.id  # type: ignore
+
+
+def seed_user(db_session: Session, username: str = "learner") -> User:
+    user = User(
+        username=username,
+        first_name="Test",
+        last_name="User",
+        email=f"{username}@example.com",
+        user_uuid=f"user_{username}",
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
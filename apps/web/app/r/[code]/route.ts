@@ -7,6 +7,16 @@ import { getAPIUrl } from '@services/config/config'
  *
  * Sets a cookie so signup/checkout can attribute the user.
  */
+/**
+ * Visitor address as seen by our own proxy: the right-most X-Forwarded-For
+ * entry, the ones before it being set by the client.
+ */
+function clientIp(req: NextRequest): string {
+  const forwardedFor = req.headers.get('x-forwarded-for') || ''
+  const hops = forwardedFor.split(',').map((hop) => hop.trim()).filter(Boolean)
+  return hops[hops.length - 1] || req.headers.get('x-real-ip') || ''
+}
+
 export async function GET(
   req: NextRequest,
   { params }: { params: Promise<{ code: string }> }
@@ -23,7 +33,14 @@ export async function GET(
       const landing = new URL(returnTo, req.url).toString()
       await fetch(`${getAPIUrl()}affiliates/track`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: {
+          'Content-Type': 'application/json',
+          // Clicks are deduplicated per visitor. The API only trusts this
+          // address along with the internal key.
+          'X-Nexo-Client-IP': clientIp(req),
+          CloudInternalKey: process.env.CLOUD_INTERNAL_KEY || '',
+          'User-Agent': req.headers.get('user-agent') || '',
+        },
         body: JSON.stringify({ org_id: orgIdInt, code, landing_url: landing }),
       })
     }
@@ -35,6 +35,8 @@ function CollectionThumbnail(props: PropsType) {
   const org = useOrg() as any
   const collectionId = removeCollectionPrefix(props.collection.collection_uuid)
   const courses = props.collection.courses || []
+  // Only the first courses are listed with the collection
+  const coursesCount = props.collection.courses_count ?? courses.length
 
   return (
     <div 
@@ -98,7 +100,7 @@ function CollectionThumbnail(props: PropsType) {
           <div className="flex items-center gap-1.5 text-gray-500">
             <BookCopy size={12} />
             <span className="text-[10px] font-bold uppercase tracking-wider">
-              {courses.length === 1 ? t('courses.course_count', { count: 1 }) : t('courses.course_count_plural', { count: courses.length })}
+              {coursesCount === 1 ? t('courses.course_count', { count: 1 }) : t('courses.course_count_plural', { count: coursesCount })}
             </span>
           </div>
           
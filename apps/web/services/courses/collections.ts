@@ -44,15 +44,25 @@ export async function getCollectionById(
   return res
 }
 
+// Largest page of collections served by the API
+const COLLECTIONS_PAGE_LIMIT = 50
+
+// All the collections of an org, fetched page by page
 export async function getOrgCollections(
   org_id: string,
   access_token?: string,
   next?: any
 ) {
-  const result: any = await fetch(
-    `${getAPIUrl()}collections/org/${org_id}/page/1/limit/10`,
-    RequestBodyWithAuthHeader('GET', null, next, access_token)
-  )
-  const res = await errorHandling(result)
-  return res
+  const collections: any[] = []
+  for (let page = 1; ; page++) {
+    const result: any = await fetch(
+      `${getAPIUrl()}collections/org/${org_id}/page/${page}/limit/${COLLECTIONS_PAGE_LIMIT}`,
+      RequestBodyWithAuthHeader('GET', null, next, access_token)
+    )
+    const res = await errorHandling(result)
+    collections.push(...res)
+    if (res.length < COLLECTIONS_PAGE_LIMIT) {
+      return collections
+    }
+  }
 }